@@ -11,54 +11,245 @@ FONCTIONNEMENT :
     3. Aucun appel IA nécessaire si le gabarit existe
 
 ARCHITECTURE :
-    - Cache en mémoire (dict)
-    - Persistence sur disque (JSON) pour survie aux redémarrages
+    - Cache en mémoire (LRU borné, TTL par entrée)
+    - Persistence SQLite (WAL) partagée par tous les workers uvicorn
+    - Écritures différées (write-behind) regroupées par lot, hors chemin de requête
+    - Compaction périodique (entrées expirées, éviction LRU, checkpoint WAL)
     - Invalidation intelligente
-    - Métriques de performance
+    - Métriques de performance (dont latence p50/p99 des lectures)
 """
 
+import atexit
 import json
 import os
-from typing import Dict, Optional, Any, List
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Any, List, Tuple
 from pathlib import Path
 import logging
-from datetime import datetime
 import re
 
 logger = logging.getLogger(__name__)
 
+# Nombre de latences de lecture conservées pour les percentiles
+LATENCY_WINDOW = 10_000
+# Taille des lots de clés par requête SQLite (limite de paramètres)
+STORE_BATCH_SIZE = 500
+
+
+class GabaritStore:
+    """
+    Store SQLite des gabarits, partagé par tous les workers uvicorn.
+
+    Mode WAL : lectures concurrentes sans verrou, écritures par lot dans une
+    transaction (busy_timeout pour les écritures simultanées de plusieurs
+    workers). Une connexion par processus.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Une connexion par processus (jamais partagée au travers d'un fork)
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS gabarits ("
+                " key TEXT PRIMARY KEY,"
+                " gabarit TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS gabarits_lru ON gabarits (accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+            # "key REGEXP pattern" appelle regexp(pattern, key) (sémantique re.match)
+            conn.create_function(
+                "REGEXP", 2, lambda pattern, key: re.match(pattern, key) is not None, deterministic=True
+            )
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT gabarit, expires_at FROM gabarits WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._connection().execute("SELECT key FROM gabarits")]
+
+    def write_batch(
+        self,
+        entries: Dict[str, Tuple[str, Optional[float]]],
+        touched: Dict[str, float],
+        counters: Dict[str, float]
+    ):
+        """Écrit un lot (gabarits, dates de lecture, compteurs) en une transaction"""
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO gabarits (key, gabarit, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    [(key, gabarit, expires_at, now) for key, (gabarit, expires_at) in entries.items()]
+                )
+                conn.executemany(
+                    "UPDATE gabarits SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+                    [(accessed_at, key) for key, accessed_at in touched.items()]
+                )
+                conn.executemany(
+                    "INSERT INTO counters (name, value) VALUES (?, ?)"
+                    " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    list(counters.items())
+                )
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+
+    def count_absent(self, keys: List[str]) -> int:
+        """Nombre de clés qui ne sont pas (encore) dans le store"""
+        present = 0
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), STORE_BATCH_SIZE):
+                chunk = keys[start:start + STORE_BATCH_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                present += conn.execute(
+                    f"SELECT COUNT(*) FROM gabarits WHERE key IN ({placeholders})", chunk
+                ).fetchone()[0]
+        return len(keys) - present
+
+    def delete_matching(self, pattern: str) -> int:
+        """Supprime les clés correspondant au pattern regex, sans les charger en mémoire"""
+        with self._lock:
+            return self._connection().execute(
+                "DELETE FROM gabarits WHERE key REGEXP ?", (pattern,)
+            ).rowcount
+
+    def delete(self, keys: List[str]):
+        with self._lock:
+            self._connection().executemany("DELETE FROM gabarits WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM gabarits")
+            conn.execute("DELETE FROM counters")
+
+    def compact(self, max_entries: int) -> int:
+        """Supprime les entrées expirées et les moins récemment lues au-delà de max_entries"""
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute(
+                "DELETE FROM gabarits WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM gabarits").fetchone()[0]
+            if count > max_entries:
+                removed += conn.execute(
+                    "DELETE FROM gabarits WHERE key IN ("
+                    " SELECT key FROM gabarits ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - max_entries,)
+                ).rowcount
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def counters(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._connection().execute("SELECT name, value FROM counters"))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM gabarits").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
 
 class CacheManager:
     """
     Gestionnaire de cache pour les gabarits d'énoncés.
     
     Responsabilités :
-        - Stocker et récupérer des gabarits
-        - Persister sur disque
-        - Suivre les métriques (hit/miss rate)
+        - Stocker et récupérer des gabarits (LRU mémoire + SQLite partagé)
+        - Persister sur disque en différé, par lots
+        - Suivre les métriques (hit/miss rate, latence des lectures)
         - Invalider le cache si nécessaire
     """
     
-    def __init__(self, cache_dir: str = "/app/backend/cache"):
+    def __init__(
+        self,
+        cache_dir: str = "/app/backend/cache",
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        flush_interval: Optional[float] = None,
+        flush_batch_size: Optional[int] = None,
+        compact_interval: Optional[float] = None
+    ):
         """
         Initialise le gestionnaire de cache.
         
         Args:
             cache_dir: Répertoire de stockage du cache sur disque
+            max_entries: Nombre maximal de gabarits (GABARIT_CACHE_MAX_ENTRIES, défaut 10000)
+            ttl_seconds: Durée de vie par défaut d'un gabarit, 0 = illimitée
+                (GABARIT_CACHE_TTL_SECONDS, défaut 0)
+            flush_interval: Délai max avant écriture disque en secondes
+                (GABARIT_CACHE_FLUSH_INTERVAL, défaut 2)
+            flush_batch_size: Écritures en attente déclenchant un flush immédiat
+                (GABARIT_CACHE_FLUSH_BATCH, défaut 100)
+            compact_interval: Période de compaction en secondes
+                (GABARIT_CACHE_COMPACT_INTERVAL, défaut 300)
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        # Cache en mémoire : {cache_key: gabarit}
-        self._cache: Dict[str, str] = {}
+        self.max_entries = max_entries or int(os.environ.get("GABARIT_CACHE_MAX_ENTRIES", "10000"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.environ.get("GABARIT_CACHE_TTL_SECONDS", "0")
+        )
+        self.flush_interval = flush_interval or float(os.environ.get("GABARIT_CACHE_FLUSH_INTERVAL", "2"))
+        self.flush_batch_size = flush_batch_size or int(os.environ.get("GABARIT_CACHE_FLUSH_BATCH", "100"))
+        self.compact_interval = compact_interval or float(os.environ.get("GABARIT_CACHE_COMPACT_INTERVAL", "300"))
+        
+        self._store = GabaritStore(str(self.cache_dir / "gabarits_cache.sqlite3"))
+        self._lock = threading.RLock()
         
-        # Métriques
+        # Cache en mémoire (LRU) : {cache_key: (gabarit, expires_at)}
+        self._cache: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        
+        # Écritures différées : gabarits, dates de dernière lecture, compteurs
+        self._pending: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._touched: Dict[str, float] = {}
+        self._pending_counters: Dict[str, float] = {}
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._last_compaction = time.monotonic()
+        
+        # Métriques (session + totaux persistés)
         self._hits = 0
         self._misses = 0
         self._total_cost_saved = 0.0  # En tokens économisés
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
         
-        # Charger le cache depuis le disque
+        # Charger les compteurs persistés (et migrer l'ancien fichier JSON)
         self._load_from_disk()
+        atexit.register(self.close)
     
     def get(self, cache_key: str) -> Optional[str]:
         """
@@ -70,31 +261,53 @@ class CacheManager:
         Returns:
             Le gabarit si trouvé, None sinon
         """
-        gabarit = self._cache.get(cache_key)
+        start = time.perf_counter()
+        gabarit = self._lookup(cache_key)
+        
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+            if gabarit:
+                self._hits += 1
+                self._total_cost_saved += self._estimate_tokens(gabarit)
+                self._touched[cache_key] = time.time()
+                self._count("hits", 1)
+                self._count("total_cost_saved", self._estimate_tokens(gabarit))
+            else:
+                self._misses += 1
+                self._count("misses", 1)
         
         if gabarit:
-            self._hits += 1
-            self._total_cost_saved += self._estimate_tokens(gabarit)
             logger.info(f"Cache HIT: {cache_key}")
             return gabarit
         else:
-            self._misses += 1
             logger.info(f"Cache MISS: {cache_key}")
             return None
     
-    def set(self, cache_key: str, gabarit: str):
+    def set(self, cache_key: str, gabarit: str, ttl_seconds: Optional[float] = None):
         """
         Stocke un gabarit dans le cache.
         
+        L'écriture disque est différée : elle part avec le prochain lot
+        (au plus flush_interval secondes plus tard).
+        
         Args:
             cache_key: Clé de cache unique
             gabarit: Gabarit d'énoncé avec placeholders
+            ttl_seconds: Durée de vie de l'entrée (défaut : ttl_seconds du cache)
         """
-        self._cache[cache_key] = gabarit
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        entry = (gabarit, time.time() + ttl if ttl else None)
+        
+        with self._lock:
+            self._remember(cache_key, entry)
+            self._pending[cache_key] = entry
+            pending = len(self._pending)
         logger.info(f"Cache SET: {cache_key}")
         
-        # Persister sur disque
-        self._save_to_disk()
+        # Persister sur disque (en différé, par le thread de write-behind)
+        self._ensure_flusher()
+        if pending >= self.flush_batch_size:
+            self._wakeup.set()
     
     def has(self, cache_key: str) -> bool:
         """
@@ -106,17 +319,24 @@ class CacheManager:
         Returns:
             True si le gabarit existe
         """
-        return cache_key in self._cache
+        return self._lookup(cache_key) is not None
     
     def get_metrics(self) -> Dict[str, Any]:
         """
         Retourne les métriques de performance du cache.
         
         Returns:
-            Dict contenant hits, misses, hit_rate, tokens_saved
+            Dict contenant hits, misses, hit_rate, tokens_saved,
+            latences de lecture p50/p99 (ms) et écritures en attente
         """
-        total = self._hits + self._misses
-        hit_rate = (self._hits / total * 100) if total > 0 else 0.0
+        with self._lock:
+            total = self._hits + self._misses
+            hit_rate = (self._hits / total * 100) if total > 0 else 0.0
+            latencies = sorted(self._latencies)
+            pending = len(self._pending)
+            pending_keys = list(self._pending)
+            memory_entries = len(self._cache)
+        cache_size = self._store.count() + self._store.count_absent(pending_keys)
         
         return {
             "hits": self._hits,
@@ -125,16 +345,25 @@ class CacheManager:
             "hit_rate_percent": round(hit_rate, 2),
             "estimated_tokens_saved": self._total_cost_saved,
             "estimated_cost_saved_usd": round(self._total_cost_saved * 0.000002, 4),  # ~$0.002 per 1K tokens
-            "cache_size": len(self._cache)
+            "cache_size": cache_size,
+            "memory_entries": memory_entries,
+            "pending_writes": pending,
+            "p50_lookup_ms": self._percentile_ms(latencies, 50),
+            "p99_lookup_ms": self._percentile_ms(latencies, 99)
         }
     
     def clear(self):
         """Vide complètement le cache."""
-        self._cache.clear()
-        self._hits = 0
-        self._misses = 0
-        self._total_cost_saved = 0.0
-        self._save_to_disk()
+        with self._lock:
+            self._cache.clear()
+            self._pending.clear()
+            self._touched.clear()
+            self._pending_counters.clear()
+            self._latencies.clear()
+            self._hits = 0
+            self._misses = 0
+            self._total_cost_saved = 0.0
+            self._store.clear()
         logger.warning("Cache cleared")
     
     def invalidate_pattern(self, pattern: str):
@@ -147,17 +376,18 @@ class CacheManager:
         Example:
             >>> cache.invalidate_pattern("symetrie_axiale.*")
         """
-        keys_to_remove = [
-            key for key in self._cache.keys()
-            if re.match(pattern, key)
-        ]
+        self.flush()
         
-        for key in keys_to_remove:
-            del self._cache[key]
+        with self._lock:
+            # Mémoire bornée : parcours direct ; disque : filtrage dans SQLite
+            memory_keys = [key for key in self._cache if re.match(pattern, key)]
+            for key in memory_keys:
+                self._cache.pop(key, None)
+                self._touched.pop(key, None)
+            removed = self._store.delete_matching(pattern)
         
-        if keys_to_remove:
-            self._save_to_disk()
-            logger.info(f"Invalidated {len(keys_to_remove)} cache entries matching '{pattern}'")
+        if removed or memory_keys:
+            logger.info(f"Invalidated {max(removed, len(memory_keys))} cache entries matching '{pattern}'")
     
     def interpolate(self, gabarit: str, values: Dict[str, Any]) -> str:
         """
@@ -201,46 +431,135 @@ class CacheManager:
         """
         return re.findall(r'\{([^}]+)\}', gabarit)
     
-    def _load_from_disk(self):
-        """Charge le cache depuis le fichier JSON sur disque."""
-        cache_file = self.cache_dir / "gabarits_cache.json"
+    def flush(self):
+        """Écrit sur disque les gabarits, lectures et compteurs en attente (un lot)"""
+        with self._lock:
+            if not (self._pending or self._touched or self._pending_counters):
+                return
+            entries, self._pending = self._pending, {}
+            touched, self._touched = self._touched, {}
+            counters, self._pending_counters = self._pending_counters, {}
         
-        if not cache_file.exists():
-            logger.info("No cache file found, starting with empty cache")
-            return
+        try:
+            self._store.write_batch(entries, touched, counters)
+            logger.debug(f"Cache flushed: {len(entries)} entries")
+        except Exception as e:
+            logger.error(f"Failed to save cache: {e}")
+            # Remettre le lot en attente (les écritures plus récentes priment)
+            with self._lock:
+                self._pending = {**entries, **self._pending}
+    
+    def compact(self):
+        """Purge les entrées expirées, applique la borne LRU et tronque le journal WAL."""
+        self.flush()
+        try:
+            removed = self._store.compact(self.max_entries)
+            self._last_compaction = time.monotonic()
+            if removed:
+                logger.info(f"Cache compacted: {removed} entries removed")
+        except Exception as e:
+            logger.error(f"Failed to compact cache: {e}")
+    
+    def close(self):
+        """Arrête le flush en arrière-plan et écrit les dernières entrées."""
+        self._stop.set()
+        self._wakeup.set()
+        self.flush()
+        self._store.close()
+    
+    def _lookup(self, cache_key: str) -> Optional[str]:
+        """Mémoire d'abord, puis SQLite (entrées écrites par les autres workers)"""
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None:
+                if entry[1] is not None and entry[1] <= now:
+                    del self._cache[cache_key]
+                    return None
+                self._cache.move_to_end(cache_key)
+                return entry[0]
         
         try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self._cache = data.get("cache", {})
-                self._hits = data.get("hits", 0)
-                self._misses = data.get("misses", 0)
-                self._total_cost_saved = data.get("total_cost_saved", 0.0)
-            
-            logger.info(f"Cache loaded: {len(self._cache)} entries")
+            entry = self._store.get(cache_key)
         except Exception as e:
-            logger.error(f"Failed to load cache: {e}")
-            self._cache = {}
+            logger.error(f"Failed to read cache: {e}")
+            return None
+        
+        if entry is None or (entry[1] is not None and entry[1] <= now):
+            return None
+        with self._lock:
+            self._remember(cache_key, entry)
+        return entry[0]
+    
+    def _remember(self, cache_key: str, entry: Tuple[str, Optional[float]]):
+        """Ajoute une entrée au LRU mémoire (appelé sous self._lock)"""
+        self._cache[cache_key] = entry
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
     
-    def _save_to_disk(self):
-        """Sauvegarde le cache dans un fichier JSON sur disque."""
-        cache_file = self.cache_dir / "gabarits_cache.json"
+    def _count(self, name: str, delta: float):
+        """Incrémente un compteur persisté au prochain flush (appelé sous self._lock)"""
+        self._pending_counters[name] = self._pending_counters.get(name, 0) + delta
+    
+    def _ensure_flusher(self):
+        """Démarre le thread de write-behind (une fois par processus)"""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._stop.clear()
+                self._flusher = threading.Thread(target=self._run_flusher, name="gabarit-cache-flush", daemon=True)
+                self._flusher.start()
+    
+    def _run_flusher(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            if time.monotonic() - self._last_compaction >= self.compact_interval:
+                self.compact()
+    
+    def _load_from_disk(self):
+        """
+        Charge les compteurs persistés.
+        
+        Si le store SQLite est vide, il est amorcé depuis l'ancien fichier
+        gabarits_cache.json (gabarits livrés avec le dépôt), laissé en place.
+        """
+        legacy_file = self.cache_dir / "gabarits_cache.json"
         
         try:
-            data = {
-                "cache": self._cache,
-                "hits": self._hits,
-                "misses": self._misses,
-                "total_cost_saved": self._total_cost_saved,
-                "last_updated": datetime.now().isoformat()
-            }
+            if legacy_file.exists() and self._store.count() == 0:
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                counters = {} if self._store.counters() else {
+                    "hits": data.get("hits", 0),
+                    "misses": data.get("misses", 0),
+                    "total_cost_saved": data.get("total_cost_saved", 0.0)
+                }
+                self._store.write_batch(
+                    {key: (gabarit, None) for key, gabarit in data.get("cache", {}).items()},
+                    {},
+                    counters
+                )
+                logger.info(f"Cache seeded from {legacy_file.name}: {len(data.get('cache', {}))} entries")
             
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            counters = self._store.counters()
+            self._hits = int(counters.get("hits", 0))
+            self._misses = int(counters.get("misses", 0))
+            self._total_cost_saved = counters.get("total_cost_saved", 0.0)
             
-            logger.debug(f"Cache saved: {len(self._cache)} entries")
+            logger.info(f"Cache loaded: {self._store.count()} entries")
         except Exception as e:
-            logger.error(f"Failed to save cache: {e}")
+            logger.error(f"Failed to load cache: {e}")
+    
+    @staticmethod
+    def _percentile_ms(sorted_latencies: List[float], percentile: int) -> Optional[float]:
+        if not sorted_latencies:
+            return None
+        index = min(len(sorted_latencies) - 1, int(len(sorted_latencies) * percentile / 100))
+        return round(sorted_latencies[index] * 1000, 4)
     
     def _estimate_tokens(self, text: str) -> int:
         """
@@ -258,5 +577,6 @@ cache_manager = CacheManager()
 # Export des symboles publics
 __all__ = [
     "CacheManager",
+    "GabaritStore",
     "cache_manager"
 ]
@@ -6,7 +6,10 @@ from .loader import (
     load_curriculum_6e,
     get_curriculum_index,
     get_chapter_by_official_code,
-    get_chapters_by_backend_name
+    get_chapters_by_backend_name,
+    build_curriculum_index,
+    install_curriculum_index,
+    get_curriculum_version
 )
 
 __all__ = [
@@ -15,5 +18,8 @@ __all__ = [
     "load_curriculum_6e",
     "get_curriculum_index",
     "get_chapter_by_official_code",
-    "get_chapters_by_backend_name"
+    "get_chapters_by_backend_name",
+    "build_curriculum_index",
+    "install_curriculum_index",
+    "get_curriculum_version"
 ]
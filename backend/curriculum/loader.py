@@ -16,7 +16,8 @@ Usage:
 import json
 import os
 import logging
-from typing import Dict, List, Optional
+import threading
+from typing import Any, Dict, Iterable, List, Optional
 from pydantic import BaseModel, Field
 from functools import lru_cache
 
@@ -75,10 +76,12 @@ class CurriculumIndex(BaseModel):
         by_official_code: Dictionnaire indexé par code officiel
         by_backend_chapter: Dictionnaire indexé par nom de chapitre backend
         by_domaine: Dictionnaire indexé par domaine
+        version: Version MongoDB du snapshot (None = chargé depuis le fichier JSON)
     """
     by_official_code: Dict[str, CurriculumChapter] = Field(default_factory=dict)
     by_backend_chapter: Dict[str, List[CurriculumChapter]] = Field(default_factory=dict)
     by_domaine: Dict[str, List[CurriculumChapter]] = Field(default_factory=dict)
+    version: Optional[int] = None
     
     def get_all_codes(self) -> List[str]:
         """Retourne tous les codes officiels."""
@@ -97,8 +100,9 @@ class CurriculumIndex(BaseModel):
         return [ch for ch in self.by_official_code.values() if ch.is_active()]
 
 
-# Singleton pour l'index du curriculum
+# Singleton pour l'index du curriculum (remplacé en une affectation, jamais modifié en place)
 _curriculum_index: Optional[CurriculumIndex] = None
+_curriculum_index_lock = threading.Lock()
 
 
 def _load_curriculum_from_json(filepath: str) -> List[CurriculumChapter]:
@@ -121,8 +125,13 @@ def _load_curriculum_from_json(filepath: str) -> List[CurriculumChapter]:
     with open(filepath, "r", encoding="utf-8") as f:
         data = json.load(f)
     
+    return _parse_chapters(data.get("chapitres", []))
+
+
+def _parse_chapters(chapters_data: Iterable[Dict[str, Any]]) -> List[CurriculumChapter]:
+    """Valide les chapitres (fichier JSON ou documents MongoDB), ignore les invalides"""
     chapters = []
-    for chapter_data in data.get("chapitres", []):
+    for chapter_data in chapters_data:
         try:
             chapter = CurriculumChapter(**chapter_data)
             chapters.append(chapter)
@@ -181,13 +190,62 @@ def load_curriculum_6e() -> CurriculumIndex:
     logger.info(f"Chargement du curriculum 6e depuis {CURRICULUM_6E_PATH}")
     
     chapters = _load_curriculum_from_json(CURRICULUM_6E_PATH)
-    _curriculum_index = _build_index(chapters)
+    index = _build_index(chapters)
+    
+    with _curriculum_index_lock:
+        # Un snapshot MongoDB installé entre-temps reste prioritaire
+        if _curriculum_index is None:
+            _curriculum_index = index
     
     logger.info(f"Curriculum 6e chargé: {len(chapters)} chapitres indexés")
     
     return _curriculum_index
 
 
+def build_curriculum_index(chapters_data: Iterable[Dict[str, Any]], version: Optional[int] = None) -> CurriculumIndex:
+    """
+    Construit un index à partir de documents chapitres (snapshot MongoDB).
+    
+    Args:
+        chapters_data: Documents au format de curriculum_6e.json
+        version: Version du snapshot
+        
+    Returns:
+        Index construit, non installé
+    """
+    index = _build_index(_parse_chapters(chapters_data))
+    index.version = version
+    return index
+
+
+def install_curriculum_index(index: CurriculumIndex) -> bool:
+    """
+    Remplace l'index servi (affectation atomique).
+    
+    Un index versionné n'est jamais remplacé par une version plus ancienne,
+    ni par un index sans version (fichier JSON).
+    
+    Returns:
+        True si l'index a été installé
+    """
+    global _curriculum_index
+    
+    with _curriculum_index_lock:
+        current = _curriculum_index
+        if current is not None and current.version is not None and (index.version is None or index.version < current.version):
+            return False
+        _curriculum_index = index
+    
+    logger.info(f"Index curriculum installé (v{index.version}, {len(index.by_official_code)} chapitres)")
+    return True
+
+
+def get_curriculum_version() -> Optional[int]:
+    """Version du snapshot servi (None = fichier JSON ou pas encore chargé)"""
+    index = _curriculum_index
+    return index.version if index is not None else None
+
+
 def get_curriculum_index() -> CurriculumIndex:
     """
     Retourne l'index du curriculum (singleton).
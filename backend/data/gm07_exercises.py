@@ -14,13 +14,16 @@ IMPORTANT: Tout le contenu est en HTML PUR.
 - Pas de LaTeX ($...$)
 - Utiliser <strong>, <em>, ×, ÷, etc.
 
-⚠️ FICHIER GÉNÉRÉ AUTOMATIQUEMENT PAR L'ADMIN
-   Ne pas modifier manuellement - utiliser /admin/curriculum
+⚠️ FICHIER GÉNÉRÉ PAR scripts/export_pilot_exercises.py
+   Source de vérité: MongoDB (admin_exercises), modifiée via /admin/curriculum.
+   Ce fichier sert de jeu initial et de repli hors MongoDB.
 """
 
 from typing import List, Dict, Any, Optional
 import random
 
+from services.exercise_pool_index import exercise_pools
+
 
 # =============================================================================
 # 22 EXERCICES GM07 VALIDÉS - HTML PUR (sans Markdown ni LaTeX)
@@ -345,27 +348,9 @@ def get_gm07_exercises(
         difficulty: "facile", "moyen", "difficile" (None = tous)
     
     Returns:
-        Liste d'exercices filtrés
+        Liste d'exercices filtrés (lecture de l'index précalculé, voir services/exercise_pool_index.py)
     """
-    exercises = GM07_EXERCISES
-    
-    # Filtrer par offer
-    if offer:
-        offer = offer.lower()
-        if offer == "free":
-            exercises = [ex for ex in exercises if ex["offer"] == "free"]
-        elif offer == "pro":
-            pass  # PRO voit tout
-    else:
-        # Par défaut, FREE ne voit que free
-        exercises = [ex for ex in exercises if ex["offer"] == "free"]
-    
-    # Filtrer par difficulté
-    if difficulty:
-        difficulty = difficulty.lower()
-        exercises = [ex for ex in exercises if ex["difficulty"] == difficulty]
-    
-    return exercises
+    return list(exercise_pools.get("6E_GM07").select(offer=offer, difficulty=difficulty))
 
 
 def get_random_gm07_exercise(
@@ -389,10 +374,9 @@ def get_random_gm07_exercise(
     if not available:
         return None
     
-    if seed is not None:
-        random.seed(seed)
-    
-    return random.choice(available)
+    # Générateur propre à l'appel : l'état global de `random` n'est jamais réinitialisé
+    rng = random.Random(seed)
+    return rng.choice(available)
 
 
 def get_gm07_batch(
@@ -430,12 +414,10 @@ def get_gm07_batch(
         batch_meta["warning"] = f"Aucun exercice disponible pour les filtres sélectionnés."
         return [], batch_meta
     
-    # Mélanger avec seed pour reproductibilité
-    if seed is not None:
-        random.seed(seed)
-    
+    # Mélanger avec seed pour reproductibilité (générateur propre à l'appel)
+    rng = random.Random(seed)
     shuffled = available.copy()
-    random.shuffle(shuffled)
+    rng.shuffle(shuffled)
     
     # Prendre au maximum ce qui est disponible
     actual_count = min(count, pool_size)
@@ -462,18 +444,14 @@ def get_exercise_by_seed_index(
     if not available:
         return None
     
-    if seed is not None:
-        random.seed(seed)
-        index = random.randint(0, len(available) - 1)
-    else:
-        index = random.randint(0, len(available) - 1)
+    index = random.Random(seed).randint(0, len(available) - 1)
     
     return available[index]
 
 
 def get_gm07_stats() -> Dict[str, Any]:
-    """Statistiques sur les exercices"""
-    exercises = GM07_EXERCISES
+    """Statistiques sur les exercices servis (snapshot courant)"""
+    exercises = exercise_pools.get("6E_GM07").exercises
     
     stats = {
         "total": len(exercises),
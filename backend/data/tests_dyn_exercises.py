@@ -12,6 +12,8 @@ mais des templates avec placeholders {{variable}}.
 from typing import List, Dict, Any, Optional
 import random
 
+from services.exercise_pool_index import exercise_pools
+
 
 # =============================================================================
 # EXERCICES TESTS_DYN - Templates dynamiques
@@ -126,22 +128,9 @@ def get_tests_dyn_exercises(
     difficulty: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
-    Filtre les exercices selon les critères.
+    Filtre les exercices selon les critères (lecture de l'index précalculé).
     """
-    exercises = TESTS_DYN_EXERCISES
-    
-    if offer:
-        offer = offer.lower()
-        if offer == "free":
-            exercises = [ex for ex in exercises if ex["offer"] == "free"]
-    else:
-        exercises = [ex for ex in exercises if ex["offer"] == "free"]
-    
-    if difficulty:
-        difficulty = difficulty.lower()
-        exercises = [ex for ex in exercises if ex["difficulty"] == difficulty]
-    
-    return exercises
+    return list(exercise_pools.get("6E_TESTS_DYN").select(offer=offer, difficulty=difficulty))
 
 
 def get_random_tests_dyn_exercise(
@@ -155,10 +144,9 @@ def get_random_tests_dyn_exercise(
     if not available:
         return None
     
-    if seed is not None:
-        random.seed(seed)
-    
-    return random.choice(available)
+    # Générateur propre à l'appel : l'état global de `random` n'est jamais réinitialisé
+    rng = random.Random(seed)
+    return rng.choice(available)
 
 
 def get_tests_dyn_batch(
@@ -175,11 +163,10 @@ def get_tests_dyn_batch(
     if not available:
         return [], {"requested": count, "available": 0, "returned": 0}
     
-    if seed is not None:
-        random.seed(seed)
-    
+    # Mélanger avec seed pour reproductibilité (générateur propre à l'appel)
+    rng = random.Random(seed)
     shuffled = available.copy()
-    random.shuffle(shuffled)
+    rng.shuffle(shuffled)
     
     actual_count = min(count, len(shuffled))
     selected = shuffled[:actual_count]
@@ -198,16 +185,18 @@ def get_tests_dyn_batch(
 
 
 def get_tests_dyn_stats() -> Dict[str, Any]:
-    """Retourne les statistiques du chapitre."""
+    """Retourne les statistiques du chapitre (snapshot courant)."""
+    exercises = exercise_pools.get("6E_TESTS_DYN").exercises
+    
     stats = {
-        "total": len(TESTS_DYN_EXERCISES),
+        "total": len(exercises),
         "by_offer": {},
         "by_difficulty": {},
         "by_family": {},
         "dynamic_count": 0
     }
     
-    for ex in TESTS_DYN_EXERCISES:
+    for ex in exercises:
         stats["by_offer"][ex["offer"]] = stats["by_offer"].get(ex["offer"], 0) + 1
         stats["by_difficulty"][ex["difficulty"]] = stats["by_difficulty"].get(ex["difficulty"], 0) + 1
         stats["by_family"][ex["family"]] = stats["by_family"].get(ex["family"], 0) + 1
@@ -1,21 +1,148 @@
 # SYSTÈME DE RECHERCHE DE DOCUMENTS PÉDAGOGIQUES
 # Spécialisé pour la Géographie avec cartes libres de droit
 
-import aiohttp
+import asyncio
+import hashlib
+import httpx
 import json
+import os
 import re
+import tempfile
+import time
+from pathlib import Path
 from typing import Dict, List, Optional, Any
 from logger import get_logger
 
+try:
+    import h2  # noqa: F401  (épinglé dans requirements.txt ; repli HTTP/1.1 s'il manque)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logger = get_logger()
 
+# Marqueur de cache négatif (recherche sans résultat, fichier sans imageinfo)
+_MISSING = object()
+
+
+class CircuitOpenError(Exception):
+    """L'API Wikimedia est considérée indisponible (disjoncteur ouvert)"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur simple pour un service amont.
+    
+    Après `failure_threshold` échecs consécutifs (erreur, statut HTTP non 200
+    ou appel plus lent que `slow_call_seconds`), le circuit s'ouvre pendant
+    `reset_timeout` secondes : les appels échouent immédiatement. Un appel
+    d'essai est ensuite autorisé (semi-ouvert) ; son succès referme le circuit.
+    """
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0,
+                 slow_call_seconds: float = 3.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+    
+    def allow_request(self) -> bool:
+        return self.state != "open"
+    
+    def record_success(self, duration: float):
+        if duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+        self.failures = 0
+        self.opened_at = None
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"⚡ Wikimedia circuit opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+
+class WikimediaResponseCache:
+    """
+    Cache TTL persistant des réponses Wikimedia (un fichier JSON par clé).
+    
+    Partagé par les workers via le disque ; les résultats vides sont mis en
+    cache avec un TTL plus court (cache négatif).
+    """
+    
+    def __init__(self, cache_dir: str, ttl_seconds: int, negative_ttl_seconds: int):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+    
+    def _path(self, namespace: str, key: str) -> Path:
+        digest = hashlib.sha256(f"{namespace}:{key}".encode()).hexdigest()
+        return self.cache_dir / namespace / digest[:2] / f"{digest}.json"
+    
+    def get(self, namespace: str, key: str) -> Any:
+        """Valeur en cache, None si absente, _MISSING si négative"""
+        path = self._path(namespace, key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            return None
+        return _MISSING if entry.get("missing") else entry.get("value")
+    
+    def set(self, namespace: str, key: str, value: Any):
+        missing = value is None
+        ttl = self.negative_ttl_seconds if missing else self.ttl_seconds
+        entry = {"expires_at": time.time() + ttl, "missing": missing, "value": value}
+        path = self._path(namespace, key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Écriture atomique : jamais de fichier partiel lu par un autre worker
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Wikimedia cache write failed: {e}")
+
+
 class DocumentSearcher:
     """Recherche automatique de documents pédagogiques libres de droit"""
     
-    def __init__(self):
-        self.wikimedia_api_base = "https://commons.wikimedia.org/w/api.php"
+    def __init__(self, cache_dir: Optional[str] = None, api_base: Optional[str] = None):
+        self.wikimedia_api_base = api_base or "https://commons.wikimedia.org/w/api.php"
         self.wikimedia_base_url = "https://commons.wikimedia.org"
         
+        # Client HTTP partagé (pool de connexions), créé à la première requête
+        self._client: Optional[httpx.AsyncClient] = None
+        self.request_timeout = float(os.environ.get("WIKIMEDIA_TIMEOUT", "5"))
+        self.max_connections = int(os.environ.get("WIKIMEDIA_MAX_CONNECTIONS", "10"))
+        # Nombre maximal de requêtes de métadonnées simultanées par recherche
+        self.metadata_concurrency = int(os.environ.get("WIKIMEDIA_METADATA_CONCURRENCY", "4"))
+        
+        self.response_cache = WikimediaResponseCache(
+            cache_dir or os.environ.get("WIKIMEDIA_CACHE_DIR", "/tmp/wikimedia_cache"),
+            ttl_seconds=int(os.environ.get("WIKIMEDIA_CACHE_TTL", str(7 * 24 * 3600))),
+            negative_ttl_seconds=int(os.environ.get("WIKIMEDIA_NEGATIVE_CACHE_TTL", "3600"))
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get("WIKIMEDIA_CIRCUIT_FAILURES", "3")),
+            reset_timeout=float(os.environ.get("WIKIMEDIA_CIRCUIT_RESET", "60")),
+            slow_call_seconds=float(os.environ.get("WIKIMEDIA_SLOW_CALL", "3"))
+        )
+        
         # Cache des documents validés avec URLs TESTÉES ET VALIDES (Octobre 2025)
         self.validated_documents_cache = {
             # Cartes de base avec URLs vérifiées fonctionnelles
@@ -118,7 +245,7 @@ class DocumentSearcher:
             logger.info(f"✅ Document found in validated cache: {cached_doc['titre']}")
             return self._enrich_document_metadata(cached_doc, document_request)
         
-        # Recherche via API Wikimedia Commons
+        # Recherche via API Wikimedia Commons (court-circuitée si l'API est lente ou en panne)
         try:
             search_results = await self._search_wikimedia_commons(doc_type, elements_requis, langue)
             if search_results:
@@ -126,6 +253,8 @@ class DocumentSearcher:
                 if best_match:
                     logger.info(f"✅ Document found via Wikimedia: {best_match['titre']}")
                     return self._enrich_document_metadata(best_match, document_request)
+        except CircuitOpenError:
+            logger.warning(f"⚡ Wikimedia circuit open, skipping search for {doc_type}")
         except Exception as e:
             logger.error(f"❌ Error searching Wikimedia Commons: {e}")
         
@@ -237,41 +366,89 @@ class DocumentSearcher:
         # FALLBACK par défaut
         return "carte_monde"
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Client HTTP partagé (keep-alive, HTTP/2 si `h2` est installé)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.request_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                headers={"User-Agent": "LeMaitreMot/1.0 (document search)"}
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Ferme le client HTTP partagé (arrêt de l'application)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _api_get(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Appel de l'API Wikimedia protégé par le disjoncteur.
+        
+        Raises:
+            CircuitOpenError: circuit ouvert, aucun appel réseau effectué
+            httpx.HTTPError: erreur réseau ou statut non 200
+        """
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError()
+        
+        started = time.monotonic()
+        try:
+            response = await self._get_client().get(self.wikimedia_api_base, params=params)
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            self.circuit_breaker.record_failure()
+            raise
+        self.circuit_breaker.record_success(time.monotonic() - started)
+        return data
+    
     async def _search_wikimedia_commons(self, doc_type: str, elements_requis: List[str], langue: str) -> List[Dict[str, Any]]:
         """Recherche via l'API Wikimedia Commons"""
         
         # Construction de la requête de recherche
         search_terms = self._build_search_terms(doc_type, elements_requis, langue)
         
-        params = {
-            "action": "query",
-            "format": "json",
-            "list": "search",
-            "srsearch": search_terms,
-            "srnamespace": "6",  # Namespace File
-            "srlimit": "10"
-        }
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.wikimedia_api_base, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        search_results = data.get("query", {}).get("search", [])
-                        
-                        # Enrichir avec les métadonnées de chaque fichier
-                        enriched_results = []
-                        for result in search_results[:5]:  # Limiter à 5 résultats
-                            file_metadata = await self._get_file_metadata(result["title"])
-                            if file_metadata:
-                                enriched_results.append(file_metadata)
-                        
-                        return enriched_results
-        except Exception as e:
-            logger.error(f"Error in Wikimedia API call: {e}")
+        titles = self.response_cache.get("search", search_terms)
+        if titles is _MISSING:
             return []
         
-        return []
+        if titles is None:
+            params = {
+                "action": "query",
+                "format": "json",
+                "list": "search",
+                "srsearch": search_terms,
+                "srnamespace": "6",  # Namespace File
+                "srlimit": "10"
+            }
+            
+            try:
+                data = await self._api_get(params)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in Wikimedia API call: {e}")
+                return []
+            
+            search_results = data.get("query", {}).get("search", [])
+            titles = [result["title"] for result in search_results[:5]]  # Limiter à 5 résultats
+            self.response_cache.set("search", search_terms, titles or None)
+        
+        # Enrichir avec les métadonnées de chaque fichier (requêtes concurrentes plafonnées)
+        semaphore = asyncio.Semaphore(self.metadata_concurrency)
+        
+        async def fetch(title: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self._get_file_metadata(title)
+        
+        metadata_list = await asyncio.gather(*(fetch(title) for title in titles))
+        return [metadata for metadata in metadata_list if metadata]
     
     def _build_search_terms(self, doc_type: str, elements_requis: List[str], langue: str) -> str:
         """Construction des termes de recherche optimisés"""
@@ -303,6 +480,12 @@ class DocumentSearcher:
     async def _get_file_metadata(self, filename: str) -> Optional[Dict[str, Any]]:
         """Récupère les métadonnées détaillées d'un fichier"""
         
+        cached = self.response_cache.get("metadata", filename)
+        if cached is _MISSING:
+            return None
+        if cached is not None:
+            return cached
+        
         params = {
             "action": "query",
             "format": "json",
@@ -313,36 +496,37 @@ class DocumentSearcher:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.wikimedia_api_base, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        pages = data.get("query", {}).get("pages", {})
-                        
-                        for page_id, page_data in pages.items():
-                            if "imageinfo" in page_data:
-                                imageinfo = page_data["imageinfo"][0]
-                                
-                                # Extraire les informations essentielles
-                                metadata = {
-                                    "titre": filename.replace("File:", "").replace("_", " "),
-                                    "url_fichier_direct": imageinfo.get("url"),
-                                    "largeur_px": imageinfo.get("width", 0),
-                                    "hauteur_px": imageinfo.get("height", 0),
-                                    "mime_type": imageinfo.get("mime"),
-                                    "taille_bytes": imageinfo.get("size", 0),
-                                    "url_page_commons": f"{self.wikimedia_base_url}/wiki/{filename}"
-                                }
-                                
-                                # Analyser la licence
-                                licence_info = self._extract_license_info(page_data)
-                                metadata["licence"] = licence_info
-                                
-                                return metadata
+            data = await self._api_get(params)
+        except CircuitOpenError:
+            return None
         except Exception as e:
             logger.error(f"Error getting file metadata for {filename}: {e}")
+            return None
         
-        return None
+        metadata = None
+        pages = data.get("query", {}).get("pages", {})
+        for page_id, page_data in pages.items():
+            if "imageinfo" in page_data:
+                imageinfo = page_data["imageinfo"][0]
+                
+                # Extraire les informations essentielles
+                metadata = {
+                    "titre": filename.replace("File:", "").replace("_", " "),
+                    "url_fichier_direct": imageinfo.get("url"),
+                    "largeur_px": imageinfo.get("width", 0),
+                    "hauteur_px": imageinfo.get("height", 0),
+                    "mime_type": imageinfo.get("mime"),
+                    "taille_bytes": imageinfo.get("size", 0),
+                    "url_page_commons": f"{self.wikimedia_base_url}/wiki/{filename}"
+                }
+                
+                # Analyser la licence
+                licence_info = self._extract_license_info(page_data)
+                metadata["licence"] = licence_info
+                break
+        
+        self.response_cache.set("metadata", filename, metadata)
+        return metadata
     
     def _extract_license_info(self, page_data: Dict[str, Any]) -> Dict[str, Any]:
         """Extrait les informations de licence d'une page Commons"""
@@ -0,0 +1,248 @@
+"""
+Cache d'artefacts PDF adressé par contenu
+
+Un export identique (mêmes exercices, même type, même style, même config Pro,
+même date d'édition) produit exactement le même PDF : on le sert directement
+depuis le disque au lieu de refaire LaTeX → SVG, schémas et WeasyPrint.
+
+Organisation sur disque (partagée entre workers):
+    <cache_dir>/<document_id>/<owner>-<sha256>.pdf
+
+- Le dossier par document permet d'invalider toutes les variantes d'un
+  document (vary_exercise) en une opération
+- Le préfixe <owner> (hash de l'email Pro, ou "guest") permet d'invalider
+  les artefacts d'un utilisateur quand il sauvegarde son template
+- L'éviction LRU s'appuie sur le mtime, rafraîchi à chaque hit
+
+Configuration (variables d'environnement):
+- PDF_CACHE_DIR: répertoire du cache (défaut: <tmp>/lemaitremot_pdf_cache)
+- PDF_CACHE_MAX_MB: taille maximale du cache en Mo (défaut: 512)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+GUEST_OWNER = "guest"
+
+
+class PdfArtifactCache:
+    """
+    Stockage disque des PDFs générés, indexé par hash du contenu exporté.
+
+    Responsabilités :
+        - Calculer la clé de contenu d'un export
+        - Servir / stocker les PDFs (écriture atomique)
+        - Borner la taille totale (éviction LRU)
+        - Invalider par document ou par utilisateur
+        - Suivre les métriques (hit/miss)
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir: Répertoire de stockage des PDFs
+            max_bytes: Taille maximale totale du cache
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size_bytes: Optional[int] = None  # Calculée paresseusement
+
+        # Métriques
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "PdfArtifactCache":
+        """Construit le cache à partir des variables d'environnement"""
+        default_dir = os.path.join(tempfile.gettempdir(), "lemaitremot_pdf_cache")
+        return cls(
+            cache_dir=os.environ.get("PDF_CACHE_DIR", default_dir),
+            max_bytes=int(os.environ.get("PDF_CACHE_MAX_MB", 512)) * 1024 * 1024,
+        )
+
+    # ------------------------------------------------------------------
+    # Clés
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """
+        Calcule la clé de contenu d'un export.
+
+        Example:
+            >>> make_key(exercises=doc["exercises"], export_type="sujet",
+            ...          template_style="classique", template_config={...})
+        """
+        canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def owner_for(user_email: Optional[str]) -> str:
+        """Identifiant disque (non réversible) du propriétaire d'un artefact"""
+        if not user_email:
+            return GUEST_OWNER
+        return hashlib.sha1(user_email.lower().encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, document_id: str, key: str, owner: str) -> Path:
+        safe_doc_id = document_id.replace("/", "_").replace("..", "_")
+        return self.cache_dir / safe_doc_id / f"{owner}-{key}.pdf"
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def get(self, document_id: str, key: str, user_email: Optional[str] = None) -> Optional[bytes]:
+        """
+        Retourne le contenu du PDF en cache, ou None.
+
+        Le fichier est lu ici et non servi par chemin : une éviction ou une
+        invalidation (autre requête, autre worker) peut le supprimer à tout
+        moment ; un fichier disparu est un miss.
+
+        Un hit rafraîchit le mtime du fichier (ordre LRU).
+        """
+        path = self._path(document_id, key, self.owner_for(user_email))
+        try:
+            os.utime(path)
+            pdf_bytes = path.read_bytes()
+        except OSError:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        logger.info(f"PDF cache HIT: {document_id}/{key[:12]}")
+        return pdf_bytes
+
+    def put(self, document_id: str, key: str, pdf_bytes: bytes, user_email: Optional[str] = None) -> Optional[Path]:
+        """
+        Stocke un PDF (écriture atomique) et applique l'éviction si nécessaire.
+
+        Returns:
+            Le chemin du PDF stocké, ou None si l'écriture a échoué
+        """
+        path = self._path(document_id, key, self.owner_for(user_email))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to store PDF artifact: {e}")
+            return None
+
+        self._stores += 1
+        with self._lock:
+            if self._size_bytes is not None:
+                self._size_bytes += len(pdf_bytes)
+        self._evict_if_needed()
+        return path
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate_document(self, document_id: str) -> None:
+        """Supprime toutes les variantes en cache d'un document"""
+        doc_dir = self._path(document_id, "x", GUEST_OWNER).parent
+        if doc_dir.exists():
+            shutil.rmtree(doc_dir, ignore_errors=True)
+            self._invalidations += 1
+            self._size_bytes = None
+            logger.info(f"PDF cache invalidated for document {document_id}")
+
+    def invalidate_user(self, user_email: str) -> None:
+        """Supprime tous les artefacts d'un utilisateur (ex: template modifié)"""
+        removed = 0
+        for path in self.cache_dir.glob(f"*/{self.owner_for(user_email)}-*.pdf"):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            self._invalidations += 1
+            self._size_bytes = None
+            logger.info(f"PDF cache invalidated for user: {removed} artifacts removed")
+
+    # ------------------------------------------------------------------
+    # Éviction
+    # ------------------------------------------------------------------
+
+    def _scan(self):
+        entries = []
+        for path in self.cache_dir.glob("*/*.pdf"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        with self._lock:
+            if self._size_bytes is not None and self._size_bytes <= self.max_bytes:
+                return
+
+            # Les autres workers écrivent dans le même répertoire : on
+            # recalcule la taille réelle avant d'évincer
+            entries = self._scan()
+            size = sum(entry[1] for entry in entries)
+
+            if size > self.max_bytes:
+                entries.sort(key=lambda entry: entry[0])
+                for _mtime, file_size, path in entries:
+                    if size <= self.max_bytes:
+                        break
+                    try:
+                        path.unlink()
+                    except OSError:
+                        continue
+                    size -= file_size
+                    self._evictions += 1
+
+            self._size_bytes = size
+
+    # ------------------------------------------------------------------
+    # Métriques
+    # ------------------------------------------------------------------
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métriques du cache (hits, misses, taille, évictions)"""
+        total = self._hits + self._misses
+        hit_rate = (self._hits / total * 100) if total > 0 else 0.0
+
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "total_requests": total,
+            "hit_rate_percent": round(hit_rate, 2),
+            "stores": self._stores,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+            "size_bytes": self._size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Instance globale
+pdf_artifact_cache = PdfArtifactCache.from_env()
+
+
+__all__ = [
+    "PdfArtifactCache",
+    "pdf_artifact_cache",
+]
@@ -3,20 +3,25 @@ PDF Builder pour les fiches MathALÉA
 Sprint D - Génération PDF à partir du preview JSON
 
 Architecture:
-- Utilise WeasyPrint (comme le système existant)
-- Génère 3 types de PDF: sujet, élève, corrigé
+- Utilise WeasyPrint (comme le système existant), via le pool de rendu
+  hors boucle d'événements (render_pool)
+- Génère 3 types de PDF: sujet, élève, corrigé (rendus en parallèle)
 - Compatible avec les données du preview Sprint C
 """
 
-import weasyprint
+import asyncio
+import io
+import zipfile
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, List
 import logging
 
+from engine.pdf_engine.render_pool import render_pdf
+
 logger = logging.getLogger(__name__)
 
 
-def build_sheet_subject_pdf(sheet_preview: dict) -> bytes:
+async def build_sheet_subject_pdf(sheet_preview: dict) -> bytes:
     """
     Génère le PDF "sujet" (sans réponses, pour le professeur)
     
@@ -33,13 +38,13 @@ def build_sheet_subject_pdf(sheet_preview: dict) -> bytes:
         bytes: Contenu du PDF
     """
     html_content = _build_html_subject(sheet_preview)
-    pdf_bytes = weasyprint.HTML(string=html_content).write_pdf()
+    pdf_bytes = await render_pdf(html_content)
     
     logger.info(f"✅ PDF Sujet généré: {len(pdf_bytes)} bytes")
     return pdf_bytes
 
 
-def build_sheet_student_pdf(sheet_preview: dict) -> bytes:
+async def build_sheet_student_pdf(sheet_preview: dict) -> bytes:
     """
     Génère le PDF "élève" (pour distribution aux élèves)
     
@@ -57,13 +62,13 @@ def build_sheet_student_pdf(sheet_preview: dict) -> bytes:
         bytes: Contenu du PDF
     """
     html_content = _build_html_student(sheet_preview)
-    pdf_bytes = weasyprint.HTML(string=html_content).write_pdf()
+    pdf_bytes = await render_pdf(html_content)
     
     logger.info(f"✅ PDF Élève généré: {len(pdf_bytes)} bytes")
     return pdf_bytes
 
 
-def build_sheet_correction_pdf(sheet_preview: dict) -> bytes:
+async def build_sheet_correction_pdf(sheet_preview: dict) -> bytes:
     """
     Génère le PDF "corrigé" (avec toutes les solutions)
     
@@ -80,12 +85,132 @@ def build_sheet_correction_pdf(sheet_preview: dict) -> bytes:
         bytes: Contenu du PDF
     """
     html_content = _build_html_correction(sheet_preview)
-    pdf_bytes = weasyprint.HTML(string=html_content).write_pdf()
+    pdf_bytes = await render_pdf(html_content)
     
     logger.info(f"✅ PDF Corrigé généré: {len(pdf_bytes)} bytes")
     return pdf_bytes
 
 
+# Clé de réponse -> (builder, nom de fichier dans l'archive)
+SHEET_PDF_KINDS = {
+    "subject_pdf": (build_sheet_subject_pdf, "sujet"),
+    "student_pdf": (build_sheet_student_pdf, "eleve"),
+    "correction_pdf": (build_sheet_correction_pdf, "corrige"),
+}
+
+
+async def build_sheet_pdfs(sheet_preview: dict) -> Dict[str, bytes]:
+    """
+    Génère les 3 PDFs (sujet, élève, corrigé) en parallèle
+    
+    Les 3 rendus partent en même temps dans le pool de rendu : la latence
+    totale est celle du PDF le plus lent, pas la somme des trois. Au premier
+    échec, les rendus restants sont annulés pour libérer leur slot du pool.
+    
+    Args:
+        sheet_preview: Dict contenant le preview complet de la fiche
+        
+    Returns:
+        Dict {subject_pdf, student_pdf, correction_pdf} -> bytes
+        
+    Raises:
+        RenderPoolError: File de rendu pleine ou rendu en échec
+    """
+    keys = list(SHEET_PDF_KINDS)
+    tasks = [
+        asyncio.ensure_future(SHEET_PDF_KINDS[key][0](sheet_preview))
+        for key in keys
+    ]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return dict(zip(keys, results))
+
+
+class _ZipChunkBuffer(io.RawIOBase):
+    """Flux non-seekable qui accumule les octets écrits par ZipFile"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def start_sheet_pdfs_zip(sheet_preview: dict, filename_base: str) -> AsyncIterator[bytes]:
+    """
+    Lance les 3 rendus en parallèle et attend le premier avant de renvoyer
+    le flux ZIP
+    
+    Les 3 jobs réservent leur slot dans le pool dès leur lancement : une file
+    pleine (RenderPoolBusyError) ou un timeout du premier rendu est donc levé
+    ici, avant l'envoi des en-têtes HTTP, et non au milieu de l'archive.
+    
+    Chaque PDF est ensuite écrit dans l'archive dès que son rendu est terminé,
+    puis libéré : pas d'encodage base64 (+33%) et jamais plus d'un PDF en
+    attente d'envoi en mémoire.
+    
+    Args:
+        sheet_preview: Dict contenant le preview complet de la fiche
+        filename_base: Préfixe des noms de fichiers dans l'archive
+        
+    Returns:
+        AsyncIterator[bytes]: Morceaux successifs de l'archive ZIP
+        
+    Raises:
+        RenderPoolError: File de rendu pleine ou premier rendu en échec
+    """
+    async def build(name: str, builder):
+        return name, await builder(sheet_preview)
+    
+    tasks = [
+        asyncio.ensure_future(build(name, builder))
+        for builder, name in SHEET_PDF_KINDS.values()
+    ]
+    completed = asyncio.as_completed(tasks)
+    try:
+        first = await next(completed)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    
+    return _stream_zip(first, completed, tasks, filename_base)
+
+
+async def _stream_zip(first, completed, tasks, filename_base: str) -> AsyncIterator[bytes]:
+    buffer = _ZipChunkBuffer()
+    try:
+        # Les PDFs sont déjà compressés : ZIP_STORED évite un recompressage inutile
+        with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            name, pdf_bytes = first
+            del first
+            while True:
+                archive.writestr(f"{filename_base}_{name}.pdf", pdf_bytes)
+                del pdf_bytes
+                yield buffer.drain()
+                next_done = next(completed, None)
+                if next_done is None:
+                    break
+                name, pdf_bytes = await next_done
+        yield buffer.drain()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 # ============================================================================
 # Fonctions internes de génération HTML
 # ============================================================================
@@ -474,7 +599,7 @@ def _get_base_css() -> str:
     """
 
 
-def build_sheet_pro_pdf(legacy_format: dict, template: str = "classique", user_config: dict = None) -> bytes:
+async def build_sheet_pro_pdf(legacy_format: dict, template: str = "classique", user_config: dict = None) -> bytes:
     """
     Génère un PDF Pro personnalisé à partir du format legacy
     
@@ -498,7 +623,7 @@ def build_sheet_pro_pdf(legacy_format: dict, template: str = "classique", user_c
     else:  # "classique" par défaut
         html_content = _build_html_pro_classique(legacy_format, user_config)
     
-    pdf_bytes = weasyprint.HTML(string=html_content).write_pdf()
+    pdf_bytes = await render_pdf(html_content)
     
     logger.info(f"✅ PDF Pro généré ({template}): {len(pdf_bytes)} bytes")
     return pdf_bytes
@@ -976,5 +1101,7 @@ __all__ = [
     "build_sheet_subject_pdf",
     "build_sheet_student_pdf",
     "build_sheet_correction_pdf",
-    "build_sheet_pro_pdf"
+    "build_sheet_pro_pdf",
+    "build_sheet_pdfs",
+    "start_sheet_pdfs_zip"
 ]
@@ -0,0 +1,279 @@
+"""
+Pool de rendu PDF WeasyPrint hors boucle d'événements
+
+WeasyPrint est synchrone et coûteux (plusieurs secondes par document).
+Appelé directement dans un handler `async def`, il bloque toute la boucle
+uvicorn : auth, quotas et catalogue attendent derrière chaque export.
+
+Architecture:
+- Pool borné de processus workers, pré-chauffés (import WeasyPrint + fontconfig)
+- API asynchrone unique: `await render_pdf(html, base_url)`
+- Limite de profondeur de file (jobs en cours + en attente)
+- Timeout par job
+- Backpressure: `RenderPoolBusyError` (traduit en 503 + Retry-After par l'API)
+
+Configuration (variables d'environnement):
+- PDF_RENDER_WORKERS: nombre de processus (défaut: min(4, nb CPU))
+- PDF_RENDER_MAX_QUEUE: jobs en attente tolérés au-delà des workers (défaut: 16)
+- PDF_RENDER_TIMEOUT: timeout d'un job en secondes (défaut: 60)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# Exceptions
+# ============================================================================
+
+class RenderPoolError(Exception):
+    """Erreur de base du pool de rendu PDF"""
+
+
+class RenderPoolBusyError(RenderPoolError):
+    """File de rendu pleine : le client doit réessayer plus tard"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"PDF render queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class RenderTimeoutError(RenderPoolError):
+    """Le rendu d'un document a dépassé le timeout autorisé"""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"PDF rendering exceeded {timeout}s")
+        self.timeout = timeout
+
+
+# ============================================================================
+# Fonctions exécutées dans les workers
+# ============================================================================
+
+_WARMUP_HTML = "<html><body><p>warm-up</p></body></html>"
+
+
+def _init_worker() -> None:
+    """
+    Pré-chauffe un worker : import de WeasyPrint et premier rendu.
+
+    Le premier rendu charge pango/cairo et la configuration fontconfig,
+    ce qui représente la majeure partie du coût d'un rendu "à froid".
+    """
+    try:
+        import weasyprint
+        weasyprint.HTML(string=_WARMUP_HTML).write_pdf()
+    except Exception as e:
+        # Le worker reste utilisable : l'erreur réelle remontera au premier job
+        logger.warning(f"⚠️ Pré-chauffage WeasyPrint impossible: {e}")
+
+
+def _write_pdf(html: str, base_url: Optional[str] = None) -> bytes:
+    """Rendu WeasyPrint d'un document HTML complet (exécuté dans un worker)"""
+    import weasyprint
+    return weasyprint.HTML(string=html, base_url=base_url).write_pdf()
+
+
+def _noop() -> None:
+    """Job vide utilisé pour forcer le démarrage des workers"""
+    return None
+
+
+# ============================================================================
+# Pool
+# ============================================================================
+
+def _default_executor_factory(max_workers: int) -> Executor:
+    # "spawn" : un fork depuis un process qui porte la boucle asyncio et les
+    # threads motor n'est pas sûr
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+
+
+class PdfRenderPool:
+    """
+    Pool borné de workers WeasyPrint avec file limitée et timeout par job.
+
+    Un slot est occupé dès la soumission et libéré à la fin effective du job
+    (y compris après un timeout côté appelant) : la backpressure reflète donc
+    la charge réelle des workers.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        timeout: float,
+        render_func: Callable[..., bytes] = _write_pdf,
+        executor_factory: Callable[[int], Executor] = _default_executor_factory,
+    ):
+        """
+        Args:
+            max_workers: Nombre de workers de rendu
+            max_queue: Nombre de jobs en attente tolérés au-delà des workers
+            timeout: Timeout d'un job en secondes
+            render_func: Fonction de rendu (picklable) exécutée dans un worker
+            executor_factory: Fabrique de l'executor (injectable pour les tests)
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._render_func = render_func
+        self._executor_factory = executor_factory
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        # Métriques
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._failures = 0
+
+    @classmethod
+    def from_env(cls) -> "PdfRenderPool":
+        """Construit le pool à partir des variables d'environnement"""
+        return cls(
+            max_workers=int(os.environ.get("PDF_RENDER_WORKERS", min(4, os.cpu_count() or 1))),
+            max_queue=int(os.environ.get("PDF_RENDER_MAX_QUEUE", 16)),
+            timeout=float(os.environ.get("PDF_RENDER_TIMEOUT", 60)),
+        )
+
+    @property
+    def capacity(self) -> int:
+        """Nombre maximum de jobs simultanés (en cours + en attente)"""
+        return self.max_workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        """Nombre de jobs actuellement en cours ou en attente"""
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._executor_factory(self.max_workers)
+                logger.info(f"🖨️ Pool de rendu PDF démarré ({self.max_workers} workers)")
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        """Remplace un executor cassé (worker tué, OOM...)"""
+        with self._lock:
+            broken, self._executor = self._executor, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+            logger.error("❌ Pool de rendu PDF cassé, recréation au prochain job")
+
+    def _reserve_slot(self) -> None:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise RenderPoolBusyError(retry_after=self._retry_after())
+            self._pending += 1
+
+    def _release_slot(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _retry_after(self) -> int:
+        # Estimation grossière: une "vague" de rendus par tranche de workers
+        waves = max(1, self._pending // max(1, self.max_workers))
+        return max(1, min(int(self.timeout), waves * 2))
+
+    async def warm_up(self) -> None:
+        """Démarre tous les workers (import + rendu de pré-chauffage)"""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, _noop) for _ in range(self.max_workers)
+        ))
+
+    async def render_pdf(self, html: str, base_url: Optional[str] = None) -> bytes:
+        """
+        Rend un document HTML en PDF dans un worker.
+
+        Args:
+            html: Document HTML complet
+            base_url: URL de base pour les ressources relatives (images, CSS)
+
+        Returns:
+            bytes: Contenu du PDF
+
+        Raises:
+            RenderPoolBusyError: File de rendu pleine
+            RenderTimeoutError: Rendu trop long
+        """
+        self._reserve_slot()
+        try:
+            future = self._get_executor().submit(self._render_func, html, base_url)
+        except BaseException:
+            self._release_slot()
+            raise
+        future.add_done_callback(self._release_slot)
+
+        try:
+            pdf_bytes = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            logger.error(f"❌ Rendu PDF interrompu après {self.timeout}s")
+            raise RenderTimeoutError(self.timeout)
+        except BrokenProcessPool:
+            self._failures += 1
+            self._reset_executor()
+            raise
+        except Exception:
+            self._failures += 1
+            raise
+
+        self._completed += 1
+        return pdf_bytes
+
+    def get_metrics(self) -> dict:
+        """Métriques du pool (charge, rejets, timeouts)"""
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+            "failures": self._failures,
+        }
+
+    def shutdown(self) -> None:
+        """Arrête les workers (appelé à l'arrêt de l'application)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.info("🛑 Pool de rendu PDF arrêté")
+
+
+# Instance globale (les workers ne démarrent qu'au premier rendu ou warm_up)
+render_pool = PdfRenderPool.from_env()
+
+
+async def render_pdf(html: str, base_url: Optional[str] = None) -> bytes:
+    """Rend un document HTML en PDF via le pool global"""
+    return await render_pool.render_pdf(html, base_url=base_url)
+
+
+__all__ = [
+    "PdfRenderPool",
+    "RenderPoolError",
+    "RenderPoolBusyError",
+    "RenderTimeoutError",
+    "render_pool",
+    "render_pdf",
+]
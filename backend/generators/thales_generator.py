@@ -45,8 +45,8 @@ class ThalesV1Generator:
         self.seed = seed
         self.difficulty = difficulty.lower()
         
-        if seed is not None:
-            random.seed(seed)
+        # Générateur propre à l'instance : l'état global de `random` n'est jamais réinitialisé
+        self.rng = random.Random(seed)
     
     def generate(self) -> Dict[str, Any]:
         """
@@ -61,7 +61,7 @@ class ThalesV1Generator:
             - figure_svg_solution: SVG de la figure finale
         """
         # Sélectionner le type de figure
-        figure_type = random.choice(ThalesV1Config.FIGURE_TYPES)
+        figure_type = self.rng.choice(ThalesV1Config.FIGURE_TYPES)
         
         # Sélectionner le coefficient selon la difficulté
         coefficient = self._select_coefficient()
@@ -112,33 +112,33 @@ class ThalesV1Generator:
     def _select_coefficient(self) -> float:
         """Sélectionne un coefficient selon la difficulté."""
         if self.difficulty == "facile":
-            return random.choice(ThalesV1Config.COEFFICIENTS_FACILE)
+            return self.rng.choice(ThalesV1Config.COEFFICIENTS_FACILE)
         elif self.difficulty == "difficile":
-            return random.choice(ThalesV1Config.COEFFICIENTS_DIFFICILE)
+            return self.rng.choice(ThalesV1Config.COEFFICIENTS_DIFFICILE)
         else:  # moyen
-            return random.choice(ThalesV1Config.COEFFICIENTS_MOYEN)
+            return self.rng.choice(ThalesV1Config.COEFFICIENTS_MOYEN)
     
     def _generate_square_dimensions(self) -> Dict[str, float]:
         """Génère les dimensions d'un carré."""
-        cote = random.choice(ThalesV1Config.BASE_LENGTHS)
+        cote = self.rng.choice(ThalesV1Config.BASE_LENGTHS)
         return {"cote": cote, "type": "carre"}
     
     def _generate_rectangle_dimensions(self) -> Dict[str, float]:
         """Génère les dimensions d'un rectangle."""
-        longueur = random.choice(ThalesV1Config.BASE_LENGTHS)
+        longueur = self.rng.choice(ThalesV1Config.BASE_LENGTHS)
         smaller_values = [l for l in ThalesV1Config.BASE_LENGTHS if l < longueur]
         if smaller_values:
-            largeur = random.choice(smaller_values)
+            largeur = self.rng.choice(smaller_values)
         else:
             largeur = max(1, longueur - 1)  # Fallback: au moins 1 cm de moins
         return {"longueur": longueur, "largeur": largeur, "type": "rectangle"}
     
     def _generate_triangle_dimensions(self) -> Dict[str, float]:
         """Génère les dimensions d'un triangle rectangle."""
-        base = random.choice(ThalesV1Config.BASE_LENGTHS)
+        base = self.rng.choice(ThalesV1Config.BASE_LENGTHS)
         other_values = [h for h in ThalesV1Config.BASE_LENGTHS if h != base]
         if other_values:
-            hauteur = random.choice(other_values)
+            hauteur = self.rng.choice(other_values)
         else:
             hauteur = base + 1  # Fallback
         return {"base": base, "hauteur": hauteur, "type": "triangle"}
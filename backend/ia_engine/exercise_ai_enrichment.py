@@ -7,6 +7,7 @@ Fonctionnalités:
 - Enrichissement des corrections (détailler les étapes)
 - Respect strict des données mathématiques (data)
 - Fallback robuste en cas d'erreur IA
+- Cache de réponses : un prompt identique réutilise une variante déjà générée
 """
 
 import logging
@@ -14,10 +15,25 @@ import json
 from typing import Dict, Any, Optional
 from utils import get_emergent_key
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from style_manager import StyleFormulation
+from services.llm_response_cache import LLMResponseCache, llm_response_cache
 
 logger = logging.getLogger(__name__)
 
 
+def _is_acceptable(enriched: str) -> bool:
+    """Validation basique: texte enrichi non vide et suffisamment long"""
+    return bool(enriched) and len(enriched.strip()) >= 10
+
+
+def _resolve_style(style: Optional[str]) -> StyleFormulation:
+    """Style de formulation pour la clé de cache (scolaire par défaut)"""
+    try:
+        return StyleFormulation(style) if style else StyleFormulation.SCOLAIRE
+    except ValueError:
+        return StyleFormulation.SCOLAIRE
+
+
 async def enrich_statement(
     enonce_brut: str,
     data: Dict[str, Any],
@@ -76,17 +92,24 @@ Réponds UNIQUEMENT avec l'énoncé reformulé, sans aucun commentaire ni explic
 
 Reformule l'énoncé de manière plus pédagogique et claire, en respectant TOUTES les valeurs numériques."""
 
-        # Appel IA
-        chat = LlmChat(
-            system_message=system_prompt,
-            emergent_key=emergent_key
-        ).with_model('openai', 'gpt-4o')
+        # Appel IA (ou variante en cache pour ce prompt)
+        async def generate() -> str:
+            chat = LlmChat(
+                system_message=system_prompt,
+                emergent_key=emergent_key
+            ).with_model('openai', 'gpt-4o')
+            response = await chat.run(UserMessage(content=user_prompt))
+            return response.strip()
         
-        response = await chat.run(UserMessage(content=user_prompt))
-        enriched = response.strip()
+        cache_key = LLMResponseCache.make_key(
+            "enrichissement", "enonce", niveau, system_prompt + user_prompt, _resolve_style(style)
+        )
+        enriched = await llm_response_cache.get_or_generate(
+            "enrich_statement", cache_key, generate, accept=_is_acceptable
+        )
         
         # Validation basique: vérifier que l'énoncé n'est pas vide
-        if not enriched or len(enriched) < 10:
+        if not _is_acceptable(enriched):
             logger.warning("⚠️ Énoncé enrichi trop court, utilisation de l'original")
             return enonce_brut
         
@@ -156,17 +179,24 @@ Réponds UNIQUEMENT avec la correction enrichie, sans aucun commentaire ni expli
 
 Développe cette correction de manière plus pédagogique et détaillée, en respectant TOUS les résultats numériques."""
 
-        # Appel IA
-        chat = LlmChat(
-            system_message=system_prompt,
-            emergent_key=emergent_key
-        ).with_model('openai', 'gpt-4o')
+        # Appel IA (ou variante en cache pour ce prompt)
+        async def generate() -> str:
+            chat = LlmChat(
+                system_message=system_prompt,
+                emergent_key=emergent_key
+            ).with_model('openai', 'gpt-4o')
+            response = await chat.run(UserMessage(content=user_prompt))
+            return response.strip()
         
-        response = await chat.run(UserMessage(content=user_prompt))
-        enriched = response.strip()
+        cache_key = LLMResponseCache.make_key(
+            "enrichissement", "correction", niveau, system_prompt + user_prompt
+        )
+        enriched = await llm_response_cache.get_or_generate(
+            "enrich_correction", cache_key, generate, accept=_is_acceptable
+        )
         
         # Validation basique
-        if not enriched or len(enriched) < 10:
+        if not _is_acceptable(enriched):
             logger.warning("⚠️ Correction enrichie trop courte, utilisation de l'originale")
             return solution_brut
         
@@ -60,7 +60,56 @@ async def init_database_indexes():
         )
         print("✅ Pro user unique email index created")
         
-        # 5. Cleanup any duplicate sessions (in case they exist)
+        # 5. Compound index for the documents listing (GET /api/documents)
+        print("Creating index on documents (guest_id, created_at)...")
+        await db.documents.create_index(
+            [("guest_id", 1), ("created_at", -1)],
+            name="documents_by_guest_recent"
+        )
+        print("✅ Documents listing index created")
+        
+        # 6. LLM response cache: one entry per key, TTL on expires_at
+        print("Creating indexes on llm_response_cache...")
+        await db.llm_response_cache.create_index(
+            "key",
+            unique=True,
+            name="unique_llm_cache_key"
+        )
+        await db.llm_response_cache.create_index(
+            "expires_at",
+            expireAfterSeconds=0,  # Expire at the specified date
+            name="llm_cache_expiry_ttl"
+        )
+        print("✅ LLM response cache indexes created")
+        
+        # 7. Guest export quota: one counter document per guest, TTL on expires_at
+        print("Creating indexes on guest_quotas and exports...")
+        await db.guest_quotas.create_index(
+            "guest_id",
+            unique=True,  # Required by the atomic check-and-reserve upsert
+            name="unique_guest_quota"
+        )
+        await db.guest_quotas.create_index(
+            "expires_at",
+            expireAfterSeconds=0,  # Expire at the specified date
+            name="guest_quota_expiry_ttl"
+        )
+        await db.exports.create_index(
+            [("guest_id", 1), ("created_at", -1)],
+            name="exports_by_guest_recent"
+        )
+        print("✅ Guest quota indexes created")
+        
+        # 8. Daily analytics rollup: one row per (owner, day, matiere, template)
+        print("Creating index on analytics_daily...")
+        await db.analytics_daily.create_index(
+            [("owner", 1), ("day", 1), ("matiere", 1), ("template", 1)],
+            unique=True,
+            name="unique_analytics_row"
+        )
+        print("✅ Analytics rollup index created")
+        
+        # 9. Cleanup any duplicate sessions (in case they exist)
         print("Cleaning up any duplicate sessions...")
         
         # Find duplicate sessions
@@ -95,6 +144,10 @@ async def init_database_indexes():
         print("  ✅ Automatic session cleanup on expiry")
         print("  ✅ Automatic magic token cleanup")
         print("  ✅ Pro user email uniqueness")
+        print("  ✅ Indexed documents listing")
+        print("  ✅ LLM response cache expiry")
+        print("  ✅ Atomic guest export quota")
+        print("  ✅ Pre-aggregated analytics")
         
         # Close connection
         client.close()
@@ -3,23 +3,243 @@ LaTeX to SVG Renderer - Convert LaTeX formulas to high-quality SVG images
 """
 
 import re
+import os
 import base64
 import hashlib
-from typing import Dict, Any
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Dict, Any, Iterable, List, Optional
 import matplotlib.pyplot as plt
 import matplotlib.mathtext as mathtext
+from matplotlib.font_manager import FontProperties
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
 from io import BytesIO
 import logging
 
 logger = logging.getLogger(__name__)
 
+# ⚠️ Incrémenter à chaque changement de la sortie SVG : les entrées disque
+# d'une version précédente ne sont alors plus jamais relues.
+SVG_CACHE_VERSION = "2"
+
+# Tokenizer unique des expressions LaTeX d'un texte : $$...$$ (display),
+# \(...\) (inline) et $...$ (inline, mais pas $$), par ordre de priorité
+LATEX_TOKEN_RE = re.compile(
+    r'\$\$(?P<display>[^$]+)\$\$'
+    r'|\\\(\s*(?P<inline>[^)]+?)\s*\\\)'
+    r'|(?<!\$)\$(?P<dollar>[^$\n]+)\$(?!\$)'
+)
+DISPLAY_MATH_HTML = '<div class="math-display" style="text-align: center; margin: 12px 0;">{}</div>'
+INLINE_MATH_HTML = '<span class="math-inline" style="display: inline-block; vertical-align: middle;">{}</span>'
+# Taille des lots de clés par requête SQLite (limite de paramètres)
+DISK_BATCH_SIZE = 500
+# Les dates d'accès des hits disque sont écrites par lot, au plus toutes les N secondes
+DISK_ACCESS_FLUSH_SECONDS = 30
+# Recomptage réel des lignes (écritures des autres workers), au plus toutes les N secondes
+DISK_COUNT_REFRESH_SECONDS = 60
+
+# Sous-ensemble LaTeX émis par les générateurs, rendu sans figure matplotlib
+FAST_PATH_COMMANDS = frozenset({
+    "frac", "dfrac", "tfrac", "sqrt", "times", "div", "cdot", "pm", "mp",
+    "text", "mathrm", "textrm", "left", "right",
+    "leq", "geq", "le", "ge", "neq", "ne", "approx", "simeq", "infty", "degree", "circ",
+    "alpha", "beta", "gamma", "delta", "epsilon", "theta", "lambda", "mu", "pi",
+    "rho", "sigma", "tau", "phi", "omega", "Delta", "Omega", "Pi", "Sigma",
+    ",", ";", ":", "!", " ", "quad", "qquad", "{", "}", "%",
+})
+LATEX_COMMAND_RE = re.compile(r'\\([a-zA-Z]+|.)')
+FAST_PATH_UNSUPPORTED_RE = re.compile(r'[&#~$]')
+SVG_FONT_SIZE = 14
+SVG_PAD = 1.44  # 0.02 pouce en points, comme pad_inches du rendu figure
+# Code de segment matplotlib → (commande SVG, nombre de sommets du segment)
+SVG_PATH_COMMANDS = {
+    Path.MOVETO: ("M", 1),
+    Path.LINETO: ("L", 1),
+    Path.CURVE3: ("Q", 2),
+    Path.CURVE4: ("C", 3),
+}
+
+
+class SVGDiskStore:
+    """
+    Store SVG adressé par contenu, partagé par tous les workers uvicorn.
+
+    Fichier SQLite en mode WAL : lectures concurrentes sans verrou, écritures
+    atomiques. Borné en nombre d'entrées, éviction des moins récemment lues.
+
+    Les lectures n'écrivent pas : les dates d'accès des hits sont gardées en
+    mémoire et écrites par lot (avec la prochaine écriture, ou au plus toutes
+    les DISK_ACCESS_FLUSH_SECONDS). Le nombre de lignes est suivi par
+    incréments et recompté au plus toutes les DISK_COUNT_REFRESH_SECONDS.
+    Si le répertoire du cache est inutilisable, le store est désactivé (le
+    renderer ne garde alors que son cache mémoire).
+    """
+
+    def __init__(self, path: str, max_entries: int = 50_000, access_flush_seconds: float = DISK_ACCESS_FLUSH_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.access_flush_seconds = access_flush_seconds
+        self.available = True
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._touched: Dict[str, float] = {}
+        self._touched_flushed_at = 0.0
+        self._row_count = 0
+        self._counted_at = 0.0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.available:
+            return None
+        # Une connexion par processus (jamais partagée au travers d'un fork)
+        if self._conn is None or self._conn_pid != os.getpid():
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            except OSError as e:
+                self.available = False
+                logger.warning(f"⚠️ LaTeX disk cache disabled, memory only ({self.path}): {e}")
+                return None
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS svg ("
+                " key TEXT PRIMARY KEY,"
+                " svg TEXT NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn = conn
+            self._conn_pid = os.getpid()
+            self._touched = {}
+            self._touched_flushed_at = time.monotonic()
+            self._refresh_count(conn)
+        return self._conn
+
+    def _refresh_count(self, conn: sqlite3.Connection):
+        self._row_count = conn.execute("SELECT COUNT(*) FROM svg").fetchone()[0]
+        self._counted_at = time.monotonic()
+
+    def _write_touched(self, conn: sqlite3.Connection):
+        """Écrit les dates d'accès en attente (appelé dans une transaction)"""
+        touched, self._touched = self._touched, {}
+        self._touched_flushed_at = time.monotonic()
+        if touched:
+            conn.executemany(
+                "UPDATE svg SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in touched.items()]
+            )
+
+    def _transaction(self, conn: sqlite3.Connection, write):
+        conn.execute("BEGIN")
+        try:
+            result = write()
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Lecture groupée : une requête par lot de DISK_BATCH_SIZE clés"""
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return found
+            for start in range(0, len(keys), DISK_BATCH_SIZE):
+                chunk = keys[start:start + DISK_BATCH_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(f"SELECT key, svg FROM svg WHERE key IN ({placeholders})", chunk).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._touched.update((key, now) for key in found)
+                if time.monotonic() - self._touched_flushed_at >= self.access_flush_seconds:
+                    self._transaction(conn, lambda: self._write_touched(conn))
+        return found
+
+    def put(self, key: str, svg_content: str):
+        self.put_many({key: svg_content})
+
+    def put_many(self, entries: Dict[str, str]):
+        """Écriture groupée en une transaction (avec les dates d'accès en attente), puis éviction éventuelle"""
+        if not entries:
+            return
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            now = time.time()
+
+            def write():
+                # Clé = empreinte du contenu : une clé déjà présente a la même valeur
+                inserted = conn.executemany(
+                    "INSERT OR IGNORE INTO svg (key, svg, accessed_at) VALUES (?, ?, ?)",
+                    [(key, svg_content, now) for key, svg_content in entries.items()]
+                ).rowcount
+                self._write_touched(conn)
+                return inserted
+
+            self._row_count += self._transaction(conn, write)
+            if time.monotonic() - self._counted_at >= DISK_COUNT_REFRESH_SECONDS:
+                self._refresh_count(conn)
+            if self._row_count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM svg WHERE key IN ("
+                    " SELECT key FROM svg ORDER BY accessed_at ASC LIMIT ?)",
+                    (self._row_count - self.max_entries,)
+                )
+                self._row_count = self.max_entries
+
+    def count(self) -> int:
+        with self._lock:
+            conn = self._connection()
+            return conn.execute("SELECT COUNT(*) FROM svg").fetchone()[0] if conn is not None else 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                if self._touched and self._conn_pid == os.getpid():
+                    self._transaction(self._conn, lambda: self._write_touched(self._conn))
+                self._conn.close()
+                self._conn = None
+
 
 class LaTeXToSVGRenderer:
     """Converts LaTeX math expressions to SVG images for PDF generation"""
     
-    def __init__(self, cache_dir: str = "/tmp/latex_cache"):
-        self.cache_dir = cache_dir
-        self.svg_cache = {}  # In-memory cache for this session
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_bytes: Optional[int] = None,
+                 max_disk_entries: Optional[int] = None, fast_path: Optional[bool] = None):
+        self.cache_dir = cache_dir or os.environ.get("LATEX_CACHE_DIR", "/tmp/latex_cache")
+        if max_memory_bytes is None:
+            max_memory_bytes = int(float(os.environ.get("LATEX_CACHE_MEMORY_MB", "32")) * 1024 * 1024)
+        if max_disk_entries is None:
+            max_disk_entries = int(os.environ.get("LATEX_CACHE_DISK_ENTRIES", "50000"))
+        
+        # Niveau 1 : LRU en mémoire borné en octets (par processus)
+        self.svg_cache: "OrderedDict[str, str]" = OrderedDict()
+        self.max_memory_bytes = max_memory_bytes
+        self._memory_bytes = 0
+        self._cache_lock = threading.Lock()
+        
+        # Niveau 2 : store disque partagé entre workers
+        self.disk_store = SVGDiskStore(os.path.join(self.cache_dir, "svg_cache.sqlite3"), max_disk_entries)
+        
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_errors": 0,
+                       "fast_renders": 0, "figure_renders": 0}
+        
+        # Chemin rapide (glyphes mathtext sans figure), désactivable par LATEX_FAST_PATH=0
+        if fast_path is None:
+            fast_path = os.environ.get("LATEX_FAST_PATH", "1") != "0"
+        self.fast_path = fast_path
+        self._fast_path_lock = threading.Lock()
         
         # Configure matplotlib for high-quality math rendering
         plt.rcParams.update({
@@ -41,6 +261,90 @@ class LaTeXToSVGRenderer:
     
     def _latex_to_svg(self, latex_code: str) -> str:
         """Convert LaTeX code to SVG string"""
+        try:
+            return self._render_svg(latex_code)
+        except Exception as e:
+            logger.error(f"Error rendering LaTeX '{latex_code}': {e}")
+            # Fallback to text representation
+            return self._fallback_html(latex_code)
+    
+    @staticmethod
+    def _fallback_html(latex_code: str) -> str:
+        return f'<span style="font-style: italic;">[{latex_code}]</span>'
+    
+    def _render_svg(self, latex_code: str) -> str:
+        """Rendu SVG d'une expression (lève une exception en cas d'échec)"""
+        if self.fast_path and self._is_fast_path_supported(latex_code):
+            try:
+                svg_content = self._render_svg_fast(latex_code)
+            except Exception as e:
+                logger.debug(f"LaTeX fast path failed for '{latex_code}', falling back: {e}")
+                svg_content = None
+            if svg_content is not None:
+                self._stats["fast_renders"] += 1
+                return svg_content
+        
+        self._stats["figure_renders"] += 1
+        return self._render_svg_figure(latex_code)
+    
+    @staticmethod
+    def _is_fast_path_supported(latex_code: str) -> bool:
+        """L'expression n'utilise-t-elle que le sous-ensemble du chemin rapide ?"""
+        if FAST_PATH_UNSUPPORTED_RE.search(latex_code):
+            return False
+        return all(command in FAST_PATH_COMMANDS for command in LATEX_COMMAND_RE.findall(latex_code))
+    
+    def _render_svg_fast(self, latex_code: str) -> Optional[str]:
+        """
+        Rendu sans figure : les glyphes mathtext sont convertis directement en
+        chemins SVG (pas de pyplot, pas de double dessin, pas de savefig).
+        
+        Returns:
+            Le SVG, ou None si l'expression ne produit aucun glyphe
+        """
+        prop = FontProperties(size=SVG_FONT_SIZE, math_fontfamily='cm')
+        # Le parseur mathtext partagé de TextPath n'est pas garanti thread-safe
+        with self._fast_path_lock:
+            text_path = TextPath((0, 0), f"${latex_code}$", size=SVG_FONT_SIZE, prop=prop)
+        
+        # Boîte des sommets (points de contrôle inclus) : majorant de l'encre,
+        # bien moins coûteux que Path.get_extents() et ses extrema de Bézier.
+        # Les sommets CLOSEPOLY sont ignorés : leur position n'est pas significative.
+        drawn = text_path.vertices[text_path.codes != Path.CLOSEPOLY]
+        if len(drawn) == 0:
+            return None
+        (x0, y0), (x1, y1) = drawn.min(axis=0), drawn.max(axis=0)
+        width = float(x1 - x0) + 2 * SVG_PAD
+        height = float(y1 - y0) + 2 * SVG_PAD
+        # Repère SVG : origine en haut à gauche, axe y vers le bas
+        dx = SVG_PAD - x0
+        dy = SVG_PAD + y1
+        
+        # Une lettre de commande SVG par segment (les points de contrôle suivent)
+        xs = (text_path.vertices[:, 0] + dx).tolist()
+        ys = (dy - text_path.vertices[:, 1]).tolist()
+        codes = text_path.codes.tolist()
+        commands = []
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == Path.CLOSEPOLY:
+                commands.append("Z")
+                i += 1
+                continue
+            letter, count = SVG_PATH_COMMANDS[code]
+            commands.append(letter + " ".join(f"{xs[j]:.3f} {ys[j]:.3f}" for j in range(i, i + count)))
+            i += count
+        
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+            f'width="{width:.3f}pt" height="{height:.3f}pt" viewBox="0 0 {width:.3f} {height:.3f}">'
+            f'<path d="{"".join(commands)}" fill="#000000"/></svg>'
+        )
+    
+    def _render_svg_figure(self, latex_code: str) -> str:
+        """Rendu matplotlib complet via une figure (toute syntaxe mathtext)"""
+        fig = None
         try:
             # Create a figure with transparent background
             fig, ax = plt.subplots(figsize=(0.1, 0.1))
@@ -66,14 +370,12 @@ class LaTeXToSVGRenderer:
             
             # Save to SVG
             svg_buffer = BytesIO()
-            plt.savefig(svg_buffer, format='svg', 
+            fig.savefig(svg_buffer, format='svg', 
                        bbox_inches='tight', 
                        pad_inches=0.02,
                        transparent=True,
                        dpi=300)
             
-            plt.close(fig)
-            
             # Get SVG content
             svg_content = svg_buffer.getvalue().decode('utf-8')
             
@@ -82,32 +384,158 @@ class LaTeXToSVGRenderer:
             svg_content = re.sub(r'<!DOCTYPE[^>]*>', '', svg_content)
             
             return svg_content.strip()
-            
-        except Exception as e:
-            logger.error(f"Error rendering LaTeX '{latex_code}': {e}")
-            # Fallback to text representation
-            return f'<span style="font-style: italic;">[{latex_code}]</span>'
+        finally:
+            if fig is not None:
+                plt.close(fig)
     
     def _get_cache_key(self, latex_code: str) -> str:
         """Generate cache key for LaTeX code"""
-        return hashlib.md5(latex_code.encode()).hexdigest()
+        return hashlib.sha256(f"{SVG_CACHE_VERSION}:{latex_code}".encode()).hexdigest()
     
-    def render_latex_expression(self, latex_code: str) -> str:
-        """Render a single LaTeX expression to SVG"""
-        cleaned_latex = self._clean_latex(latex_code)
-        cache_key = self._get_cache_key(cleaned_latex)
+    def _memory_get(self, cache_key: str) -> Optional[str]:
+        with self._cache_lock:
+            svg_content = self.svg_cache.get(cache_key)
+            if svg_content is not None:
+                self.svg_cache.move_to_end(cache_key)
+            return svg_content
+    
+    def _memory_put(self, cache_key: str, svg_content: str):
+        size = len(svg_content)
+        if size > self.max_memory_bytes:
+            return
+        with self._cache_lock:
+            previous = self.svg_cache.pop(cache_key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self.svg_cache[cache_key] = svg_content
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self.svg_cache.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+    
+    def _render_or_none(self, latex_code: str) -> Optional[str]:
+        """Rendu d'une expression nettoyée, None en cas d'échec"""
+        try:
+            return self._render_svg(latex_code)
+        except Exception as e:
+            logger.error(f"Error rendering LaTeX '{latex_code}': {e}")
+            return None
+    
+    def render_latex_batch(self, expressions: Iterable[str],
+                           executor: Optional[Executor] = None) -> Dict[str, str]:
+        """
+        Rend un ensemble d'expressions en un seul lot.
+        
+        Les expressions sont dédupliquées, cherchées en mémoire puis sur disque
+        (une requête groupée), et seules les manquantes sont rendues — via
+        `executor` (pool de processus) si fourni, sinon dans le processus courant.
         
-        # Check cache first
-        if cache_key in self.svg_cache:
-            return self.svg_cache[cache_key]
+        Args:
+            expressions: Expressions LaTeX (avec ou sans délimiteurs)
+            executor: Pool optionnel pour paralléliser les rendus manquants
         
-        # Render to SVG
-        svg_content = self._latex_to_svg(cleaned_latex)
+        Returns:
+            {expression nettoyée: SVG (ou texte de repli si le rendu échoue)}
+        """
+        results: Dict[str, str] = {}
+        pending: Dict[str, str] = {}  # clé de cache → expression nettoyée
         
-        # Cache the result
-        self.svg_cache[cache_key] = svg_content
+        # 1. LRU mémoire
+        for latex_code in dict.fromkeys(self._clean_latex(e) for e in expressions):
+            cache_key = self._get_cache_key(latex_code)
+            svg_content = self._memory_get(cache_key)
+            if svg_content is not None:
+                self._stats["memory_hits"] += 1
+                results[latex_code] = svg_content
+            else:
+                pending[cache_key] = latex_code
         
-        return svg_content
+        # 2. Store disque partagé
+        if pending:
+            try:
+                found = self.disk_store.get_many(list(pending))
+            except sqlite3.Error as e:
+                self._stats["disk_errors"] += 1
+                logger.warning(f"⚠️ LaTeX disk cache read failed: {e}")
+                found = {}
+            for cache_key, svg_content in found.items():
+                self._stats["disk_hits"] += 1
+                self._memory_put(cache_key, svg_content)
+                results[pending.pop(cache_key)] = svg_content
+        
+        if not pending:
+            return results
+        
+        # 3. Rendu des seules expressions absentes des deux niveaux
+        self._stats["misses"] += len(pending)
+        to_render = list(pending.values())
+        if executor is not None and len(to_render) > 1:
+            rendered = list(executor.map(render_svg_in_worker, to_render))
+        else:
+            rendered = [self._render_or_none(latex_code) for latex_code in to_render]
+        
+        to_store = {}
+        for (cache_key, latex_code), svg_content in zip(pending.items(), rendered):
+            if svg_content is None:
+                # Le fallback n'est pas mis en cache : l'échec peut être transitoire
+                results[latex_code] = self._fallback_html(latex_code)
+                continue
+            self._memory_put(cache_key, svg_content)
+            to_store[cache_key] = svg_content
+            results[latex_code] = svg_content
+        
+        try:
+            self.disk_store.put_many(to_store)
+        except sqlite3.Error as e:
+            self._stats["disk_errors"] += 1
+            logger.warning(f"⚠️ LaTeX disk cache write failed: {e}")
+        
+        return results
+    
+    def render_latex_expression(self, latex_code: str) -> str:
+        """Render a single LaTeX expression to SVG"""
+        return self.render_latex_batch([latex_code])[self._clean_latex(latex_code)]
+    
+    @staticmethod
+    def extract_expressions(text: str) -> List[str]:
+        """Liste des expressions LaTeX d'un texte (dans l'ordre d'apparition)"""
+        if not text:
+            return []
+        return [
+            match.group("display") or match.group("inline") or match.group("dollar")
+            for match in LATEX_TOKEN_RE.finditer(text)
+        ]
+    
+    def warm_up(self, expressions: Iterable[str], executor: Optional[Executor] = None) -> int:
+        """
+        Pré-rend des expressions dans les deux niveaux de cache.
+        
+        Returns:
+            Nombre d'expressions effectivement rendues (absentes du cache)
+        """
+        misses_before = self._stats["misses"]
+        self.render_latex_batch(expressions, executor)
+        return self._stats["misses"] - misses_before
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Statistiques du cache SVG (hit ratio par niveau)"""
+        lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        try:
+            disk_entries = self.disk_store.count()
+        except sqlite3.Error:
+            disk_entries = None
+        return {
+            **self._stats,
+            "lookups": lookups,
+            "hit_ratio_percent": round(hits / lookups * 100, 2) if lookups else 0.0,
+            "memory_entries": len(self.svg_cache),
+            "memory_bytes": self._memory_bytes,
+            "max_memory_bytes": self.max_memory_bytes,
+            "disk_entries": disk_entries,
+            "disk_available": self.disk_store.available,
+            "disk_path": self.disk_store.path
+        }
     
     def convert_latex_to_svg(self, text: str) -> str:
         """Alias for convert_text_with_latex for compatibility"""
@@ -116,72 +544,99 @@ class LaTeXToSVGRenderer:
     def convert_text_with_latex(self, text: str) -> str:
         """
         Convert text containing LaTeX expressions to HTML with embedded SVG
-        Handles both inline \( ... \) and display $$ ... $$ math
+        Handles both inline \\( ... \\) and display $$ ... $$ math
         """
         if not text:
             return text
+        return self.convert_texts_with_latex([text])[0]
+    
+    def convert_texts_with_latex(self, texts: List[str], executor: Optional[Executor] = None) -> List[str]:
+        """
+        Convertit un lot de textes (ex. tous les champs d'une fiche) en une passe.
         
-        # Process display math first ($$...$$)
-        def replace_display_math(match):
-            latex_code = match.group(1)
-            svg_content = self.render_latex_expression(latex_code)
-            return f'<div class="math-display" style="text-align: center; margin: 12px 0;">{svg_content}</div>'
-        
-        # Process inline math \(...\)
-        def replace_inline_math(match):
-            latex_code = match.group(1)
-            svg_content = self.render_latex_expression(latex_code)
-            return f'<span class="math-inline" style="display: inline-block; vertical-align: middle;">{svg_content}</span>'
-        
-        # Process single dollar math $...$
-        def replace_dollar_math(match):
-            latex_code = match.group(1)
-            svg_content = self.render_latex_expression(latex_code)
-            return f'<span class="math-inline" style="display: inline-block; vertical-align: middle;">{svg_content}</span>'
-        
-        result = text
-        
-        # Replace display math first ($$...$$)
-        result = re.sub(r'\$\$([^$]+)\$\$', replace_display_math, result)
-        
-        # Replace inline math \(...\)
-        result = re.sub(r'\\\(\s*([^)]+?)\s*\\\)', replace_inline_math, result)
-        
-        # Replace single dollar math $...$  (but not $$)
-        result = re.sub(r'(?<!\$)\$([^$\n]+)\$(?!\$)', replace_dollar_math, result)
+        Chaque texte est tokenisé une seule fois ; les expressions uniques de
+        tout le lot sont rendues ensemble (render_latex_batch) puis réinsérées.
+        Le coût est donc proportionnel au nombre d'expressions distinctes,
+        pas au nombre d'occurrences.
+        """
+        tokenized = [list(LATEX_TOKEN_RE.finditer(text)) if text else [] for text in texts]
+        svgs = self.render_latex_batch(
+            (match.group("display") or match.group("inline") or match.group("dollar")
+             for matches in tokenized for match in matches),
+            executor
+        )
         
-        return result
+        converted = []
+        for text, matches in zip(texts, tokenized):
+            if not matches:
+                converted.append(text)
+                continue
+            parts = []
+            position = 0
+            for match in matches:
+                parts.append(text[position:match.start()])
+                if match.group("display") is not None:
+                    parts.append(DISPLAY_MATH_HTML.format(svgs[self._clean_latex(match.group("display"))]))
+                else:
+                    latex_code = match.group("inline") or match.group("dollar")
+                    parts.append(INLINE_MATH_HTML.format(svgs[self._clean_latex(latex_code)]))
+                position = match.end()
+            parts.append(text[position:])
+            converted.append("".join(parts))
+        return converted
     
-    def process_document_exercises(self, document_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process all exercises in a document to convert LaTeX expressions"""
+    def process_document_exercises(self, document_data: Dict[str, Any],
+                                   executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """
+        Process all exercises in a document to convert LaTeX expressions.
+        
+        Tous les champs de la fiche sont convertis en un seul lot : chaque
+        expression distincte n'est rendue qu'une fois pour tout le document.
+        """
         if not hasattr(document_data, 'exercises') or not document_data.exercises:
             return document_data
         
-        # Process each exercise
+        # 1. Collecter les champs à convertir : (texte, affectation du résultat)
+        fields = []
         for exercise in document_data.exercises:
-            # Process exercise statement
+            # Exercise statement
             if hasattr(exercise, 'enonce') and exercise.enonce:
-                exercise.enonce = self.convert_text_with_latex(exercise.enonce)
+                fields.append((exercise.enonce, lambda value, e=exercise: setattr(e, 'enonce', value)))
             
-            # Process QCM options if they exist
+            # QCM options if they exist
             if (hasattr(exercise, 'type') and exercise.type == 'qcm' and 
                 hasattr(exercise, 'donnees') and exercise.donnees and 
                 hasattr(exercise.donnees, 'options')):
-                exercise.donnees.options = [
-                    self.convert_text_with_latex(option) for option in exercise.donnees.options
-                ]
+                options = list(exercise.donnees.options)
+                exercise.donnees.options = options
+                for index, option in enumerate(options):
+                    fields.append((option, lambda value, o=options, i=index: o.__setitem__(i, value)))
             
-            # Process solution if it exists
+            # Solution if it exists
             if hasattr(exercise, 'solution') and exercise.solution:
                 if hasattr(exercise.solution, 'etapes') and exercise.solution.etapes:
-                    exercise.solution.etapes = [
-                        self.convert_text_with_latex(step) for step in exercise.solution.etapes
-                    ]
+                    etapes = list(exercise.solution.etapes)
+                    exercise.solution.etapes = etapes
+                    for index, step in enumerate(etapes):
+                        fields.append((step, lambda value, o=etapes, i=index: o.__setitem__(i, value)))
                 if hasattr(exercise.solution, 'resultat') and exercise.solution.resultat:
-                    exercise.solution.resultat = self.convert_text_with_latex(exercise.solution.resultat)
+                    fields.append((
+                        exercise.solution.resultat,
+                        lambda value, sol=exercise.solution: setattr(sol, 'resultat', value)
+                    ))
+        
+        # 2. Rendu groupé puis réinsertion
+        converted = self.convert_texts_with_latex([text for text, _ in fields], executor)
+        for (_, assign), value in zip(fields, converted):
+            assign(value)
         
         return document_data
 
 
+def render_svg_in_worker(latex_code: str) -> Optional[str]:
+    """Rendu d'une expression dans un processus du pool (render_latex_batch)"""
+    return latex_renderer._render_or_none(latex_code)
+
+
 # Global instance for easy use
 latex_renderer = LaTeXToSVGRenderer()
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Migration 004 : Pré-calculer le rendu HTML des documents existants
+
+Cette migration :
+1. Parcourt les documents dont `renderer_version` est absent ou périmé
+2. Calcule `exercises_html` (LaTeX → SVG, schémas géométriques) une fois pour toutes
+3. Est idempotente : peut être relancée sans danger (à relancer après chaque
+   incrément de RENDERER_VERSION pour éviter le re-rendu paresseux au listing)
+
+Usage:
+    python migrations/004_backfill_rendered_documents.py
+"""
+
+import asyncio
+import os
+import sys
+import logging
+from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+# Ajouter le dossier parent au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from services.document_render_service import backfill_rendered_documents, RENDERER_VERSION
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    """Point d'entrée principal"""
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get('DB_NAME', 'lemaitremot')]
+    
+    logger.info(f"🔧 Début de la migration 004 : rendu HTML des documents (version {RENDERER_VERSION})")
+    
+    total = await backfill_rendered_documents(db.documents)
+    remaining = await db.documents.count_documents({"renderer_version": {"$ne": RENDERER_VERSION}})
+    
+    logger.info(f"✅ {total} documents rendus, {remaining} restants")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
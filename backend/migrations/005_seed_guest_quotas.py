@@ -0,0 +1,51 @@
+"""
+Migration 005 : Amorcer les quotas invités depuis l'historique des exports
+
+Cette migration :
+1. Regroupe par guest_id les exports invités des 30 derniers jours
+2. Écrit un document `guest_quotas` par invité (réservations + expires_at)
+3. Est idempotente : peut être relancée sans danger (les réservations de
+   chaque invité sont remplacées par ses exports de la fenêtre courante)
+
+À lancer après init_db_indexes.py, avant de déployer le quota par compteur.
+
+Usage:
+    python migrations/005_seed_guest_quotas.py
+"""
+
+import asyncio
+import os
+import sys
+import logging
+from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+# Ajouter le dossier parent au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from services.guest_quota_service import GuestQuotaService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    """Point d'entrée principal"""
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get('DB_NAME', 'lemaitremot')]
+    
+    logger.info("🔧 Début de la migration 005 : quotas invités")
+    
+    service = GuestQuotaService(db.guest_quotas)
+    await service.ensure_indexes()
+    total = await service.seed_from_exports(db.exports)
+    
+    logger.info(f"✅ {total} invités amorcés")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
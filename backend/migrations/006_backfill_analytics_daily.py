@@ -0,0 +1,50 @@
+"""
+Migration 006 : Construire les agrégats journaliers des analytics
+
+Cette migration :
+1. Regroupe `documents` par (propriétaire, jour, matière)
+2. Regroupe `exports` par (propriétaire, jour, template, matière du document)
+3. Écrit les compteurs dans `analytics_daily`
+4. Est idempotente : les compteurs sont remplacés, pas incrémentés
+   (à relancer pour corriger une dérive éventuelle des agrégats)
+
+Usage:
+    python migrations/006_backfill_analytics_daily.py
+"""
+
+import asyncio
+import os
+import sys
+import logging
+from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+# Ajouter le dossier parent au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from services.analytics_rollup_service import AnalyticsRollupService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    """Point d'entrée principal"""
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get('DB_NAME', 'lemaitremot')]
+    
+    logger.info("🔧 Début de la migration 006 : agrégats analytics journaliers")
+    
+    rollup = AnalyticsRollupService(db.analytics_daily)
+    await rollup.ensure_indexes()
+    document_rows, export_rows = await rollup.backfill(db.documents, db.exports)
+    
+    logger.info(f"✅ {document_rows} lignes documents, {export_rows} lignes exports")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -18,8 +18,10 @@ from curriculum.loader import (
     validate_curriculum
 )
 from services.curriculum_persistence_service import (
+    CURRICULUM_VERSION_CHECK_SECONDS,
     ChapterCreateRequest,
     ChapterUpdateRequest,
+    curriculum_snapshot,
     get_curriculum_persistence_service
 )
 from logger import get_logger
@@ -75,6 +77,17 @@ class ChapterCRUDResponse(BaseModel):
     chapter: Optional[AdminChapterResponse] = None
 
 
+class CurriculumVersionResponse(BaseModel):
+    """Version du curriculum servie par ce worker et version MongoDB"""
+    niveau: str
+    served_version: Optional[int] = None
+    latest_version: Optional[int] = None
+    stale: bool
+    source: str
+    total_chapitres: int
+    check_interval_seconds: float
+
+
 class AvailableOptionsResponse(BaseModel):
     """Options disponibles pour le formulaire d'édition"""
     generators: List[str]
@@ -341,6 +354,37 @@ async def get_curriculum_stats_endpoint(admin_check: bool = Depends(check_admin_
     }
 
 
+@router.get(
+    "/curriculum/version",
+    response_model=CurriculumVersionResponse,
+    summary="Version du curriculum servie",
+    description="Version de l'index curriculum de ce worker, comparée à la version MongoDB."
+)
+async def get_curriculum_version_endpoint(
+    admin_check: bool = Depends(check_admin_enabled),
+    db=Depends(get_db)
+):
+    """
+    Observabilité du rechargement multi-workers.
+    """
+    served = curriculum_snapshot.version
+    try:
+        latest = await curriculum_snapshot.read_version(db)
+    except Exception as e:
+        logger.warning(f"Version MongoDB du curriculum indisponible: {e}")
+        latest = None
+    
+    return CurriculumVersionResponse(
+        niveau=curriculum_snapshot.NIVEAU,
+        served_version=served,
+        latest_version=latest,
+        stale=latest is not None and (served is None or served < latest),
+        source="mongodb" if served is not None else "json",
+        total_chapitres=len(get_curriculum_index().by_official_code),
+        check_interval_seconds=CURRICULUM_VERSION_CHECK_SECONDS
+    )
+
+
 # ============================================================================
 # ENDPOINTS CRUD (V2)
 # ============================================================================
@@ -7,8 +7,10 @@ Endpoints:
 - GET /api/catalogue/exercise-types : Liste filtrée des ExerciseTypes
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Awaitable, Callable, List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from collections import defaultdict
@@ -16,6 +18,7 @@ from collections import defaultdict
 from models.catalogue_models import ChapterWithStats, CatalogueExerciseType
 from models.mathalea_models import ExerciseType
 from services.chapter_service import ChapterService
+from services.catalogue_stats_service import catalogue_cache, etag_matches, load_chapter_counts
 
 # Configuration MongoDB
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
@@ -119,6 +122,27 @@ CHAPITRES_STRUCTURE = {
 }
 
 
+# Le client revalide à chaque affichage (If-None-Match → 304 sans corps)
+CATALOGUE_CACHE_CONTROL = "no-cache"
+
+
+async def cached_catalogue_response(request: Request, key: Tuple, build: Callable[[], Awaitable]) -> Response:
+    """
+    Sert une réponse du catalogue depuis le cache, avec ETag / Cache-Control.
+    
+    build() n'est appelé (requêtes MongoDB) qu'en cas d'absence en cache.
+    """
+    cached = catalogue_cache.get(key)
+    if cached is None:
+        generation = catalogue_cache.generation
+        cached = catalogue_cache.put(key, jsonable_encoder(await build()), generation)
+    
+    headers = {"ETag": cached.etag, "Cache-Control": CATALOGUE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=cached.payload, headers=headers)
+
+
 def get_chapter_info(chapitre_id: str) -> Optional[dict]:
     """Récupère les infos d'un chapitre à partir de son ID"""
     for niveau, domaines in CHAPITRES_STRUCTURE.items():
@@ -134,13 +158,17 @@ def get_chapter_info(chapitre_id: str) -> Optional[dict]:
 
 
 @router.get("/levels", response_model=List[str])
-async def get_levels():
+async def get_levels(request: Request):
     """
     Récupère la liste des niveaux disponibles
     
     Returns:
         Liste des niveaux (6e, 5e, 4e, 3e)
     """
+    return await cached_catalogue_response(request, ("levels",), _build_levels)
+
+
+async def _build_levels() -> List[str]:
     # Récupérer les niveaux distincts depuis la DB
     levels = await exercise_types_collection.distinct("niveau")
     
@@ -155,7 +183,7 @@ async def get_levels():
 
 
 @router.get("/levels/{niveau}/chapters", response_model=List[ChapterWithStats])
-async def get_chapters_for_level(niveau: str):
+async def get_chapters_for_level(niveau: str, request: Request):
     """
     Récupère la liste des chapitres pour un niveau donné
     
@@ -165,27 +193,26 @@ async def get_chapters_for_level(niveau: str):
     Returns:
         Liste des chapitres avec nombre d'exercices
     """
+    return await cached_catalogue_response(
+        request, ("level_chapters", niveau), lambda: _build_chapters_for_level(niveau)
+    )
+
+
+async def _build_chapters_for_level(niveau: str) -> List[ChapterWithStats]:
     # Récupérer les chapitres depuis MongoDB
     chapters = await chapter_service.get_chapters_by_niveau(niveau)
     
+    if not chapters and niveau not in CHAPITRES_STRUCTURE:
+        raise HTTPException(status_code=404, detail=f"Niveau '{niveau}' non trouvé")
+    
+    # Effectifs de tous les chapitres du niveau en une seule agrégation
+    counts = await load_chapter_counts(exercise_types_collection, niveau)
+    
     if not chapters:
         # Fallback sur CHAPITRES_STRUCTURE si aucun chapitre trouvé dans MongoDB
-        if niveau not in CHAPITRES_STRUCTURE:
-            raise HTTPException(status_code=404, detail=f"Niveau '{niveau}' non trouvé")
-        
-        # Utiliser l'ancienne logique comme fallback
         chapitres_avec_stats = []
         for domaine, chapitres_list in CHAPITRES_STRUCTURE[niveau].items():
             for chapitre_def in chapitres_list:
-                count = await exercise_types_collection.count_documents({
-                    "niveau": niveau,
-                    "domaine": domaine,
-                    "$or": [
-                        {"chapitre_id": chapitre_def["titre"]},
-                        {"chapitre_id": {"$in": [chapitre_def["titre"], chapitre_def["id"]]}}
-                    ]
-                })
-                
                 chapitre_with_stats = ChapterWithStats(
                     id=chapitre_def["id"],
                     titre=chapitre_def["titre"],
@@ -193,7 +220,7 @@ async def get_chapters_for_level(niveau: str):
                     domaine=domaine,
                     code=chapitre_def.get("code"),
                     ordre=chapitre_def.get("ordre", 0),
-                    nb_exercises=count
+                    nb_exercises=counts.for_legacy_chapter(domaine, chapitre_def)
                 )
                 
                 chapitres_avec_stats.append(chapitre_with_stats)
@@ -204,31 +231,7 @@ async def get_chapters_for_level(niveau: str):
         return chapitres_avec_stats
     
     # Nouvelle logique : utiliser les chapitres depuis MongoDB
-    chapitres_avec_stats = []
-    
-    for chapter in chapters:
-        # Compter le nombre d'ExerciseTypes pour ce chapitre
-        # Chercher par code, legacy_code ou chapitre_id
-        count = await exercise_types_collection.count_documents({
-            "niveau": niveau,
-            "$or": [
-                {"chapitre_id": chapter["code"]},
-                {"chapitre_id": chapter.get("legacy_code")},
-                {"chapter_code": chapter["code"]}
-            ]
-        })
-        
-        chapitre_with_stats = ChapterWithStats(
-            id=chapter["code"],
-            titre=chapter["titre"],
-            niveau=chapter["niveau"],
-            domaine=chapter.get("domaine_legacy", chapter["domaine"]),  # Utiliser domaine_legacy pour compatibilité
-            code=chapter["code"],
-            ordre=chapter.get("ordre", 0),
-            nb_exercises=count
-        )
-        
-        chapitres_avec_stats.append(chapitre_with_stats)
+    chapitres_avec_stats = [_chapter_with_stats(chapter, counts.for_chapter(chapter)) for chapter in chapters]
     
     # Trier par domaine puis ordre
     chapitres_avec_stats.sort(key=lambda x: (x.domaine, x.ordre))
@@ -236,9 +239,21 @@ async def get_chapters_for_level(niveau: str):
     return chapitres_avec_stats
 
 
+def _chapter_with_stats(chapter: dict, count: int) -> ChapterWithStats:
+    return ChapterWithStats(
+        id=chapter["code"],
+        titre=chapter["titre"],
+        niveau=chapter["niveau"],
+        domaine=chapter.get("domaine_legacy", chapter["domaine"]),  # Utiliser domaine_legacy pour compatibilité
+        code=chapter["code"],
+        ordre=chapter.get("ordre", 0),
+        nb_exercises=count
+    )
+
 
 @router.get("/chapters", response_model=List[ChapterWithStats])
 async def get_chapters(
+    request: Request,
     niveau: Optional[str] = Query(None, description="Filtrer par niveau (ex: '6e', '2nde')"),
     domaine: Optional[str] = Query(None, description="Filtrer par domaine")
 ):
@@ -252,6 +267,12 @@ async def get_chapters(
     Returns:
         Liste des chapitres avec nombre d'exercices
     """
+    return await cached_catalogue_response(
+        request, ("chapters", niveau, domaine), lambda: _build_chapters(niveau, domaine)
+    )
+
+
+async def _build_chapters(niveau: Optional[str], domaine: Optional[str]) -> List[ChapterWithStats]:
     if niveau:
         chapters = await chapter_service.get_chapters_by_niveau_and_domaine(niveau, domaine)
     else:
@@ -261,31 +282,10 @@ async def get_chapters(
     if not chapters:
         return []
     
-    chapitres_avec_stats = []
+    # Comptage sans filtre de niveau (comme historiquement), en une seule agrégation
+    counts = await load_chapter_counts(exercise_types_collection)
     
-    for chapter in chapters:
-        # Compter le nombre d'ExerciseTypes pour ce chapitre
-        count = await exercise_types_collection.count_documents({
-            "$or": [
-                {"chapitre_id": chapter["code"]},
-                {"chapitre_id": chapter.get("legacy_code")},
-                {"chapter_code": chapter["code"]}
-            ]
-        })
-        
-        chapitre_with_stats = ChapterWithStats(
-            id=chapter["code"],
-            titre=chapter["titre"],
-            niveau=chapter["niveau"],
-            domaine=chapter.get("domaine_legacy", chapter["domaine"]),
-            code=chapter["code"],
-            ordre=chapter.get("ordre", 0),
-            nb_exercises=count
-        )
-        
-        chapitres_avec_stats.append(chapitre_with_stats)
-    
-    return chapitres_avec_stats
+    return [_chapter_with_stats(chapter, counts.for_chapter(chapter)) for chapter in chapters]
 
 
 @router.get("/exercise-types", response_model=List[CatalogueExerciseType])
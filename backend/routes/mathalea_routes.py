@@ -6,10 +6,12 @@ Architecture non-destructive - N'affecte pas les routes existantes
 """
 
 from fastapi import APIRouter, HTTPException, Query, Header, File, UploadFile
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 import uuid
 import shutil
@@ -38,6 +40,8 @@ from models.mathalea_models import (
     ProPdfRequest
 )
 
+from services.catalogue_stats_service import catalogue_cache
+
 # Router avec préfixe pour isoler du système existant
 router = APIRouter(prefix="/api/mathalea", tags=["MathALÉA System"])
 
@@ -153,6 +157,7 @@ async def create_exercise_type(exercise_type: ExerciseTypeCreate):
         )
     
     await exercise_types_collection.insert_one(exercise_type_dict)
+    catalogue_cache.invalidate("exercise type created")
     return ExerciseType(**exercise_type_dict)
 
 
@@ -298,6 +303,7 @@ async def update_exercise_type(exercise_type_id: str, update: ExerciseTypeUpdate
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="ExerciseType not found")
+    catalogue_cache.invalidate("exercise type updated")
     
     updated = await exercise_types_collection.find_one({"id": exercise_type_id}, {"_id": 0})
     return ExerciseType(**updated)
@@ -309,6 +315,7 @@ async def delete_exercise_type(exercise_type_id: str):
     result = await exercise_types_collection.delete_one({"id": exercise_type_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="ExerciseType not found")
+    catalogue_cache.invalidate("exercise type deleted")
 
 
 # ============================================================================
@@ -739,93 +746,30 @@ async def preview_exercise_sheet(sheet_id: str):
     """
     Générer un aperçu JSON complet d'une feuille d'exercices
     
-    Pour chaque SheetItem:
-    - Récupère l'ExerciseType associé
-    - Appelle generate_exercise() avec les paramètres du config
+    Via SheetPreviewBuilder (nombre de requêtes DB constant):
+    - Charge en lot les SheetItems, leurs ExerciseTypes et chapitres
+    - Génère chaque item avec les paramètres du config (ordre conservé)
     - Retourne le JSON structuré avec tous les exercices générés
     
     Note: Aucune IA n'est appelée ici (ai_enonce/ai_correction ignorés)
     """
-    from services.exercise_template_service import exercise_template_service
-    
     # 1. Récupérer la feuille
     sheet = await exercise_sheets_collection.find_one({"id": sheet_id}, {"_id": 0})
     if not sheet:
         raise HTTPException(status_code=404, detail="ExerciseSheet not found")
     
-    # 2. Récupérer tous les items, triés par order
-    cursor = sheet_items_collection.find({"sheet_id": sheet_id}, {"_id": 0}).sort("order", 1)
-    items = await cursor.to_list(length=1000)
-    
-    # 3. Générer les exercices pour chaque item
-    preview_items = []
-    
-    for item_dict in items:
-        try:
-            item = SheetItem(**item_dict)
-            
-            # Récupérer l'ExerciseType
-            exercise_type_dict = await exercise_types_collection.find_one(
-                {"id": item.exercise_type_id},
-                {"_id": 0}
-            )
-            
-            if not exercise_type_dict:
-                # Si l'ExerciseType n'existe plus
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"ExerciseType {item.exercise_type_id} not found for item {item.id}"
-                )
-            
-            exercise_type = ExerciseType(**exercise_type_dict)
-            
-            # Appeler le générateur (en interne, pas via HTTP)
-            generated = await exercise_template_service.generate_exercise(
-                exercise_type_id=item.exercise_type_id,
-                nb_questions=item.config.nb_questions,
-                seed=item.config.seed,
-                difficulty=item.config.difficulty,
-                options=item.config.options,
-                use_ai_enonce=False,  # Pas d'IA dans le preview
-                use_ai_correction=False
-            )
-            
-            # Construire l'item de preview
-            preview_item = {
-                "item_id": item.id,
-                "exercise_type_id": item.exercise_type_id,
-                "exercise_type_summary": {
-                    "code_ref": exercise_type.code_ref,
-                    "titre": exercise_type.titre,
-                    "niveau": exercise_type.niveau,
-                    "domaine": exercise_type.domaine
-                },
-                "config": item.config.dict(),
-                "generated": generated
-            }
-            
-            preview_items.append(preview_item)
-            
-        except ValueError as e:
-            # Erreur de validation (nb_questions hors limites, etc.)
-            raise HTTPException(status_code=400, detail=str(e))
-        except Exception as e:
-            # Erreur inattendue
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error generating exercise for item {item.id}: {str(e)}"
-            )
-    
-    # 4. Construire la réponse finale
-    response = {
-        "sheet_id": sheet_id,
-        "titre": sheet["titre"],
-        "niveau": sheet["niveau"],
-        "description": sheet.get("description"),
-        "items": preview_items
-    }
-    
-    return response
+    # 2. Items, ExerciseTypes et chapitres chargés en lot, puis génération
+    try:
+        return await sheet_preview_builder.build_preview(sheet)
+    except ExerciseTypeNotFoundError as e:
+        # Si l'ExerciseType n'existe plus
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        # Erreur de validation (nb_questions hors limites, etc.)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        # Erreur inattendue
+        raise HTTPException(status_code=500, detail=f"Error generating sheet preview: {str(e)}")
 
 
 # ============================================================================
@@ -834,7 +778,27 @@ async def preview_exercise_sheet(sheet_id: str):
 
 from pydantic import BaseModel, Field
 from services.exercise_template_service import exercise_template_service
+from services.sheet_preview_builder import SheetPreviewBuilder, ExerciseTypeNotFoundError
+from engine.pdf_engine.render_pool import render_pdf, RenderPoolError
 import base64
+import unicodedata
+from urllib.parse import quote
+
+
+def _attachment_disposition(filename: str) -> str:
+    """En-tête Content-Disposition sûr en latin-1 : repli ASCII + filename* UTF-8 (RFC 5987)"""
+    ascii_name = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    ascii_name = "".join(c if c.isprintable() and c not in '"\\' else "_" for c in ascii_name)
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+# Preview des fiches partagé par /preview et les exports PDF
+sheet_preview_builder = SheetPreviewBuilder(
+    sheet_items_collection,
+    exercise_types_collection,
+    db.chapters,
+    exercise_template_service
+)
 
 
 class GenerateExerciseRequest(BaseModel):
@@ -879,26 +843,31 @@ async def generate_exercise_endpoint(request: GenerateExerciseRequest):
 # ============================================================================
 
 @router.post("/sheets/{sheet_id}/generate-pdf")
-async def generate_sheet_pdf(sheet_id: str):
+async def generate_sheet_pdf(
+    sheet_id: str,
+    format: str = Query("json", pattern="^(json|zip)$", description="json (PDFs en base64) ou zip (archive en streaming)")
+):
     """
     Générer les 3 PDFs pour une feuille d'exercices
     
     Sprint D & E - Pipeline PDF complet avec IA optionnelle:
     1. Récupère la feuille et génère le preview
     2. Si IA activée: enrichit les énoncés/corrections
-    3. Génère 3 PDFs: sujet, élève, corrigé
-    4. Retourne les PDFs en base64
+    3. Génère 3 PDFs en parallèle: sujet, élève, corrigé
+    4. Retourne les PDFs en base64 (format=json) ou en archive ZIP
+       diffusée au fil des rendus (format=zip)
     
     Returns:
-        Dict avec 3 clés contenant les PDFs en base64:
+        format=json: Dict avec 3 clés contenant les PDFs en base64:
         - subject_pdf: PDF sujet (pour professeur)
         - student_pdf: PDF élève (pour distribution)
         - correction_pdf: PDF corrigé (avec solutions)
+        format=zip: application/zip contenant <fiche>_sujet.pdf,
+        <fiche>_eleve.pdf et <fiche>_corrige.pdf
     """
     from engine.pdf_engine.mathalea_sheet_pdf_builder import (
-        build_sheet_subject_pdf,
-        build_sheet_student_pdf,
-        build_sheet_correction_pdf
+        build_sheet_pdfs,
+        start_sheet_pdfs_zip
     )
     from engine.pdf_engine.sheet_ai_enrichment_helper import (
         apply_ai_enrichment_to_sheet_preview,
@@ -911,65 +880,13 @@ async def generate_sheet_pdf(sheet_id: str):
         if not sheet:
             raise HTTPException(status_code=404, detail="ExerciseSheet not found")
         
-        # 2. Générer le preview (réutilise la logique du endpoint /preview)
-        cursor = sheet_items_collection.find({"sheet_id": sheet_id}, {"_id": 0}).sort("order", 1)
-        items = await cursor.to_list(length=1000)
-        
-        preview_items = []
-        for item_dict in items:
-            try:
-                item = SheetItem(**item_dict)
-                
-                # Récupérer l'ExerciseType
-                exercise_type_dict = await exercise_types_collection.find_one(
-                    {"id": item.exercise_type_id},
-                    {"_id": 0}
-                )
-                
-                if not exercise_type_dict:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"ExerciseType {item.exercise_type_id} not found"
-                    )
-                
-                exercise_type = ExerciseType(**exercise_type_dict)
-                
-                # Générer l'exercice
-                generated = await exercise_template_service.generate_exercise(
-                    exercise_type_id=item.exercise_type_id,
-                    nb_questions=item.config.nb_questions,
-                    seed=item.config.seed,
-                    difficulty=item.config.difficulty,
-                    options=item.config.options,
-                    use_ai_enonce=False,
-                    use_ai_correction=False
-                )
-                
-                preview_item = {
-                    "item_id": item.id,
-                    "exercise_type_id": item.exercise_type_id,
-                    "exercise_type_summary": {
-                        "code_ref": exercise_type.code_ref,
-                        "titre": exercise_type.titre,
-                        "niveau": exercise_type.niveau,
-                        "domaine": exercise_type.domaine
-                    },
-                    "config": item.config.dict(),
-                    "generated": generated
-                }
-                
-                preview_items.append(preview_item)
-                
-            except ValueError as e:
-                raise HTTPException(status_code=400, detail=str(e))
-        
-        preview = {
-            "sheet_id": sheet_id,
-            "titre": sheet["titre"],
-            "niveau": sheet["niveau"],
-            "description": sheet.get("description"),
-            "items": preview_items
-        }
+        # 2. Générer le preview (même construction que le endpoint /preview)
+        try:
+            preview = await sheet_preview_builder.build_preview(sheet)
+        except ExerciseTypeNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # 3. Enrichissement IA optionnel (Sprint E)
         # Vérifier si au moins un item a l'IA activée
@@ -980,21 +897,27 @@ async def generate_sheet_pdf(sheet_id: str):
         else:
             logger.info(f"⏭️  IA désactivée pour la feuille {sheet_id}, génération directe")
         
-        # 4. Générer les 3 PDFs
-        subject_pdf_bytes = build_sheet_subject_pdf(preview)
-        student_pdf_bytes = build_sheet_student_pdf(preview)
-        correction_pdf_bytes = build_sheet_correction_pdf(preview)
+        # 4. Générer les 3 PDFs (en parallèle)
+        if format == "zip":
+            filename_base = f"LeMaitreMot_{sheet['titre'].replace(' ', '_')}"
+            # Premier rendu attendu ici : 503/504 possibles avant les en-têtes
+            chunks = await start_sheet_pdfs_zip(preview, filename_base)
+            return StreamingResponse(
+                chunks,
+                media_type="application/zip",
+                headers={"Content-Disposition": _attachment_disposition(f"{filename_base}.zip")}
+            )
+        
+        pdfs = await build_sheet_pdfs(preview)
         
         # 5. Encoder en base64
         response = {
-            "subject_pdf": base64.b64encode(subject_pdf_bytes).decode('utf-8'),
-            "student_pdf": base64.b64encode(student_pdf_bytes).decode('utf-8'),
-            "correction_pdf": base64.b64encode(correction_pdf_bytes).decode('utf-8'),
+            **{key: base64.b64encode(pdf_bytes).decode('utf-8') for key, pdf_bytes in pdfs.items()},
             "metadata": {
                 "sheet_id": sheet_id,
                 "titre": sheet["titre"],
                 "niveau": sheet["niveau"],
-                "nb_exercises": len(preview_items),
+                "nb_exercises": len(preview["items"]),
                 "ai_enrichment_applied": check_if_ai_needed(preview),
                 "generated_at": datetime.now(timezone.utc).isoformat()
             }
@@ -1002,7 +925,7 @@ async def generate_sheet_pdf(sheet_id: str):
         
         return response
         
-    except HTTPException:
+    except (HTTPException, RenderPoolError):
         raise
     except Exception as e:
         raise HTTPException(
@@ -1043,75 +966,21 @@ async def export_standard_pdf(sheet_id: str):
         if not sheet:
             raise HTTPException(status_code=404, detail="ExerciseSheet not found")
         
-        # 2. Générer le preview
-        cursor = sheet_items_collection.find({"sheet_id": sheet_id}, {"_id": 0}).sort("order", 1)
-        items = await cursor.to_list(length=1000)
+        # 2. Générer le preview (items invalides ignorés)
+        preview = await sheet_preview_builder.build_preview(sheet, skip_errors=True)
         
-        if not items:
+        if not preview["items"]:
             raise HTTPException(
                 status_code=400,
                 detail="Cannot generate PDF for empty sheet"
             )
         
-        preview_items = []
-        for item_dict in items:
-            try:
-                item = SheetItem(**item_dict)
-                
-                # Récupérer l'ExerciseType
-                exercise_type_dict = await exercise_types_collection.find_one(
-                    {"id": item.exercise_type_id},
-                    {"_id": 0}
-                )
-                
-                if not exercise_type_dict:
-                    logger.warning(f"⚠️ ExerciseType {item.exercise_type_id} not found")
-                    continue
-                
-                exercise_type = ExerciseType(**exercise_type_dict)
-                
-                # Générer l'exercice
-                generated = await exercise_template_service.generate_exercise(
-                    exercise_type_id=item.exercise_type_id,
-                    nb_questions=item.config.nb_questions,
-                    seed=item.config.seed,
-                    difficulty=item.config.difficulty,
-                    options=item.config.options,
-                    use_ai_enonce=False,
-                    use_ai_correction=False
-                )
-                
-                preview_item = {
-                    "item_id": item.id,
-                    "exercise_type_id": item.exercise_type_id,
-                    "exercise_type_summary": {
-                        "code_ref": exercise_type.code_ref,
-                        "titre": exercise_type.titre,
-                        "niveau": exercise_type.niveau,
-                        "domaine": exercise_type.domaine
-                    },
-                    "config": item.config.dict(),
-                    "generated": generated
-                }
-                
-                preview_items.append(preview_item)
-                
-            except Exception as e:
-                logger.error(f"❌ Error generating exercise: {e}")
-                continue
-        
-        preview = {
-            "sheet_id": sheet_id,
-            "titre": sheet["titre"],
-            "niveau": sheet["niveau"],
-            "description": sheet.get("description"),
-            "items": preview_items
-        }
-        
         # 3. Générer les 2 PDFs uniquement
         logger.info(f"📄 Génération export standard pour la feuille {sheet_id}")
-        student_pdf_bytes = build_sheet_student_pdf(preview)
-        correction_pdf_bytes = build_sheet_correction_pdf(preview)
+        student_pdf_bytes, correction_pdf_bytes = await asyncio.gather(
+            build_sheet_student_pdf(preview),
+            build_sheet_correction_pdf(preview)
+        )
         
         # 4. Créer le nom de fichier base
         filename_base = f"LeMaitreMot_{sheet['titre'].replace(' ', '_')}"
@@ -1125,7 +994,7 @@ async def export_standard_pdf(sheet_id: str):
                 "sheet_id": sheet_id,
                 "titre": sheet["titre"],
                 "niveau": sheet["niveau"],
-                "nb_exercises": len(preview_items),
+                "nb_exercises": len(preview["items"]),
                 "generated_at": datetime.now(timezone.utc).isoformat()
             }
         }
@@ -1133,7 +1002,7 @@ async def export_standard_pdf(sheet_id: str):
         logger.info(f"✅ Export standard généré: 2 PDFs pour la feuille {sheet_id}")
         return response
         
-    except HTTPException:
+    except (HTTPException, RenderPoolError):
         raise
     except Exception as e:
         logger.error(f"❌ Error generating standard PDF export: {e}", exc_info=True)
@@ -1196,68 +1065,17 @@ async def generate_pro_pdf(
             logger.error(f"❌ Fiche {sheet_id} introuvable")
             raise HTTPException(status_code=404, detail=f"Sheet {sheet_id} not found")
         
-        # 2. Récupérer les items de la fiche
-        items = await sheet_items_collection.find({"sheet_id": sheet_id}, {"_id": 0}).to_list(1000)
+        # 2. Générer le preview JSON (nécessaire pour l'adapter, items invalides ignorés)
+        preview_json = await sheet_preview_builder.build_preview(sheet, skip_errors=True)
         
-        if not items:
+        if not preview_json["items"]:
             logger.warning(f"⚠️ Fiche {sheet_id} sans exercices")
             raise HTTPException(
                 status_code=400,
                 detail="Cannot generate PDF for empty sheet"
             )
         
-        # 3. Générer le preview JSON (nécessaire pour l'adapter)
-        preview_items = []
-        for item in items:
-            # Générer les exercices
-            exercise_type_id = item.get("exercise_type_id")
-            exercise_type = await exercise_types_collection.find_one(
-                {"id": exercise_type_id},
-                {"_id": 0}
-            )
-            
-            if not exercise_type:
-                logger.warning(f"⚠️ ExerciseType {exercise_type_id} not found")
-                continue
-            
-            config = item.get("config", {})
-            nb_questions = config.get("nb_questions", 5)
-            seed = config.get("seed", 0)
-            difficulty = config.get("difficulty", "moyen")
-            
-            # Générer l'exercice
-            generated_exercise = await exercise_template_service.generate_exercise(
-                exercise_type_id=exercise_type_id,
-                nb_questions=nb_questions,
-                seed=seed,
-                difficulty=difficulty
-            )
-            
-            preview_item = {
-                "item_id": item.get("id"),
-                "exercise_type_id": exercise_type_id,
-                "exercise_type_summary": {
-                    "code_ref": exercise_type.get("code_ref"),
-                    "titre": exercise_type.get("titre"),
-                    "niveau": exercise_type.get("niveau"),
-                    "domaine": exercise_type.get("domaine"),
-                    "generator_kind": exercise_type.get("generator_kind")
-                },
-                "config": config,
-                "generated": generated_exercise
-            }
-            
-            preview_items.append(preview_item)
-        
-        preview_json = {
-            "sheet_id": sheet_id,
-            "titre": sheet.get("titre", "Fiche d'exercices"),
-            "niveau": sheet.get("niveau", ""),
-            "description": sheet.get("description", ""),
-            "items": preview_items
-        }
-        
-        # 4. Récupérer la configuration Pro de l'utilisateur depuis MongoDB
+        # 3. Récupérer la configuration Pro de l'utilisateur depuis MongoDB
         from services.pro_config_service import get_pro_config_for_user
         
         # TODO: Extraire le vrai email depuis le token de session
@@ -1288,7 +1106,7 @@ async def generate_pro_pdf(
         
         logger.info(f"✅ Template config préparée: {template_config}")
         
-        # 5. Convertir le preview Builder vers le format Legacy attendu par les templates
+        # 4. Convertir le preview Builder vers le format Legacy attendu par les templates
         from engine.pdf_engine.builder_to_legacy_converter import convert_builder_to_legacy_pro_format
         
         # Extraire le type_doc de la requête
@@ -1300,9 +1118,8 @@ async def generate_pro_pdf(
             type_doc=type_doc
         )
         
-        # 6. Générer les 2 PDFs Pro (Sujet + Corrigé) via Jinja2
+        # 5. Générer les 2 PDFs Pro (Sujet + Corrigé) via Jinja2
         from engine.pdf_engine.template_renderer import render_pro_sujet, render_pro_corrige
-        import weasyprint
         
         # Générer le Sujet Pro (énoncés + zones de réponse)
         html_sujet = render_pro_sujet(
@@ -1310,7 +1127,6 @@ async def generate_pro_pdf(
             document_data=document_data,
             template_config=template_config
         )
-        pro_subject_pdf_bytes = weasyprint.HTML(string=html_sujet).write_pdf()
         
         # Générer le Corrigé Pro (énoncés + solutions)
         html_corrige = render_pro_corrige(
@@ -1318,14 +1134,19 @@ async def generate_pro_pdf(
             document_data=document_data,
             template_config=template_config
         )
-        pro_correction_pdf_bytes = weasyprint.HTML(string=html_corrige).write_pdf()
         
-        # 7. Encoder les 2 PDFs en base64
+        # Les 2 rendus partent en parallèle dans le pool
+        pro_subject_pdf_bytes, pro_correction_pdf_bytes = await asyncio.gather(
+            render_pdf(html_sujet),
+            render_pdf(html_corrige)
+        )
+        
+        # 6. Encoder les 2 PDFs en base64
         import base64
         pro_subject_pdf_b64 = base64.b64encode(pro_subject_pdf_bytes).decode('utf-8')
         pro_correction_pdf_b64 = base64.b64encode(pro_correction_pdf_bytes).decode('utf-8')
         
-        # 8. Créer le nom de fichier base
+        # 7. Créer le nom de fichier base
         base_filename = f"LeMaitreMot_{sheet.get('titre', 'Fiche').replace(' ', '_')}_Pro"
         
         logger.info(f"✅ 2 PDFs Pro générés avec succès pour la fiche {sheet_id} (template: {template})")
@@ -1342,7 +1163,7 @@ async def generate_pro_pdf(
             "logo_url": template_config.get("logo_url")
         }
         
-    except HTTPException:
+    except (HTTPException, RenderPoolError):
         raise
     except Exception as e:
         logger.error(f"❌ Error generating Pro PDF: {e}", exc_info=True)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark des analytics Pro : requêtes historiques (regex non ancrée) vs agrégats journaliers
+Usage : python scripts/bench_analytics.py [--sizes 10000,100000,1000000] [--runs N]
+
+Nécessite MongoDB (MONGO_URL) ; travaille dans une base jetable
+<DB_NAME>_bench_analytics, supprimée à la fin.
+
+Pour chaque taille, `documents` est rempli d'invités aléatoires ; l'utilisateur
+Pro mesuré garde la même activité (300 documents, 100 exports). La latence de
+l'overview doit rester plate côté agrégats, et croître avec la collection côté
+historique.
+"""
+
+import sys
+import os
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.analytics_rollup_service import AnalyticsRollupService
+
+PRO_EMAIL = "prof.bench@example.com"
+MATIERES = ["Mathématiques", "Français", "Physique-Chimie", "SVT"]
+TEMPLATES = ["classique", "moderne", "academique"]
+BATCH_SIZE = 10_000
+
+
+async def legacy_overview(db, user_email: str):
+    """Requêtes de l'ancien /analytics/overview"""
+    guest_regex = {"$regex": f".*{user_email.split('@')[0]}.*"}
+    owner_match = {"$or": [{"user_id": user_email}, {"guest_id": guest_regex}]}
+    thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
+    await db.documents.count_documents({"user_id": user_email})
+    await db.documents.count_documents({"guest_id": guest_regex})
+    await db.exports.count_documents({"user_email": user_email})
+    await db.documents.count_documents({**owner_match, "created_at": {"$gte": thirty_days_ago}})
+    await db.exports.count_documents({"user_email": user_email, "created_at": {"$gte": thirty_days_ago}})
+    await db.documents.aggregate([
+        {"$match": owner_match}, {"$group": {"_id": "$matiere", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    await db.exports.aggregate([
+        {"$match": {"user_email": user_email}}, {"$group": {"_id": "$template_used", "count": {"$sum": 1}}}
+    ]).to_list(None)
+
+
+def random_day(now):
+    return now - timedelta(days=random.randint(0, 365), seconds=random.randint(0, 86400))
+
+
+async def grow_documents(db, target: int, now: datetime):
+    """Complète `documents` jusqu'à target avec des invités aléatoires"""
+    missing = target - await db.documents.estimated_document_count()
+    while missing > 0:
+        batch = [
+            {
+                "id": f"doc-{random.getrandbits(64):x}",
+                "guest_id": f"guest_{random.getrandbits(40):x}",
+                "matiere": random.choice(MATIERES),
+                "created_at": random_day(now)
+            }
+            for _ in range(min(BATCH_SIZE, missing))
+        ]
+        await db.documents.insert_many(batch, ordered=False)
+        missing -= len(batch)
+
+
+async def seed_pro_user(db, now: datetime):
+    documents = [
+        {"id": f"pro-doc-{i}", "user_id": PRO_EMAIL, "matiere": random.choice(MATIERES), "created_at": random_day(now)}
+        for i in range(300)
+    ]
+    await db.documents.insert_many(documents)
+    await db.exports.insert_many([
+        {
+            "id": f"pro-export-{i}",
+            "document_id": random.choice(documents)["id"],
+            "user_email": PRO_EMAIL,
+            "is_pro": True,
+            "template_used": random.choice(TEMPLATES),
+            "created_at": random_day(now)
+        }
+        for i in range(100)
+    ])
+
+
+async def timed(coro_factory, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await coro_factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark des analytics Pro")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Tailles de `documents` (séparées par des virgules)")
+    parser.add_argument("--runs", type=int, default=5, help="Mesures par taille (médiane)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[f"{os.environ.get('DB_NAME', 'lemaitremot')}_bench_analytics"]
+    await client.drop_database(db.name)
+
+    rollup = AnalyticsRollupService(db.analytics_daily)
+    await rollup.ensure_indexes()
+    await db.documents.create_index("id")
+    now = datetime.now(timezone.utc)
+    await seed_pro_user(db, now)
+
+    print(f"📊 /analytics/overview — médiane sur {args.runs} appels")
+    print(f"  {'documents':>10}   {'historique':>12}   {'agrégats':>10}")
+    try:
+        for size in (int(value) for value in args.sizes.split(",")):
+            await grow_documents(db, size, now)
+            await rollup.backfill(db.documents, db.exports)
+            legacy_ms = await timed(lambda: legacy_overview(db, PRO_EMAIL), args.runs)
+            rollup_ms = await timed(lambda: rollup.get_overview(PRO_EMAIL), args.runs)
+            print(f"  {size:>10}   {legacy_ms:>9.1f} ms   {rollup_ms:>7.1f} ms")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark du rendu LaTeX → SVG : chemin rapide (glyphes mathtext) vs figure matplotlib
+Usage : python scripts/bench_latex_render.py [--specs N] [--seed S]
+
+Le corpus est tiré des sorties de MathGenerationService (résultats et étapes
+de calcul des chapitres à formules). Les caches sont contournés : chaque
+expression est rendue par les deux chemins.
+"""
+
+import sys
+import os
+import re
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latex_to_svg import LaTeXToSVGRenderer
+from services.math_generation_service import MathGenerationService
+
+CORPUS_CHAPTERS = [
+    ("6e", "Fractions"),
+    ("5e", "Fractions"),
+    ("4e", "Fractions"),
+    ("4e", "Puissances"),
+    ("3e", "Puissances"),
+    ("4e", "Calcul littéral"),
+    ("4e", "Théorème de Pythagore"),
+]
+
+# Fragments de formule dans le texte des étapes (fractions, puissances, produits)
+FORMULA_RE = re.compile(r'[-\d\w(][^:;]*(?:\\frac|\^\{|×|÷|²)[^:;]*')
+
+
+def build_corpus(nb_specs: int, seed: int):
+    """Expressions distinctes issues des specs générées"""
+    random.seed(seed)
+    service = MathGenerationService()
+    expressions = set()
+    for niveau, chapitre in CORPUS_CHAPTERS:
+        for spec in service.generate_math_exercise_specs(niveau, chapitre, "moyen", nb_specs):
+            for text in [str(spec.resultat_final or "")] + list(spec.etapes_calculees or []):
+                for fragment in FORMULA_RE.findall(text):
+                    expressions.add(fragment.strip().replace("×", "\\times ").replace("÷", "\\div "))
+    return sorted(expressions)
+
+
+def time_path(render, expressions):
+    """Durées (ms) de rendu de chaque expression"""
+    durations = []
+    for expression in expressions:
+        start = time.perf_counter()
+        render(expression)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparer les deux chemins de rendu LaTeX → SVG")
+    parser.add_argument("--specs", type=int, default=10, help="Specs générées par chapitre (défaut : 10)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du corpus (défaut : 42)")
+
+    args = parser.parse_args()
+
+    renderer = LaTeXToSVGRenderer(cache_dir="/tmp/latex_bench_cache")
+    expressions = build_corpus(args.specs, args.seed)
+    supported = [e for e in expressions if renderer._is_fast_path_supported(e)]
+
+    # Échauffement (chargement des polices) hors mesure
+    renderer._render_svg_fast("\\frac{1}{2}")
+    renderer._render_svg_figure("\\frac{1}{2}")
+
+    fast = time_path(renderer._render_svg_fast, supported)
+    figure = time_path(renderer._render_svg_figure, supported)
+
+    print(f"\n📊 Corpus : {len(expressions)} expressions, {len(supported)} dans le sous-ensemble rapide\n")
+    for label, durations in (("chemin rapide", fast), ("figure matplotlib", figure)):
+        if durations:
+            print(f"  {label:<18} moyenne {statistics.mean(durations):7.2f} ms/expr"
+                  f"   médiane {statistics.median(durations):7.2f} ms/expr")
+    if fast and figure:
+        print(f"\n  ⚡ Gain : x{statistics.mean(figure) / statistics.mean(fast):.1f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark du coût d'un appel AppLogger (µs par appel, côté appelant)
+Usage : python scripts/bench_logging.py [--calls N] [--format text|json]
+
+Compare :
+    - avant  : écriture synchrone stdout + fichier, redaction en 5 passes regex
+    - sync   : écriture synchrone, redaction par l'alternation précompilée
+    - queue  : QueueHandler → QueueListener (formatage, redaction, E/S en thread)
+    - sample : queue + échantillonnage INFO à 10 % (APP_LOG_SAMPLE_RATE=0.1)
+
+La sortie console est redirigée vers /dev/null, le fichier vers un répertoire temporaire.
+"""
+
+import sys
+import os
+import re
+import time
+import argparse
+import tempfile
+import statistics
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logger import AppLogger, SensitiveDataFilter
+
+
+def legacy_redact(text: str) -> str:
+    """Redaction historique : 5 passes re.sub non précompilées"""
+    patterns = SensitiveDataFilter.SENSITIVE_PATTERNS
+    text = re.sub(patterns['email'], lambda m: f"{m.group(1)[:3]}***@{m.group(1).split('@')[1]}", text)
+    for pattern_name, pattern in patterns.items():
+        if pattern_name != 'email':
+            text = re.sub(pattern, r'\1***REDACTED***', text, flags=re.IGNORECASE)
+    return text
+
+
+@contextmanager
+def configured(env: dict, legacy: bool = False):
+    previous_env = {key: os.environ.get(key) for key in env}
+    previous_redact = SensitiveDataFilter.__dict__['redact_sensitive_data']
+    os.environ.update(env)
+    if legacy:
+        SensitiveDataFilter.redact_sensitive_data = staticmethod(legacy_redact)
+    try:
+        yield
+    finally:
+        SensitiveDataFilter.redact_sensitive_data = previous_redact
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def run(env: dict, calls: int, log_dir: str, legacy: bool = False) -> str:
+    """Mesure le temps passé dans l'appelant ; retourne la ligne de résultat"""
+    with configured(env, legacy), open(os.devnull, "w") as devnull:
+        real_stdout, sys.stdout = sys.stdout, devnull  # Console handler → /dev/null
+        try:
+            app_logger = AppLogger(log_dir=log_dir)
+            timings = []
+            for i in range(calls):
+                start = time.perf_counter()
+                app_logger.info(
+                    f"Exercise {i} rendered for user teacher{i}@example.com",
+                    module_name="export",
+                    func_name="export_pdf",
+                    doc_id=f"doc-{i}",
+                    exercise_id=f"ex-{i}",
+                    duration_ms=12
+                )
+                timings.append((time.perf_counter() - start) * 1e6)
+            drain_start = time.perf_counter()
+            app_logger.shutdown()
+            drain_ms = (time.perf_counter() - drain_start) * 1000
+        finally:
+            sys.stdout = real_stdout
+
+    timings.sort()
+    return (
+        f"p50 {statistics.median(timings):7.1f} µs   "
+        f"p99 {timings[int(len(timings) * 0.99)]:7.1f} µs   "
+        f"moyenne {statistics.fmean(timings):7.1f} µs   (vidage file : {drain_ms:.0f} ms)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline de logs AppLogger")
+    parser.add_argument("--calls", type=int, default=5000, help="Nombre d'appels par scénario")
+    parser.add_argument("--format", choices=["text", "json"], default="json", help="APP_LOG_FORMAT")
+    args = parser.parse_args()
+
+    base_env = {"APP_ENV": "prod", "APP_LOG_FORMAT": args.format, "APP_LOG_SAMPLE_RATE": "1.0"}
+    scenarios = [
+        ("avant", {**base_env, "APP_LOG_ASYNC": "0"}, True),
+        ("sync", {**base_env, "APP_LOG_ASYNC": "0"}, False),
+        ("queue", {**base_env, "APP_LOG_ASYNC": "1"}, False),
+        ("sample", {**base_env, "APP_LOG_ASYNC": "1", "APP_LOG_SAMPLE_RATE": "0.1"}, False),
+    ]
+
+    print(f"📊 Coût d'un appel logger.info ({args.calls} appels, format {args.format})")
+    with tempfile.TemporaryDirectory() as log_dir:
+        for name, env, legacy in scenarios:
+            print(f"  {name:<7} {run(env, args.calls, log_dir, legacy)}")
+
+
+if __name__ == "__main__":
+    main()
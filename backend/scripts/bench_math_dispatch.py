@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark du dispatch de MathGenerationService (specs par seconde, un cœur)
+Usage : python scripts/bench_math_dispatch.py [--seconds S] [--nb N]
+
+Compare :
+    - avant    : dicts chapitre → types et chapitre/type → méthode liée reconstruits à chaque spec
+    - registre : CHAPTER_EXERCISE_TYPES / CHAPTER_GENERATORS / TYPE_GENERATORS construits à l'import
+
+Deux mesures :
+    - dispatch : _map_chapter_to_types + résolution du générateur seuls (µs par appel)
+    - specs/s  : generate_math_exercise_specs complet, un service neuf par requête de N specs
+                 (comme ExerciseTemplateService), sur tous les chapitres mappés
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.math_generation_service import (
+    MathGenerationService,
+    CHAPTER_EXERCISE_TYPES,
+    CHAPTER_GENERATORS,
+    TYPE_GENERATORS
+)
+
+
+class LegacyDispatchService(MathGenerationService):
+    """Reproduit l'ancien dispatch : tables reconstruites à chaque appel"""
+
+    def _map_chapter_to_types(self, chapitre, niveau):
+        mapping = {name: list(types) for name, types in CHAPTER_EXERCISE_TYPES.items()}
+        if chapitre not in mapping:
+            raise ValueError(f"CHAPITRE NON MAPPÉ : '{chapitre}' ({sorted(mapping.keys())})")
+        return mapping[chapitre]
+
+    def _legacy_generator(self, chapitre, exercise_type):
+        chapter_specific_generators = {name: getattr(self, fn.__name__) for name, fn in CHAPTER_GENERATORS.items()}
+        if chapitre in chapter_specific_generators:
+            return chapter_specific_generators[chapitre]
+        generators = {kind: getattr(self, fn.__name__) for kind, fn in TYPE_GENERATORS.items()}
+        return generators.get(exercise_type)
+
+    def _generate_spec_by_type(self, niveau, chapitre, exercise_type, difficulte):
+        generator = self._legacy_generator(chapitre, exercise_type)
+        if generator:
+            return generator(niveau, chapitre, difficulte)
+        return self._gen_calcul_decimaux(niveau, chapitre, difficulte)
+
+
+def registry_generator(service, chapitre, exercise_type):
+    return CHAPTER_GENERATORS.get(chapitre) or TYPE_GENERATORS.get(exercise_type)
+
+
+def bench_dispatch(service_class, resolve, calls: int) -> float:
+    """µs par (mapping chapitre + résolution du générateur)"""
+    service = service_class()
+    chapters = list(CHAPTER_EXERCISE_TYPES)
+    start = time.perf_counter()
+    for i in range(calls):
+        chapitre = chapters[i % len(chapters)]
+        exercise_type = service._map_chapter_to_types(chapitre, "6e")[0]
+        resolve(service, chapitre, exercise_type)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def bench_specs(service_class, seconds: float, nb: int) -> float:
+    """Specs générées par seconde sur un cœur"""
+    chapters = list(CHAPTER_EXERCISE_TYPES)
+    random.seed(42)
+    generated = 0
+    requests = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        service = service_class()  # Un service par requête, comme ExerciseTemplateService
+        chapitre = chapters[requests % len(chapters)]
+        try:
+            generated += len(service.generate_math_exercise_specs("6e", chapitre, "moyen", nb))
+        except Exception:
+            pass  # Un générateur en échec ne doit pas fausser la comparaison du dispatch
+        requests += 1
+    return generated / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du dispatch MathGenerationService")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Durée de chaque mesure specs/s")
+    parser.add_argument("--nb", type=int, default=5, help="Specs par requête")
+    parser.add_argument("--calls", type=int, default=20000, help="Appels pour la mesure du dispatch seul")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    legacy_us = bench_dispatch(LegacyDispatchService, LegacyDispatchService._legacy_generator, args.calls)
+    registry_us = bench_dispatch(MathGenerationService, registry_generator, args.calls)
+    legacy_rate = bench_specs(LegacyDispatchService, args.seconds, args.nb)
+    registry_rate = bench_specs(MathGenerationService, args.seconds, args.nb)
+
+    print(f"📊 Dispatch MathGenerationService — {len(CHAPTER_EXERCISE_TYPES)} chapitres, {len(TYPE_GENERATORS)} types")
+    print(f"  {'':10} {'dispatch':>12} {'specs/s':>10}")
+    print(f"  {'avant':10} {legacy_us:>9.2f} µs {legacy_rate:>10.0f}")
+    print(f"  {'registre':10} {registry_us:>9.2f} µs {registry_rate:>10.0f}")
+    print(f"  gain dispatch x{legacy_us / registry_us:.1f}, specs/s {registry_rate / legacy_rate - 1:+.1%}")
+
+
+if __name__ == "__main__":
+    main()
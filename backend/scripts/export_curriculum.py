@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Export du curriculum 6e MongoDB → curriculum/curriculum_6e.json
+Usage : python scripts/export_curriculum.py [--output PATH]
+
+Les écritures admin ne réécrivent plus le fichier JSON : MongoDB
+(curriculum_chapters) est la source de vérité, servie par chaque worker
+depuis un snapshot versionné. Cette commande fige l'état courant dans le
+fichier (jeu initial d'une base vide, repli hors MongoDB) ; les autres
+clés du fichier (macro_groups, ...) sont conservées.
+"""
+
+import sys
+import os
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from services.curriculum_persistence_service import CURRICULUM_6E_PATH, CurriculumPersistenceService
+
+
+async def run(output: str):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[os.environ.get('DB_NAME', 'lemaitremot')]
+    try:
+        count = await CurriculumPersistenceService(db).export_to_json(output)
+    finally:
+        client.close()
+
+    print(f"✅ {count} chapitres → {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export du curriculum 6e vers le fichier JSON")
+    parser.add_argument("--output", default=CURRICULUM_6E_PATH, help="Fichier de sortie")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.output))
+
+
+if __name__ == "__main__":
+    main()
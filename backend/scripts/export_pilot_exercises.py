@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Export des exercices des chapitres pilotes MongoDB → data/*_exercises.py
+Usage : python scripts/export_pilot_exercises.py [--chapter 6e_GM07 ...]
+
+Les écritures admin ne régénèrent plus les fichiers Python : MongoDB
+(admin_exercises) est la source de vérité, servie depuis un snapshot en
+mémoire. Cette commande fige l'état courant dans les fichiers data/
+(jeu initial d'une base vide, repli hors MongoDB) ; à committer ensuite.
+"""
+
+import sys
+import os
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from services.exercise_persistence_service import ExercisePersistenceService
+
+# Chapitres exportables (gabarit des fichiers statiques ; TESTS_DYN est maintenu à la main)
+EXPORTABLE_CHAPTERS = ["6e_GM07", "6e_GM08"]
+
+
+async def run(chapters):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[os.environ.get('DB_NAME', 'lemaitremot')]
+    try:
+        service = ExercisePersistenceService(db)
+        for chapter_code in chapters:
+            filepath = await service.export_to_python_file(chapter_code)
+            if filepath:
+                print(f"✅ {chapter_code} → {filepath}")
+            else:
+                print(f"⚠️ {chapter_code} : pas de fichier exportable")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export des exercices pilotes vers data/")
+    parser.add_argument(
+        "--chapter", action="append", choices=EXPORTABLE_CHAPTERS,
+        help="Chapitre à exporter (répétable, défaut : tous)"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run(args.chapter or EXPORTABLE_CHAPTERS))
+
+
+if __name__ == "__main__":
+    main()
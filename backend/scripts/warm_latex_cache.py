@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Script de pré-chauffage du cache SVG LaTeX
+Usage : python scripts/warm_latex_cache.py [--top N] [--scan M]
+
+Parcourt les documents stockés, compte les expressions LaTeX les plus
+fréquentes et les pré-rend dans le store disque partagé (LATEX_CACHE_DIR)
+afin qu'aucun worker n'ait à les rendre via matplotlib après un redémarrage.
+"""
+
+import sys
+import os
+import asyncio
+import argparse
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from latex_to_svg import latex_renderer
+
+
+def iter_exercise_texts(exercise):
+    """Textes d'un exercice susceptibles de contenir du LaTeX"""
+    yield exercise.get("enonce") or ""
+    solution = exercise.get("solution") or {}
+    yield solution.get("resultat") or ""
+    for step in solution.get("etapes") or []:
+        yield step if isinstance(step, str) else ""
+    for option in (exercise.get("donnees") or {}).get("options") or []:
+        yield option if isinstance(option, str) else ""
+
+
+async def collect_frequent_expressions(db, top: int, scan: int):
+    """Expressions LaTeX les plus fréquentes des `scan` derniers documents"""
+    counter = Counter()
+    cursor = db.documents.find({}, {"_id": 0, "exercises": 1}).sort("created_at", -1).limit(scan)
+    async for document in cursor:
+        for exercise in document.get("exercises") or []:
+            for text in iter_exercise_texts(exercise):
+                counter.update(latex_renderer.extract_expressions(text))
+    return [expression for expression, _ in counter.most_common(top)]
+
+
+async def run(top: int, scan: int):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[os.environ.get('DB_NAME', 'lemaitremot')]
+    try:
+        expressions = await collect_frequent_expressions(db, top, scan)
+    finally:
+        client.close()
+
+    rendered = latex_renderer.warm_up(expressions)
+    stats = latex_renderer.get_cache_stats()
+    print(f"\n✅ {len(expressions)} expressions fréquentes, {rendered} nouvellement rendues")
+    print(f"   Store disque : {stats['disk_path']} ({stats['disk_entries']} entrées)\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-chauffer le cache SVG LaTeX partagé")
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=500,
+        help="Nombre d'expressions les plus fréquentes à pré-rendre (défaut : 500)"
+    )
+    parser.add_argument(
+        "--scan",
+        type=int,
+        default=2000,
+        help="Nombre de documents récents à analyser (défaut : 2000)"
+    )
+
+    args = parser.parse_args()
+    asyncio.run(run(args.top, args.scan))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Response, Depends, BackgroundTasks, Request, Form, UploadFile, File
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import os
 import logging
 from pathlib import Path
@@ -11,22 +12,26 @@ from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Dict
 import uuid
 from datetime import datetime, timezone, timedelta
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
 import json
 import re
-import tempfile
-# Import lazy de weasyprint pour éviter les erreurs au démarrage
-# weasyprint est importé dans les fonctions qui en ont besoin
+from urllib.parse import quote
+# weasyprint n'est jamais importé ici : le rendu PDF passe par le pool de
+# workers de engine/pdf_engine/render_pool.py (hors boucle d'événements)
 from jinja2 import Template
-from latex_to_svg import latex_renderer
-from geometry_renderer import geometry_renderer
-from render_schema import schema_renderer
-import sys
-import subprocess
+# matplotlib (renderers) et emergentintegrations (LLM, Stripe) sont chargés
+# à la première utilisation : voir subsystems.py
+from subsystems import (
+    get_latex_renderer,
+    get_geometry_renderer,
+    get_schema_renderer,
+    get_llm_chat_module,
+    get_stripe_checkout_module,
+    preload_renderers
+)
 # Nouveaux imports pour l'architecture mathématique structurée (réorganisés)
 from services.math_generation_service import MathGenerationService
 from services.math_text_service import MathTextService
+from services.llm_response_cache import LLMResponseCache, llm_response_cache
 from routes.math_routes import generate_math_exercises_new_architecture
 import requests
 import latex2mathml.converter
@@ -51,45 +56,27 @@ from curriculum_complete import (
     log_feature_flag_access,
     process_math_content_for_pdf
 )
-from document_search import search_educational_document
-
-# ============================================================================
-# SYSTEM DEPENDENCIES INITIALIZATION
-# ============================================================================
-def ensure_system_dependencies():
-    """
-    Garantit que toutes les dépendances système critiques sont installées.
-    Appelé au démarrage de l'application pour résoudre le problème de libpangoft2-1.0-0.
-    """
-    try:
-        scripts_dir = Path(__file__).parent.parent / 'scripts'
-        init_script = scripts_dir / 'ensure_system_dependencies.py'
-        
-        if init_script.exists():
-            print("🔧 Vérification des dépendances système...")
-            result = subprocess.run(
-                [sys.executable, str(init_script)],
-                capture_output=True,
-                text=True,
-                check=False
-            )
-            
-            if result.stdout:
-                print(result.stdout)
-            
-            if result.returncode != 0:
-                print(f"⚠️  Avertissement: Problème lors de l'initialisation des dépendances système")
-                if result.stderr:
-                    print(result.stderr)
-        else:
-            print(f"⚠️  Script d'initialisation non trouvé: {init_script}")
-            
-    except Exception as e:
-        print(f"⚠️  Erreur lors de la vérification des dépendances: {e}")
-        # On continue le démarrage même en cas d'erreur
+from document_search import search_educational_document, document_searcher
+from engine.pdf_engine.render_pool import render_pool, render_pdf, RenderPoolError, RenderPoolBusyError
+from engine.pdf_engine.artifact_cache import pdf_artifact_cache
+from services.auth_cache import auth_cache
+from services.guest_quota_service import GuestQuotaService, MAX_GUEST_EXPORTS
+from services.analytics_rollup_service import AnalyticsRollupService
+from services.exercise_pool_index import exercise_pools
+from services.exercise_persistence_service import get_exercise_persistence_service, pilot_exercise_store
+from services.curriculum_persistence_service import curriculum_snapshot, get_curriculum_persistence_service
+from services.document_render_service import (
+    process_exercise_content,
+    prerender_latex,
+    render_exercise_html,
+    render_document_fields,
+    is_render_current,
+    ensure_rendered,
+    DOCUMENT_LIST_PROJECTION
+)
 
-# Exécuter la vérification des dépendances au démarrage
-ensure_system_dependencies()
+# Les dépendances système (libpangoft2, ...) sont vérifiées une seule fois par
+# scripts/prestart.sh, et non à l'import de chaque worker.
 
 ROOT_DIR = Path(__file__).parent
 TEMPLATES_DIR = ROOT_DIR / 'templates'
@@ -338,7 +325,7 @@ def process_schema_to_base64(schema: Optional[dict]) -> Optional[str]:
         }
         
         # Render to Base64 for web display
-        base64_image = geometry_renderer.render_geometry_to_base64(geometry_schema)
+        base64_image = get_geometry_renderer().render_geometry_to_base64(geometry_schema)
         
         if base64_image:
             logger.info(
@@ -366,32 +353,13 @@ def process_schema_to_base64(schema: Optional[dict]) -> Optional[str]:
         logger.error(f"❌ Error processing schema to Base64: {e}")
         return None
 
-def process_exercise_content(content: str) -> str:
-    """
-    Processes the exercise content to render both LaTeX and geometric schemas.
-    This centralizes all content processing logic for consistency.
-    """
-    if not content or not isinstance(content, str):
-        return content if isinstance(content, str) else ""
-    
-    # 1. Process legacy geometric schemas (for backward compatibility)
-    try:
-        content = geometry_renderer.process_geometric_schemas_for_web(content)
-    except Exception as e:
-        logger.error(f"Error processing legacy geometric schemas: {e}")
-    
-    # 2. Process LaTeX formulas
-    try:
-        content = latex_renderer.convert_latex_to_svg(content)
-    except Exception as e:
-        logger.error(f"Error processing LaTeX: {e}")
-    
-    return content
-
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
+guest_quota_service = GuestQuotaService(db.guest_quotas)
+analytics_rollup = AnalyticsRollupService(db.analytics_daily)
+llm_response_cache.use_collection(db.llm_response_cache)
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -960,46 +928,97 @@ async def check_guest_quota(guest_id: str):
     )
     
     try:
-        thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
-        export_count = await db.exports.count_documents({
-            "guest_id": guest_id,
-            "created_at": {"$gte": thirty_days_ago}
-        })
-        
-        remaining = max(0, 3 - export_count)
+        quota_status = await guest_quota_service.get_status(guest_id)
         
         # Log quota check result
-        log_quota_check("guest", export_count, 3, guest_id=guest_id[:8] + "..." if guest_id and len(guest_id) > 8 else guest_id)
+        log_quota_check("guest", quota_status["exports_used"], MAX_GUEST_EXPORTS, guest_id=guest_id[:8] + "..." if guest_id and len(guest_id) > 8 else guest_id)
         
         logger.info(
             "Guest quota check completed",
             module_name="quota",
             func_name="check_guest_quota",
             user_type="guest",
-            exports_used=export_count,
-            exports_remaining=remaining,
-            quota_exceeded=remaining == 0
+            exports_used=quota_status["exports_used"],
+            exports_remaining=quota_status["exports_remaining"],
+            quota_exceeded=quota_status["quota_exceeded"]
         )
         
-        return {
-            "exports_used": export_count,
-            "exports_remaining": remaining,
-            "max_exports": 3,
-            "quota_exceeded": remaining == 0
-        }
+        return quota_status
         
     except Exception as e:
         logger.error(f"Error checking guest quota: {e}")
         return {
             "exports_used": 0,
-            "exports_remaining": 3,
-            "max_exports": 3,
+            "exports_remaining": MAX_GUEST_EXPORTS,
+            "max_exports": MAX_GUEST_EXPORTS,
             "quota_exceeded": False
         }
 
+async def reserve_guest_export(guest_id: str):
+    """
+    Atomically check the guest quota and reserve one export.
+    
+    Returns the reservation id, None when the quota is exhausted, or "" when
+    the quota store is unavailable (fail open, like check_guest_quota).
+    """
+    try:
+        return await guest_quota_service.reserve(guest_id)
+    except Exception as e:
+        logger.error(f"Error reserving guest quota: {e}")
+        return ""
+
+async def release_guest_export(guest_id: Optional[str], reservation_id: Optional[str]):
+    """Give back a reserved export when the export fails"""
+    if not guest_id or not reservation_id:
+        return
+    try:
+        await guest_quota_service.release(guest_id, reservation_id)
+    except Exception as e:
+        logger.error(f"Error releasing guest quota reservation: {e}")
+
+async def track_guest_export(document_id: str, export_type: str, guest_id: Optional[str], user_email: Optional[str], is_pro_user: bool, template_config: dict):
+    """Record an export for guest quota tracking (only for non-Pro users)"""
+    if is_pro_user or not guest_id:
+        return
+    
+    export_record = {
+        "id": str(uuid.uuid4()),
+        "document_id": document_id,
+        "export_type": export_type,
+        "guest_id": guest_id,
+        "user_email": user_email,
+        "is_pro": is_pro_user,
+        "template_used": template_config.get('template_style') if template_config else 'standard',
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.exports.insert_one(export_record)
+
+async def record_export_analytics(document: dict, guest_id: Optional[str], user_email: Optional[str], is_pro_user: bool, template_config: dict):
+    """Count an export in the daily analytics rollup (Pro and guest exports)"""
+    owner = user_email if is_pro_user else guest_id
+    template_used = template_config.get('template_style') if template_config else 'standard'
+    await analytics_rollup.record_export(owner, document.get('matiere'), template_used)
+
+def pdf_attachment_response(pdf_bytes: bytes, filename: str) -> Response:
+    """PDF download response built from memory (same Content-Disposition as FileResponse)"""
+    quoted_filename = quote(filename)
+    if quoted_filename != filename:
+        content_disposition = f"attachment; filename*=utf-8''{quoted_filename}"
+    else:
+        content_disposition = f'attachment; filename="{filename}"'
+    return Response(
+        content=pdf_bytes,
+        media_type='application/pdf',
+        headers={"Content-Disposition": content_disposition}
+    )
+
 async def check_user_pro_status(email: str):
     """Check if user has active Pro subscription"""
     try:
+        cached_status = auth_cache.get_pro_status(email)
+        if cached_status is not None:
+            return cached_status
+        
         user = await db.pro_users.find_one({"email": email})
         if user and user.get("subscription_expires"):
             expires = user["subscription_expires"]
@@ -1013,10 +1032,12 @@ async def check_user_pro_status(email: str):
             
             if expires > now:
                 logger.info(f"User {email} is Pro (expires: {expires})")
+                auth_cache.put_pro_status(email, True, user, expires)
                 return True, user
             else:
                 logger.info(f"User {email} Pro subscription expired")
         
+        auth_cache.put_pro_status(email, False, None)
         return False, None
         
     except Exception as e:
@@ -1212,6 +1233,8 @@ async def create_login_session(email: str, device_id: str):
             {"email": email},
             {"$set": {"last_login": datetime.now(timezone.utc)}}
         )
+        # Previous sessions and the cached user document (last_login) are stale
+        auth_cache.invalidate_user(email)
         
         logger.info(f"Login session created successfully for {email} - all previous sessions invalidated")
         return session_token
@@ -1223,6 +1246,11 @@ async def create_login_session(email: str, device_id: str):
 async def validate_session_token(session_token: str):
     """Validate a session token and return user email if valid"""
     try:
+        email = auth_cache.get_session(session_token)
+        if email:
+            await touch_session(session_token)
+            return email
+        
         session = await db.login_sessions.find_one({"session_token": session_token})
         
         if not session:
@@ -1242,11 +1270,8 @@ async def validate_session_token(session_token: str):
             await db.login_sessions.delete_one({"session_token": session_token})
             return None
             
-        # Update last_used
-        await db.login_sessions.update_one(
-            {"session_token": session_token},
-            {"$set": {"last_used": datetime.now(timezone.utc)}}
-        )
+        auth_cache.put_session(session_token, session.get('user_email'), expires_at)
+        await touch_session(session_token)
         
         return session.get('user_email')
         
@@ -1254,6 +1279,22 @@ async def validate_session_token(session_token: str):
         logger.error(f"Error validating session token: {e}")
         return None
 
+async def touch_session(session_token: str):
+    """Update last_used, at most once per AUTH_CACHE_LAST_USED_INTERVAL per session"""
+    if auth_cache.should_touch(session_token):
+        await db.login_sessions.update_one(
+            {"session_token": session_token},
+            {"$set": {"last_used": datetime.now(timezone.utc)}}
+        )
+
+async def get_user_template_doc(email: str):
+    """Load the user's template document (None if the user has none), cached per worker"""
+    found, template_doc = auth_cache.get_template(email)
+    if not found:
+        template_doc = await db.user_templates.find_one({"user_email": email})
+        auth_cache.put_template(email, template_doc)
+    return template_doc
+
 def sanitize_schema_ai_response(response: str) -> str:
     """
     Clean AI responses specifically for geometric schema generation.
@@ -1397,7 +1438,7 @@ async def generate_geometry_schema_with_ai(enonce: str) -> str:
     
     try:
         # Create LLM chat instance with faster model
-        chat = LlmChat(
+        chat = get_llm_chat_module().LlmChat(
             api_key=emergent_key,
             session_id=f"schema_gen_{uuid.uuid4()}",
             system_message="""En tant que moteur de génération de schémas géométriques PRÉCIS, tu dois créer un schéma qui CORRESPOND EXACTEMENT à l'énoncé de l'exercice.
@@ -1477,7 +1518,13 @@ Si l'énoncé mentionne une figure géométrique (triangle, rectangle, cercle, e
 Réponds UNIQUEMENT avec le JSON complet, JAMAIS null pour un énoncé géométrique.
 """
 
-        user_message = UserMessage(text=prompt)
+        # Same statement → reuse a previously validated schema (no AI call)
+        cache_key = LLMResponseCache.make_key("schema_geometrique", "schema", "tous", prompt)
+        cached_schema = await llm_response_cache.lookup("geometry_schema", cache_key)
+        if cached_schema is not None:
+            return cached_schema
+        
+        user_message = get_llm_chat_module().UserMessage(text=prompt)
         
         # Set shorter timeout for faster response
         import asyncio
@@ -1493,6 +1540,7 @@ Réponds UNIQUEMENT avec le JSON complet, JAMAIS null pour un énoncé géométr
         try:
             parsed = json.loads(sanitized_response)
             if parsed.get("schema") is not None:
+                await llm_response_cache.store_response("geometry_schema", cache_key, sanitized_response)
                 schema_type = parsed['schema'].get('type', 'unknown')
                 logger.info(
                     "Valid schema generated successfully",
@@ -1974,7 +2022,7 @@ FORMAT JSON REQUIS:
         system_msg = instruction
     
     # Create LLM chat instance with faster model
-    chat = LlmChat(
+    chat = get_llm_chat_module().LlmChat(
         api_key=emergent_key,
         session_id=f"exercise_gen_{uuid.uuid4()}",
         system_message=f"""{system_msg}
@@ -2049,7 +2097,7 @@ JSON OBLIGATOIRE:
     example = examples.get(chapitre, f"Exercice {chapitre}")
     
     try:
-        user_message = UserMessage(text=f"Génère {nb_exercices} exercices. Exemple: {example}")
+        user_message = get_llm_chat_module().UserMessage(text=f"Génère {nb_exercices} exercices. Exemple: {example}")
         
         # FIRST PASS: Generate the exercise content
         logger.debug("Starting first AI pass - exercise content generation")
@@ -2747,9 +2795,8 @@ async def generate_advanced_pdf(document: dict, content: str, export_type: str,
         </html>
         """
     
-    # Generate PDF (import lazy)
-    import weasyprint
-    pdf_bytes = weasyprint.HTML(string=html_content).write_pdf()
+    # Generate PDF (pool de rendu hors boucle d'événements)
+    pdf_bytes = await render_pdf(html_content)
     return pdf_bytes
 
 # API Routes
@@ -2911,55 +2958,12 @@ async def get_analytics_overview(request: Request):
         user_email = await require_pro_user(request)
         logger.info(f"Analytics overview requested by Pro user: {user_email}")
         
-        # Get user's documents count
-        user_documents = await db.documents.count_documents({"user_id": user_email})
-        guest_documents = await db.documents.count_documents({"guest_id": {"$regex": f".*{user_email.split('@')[0]}.*"}})
-        
-        # Get user's exports count
-        user_exports = await db.exports.count_documents({"user_email": user_email})
-        
-        # Get recent activity (last 30 days)
-        thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
-        recent_documents = await db.documents.count_documents({
-            "$or": [{"user_id": user_email}, {"guest_id": {"$regex": f".*{user_email.split('@')[0]}.*"}}],
-            "created_at": {"$gte": thirty_days_ago}
-        })
-        
-        recent_exports = await db.exports.count_documents({
-            "user_email": user_email,
-            "created_at": {"$gte": thirty_days_ago}
-        })
-        
-        # Get subject distribution
-        subject_pipeline = [
-            {"$match": {"$or": [{"user_id": user_email}, {"guest_id": {"$regex": f".*{user_email.split('@')[0]}.*"}}]}},
-            {"$group": {"_id": "$matiere", "count": {"$sum": 1}}}
-        ]
-        subject_stats = await db.documents.aggregate(subject_pipeline).to_list(None)
-        
-        # Get template usage stats
-        template_pipeline = [
-            {"$match": {"user_email": user_email}},
-            {"$group": {"_id": "$template_used", "count": {"$sum": 1}}}
-        ]
-        template_stats = await db.exports.aggregate(template_pipeline).to_list(None)
+        # Pre-aggregated daily rows of this user only (index on owner, day)
+        overview = await analytics_rollup.get_overview(user_email)
         
         return {
             "user_analytics": {
-                "total_documents": user_documents + guest_documents,
-                "total_exports": user_exports,
-                "recent_activity": {
-                    "documents_last_30_days": recent_documents,
-                    "exports_last_30_days": recent_exports
-                },
-                "subject_distribution": [
-                    {"subject": stat["_id"], "count": stat["count"]} 
-                    for stat in subject_stats
-                ],
-                "template_usage": [
-                    {"template": stat["_id"] or "standard", "count": stat["count"]} 
-                    for stat in template_stats
-                ],
+                **overview,
                 "subscription_info": {
                     "type": "Pro",
                     "analytics_enabled": True
@@ -2984,62 +2988,8 @@ async def get_usage_analytics(request: Request, days: int = 30):
         end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=days)
         
-        # Daily document generation
-        daily_docs_pipeline = [
-            {
-                "$match": {
-                    "$or": [{"user_id": user_email}, {"guest_id": {"$regex": f".*{user_email.split('@')[0]}.*"}}],
-                    "created_at": {"$gte": start_date, "$lte": end_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
-                    "documents": {"$sum": 1}
-                }
-            },
-            {"$sort": {"_id": 1}}
-        ]
-        daily_docs = await db.documents.aggregate(daily_docs_pipeline).to_list(None)
-        
-        # Daily exports
-        daily_exports_pipeline = [
-            {
-                "$match": {
-                    "user_email": user_email,
-                    "created_at": {"$gte": start_date, "$lte": end_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
-                    "exports": {"$sum": 1}
-                }
-            },
-            {"$sort": {"_id": 1}}
-        ]
-        daily_exports = await db.exports.aggregate(daily_exports_pipeline).to_list(None)
-        
-        # Subject popularity over time
-        subject_timeline_pipeline = [
-            {
-                "$match": {
-                    "$or": [{"user_id": user_email}, {"guest_id": {"$regex": f".*{user_email.split('@')[0]}.*"}}],
-                    "created_at": {"$gte": start_date, "$lte": end_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
-                        "subject": "$matiere"
-                    },
-                    "count": {"$sum": 1}
-                }
-            },
-            {"$sort": {"_id.date": 1}}
-        ]
-        subject_timeline = await db.documents.aggregate(subject_timeline_pipeline).to_list(None)
+        # Pre-aggregated daily rows of this user only (index on owner, day)
+        usage = await analytics_rollup.get_usage(user_email, start_date, end_date)
         
         return {
             "usage_analytics": {
@@ -3048,24 +2998,7 @@ async def get_usage_analytics(request: Request, days: int = 30):
                     "end_date": end_date.isoformat(),
                     "days": days
                 },
-                "daily_activity": {
-                    "documents": [
-                        {"date": doc["_id"], "count": doc["documents"]} 
-                        for doc in daily_docs
-                    ],
-                    "exports": [
-                        {"date": exp["_id"], "count": exp["exports"]} 
-                        for exp in daily_exports
-                    ]
-                },
-                "subject_timeline": [
-                    {
-                        "date": item["_id"]["date"], 
-                        "subject": item["_id"]["subject"], 
-                        "count": item["count"]
-                    }
-                    for item in subject_timeline
-                ]
+                **usage
             }
         }
         
@@ -3198,7 +3131,10 @@ async def generate_document(request: GenerateRequest):
         doc_dict = document.dict()
         # Convert datetime for MongoDB
         doc_dict['created_at'] = doc_dict['created_at'].isoformat()
+        # Rendered HTML is computed once here, listing only reads it back
+        doc_dict.update(render_document_fields(doc_dict['exercises']))
         await db.documents.insert_one(doc_dict)
+        await analytics_rollup.record_document(document.user_id or document.guest_id, document.matiere, document.created_at)
         
         # Return the document (already processed during generation)
         return {"document": document}
@@ -3384,6 +3320,7 @@ async def logout(request: Request):
         
         # Remove session
         result = await db.login_sessions.delete_one({"session_token": session_token})
+        auth_cache.invalidate_session(session_token)
         
         if result.deleted_count == 0:
             raise HTTPException(
@@ -3513,7 +3450,7 @@ async def get_user_template(request: Request):
         user_email = await require_pro_user(request)
         
         # Find user template
-        template_doc = await db.user_templates.find_one({"user_email": user_email})
+        template_doc = await get_user_template_doc(user_email)
         
         if not template_doc:
             # Return default template
@@ -3650,6 +3587,8 @@ async def save_user_template(
             
             await db.user_templates.insert_one(template.dict())
         
+        pdf_artifact_cache.invalidate_user(user_email)
+        auth_cache.invalidate_user(user_email)
         logger.info(f"Template saved for user: {user_email}")
         return {
             "message": "Template sauvegardé avec succès",
@@ -3759,6 +3698,7 @@ async def validate_session(request: Request):
         if not is_pro:
             # Clean up session if user is no longer Pro
             await db.login_sessions.delete_one({"session_token": session_token})
+            auth_cache.invalidate_session(session_token)
             raise HTTPException(
                 status_code=403,
                 detail="Abonnement Pro expiré"
@@ -3853,6 +3793,8 @@ async def export_pdf(request: ExportRequest, http_request: Request):
         template_style=getattr(request, 'template_style', 'default')
     )
     
+    quota_reservation = None
+    
     try:
         # Check authentication - ONLY session token method (no legacy email fallback)
         session_token = http_request.headers.get("X-Session-Token")
@@ -3875,7 +3817,7 @@ async def export_pdf(request: ExportRequest, http_request: Request):
                 if is_pro:
                     logger.info(f"Loading template config for Pro user: {email}")
                     try:
-                        template_doc = await db.user_templates.find_one({"user_email": email})
+                        template_doc = await get_user_template_doc(email)
                         logger.info(f"🔍 Raw template doc from DB: {template_doc}")
                         if template_doc:
                             template_config = {
@@ -3917,9 +3859,10 @@ async def export_pdf(request: ExportRequest, http_request: Request):
             if not request.guest_id:
                 raise HTTPException(status_code=400, detail="Guest ID required for non-Pro users")
                 
-            quota_status = await check_guest_quota(request.guest_id)
+            # Check and reserve in one atomic update: concurrent exports cannot both pass
+            quota_reservation = await reserve_guest_export(request.guest_id)
             
-            if quota_status["quota_exceeded"]:
+            if quota_reservation is None:
                 raise HTTPException(status_code=402, detail={
                     "error": "quota_exceeded", 
                     "message": "Limite de 3 exports gratuits atteinte. Passez à l'abonnement Pro pour continuer.",
@@ -3931,9 +3874,55 @@ async def export_pdf(request: ExportRequest, http_request: Request):
         if not doc:
             raise HTTPException(status_code=404, detail="Document non trouvé")
         
+        # NEW TEMPLATE STYLE SYSTEM - Choose template based on requested style
+        requested_style = request.template_style or "classique"
+        logger.info(f"🎨 TEMPLATE STYLE EXPORT - Requested style: {requested_style}, Pro user: {is_pro_user}")
+        
+        # Validate style permission
+        if requested_style not in EXPORT_TEMPLATE_STYLES:
+            logger.warning(f"Invalid template style: {requested_style}, falling back to classique")
+            requested_style = "classique"
+        
+        style_config = EXPORT_TEMPLATE_STYLES[requested_style]
+        
+        # Check if user has permission for this style
+        if "free" not in style_config["available_for"] and not is_pro_user:
+            logger.info(f"Style {requested_style} is Pro-only, user is not Pro. Using classique instead.")
+            requested_style = "classique"
+            style_config = EXPORT_TEMPLATE_STYLES["classique"]
+        
+        # Choose the correct template file
+        if request.export_type == "sujet":
+            template_name = style_config["sujet_template"]
+        else:
+            template_name = style_config["corrige_template"]
+        
+        logger.info(f"📄 Using template: {template_name} for style: {requested_style}")
+        template_content = load_template(template_name)
+        
+        date_creation = datetime.now(timezone.utc).strftime("%d/%m/%Y")
+        filename = f"LeMaitremot_{doc.get('type_doc')}_{doc.get('matiere')}_{doc.get('niveau')}_{request.export_type}_{requested_style}.pdf"
+        
+        # Content-addressed cache: same document + template + Pro config + date = same PDF
+        artifact_owner = user_email if is_pro_user else None
+        artifact_key = pdf_artifact_cache.make_key(
+            document={k: v for k, v in doc.items() if k != '_id'},
+            export_type=request.export_type,
+            template=template_content,
+            template_config=template_config if is_pro_user else None,
+            date_creation=date_creation
+        )
+        cached_pdf = pdf_artifact_cache.get(request.document_id, artifact_key, artifact_owner)
+        if cached_pdf is not None:
+            await track_guest_export(request.document_id, request.export_type, request.guest_id, user_email, is_pro_user, template_config)
+            await record_export_analytics(doc, request.guest_id, user_email, is_pro_user, template_config)
+            logger.info(f"✅ PDF served from artifact cache: {filename}")
+            return pdf_attachment_response(cached_pdf, filename)
+        
         # CRITICAL: Process geometric schemas and LaTeX before PDF generation
         
         if 'exercises' in doc:
+            prerender_latex(doc['exercises'])
             for exercise in doc['exercises']:
                 if 'enonce' in exercise and exercise['enonce']:
                     exercise['enonce'] = process_exercise_content(exercise['enonce'])
@@ -3964,7 +3953,7 @@ async def export_pdf(request: ExportRequest, http_request: Request):
                             schema_type=schema_type
                         )
                         
-                        svg_content = schema_renderer.render_to_svg(schema_data)
+                        svg_content = get_schema_renderer().render_to_svg(schema_data)
                         if svg_content:
                             exercise['schema_svg'] = svg_content
                             logger.info(
@@ -4052,36 +4041,10 @@ async def export_pdf(request: ExportRequest, http_request: Request):
             doc['created_at'] = datetime.fromisoformat(doc['created_at'])
         document = Document(**doc)
         
-        # NEW TEMPLATE STYLE SYSTEM - Choose template based on requested style
-        requested_style = request.template_style or "classique"
-        logger.info(f"🎨 TEMPLATE STYLE EXPORT - Requested style: {requested_style}, Pro user: {is_pro_user}")
-        
-        # Validate style permission
-        if requested_style not in EXPORT_TEMPLATE_STYLES:
-            logger.warning(f"Invalid template style: {requested_style}, falling back to classique")
-            requested_style = "classique"
-        
-        style_config = EXPORT_TEMPLATE_STYLES[requested_style]
-        
-        # Check if user has permission for this style
-        if "free" not in style_config["available_for"] and not is_pro_user:
-            logger.info(f"Style {requested_style} is Pro-only, user is not Pro. Using classique instead.")
-            requested_style = "classique"
-            style_config = EXPORT_TEMPLATE_STYLES["classique"]
-        
-        # Choose the correct template file
-        if request.export_type == "sujet":
-            template_name = style_config["sujet_template"]
-        else:
-            template_name = style_config["corrige_template"]
-        
-        logger.info(f"📄 Using template: {template_name} for style: {requested_style}")
-        template_content = load_template(template_name)
-        
         # Prepare render context
         render_context = {
             'document': document,
-            'date_creation': datetime.now(timezone.utc).strftime("%d/%m/%Y"),
+            'date_creation': date_creation,
         }
         
         # Add Pro personalization if available
@@ -4114,9 +4077,6 @@ async def export_pdf(request: ExportRequest, http_request: Request):
             logger.info(f"   professor_name: {render_context.get('professor_name')}")
             logger.info(f"   logo_url: {render_context.get('logo_url')}")
        
-        # Generate filename with style suffix
-        filename = f"LeMaitremot_{document.type_doc}_{document.matiere}_{document.niveau}_{request.export_type}_{requested_style}.pdf"
-        
         # Process LaTeX expressions in document before rendering
         logger.info("🔬 Converting LaTeX expressions to SVG...")
         
@@ -4125,20 +4085,21 @@ async def export_pdf(request: ExportRequest, http_request: Request):
         
         # Process each exercise and convert LaTeX to SVG
         try:
+            prerender_latex(document_dict.get('exercises', []))
             for exercise in document_dict.get('exercises', []):
                 # Process exercise statement
                 if 'enonce' in exercise and exercise['enonce']:
                     # First process geometric schemas, then LaTeX
-                    exercise['enonce'] = geometry_renderer.process_geometric_schemas(exercise['enonce'])
-                    exercise['enonce'] = latex_renderer.convert_latex_to_svg(exercise['enonce'])
+                    exercise['enonce'] = get_geometry_renderer().process_geometric_schemas(exercise['enonce'])
+                    exercise['enonce'] = get_latex_renderer().convert_latex_to_svg(exercise['enonce'])
                 
                 # Process QCM options if they exist
                 if (exercise.get('type') == 'qcm' and 
                     exercise.get('donnees') and 
                     exercise['donnees'].get('options')):
                     exercise['donnees']['options'] = [
-                        latex_renderer.convert_latex_to_svg(
-                            geometry_renderer.process_geometric_schemas(option)
+                        get_latex_renderer().convert_latex_to_svg(
+                            get_geometry_renderer().process_geometric_schemas(option)
                         )
                         for option in exercise['donnees']['options']
                     ]
@@ -4147,17 +4108,17 @@ async def export_pdf(request: ExportRequest, http_request: Request):
                 if exercise.get('solution'):
                     # Process result
                     if exercise['solution'].get('resultat'):
-                        processed_result = geometry_renderer.process_geometric_schemas(
+                        processed_result = get_geometry_renderer().process_geometric_schemas(
                             exercise['solution']['resultat']
                         )
-                        exercise['solution']['resultat'] = latex_renderer.convert_latex_to_svg(
+                        exercise['solution']['resultat'] = get_latex_renderer().convert_latex_to_svg(
                             processed_result
                         )
                     # Process steps
                     if exercise['solution'].get('etapes') and isinstance(exercise['solution']['etapes'], list):
                         exercise['solution']['etapes'] = [
-                            latex_renderer.convert_latex_to_svg(
-                                geometry_renderer.process_geometric_schemas(step)
+                            get_latex_renderer().convert_latex_to_svg(
+                                get_geometry_renderer().process_geometric_schemas(step)
                             )
                             for step in exercise['solution']['etapes']
                         ]
@@ -4186,7 +4147,7 @@ async def export_pdf(request: ExportRequest, http_request: Request):
             
             if schema_data:
                 try:
-                    svg_content = schema_renderer.render_to_svg(schema_data)
+                    svg_content = get_schema_renderer().render_to_svg(schema_data)
                     if svg_content:
                         exercise['schema_svg'] = svg_content
                         logger.info(f"[EXPORT][PDF] Generated SVG for Exercice {i} - schema_svg length = {len(svg_content)}")
@@ -4207,40 +4168,25 @@ async def export_pdf(request: ExportRequest, http_request: Request):
         
         logger.info("✅ Mathematical expressions converted to SVG")
         
-        # Generate PDF with WeasyPrint (import lazy)
-        import weasyprint
-        pdf_bytes = weasyprint.HTML(string=html_content).write_pdf()
+        # Generate PDF with WeasyPrint (pool de rendu hors boucle d'événements)
+        pdf_bytes = await render_pdf(html_content)
         
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        temp_file.write(pdf_bytes)
-        temp_file.close()
+        # Store in the artifact cache (served from memory: the file may be evicted at any time)
+        pdf_artifact_cache.put(request.document_id, artifact_key, pdf_bytes, artifact_owner)
         
         # Track export for guest quota (only for non-Pro users)
-        if not is_pro_user and request.guest_id:
-            export_record = {
-                "id": str(uuid.uuid4()),
-                "document_id": request.document_id,
-                "export_type": request.export_type,
-                "guest_id": request.guest_id,
-                "user_email": user_email,
-                "is_pro": is_pro_user,
-                "template_used": template_config.get('template_style') if template_config else 'standard',
-                "created_at": datetime.now(timezone.utc)
-            }
-            await db.exports.insert_one(export_record)
+        await track_guest_export(request.document_id, request.export_type, request.guest_id, user_email, is_pro_user, template_config)
+        await record_export_analytics(doc, request.guest_id, user_email, is_pro_user, template_config)
         
         logger.info(f"✅ PDF generated successfully: {filename}")
         
-        return FileResponse(
-            temp_file.name,
-            media_type='application/pdf',
-            filename=filename
-        )
+        return pdf_attachment_response(pdf_bytes, filename)
         
-    except HTTPException:
+    except (HTTPException, RenderPoolError):
+        await release_guest_export(request.guest_id, quota_reservation)
         raise
     except Exception as e:
+        await release_guest_export(request.guest_id, quota_reservation)
         logger.error(f"Error exporting PDF: {e}")
         raise HTTPException(status_code=500, detail="Erreur lors de l'export PDF")
         
@@ -4274,8 +4220,55 @@ async def export_pdf_advanced(request: EnhancedExportRequest, http_request: Requ
         if not document:
             raise HTTPException(status_code=404, detail="Document non trouvé")
         
+        # Load user template configuration
+        template_config = {}
+        template_doc = await get_user_template_doc(email)
+        if template_doc:
+            template_config = {
+                'template_style': template_doc.get('template_style', 'minimaliste'),
+                'professor_name': template_doc.get('professor_name'),
+                'school_name': template_doc.get('school_name'),
+                'school_year': template_doc.get('school_year'),
+                'footer_text': template_doc.get('footer_text'),
+                'logo_url': template_doc.get('logo_url'),
+                'logo_filename': template_doc.get('logo_filename')
+            }
+        else:
+            template_config = {'template_style': 'minimaliste'}
+        
+        # Apply advanced options
+        advanced_opts = request.advanced_options or AdvancedPDFOptions()
+        
+        filename = f"LeMaitremot_{request.export_type}_{document['matiere']}_{document['niveau']}_advanced.pdf"
+        export_record = {
+            "id": str(uuid.uuid4()),
+            "document_id": request.document_id,
+            "export_type": request.export_type,
+            "user_email": email,
+            "is_pro": True,
+            "template_used": template_config.get('template_style', 'minimaliste'),
+            "advanced_options": advanced_opts.dict(),
+            "created_at": datetime.now(timezone.utc)
+        }
+        
+        # Content-addressed cache: same document + options + Pro config + date = same PDF
+        artifact_key = pdf_artifact_cache.make_key(
+            document={k: v for k, v in document.items() if k != '_id'},
+            export_type=request.export_type,
+            template_config=template_config,
+            advanced_options=advanced_opts.dict(),
+            date_creation=datetime.now().strftime("%d/%m/%Y")
+        )
+        cached_pdf = pdf_artifact_cache.get(request.document_id, artifact_key, email)
+        if cached_pdf is not None:
+            await db.exports.insert_one(export_record)
+            await analytics_rollup.record_export(email, document.get('matiere'), export_record["template_used"])
+            logger.info(f"✅ Advanced PDF served from artifact cache: {filename}")
+            return pdf_attachment_response(cached_pdf, filename)
+        
         # CRITICAL: Process geometric schemas and LaTeX before PDF generation
         if 'exercises' in document:
+            prerender_latex(document['exercises'])
             for exercise in document['exercises']:
                 if 'enonce' in exercise and exercise['enonce']:
                     exercise['enonce'] = process_exercise_content(exercise['enonce'])
@@ -4296,25 +4289,6 @@ async def export_pdf_advanced(request: EnhancedExportRequest, http_request: Requ
                             processed_steps.append(processed_step)
                         exercise['solution']['etapes'] = processed_steps
         
-        # Load user template configuration
-        template_config = {}
-        template_doc = await db.user_templates.find_one({"user_email": email})
-        if template_doc:
-            template_config = {
-                'template_style': template_doc.get('template_style', 'minimaliste'),
-                'professor_name': template_doc.get('professor_name'),
-                'school_name': template_doc.get('school_name'),
-                'school_year': template_doc.get('school_year'),
-                'footer_text': template_doc.get('footer_text'),
-                'logo_url': template_doc.get('logo_url'),
-                'logo_filename': template_doc.get('logo_filename')
-            }
-        else:
-            template_config = {'template_style': 'minimaliste'}
-        
-        # Apply advanced options
-        advanced_opts = request.advanced_options or AdvancedPDFOptions()
-        
         # Generate content with advanced formatting
         if request.export_type == "sujet":
             content = format_exercises_for_export(document["exercises"], advanced_opts)
@@ -4326,36 +4300,18 @@ async def export_pdf_advanced(request: EnhancedExportRequest, http_request: Requ
             document, content, request.export_type, template_config, advanced_opts
         )
         
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        temp_file.write(pdf_content)
-        temp_file.close()
-        
-        # Generate filename
-        filename = f"LeMaitremot_{request.export_type}_{document['matiere']}_{document['niveau']}_advanced.pdf"
+        # Store in the artifact cache (served from memory: the file may be evicted at any time)
+        pdf_artifact_cache.put(request.document_id, artifact_key, pdf_content, email)
         
         # Record export
-        export_record = {
-            "id": str(uuid.uuid4()),
-            "document_id": request.document_id,
-            "export_type": request.export_type,
-            "user_email": email,
-            "is_pro": True,
-            "template_used": template_config.get('template_style', 'minimaliste'),
-            "advanced_options": advanced_opts.dict(),
-            "created_at": datetime.now(timezone.utc)
-        }
         await db.exports.insert_one(export_record)
+        await analytics_rollup.record_export(email, document.get('matiere'), export_record["template_used"])
         
         logger.info(f"✅ Advanced PDF generated successfully: {filename}")
         
-        return FileResponse(
-            temp_file.name,
-            media_type='application/pdf',
-            filename=filename
-        )
+        return pdf_attachment_response(pdf_content, filename)
         
-    except HTTPException:
+    except (HTTPException, RenderPoolError):
         raise
     except Exception as e:
         logger.error(f"Error exporting advanced PDF: {e}")
@@ -4405,7 +4361,7 @@ async def create_checkout_session(request: CheckoutRequest, http_request: Reques
         # Initialize Stripe
         host_url = str(http_request.base_url).rstrip('/')
         webhook_url = f"{host_url}/api/webhook/stripe"
-        stripe_checkout = StripeCheckout(api_key=stripe_secret_key, webhook_url=webhook_url)
+        stripe_checkout = get_stripe_checkout_module().StripeCheckout(api_key=stripe_secret_key, webhook_url=webhook_url)
         
         # Build URLs from frontend origin
         success_url = f"{request.origin_url}/success?session_id={{CHECKOUT_SESSION_ID}}"
@@ -4421,7 +4377,7 @@ async def create_checkout_session(request: CheckoutRequest, http_request: Reques
         }
         
         # Create checkout session request
-        checkout_request = CheckoutSessionRequest(
+        checkout_request = get_stripe_checkout_module().CheckoutSessionRequest(
             amount=package["amount"],
             currency=package["currency"],
             success_url=success_url,
@@ -4465,7 +4421,7 @@ async def get_checkout_status(session_id: str):
     """Get checkout session status"""
     try:
         # Initialize Stripe
-        stripe_checkout = StripeCheckout(api_key=stripe_secret_key, webhook_url="")
+        stripe_checkout = get_stripe_checkout_module().StripeCheckout(api_key=stripe_secret_key, webhook_url="")
         
         # Get status from Stripe
         status = await stripe_checkout.get_checkout_status(session_id)
@@ -4560,6 +4516,7 @@ async def create_pro_user_from_transaction(transaction: dict, status):
             {"$set": pro_user.dict()},
             upsert=True
         )
+        auth_cache.invalidate_user(transaction["email"])
         
         action = "updated" if result.matched_count > 0 else "created"
         logger.info(f"Pro user {action}: {transaction['email']} - {package['duration']} subscription expires {expires.strftime('%d/%m/%Y %H:%M')}")
@@ -4581,7 +4538,7 @@ async def stripe_webhook(request: Request):
             raise HTTPException(status_code=400, detail="Missing Stripe signature")
         
         # Initialize Stripe
-        stripe_checkout = StripeCheckout(api_key=stripe_secret_key, webhook_url="")
+        stripe_checkout = get_stripe_checkout_module().StripeCheckout(api_key=stripe_secret_key, webhook_url="")
         
         # Handle webhook
         webhook_response = await stripe_checkout.handle_webhook(body, stripe_signature)
@@ -4654,47 +4611,22 @@ async def get_documents(guest_id: str = None):
     
     try:
         if guest_id:
-            # Get documents for guest user
-            documents = await db.documents.find({"guest_id": guest_id}).sort("created_at", -1).limit(20).to_list(length=20)
+            # Get documents for guest user (rendered HTML only, raw exercises are not read)
+            documents = await db.documents.find(
+                {"guest_id": guest_id},
+                DOCUMENT_LIST_PROJECTION
+            ).sort("created_at", -1).limit(20).to_list(length=20)
         else:
             return {"documents": []}
         
+        # Lazy re-render of documents created before the current renderer version
+        documents = await ensure_rendered(db.documents, documents)
+        
         for doc in documents:
             if isinstance(doc.get('created_at'), str):
                 doc['created_at'] = datetime.fromisoformat(doc['created_at'])
-            
-            # Apply professional content processing to ensure consistency
-            # Process all content systematically to handle both old and new documents
-            if 'exercises' in doc:
-                for exercise in doc['exercises']:
-                    if 'enonce' in exercise and exercise['enonce']:
-                        exercise['enonce'] = process_exercise_content(exercise['enonce'])
-                    
-                    # schema_img is now generated during exercise creation, no need to process again
-                    if exercise.get('schema_img'):
-                        logger.debug(
-                            "Schema image already present from generation",
-                            module_name="documents",
-                            func_name="check_schemas",
-                            doc_id=str(doc.get('id', 'unknown'))[:8],
-                            has_schema_img=bool(exercise.get('schema_img'))
-                        )
-
-                    # Process solution if it exists
-                    if exercise.get('solution'):
-                        if exercise['solution'].get('resultat'):
-                            exercise['solution']['resultat'] = process_exercise_content(exercise['solution']['resultat'])
-                                
-                        if exercise['solution'].get('etapes') and isinstance(exercise['solution']['etapes'], list):
-                            exercise['solution']['etapes'] = [
-                                process_exercise_content(step) for step in exercise['solution']['etapes']
-                            ]
-        
-        # Clean up MongoDB-specific fields that can't be JSON serialized
-        for doc in documents:
-            # Remove MongoDB ObjectId fields that cause serialization issues
-            if '_id' in doc:
-                del doc['_id']
+            doc['exercises'] = doc.pop('exercises_html', [])
+            doc.pop('renderer_version', None)
         
         # Return raw documents to preserve dynamic fields like schema_img
         # Don't use Pydantic models here as they filter out dynamic fields
@@ -4731,10 +4663,16 @@ async def vary_exercise(document_id: str, exercise_index: int):
             # Convert Exercise object to dict for MongoDB storage
             exercise_dict = exercises[0].dict() if hasattr(exercises[0], 'dict') else exercises[0]
             doc["exercises"][exercise_index] = exercise_dict
+            update_fields = {"exercises": doc["exercises"]}
+            if is_render_current(doc):
+                update_fields[f"exercises_html.{exercise_index}"] = render_exercise_html(exercise_dict)
+            else:
+                update_fields.update(render_document_fields(doc["exercises"]))
             await db.documents.update_one(
                 {"id": document_id},
-                {"$set": {"exercises": doc["exercises"]}}
+                {"$set": update_fields}
             )
+            pdf_artifact_cache.invalidate_document(document_id)
             
             # Return the exercise as dict for JSON serialization
             return {"exercise": exercise_dict}
@@ -4792,6 +4730,66 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.exception_handler(RenderPoolError)
+async def render_pool_error_handler(request: Request, exc: RenderPoolError):
+    """Backpressure du pool de rendu PDF: 503 + Retry-After si saturé, 504 si timeout"""
+    if isinstance(exc, RenderPoolBusyError):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Service de génération PDF saturé, réessayez dans quelques secondes"},
+            headers={"Retry-After": str(exc.retry_after)}
+        )
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "La génération du PDF a pris trop de temps"}
+    )
+
+@app.on_event("startup")
+async def warm_up_render_pool():
+    """Démarre et pré-chauffe les workers WeasyPrint avant le premier export"""
+    try:
+        await render_pool.warm_up()
+    except Exception as e:
+        logger.warning(f"PDF render pool warm-up failed: {e}")
+
+@app.on_event("startup")
+async def warm_up_renderers():
+    """Importe matplotlib et les renderers en arrière-plan, sans retarder le démarrage du worker"""
+    asyncio.get_running_loop().run_in_executor(None, preload_renderers)
+
+@app.on_event("startup")
+async def ensure_counter_indexes():
+    """Index uniques requis par les upserts du quota invité et des analytics"""
+    try:
+        await guest_quota_service.ensure_indexes()
+        await analytics_rollup.ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Guest quota / analytics indexes not ensured: {e}")
+
+@app.on_event("startup")
+async def load_pilot_exercises():
+    """Snapshots versionnés des chapitres pilotes (GM07, GM08, TESTS_DYN) depuis MongoDB, puis suivi des versions"""
+    try:
+        await pilot_exercise_store.load_all(get_exercise_persistence_service(db))
+    except Exception as e:
+        logger.warning(f"Pilot exercises not loaded from MongoDB, serving data/ files: {e}")
+        await asyncio.get_running_loop().run_in_executor(None, exercise_pools.build_all)
+    pilot_exercise_store.start_polling(db)
+
+@app.on_event("startup")
+async def load_curriculum_snapshot():
+    """Index du curriculum depuis MongoDB (version courante), puis vérification périodique de la version"""
+    try:
+        await get_curriculum_persistence_service(db).initialize()
+        await curriculum_snapshot.load(db)
+    except Exception as e:
+        logger.warning(f"Curriculum snapshot not loaded from MongoDB, serving curriculum_6e.json: {e}")
+    curriculum_snapshot.start_version_checks(db)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await pilot_exercise_store.stop_polling()
+    await curriculum_snapshot.stop_version_checks()
+    client.close()
+    render_pool.shutdown()
+    await document_searcher.aclose()
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+Agrégats journaliers pour les analytics Pro
+
+Les endpoints /analytics/overview et /analytics/usage recomptaient à chaque
+appel documents et exports avec un filtre {"guest_id": {"$regex": ".*<préfixe>.*"}}
+non ancré : un parcours complet de `documents`, répété dans plusieurs
+pipelines par requête.
+
+La collection `analytics_daily` contient une ligne par
+(propriétaire, jour, matière, template), incrémentée au fil de l'eau :
+
+    {"owner": "prof@example.com", "day": "2026-10-16", "matiere": "Mathématiques",
+     "template": None, "documents": 2, "exports": 0}
+
+- owner : email Pro (user_id / user_email), sinon guest_id
+- template : None pour les documents, style d'export pour les exports
+
+Une requête analytics lit les lignes d'un seul propriétaire via l'index
+(owner, day) : sa latence dépend de l'activité de l'utilisateur, plus de la
+taille de `documents`.
+
+backfill() reconstruit les agrégats depuis `documents` et `exports`
+(idempotent : les compteurs sont remplacés, pas incrémentés).
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Jour UTC "YYYY-MM-DD" d'un created_at (datetime Mongo ou chaîne ISO)
+_DAY_EXPRESSION = {"$substrBytes": [{"$toString": "$created_at"}, 0, 10]}
+
+
+def day_of(value: Optional[Any] = None) -> str:
+    """Jour UTC d'une date (datetime ou chaîne ISO), maintenant par défaut"""
+    if value is None:
+        value = datetime.now(timezone.utc)
+    if isinstance(value, str):
+        return value[:10]
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d")
+
+
+class AnalyticsRollupService:
+    """
+    Agrégats journaliers documents / exports par propriétaire.
+
+    Responsabilités :
+        - Incrémenter les compteurs à la création d'un document et à l'export
+        - Servir les analytics d'un utilisateur depuis ses seules lignes
+        - Reconstruire les agrégats depuis l'historique (backfill)
+    """
+
+    def __init__(self, collection):
+        """
+        Args:
+            collection: Collection Motor `analytics_daily`
+        """
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index(
+            [("owner", 1), ("day", 1), ("matiere", 1), ("template", 1)],
+            unique=True,
+            name="unique_analytics_row"
+        )
+
+    # ------------------------------------------------------------------
+    # Mise à jour incrémentale
+    # ------------------------------------------------------------------
+
+    async def _increment(self, field: str, owner: Optional[str], matiere: Optional[str], template: Optional[str], created_at=None):
+        """Incrément atomique ; une erreur d'analytics ne fait jamais échouer la requête"""
+        if not owner:
+            return
+        try:
+            await self.collection.update_one(
+                {"owner": owner, "day": day_of(created_at), "matiere": matiere, "template": template},
+                {"$inc": {field: 1}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"❌ Analytics rollup update failed ({field}): {e}")
+
+    async def record_document(self, owner: Optional[str], matiere: Optional[str], created_at=None):
+        await self._increment("documents", owner, matiere, None, created_at)
+
+    async def record_export(self, owner: Optional[str], matiere: Optional[str], template: Optional[str], created_at=None):
+        await self._increment("exports", owner, matiere, template or "standard", created_at)
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    async def _rows(self, owner: str, start_day: Optional[str] = None, end_day: Optional[str] = None):
+        query: Dict[str, Any] = {"owner": owner}
+        if start_day or end_day:
+            query["day"] = {}
+            if start_day:
+                query["day"]["$gte"] = start_day
+            if end_day:
+                query["day"]["$lte"] = end_day
+        return await self.collection.find(query, {"_id": 0}).sort("day", 1).to_list(None)
+
+    async def get_overview(self, owner: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Totaux, activité des 30 derniers jours, matières et templates"""
+        now = now or datetime.now(timezone.utc)
+        recent_day = day_of(now - timedelta(days=30))
+
+        totals = Counter()
+        subjects = Counter()
+        templates = Counter()
+        for row in await self._rows(owner):
+            documents, exports = row.get("documents", 0), row.get("exports", 0)
+            totals["documents"] += documents
+            totals["exports"] += exports
+            if row["day"] >= recent_day:
+                totals["recent_documents"] += documents
+                totals["recent_exports"] += exports
+            if documents:
+                subjects[row.get("matiere")] += documents
+            if exports:
+                templates[row.get("template")] += exports
+
+        return {
+            "total_documents": totals["documents"],
+            "total_exports": totals["exports"],
+            "recent_activity": {
+                "documents_last_30_days": totals["recent_documents"],
+                "exports_last_30_days": totals["recent_exports"]
+            },
+            "subject_distribution": [
+                {"subject": subject, "count": count} for subject, count in subjects.items()
+            ],
+            "template_usage": [
+                {"template": template or "standard", "count": count} for template, count in templates.items()
+            ]
+        }
+
+    async def get_usage(self, owner: str, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """Activité jour par jour et matières par jour sur la période"""
+        daily_documents = Counter()
+        daily_exports = Counter()
+        subject_timeline = Counter()
+        for row in await self._rows(owner, day_of(start_date), day_of(end_date)):
+            documents, exports = row.get("documents", 0), row.get("exports", 0)
+            if documents:
+                daily_documents[row["day"]] += documents
+                subject_timeline[(row["day"], row.get("matiere"))] += documents
+            if exports:
+                daily_exports[row["day"]] += exports
+
+        return {
+            "daily_activity": {
+                "documents": [{"date": day, "count": count} for day, count in sorted(daily_documents.items())],
+                "exports": [{"date": day, "count": count} for day, count in sorted(daily_exports.items())]
+            },
+            "subject_timeline": [
+                {"date": day, "subject": subject, "count": count}
+                for (day, subject), count in sorted(subject_timeline.items(), key=lambda item: item[0][0])
+            ]
+        }
+
+    # ------------------------------------------------------------------
+    # Backfill
+    # ------------------------------------------------------------------
+
+    async def backfill(self, documents_collection, exports_collection) -> Tuple[int, int]:
+        """
+        Reconstruit les agrégats depuis l'historique.
+
+        Returns:
+            (lignes documents, lignes exports) écrites
+        """
+        documents_pipeline = [
+            {"$project": {
+                "owner": {"$ifNull": ["$user_id", "$guest_id"]},
+                "day": _DAY_EXPRESSION,
+                "matiere": 1
+            }},
+            {"$match": {"owner": {"$ne": None}}},
+            {"$group": {"_id": {"owner": "$owner", "day": "$day", "matiere": "$matiere"}, "count": {"$sum": 1}}}
+        ]
+        exports_pipeline = [
+            {"$project": {
+                "owner": {"$ifNull": ["$user_email", "$guest_id"]},
+                "day": _DAY_EXPRESSION,
+                "template": {"$ifNull": ["$template_used", "standard"]},
+                "document_id": 1
+            }},
+            {"$match": {"owner": {"$ne": None}}},
+            {"$group": {
+                "_id": {"owner": "$owner", "day": "$day", "template": "$template", "document_id": "$document_id"},
+                "count": {"$sum": 1}
+            }},
+            {"$lookup": {
+                "from": documents_collection.name,
+                "localField": "_id.document_id",
+                "foreignField": "id",
+                "as": "document"
+            }},
+            {"$group": {
+                "_id": {
+                    "owner": "$_id.owner",
+                    "day": "$_id.day",
+                    "template": "$_id.template",
+                    "matiere": {"$arrayElemAt": ["$document.matiere", 0]}
+                },
+                "count": {"$sum": "$count"}
+            }}
+        ]
+
+        document_rows = 0
+        async for group in documents_collection.aggregate(documents_pipeline, allowDiskUse=True):
+            key = group["_id"]
+            await self._set_count("documents", key["owner"], key["day"], key.get("matiere"), None, group["count"])
+            document_rows += 1
+
+        export_rows = 0
+        async for group in exports_collection.aggregate(exports_pipeline, allowDiskUse=True):
+            key = group["_id"]
+            await self._set_count("exports", key["owner"], key["day"], key.get("matiere"), key["template"], group["count"])
+            export_rows += 1
+
+        logger.info(f"✅ Analytics backfill: {document_rows} document rows, {export_rows} export rows")
+        return document_rows, export_rows
+
+    async def _set_count(self, field: str, owner: str, day: str, matiere: Optional[str], template: Optional[str], count: int):
+        await self.collection.update_one(
+            {"owner": owner, "day": day, "matiere": matiere, "template": template},
+            {"$set": {field: count}},
+            upsert=True
+        )
@@ -0,0 +1,219 @@
+"""
+Cache mémoire des sessions et du statut Pro
+
+Chaque requête authentifiée (export PDF, styles, template...) validait le
+token de session (find_one + update_one sur login_sessions) puis relisait
+pro_users : 3 à 4 allers-retours MongoDB avant tout travail utile.
+
+Ce cache conserve, par worker et pour une courte durée :
+    - session_token → email (jamais au-delà de l'expiration de la session)
+    - email → (statut Pro, document pro_users)
+    - email → document user_templates
+
+L'écriture de last_used est regroupée : au plus une par session et par
+intervalle (LAST_USED_INTERVAL), au lieu d'une par requête.
+
+Invalidation explicite (dans le worker courant) :
+    - logout / session rejetée → invalidate_session
+    - nouvelle connexion, checkout, sauvegarde du template → invalidate_user
+
+Les autres workers convergent au plus tard après le TTL, d'où des TTL courts.
+
+Configuration (variables d'environnement):
+- AUTH_CACHE_SESSION_TTL: durée de vie d'une session en cache, en secondes (défaut: 30)
+- AUTH_CACHE_PRO_TTL: durée de vie du statut Pro / template, en secondes (défaut: 60)
+- AUTH_CACHE_LAST_USED_INTERVAL: intervalle minimal entre deux écritures de last_used (défaut: 60)
+- AUTH_CACHE_MAX_ENTRIES: nombre maximal d'entrées par table (défaut: 10000)
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["AuthCache", "auth_cache"]
+
+_MISSING = object()
+
+
+class _TTLTable:
+    """Table LRU bornée dont chaque entrée porte sa propre échéance (monotonic)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        deadline, value = entry
+        if deadline <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any, ttl_seconds: float):
+        if ttl_seconds <= 0:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AuthCache:
+    """
+    Cache des vérifications d'authentification d'un worker.
+
+    Responsabilités :
+        - Servir session et statut Pro sans aller-retour MongoDB (chemin chaud)
+        - Ne jamais prolonger une session ou un abonnement au-delà de son expiration
+        - Regrouper les écritures de last_used
+        - Invalider par session ou par utilisateur
+        - Suivre les métriques (hit/miss)
+    """
+
+    def __init__(
+        self,
+        session_ttl: Optional[float] = None,
+        pro_ttl: Optional[float] = None,
+        last_used_interval: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        """
+        Args:
+            session_ttl: Durée de vie d'une session en cache (secondes)
+            pro_ttl: Durée de vie du statut Pro et du template (secondes)
+            last_used_interval: Intervalle minimal entre deux écritures de last_used
+            max_entries: Taille maximale de chaque table
+        """
+        self.session_ttl = session_ttl if session_ttl is not None else float(os.environ.get("AUTH_CACHE_SESSION_TTL", 30))
+        self.pro_ttl = pro_ttl if pro_ttl is not None else float(os.environ.get("AUTH_CACHE_PRO_TTL", 60))
+        self.last_used_interval = (
+            last_used_interval if last_used_interval is not None
+            else float(os.environ.get("AUTH_CACHE_LAST_USED_INTERVAL", 60))
+        )
+        max_entries = max_entries or int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+        self._sessions = _TTLTable(max_entries)
+        self._pro_status = _TTLTable(max_entries)
+        self._templates = _TTLTable(max_entries)
+        self._last_used_writes: "OrderedDict[str, float]" = OrderedDict()
+        self._max_entries = max_entries
+
+        # Métriques
+        self._hits = 0
+        self._misses = 0
+        self._last_used_skipped = 0
+
+    @staticmethod
+    def _seconds_until(expires_at: Optional[datetime]) -> float:
+        if expires_at is None:
+            return float("inf")
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+    def _count(self, value: Any) -> Any:
+        if value is _MISSING:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+
+    def get_session(self, session_token: str) -> Optional[str]:
+        """Email associé au token, ou None si absent du cache"""
+        value = self._count(self._sessions.get(session_token))
+        return None if value is _MISSING else value
+
+    def put_session(self, session_token: str, email: str, expires_at: Optional[datetime]):
+        """Mémorise une session valide, sans dépasser son expiration"""
+        ttl = min(self.session_ttl, self._seconds_until(expires_at))
+        self._sessions.put(session_token, email, ttl)
+
+    def should_touch(self, session_token: str) -> bool:
+        """
+        Indique si last_used doit être écrit pour cette session.
+
+        Retourne True au plus une fois par last_used_interval et par session.
+        """
+        now = time.monotonic()
+        last_write = self._last_used_writes.get(session_token)
+        if last_write is not None and now - last_write < self.last_used_interval:
+            self._last_used_skipped += 1
+            return False
+        self._last_used_writes[session_token] = now
+        self._last_used_writes.move_to_end(session_token)
+        while len(self._last_used_writes) > self._max_entries:
+            self._last_used_writes.popitem(last=False)
+        return True
+
+    def invalidate_session(self, session_token: str):
+        self._sessions.pop(session_token)
+        self._last_used_writes.pop(session_token, None)
+
+    # ------------------------------------------------------------------
+    # Statut Pro / template
+    # ------------------------------------------------------------------
+
+    def get_pro_status(self, email: str) -> Optional[Tuple[bool, Optional[Dict[str, Any]]]]:
+        """(is_pro, user) en cache, ou None si absent"""
+        value = self._count(self._pro_status.get(email))
+        return None if value is _MISSING else value
+
+    def put_pro_status(self, email: str, is_pro: bool, user: Optional[Dict[str, Any]], expires_at: Optional[datetime] = None):
+        """Mémorise le statut Pro ; un statut actif n'est jamais servi après expires_at"""
+        ttl = min(self.pro_ttl, self._seconds_until(expires_at)) if is_pro else self.pro_ttl
+        self._pro_status.put(email, (is_pro, user), ttl)
+
+    def get_template(self, email: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(trouvé en cache, document user_templates) ; le document peut être None (pas de template)"""
+        value = self._count(self._templates.get(email))
+        return (False, None) if value is _MISSING else (True, value)
+
+    def put_template(self, email: str, template_doc: Optional[Dict[str, Any]]):
+        self._templates.put(email, template_doc, self.pro_ttl)
+
+    def invalidate_user(self, email: str):
+        """Oublie le statut Pro, le template et toutes les sessions d'un utilisateur"""
+        self._pro_status.pop(email)
+        self._templates.pop(email)
+        for session_token in [token for token, (_, value) in self._sessions._entries.items() if value == email]:
+            self.invalidate_session(session_token)
+        logger.info(f"🔄 Auth cache invalidated for {email}")
+
+    # ------------------------------------------------------------------
+    # Métriques
+    # ------------------------------------------------------------------
+
+    def get_metrics(self) -> Dict[str, Any]:
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / total * 100, 2) if total else 0.0,
+            "sessions": len(self._sessions),
+            "pro_status": len(self._pro_status),
+            "templates": len(self._templates),
+            "last_used_writes_skipped": self._last_used_skipped
+        }
+
+
+auth_cache = AuthCache()
@@ -0,0 +1,177 @@
+"""
+Statistiques et cache du catalogue (GET /api/catalogue/...)
+
+Le nombre d'ExerciseTypes par chapitre était obtenu par un count_documents
+par chapitre (un aller-retour MongoDB par ligne du catalogue).
+
+Ici, une seule agrégation $group par niveau renvoie les effectifs par
+(domaine, chapitre_id, chapter_code) ; les effectifs de chaque chapitre sont
+ensuite sommés en mémoire, avec les mêmes règles de correspondance :
+    - chapitre MongoDB : chapitre_id ∈ {code, legacy_code} ou chapter_code == code
+    - fallback CHAPITRES_STRUCTURE : même domaine et chapitre_id ∈ {titre, id}
+
+Les réponses sont mises en cache (CatalogueCache) avec un ETag calculé sur
+leur contenu ; le cache est vidé par le CRUD des ExerciseTypes et par
+l'upsert des chapitres.
+
+Configuration (variables d'environnement):
+- CATALOGUE_CACHE_TTL: durée de vie d'une réponse en cache, en secondes (défaut: 300).
+  Borne la désynchronisation entre workers et après une migration.
+- CATALOGUE_CACHE_MAX_ENTRIES: nombre maximum de réponses en cache (défaut: 256).
+  Les clés incluent les paramètres de requête libres (niveau, domaine) : au-delà,
+  les réponses les moins récemment servies sont évincées (LRU).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["ChapterCounts", "CatalogueCache", "CachedResponse", "load_chapter_counts", "etag_matches", "catalogue_cache"]
+
+GroupKey = Tuple[Optional[str], Optional[str], Optional[str]]  # (domaine, chapitre_id, chapter_code)
+
+
+class ChapterCounts:
+    """Effectifs d'ExerciseTypes par (domaine, chapitre_id, chapter_code)"""
+
+    def __init__(self, groups: Dict[GroupKey, int]):
+        self.groups = groups
+
+    def for_chapter(self, chapter: Dict[str, Any]) -> int:
+        """Chapitre MongoDB : chapitre_id ∈ {code, legacy_code} ou chapter_code == code"""
+        code = chapter["code"]
+        chapitre_ids = {code, chapter.get("legacy_code")} - {None}
+        return sum(
+            count for (_, chapitre_id, chapter_code), count in self.groups.items()
+            if chapitre_id in chapitre_ids or chapter_code == code
+        )
+
+    def for_legacy_chapter(self, domaine: str, chapitre_def: Dict[str, Any]) -> int:
+        """Chapitre de CHAPITRES_STRUCTURE : même domaine, chapitre_id ∈ {titre, id}"""
+        chapitre_ids = {chapitre_def["titre"], chapitre_def["id"]}
+        return sum(
+            count for (group_domaine, chapitre_id, _), count in self.groups.items()
+            if group_domaine == domaine and chapitre_id in chapitre_ids
+        )
+
+
+async def load_chapter_counts(collection, niveau: Optional[str] = None) -> ChapterCounts:
+    """Une seule agrégation pour tous les chapitres (d'un niveau, ou de tous)"""
+    pipeline: List[Dict[str, Any]] = []
+    if niveau:
+        pipeline.append({"$match": {"niveau": niveau}})
+    pipeline.append({
+        "$group": {
+            "_id": {"domaine": "$domaine", "chapitre_id": "$chapitre_id", "chapter_code": "$chapter_code"},
+            "count": {"$sum": 1}
+        }
+    })
+
+    groups: Dict[GroupKey, int] = {}
+    for group in await collection.aggregate(pipeline).to_list(None):
+        key = group["_id"]
+        groups[(key.get("domaine"), key.get("chapitre_id"), key.get("chapter_code"))] = group["count"]
+    return ChapterCounts(groups)
+
+
+class CachedResponse(NamedTuple):
+    payload: Any
+    etag: str
+
+
+class CatalogueCache:
+    """
+    Réponses du catalogue déjà sérialisées, avec leur ETag.
+
+    Responsabilités :
+        - Servir une réponse sans requête MongoDB tant qu'elle est valide
+        - Calculer un ETag stable (hash du contenu JSON)
+        - Tout invalider lors d'une écriture sur les ExerciseTypes / chapitres
+        - Rester borné : entrées expirées purgées, LRU au-delà de max_entries
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        Args:
+            ttl_seconds: Durée de vie d'une réponse en cache
+            max_entries: Nombre maximum de réponses conservées
+        """
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("CATALOGUE_CACHE_TTL", 300))
+        self.max_entries = max_entries or int(os.environ.get("CATALOGUE_CACHE_MAX_ENTRIES", 256))
+        self._entries: "OrderedDict[Tuple, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._generation = 0
+
+        # Métriques
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_etag(payload: Any) -> str:
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return '"' + hashlib.sha1(canonical.encode("utf-8")).hexdigest() + '"'
+
+    @property
+    def generation(self) -> int:
+        """Incrémenté à chaque invalidation"""
+        return self._generation
+
+    def get(self, key: Tuple) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry[1]
+
+    def put(self, key: Tuple, payload: Any, generation: Optional[int] = None) -> CachedResponse:
+        """
+        Stocke une réponse sérialisable en JSON.
+
+        generation : valeur de `generation` lue avant le calcul ; si une
+        invalidation a eu lieu entre-temps, la réponse n'est pas conservée.
+        """
+        response = CachedResponse(payload, self.make_etag(payload))
+        if generation is None or generation == self._generation:
+            now = time.monotonic()
+            for expired in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                del self._entries[expired]
+            self._entries[key] = (now + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return response
+
+    def invalidate(self, reason: str = ""):
+        self._generation += 1
+        self._entries.clear()
+        logger.info(f"🔄 Catalogue cache invalidated{f' ({reason})' if reason else ''}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / total * 100, 2) if total else 0.0,
+            "entries": len(self._entries),
+            "generation": self._generation
+        }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible d'un en-tête If-None-Match (liste, W/, *)"""
+    if not if_none_match:
+        return False
+    candidates: Iterable[str] = (value.strip() for value in if_none_match.split(","))
+    return any(candidate in ("*", etag, f"W/{etag}") for candidate in candidates)
+
+
+catalogue_cache = CatalogueCache()
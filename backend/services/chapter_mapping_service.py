@@ -2,21 +2,155 @@
 Service de mapping entre chapitre_id (legacy) et chapter_code (MathALÉA)
 
 Ce service aide à gérer la transition douce entre les deux systèmes de référencement des chapitres.
+
+La résolution chapitre_id → chapter_code passe par un index en mémoire
+(ChapterResolutionIndex) construit depuis la collection `chapters` :
+    1. legacy_code → code
+    2. code → code
+    3. titre normalisé (contient chapitre_id) + niveau → code
+Il remplace les trois find_one successifs par ExerciseType, dont une regex
+non ancrée sur `titre` qui ne pouvait pas utiliser d'index.
+
+L'index est chargé au premier appel de resolve_many(), puis rechargé :
+    - après une écriture sur les chapitres dans ce worker
+      (ChapterService.upsert_chapter, admin curriculum)
+    - au-delà de CHAPTER_INDEX_TTL secondes (défaut: 300), pour prendre en
+      compte les écritures faites par les autres workers
 """
 
 import logging
-from typing import Optional
+import os
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 logger = logging.getLogger(__name__)
 
 
+def _field(exercise_type, name: str) -> Optional[Any]:
+    """Champ d'un ExerciseType (dict ou modèle Pydantic)"""
+    if isinstance(exercise_type, dict):
+        return exercise_type.get(name)
+    return getattr(exercise_type, name, None)
+
+
+def normalize_titre(value: str) -> str:
+    """Forme de comparaison des titres (équivalent de l'option $regex "i")"""
+    return unicodedata.normalize("NFKC", value).casefold().strip()
+
+
+class ChapterResolutionIndex:
+    """
+    Table de résolution chapitre_id → chapter_code, en mémoire.
+
+    Responsabilités :
+        - Résoudre un chapitre_id sans requête MongoDB
+        - Conserver l'ordre de la collection pour la recherche par titre
+          (premier chapitre trouvé, comme find_one)
+        - Se marquer périmé lors d'une écriture sur les chapitres ou à
+          l'expiration de son TTL
+
+    Args:
+        ttl_seconds: Durée de vie de l'index (CHAPTER_INDEX_TTL, défaut 300)
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("CHAPTER_INDEX_TTL", 300))
+        self._by_legacy_code: Dict[str, str] = {}
+        self._by_code: Dict[str, str] = {}
+        self._titres_by_niveau: Dict[str, List[Tuple[str, str]]] = {}
+        self._resolved: Dict[Tuple[str, Optional[str]], Optional[str]] = {}
+        self._loaded_at: Optional[float] = None
+        self._stale = False
+
+    @property
+    def needs_refresh(self) -> bool:
+        return (
+            self._loaded_at is None
+            or self._stale
+            or time.monotonic() - self._loaded_at >= self.ttl_seconds
+        )
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def build(self, chapters: Iterable[Dict[str, Any]]):
+        """Reconstruit toutes les tables (remplacement atomique)"""
+        by_legacy_code: Dict[str, str] = {}
+        by_code: Dict[str, str] = {}
+        titres_by_niveau: Dict[str, List[Tuple[str, str]]] = {}
+
+        for chapter in chapters:
+            code = chapter.get("code")
+            if not code:
+                continue
+            by_code.setdefault(code, code)
+            if chapter.get("legacy_code"):
+                by_legacy_code.setdefault(chapter["legacy_code"], code)
+            if chapter.get("niveau") and chapter.get("titre"):
+                titres_by_niveau.setdefault(chapter["niveau"], []).append((normalize_titre(chapter["titre"]), code))
+
+        self._by_legacy_code = by_legacy_code
+        self._by_code = by_code
+        self._titres_by_niveau = titres_by_niveau
+        self._resolved = {}
+        self._loaded_at = time.monotonic()
+        self._stale = False
+
+    def invalidate(self, reason: str = ""):
+        self._stale = True
+        logger.info(f"🔄 Chapter resolution index invalidated{f' ({reason})' if reason else ''}")
+
+    def resolve(self, chapitre_id: str, niveau: Optional[str] = None) -> Optional[str]:
+        """Mêmes stratégies, dans le même ordre, que les anciennes requêtes"""
+        code = self._by_legacy_code.get(chapitre_id) or self._by_code.get(chapitre_id)
+        if code or not niveau:
+            return code
+
+        key = (chapitre_id, niveau)
+        if key not in self._resolved:
+            needle = normalize_titre(chapitre_id)
+            self._resolved[key] = next(
+                (code for titre, code in self._titres_by_niveau.get(niveau, ()) if needle in titre),
+                None
+            )
+        return self._resolved[key]
+
+
 class ChapterMappingService:
     """Service pour gérer le mapping chapitre_id ↔ chapter_code"""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncIOMotorDatabase, index: Optional[ChapterResolutionIndex] = None):
         self.db = db
         self.chapters_collection = db.chapters
+        self.index = index if index is not None else chapter_resolution_index
+    
+    async def refresh_index(self) -> int:
+        """
+        Recharge l'index de résolution depuis la collection chapters
+        
+        Returns:
+            Nombre de chapitres indexés
+        """
+        chapters = await self.chapters_collection.find(
+            {},
+            {"_id": 0, "code": 1, "legacy_code": 1, "titre": 1, "niveau": 1}
+        ).to_list(None)
+        self.index.build(chapters)
+        logger.info(f"✅ Chapter resolution index loaded: {len(self.index)} chapters")
+        return len(self.index)
+    
+    async def _ensure_index(self) -> bool:
+        """Charge l'index si absent ou périmé ; False si MongoDB est indisponible"""
+        if not self.index.needs_refresh:
+            return True
+        try:
+            await self.refresh_index()
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de l'index des chapitres: {e}")
+            return False
     
     async def get_chapter_code_for_exercise_type(
         self,
@@ -38,23 +172,43 @@ class ChapterMappingService:
            - chapitre_id (legacy_code)
            - titre + niveau
         """
-        # Cas 1 : chapter_code déjà présent
-        if isinstance(exercise_type, dict):
-            chapter_code = exercise_type.get("chapter_code")
-        else:
-            # Pydantic model
-            chapter_code = getattr(exercise_type, "chapter_code", None)
+        return (await self.resolve_many([exercise_type]))[0]
+    
+    async def resolve_many(self, exercise_types: Iterable[Any]) -> List[Optional[str]]:
+        """
+        Résout le chapter_code d'une liste d'ExerciseTypes en une seule étape
         
-        if chapter_code:
-            return chapter_code
+        Args:
+            exercise_types: ExerciseTypes (dicts ou modèles Pydantic)
         
-        # Cas 2 : Recherche dans la collection chapters
-        chapitre_id = exercise_type.get("chapitre_id") if isinstance(exercise_type, dict) else getattr(exercise_type, "chapitre_id", None)
-        niveau = exercise_type.get("niveau") if isinstance(exercise_type, dict) else getattr(exercise_type, "niveau", None)
+        Returns:
+            chapter_code (ou None) pour chaque ExerciseType, dans le même ordre
         
-        if not chapitre_id:
-            return None
+        L'index est chargé au plus une fois pour tout le lot.
+        """
+        exercise_types = list(exercise_types)
+        pending = [et for et in exercise_types if not _field(et, "chapter_code") and _field(et, "chapitre_id")]
+        index_ready = await self._ensure_index() if pending else True
         
+        results: List[Optional[str]] = []
+        for exercise_type in exercise_types:
+            chapter_code = _field(exercise_type, "chapter_code")
+            chapitre_id = _field(exercise_type, "chapitre_id")
+            niveau = _field(exercise_type, "niveau")
+            
+            if not chapter_code and chapitre_id:
+                if index_ready:
+                    chapter_code = self.index.resolve(chapitre_id, niveau)
+                else:
+                    chapter_code = await self._resolve_from_db(chapitre_id, niveau)
+                if not chapter_code:
+                    logger.debug(f"Aucun chapter_code trouvé pour chapitre_id='{chapitre_id}', niveau='{niveau}'")
+            
+            results.append(chapter_code or None)
+        return results
+    
+    async def _resolve_from_db(self, chapitre_id: str, niveau: Optional[str]) -> Optional[str]:
+        """Résolution directe par requêtes (si l'index n'a pas pu être chargé)"""
         try:
             # Stratégie 1 : Par legacy_code
             chapter = await self.chapters_collection.find_one(
@@ -87,8 +241,6 @@ class ChapterMappingService:
                 if chapter:
                     return chapter["code"]
             
-            # Aucune correspondance trouvée
-            logger.debug(f"Aucun chapter_code trouvé pour chapitre_id='{chapitre_id}', niveau='{niveau}'")
             return None
         
         except Exception as e:
@@ -230,4 +382,7 @@ class ChapterMappingService:
             return []
 
 
-__all__ = ["ChapterMappingService"]
+chapter_resolution_index = ChapterResolutionIndex()
+
+
+__all__ = ["ChapterMappingService", "ChapterResolutionIndex", "chapter_resolution_index"]
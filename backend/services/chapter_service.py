@@ -6,6 +6,8 @@ import logging
 from typing import List, Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from models.chapter_model import Chapter, ChapterCreate, get_domaine_legacy
+from services.catalogue_stats_service import catalogue_cache
+from services.chapter_mapping_service import chapter_resolution_index
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
@@ -61,6 +63,9 @@ class ChapterService:
                 upsert=True
             )
             
+            catalogue_cache.invalidate(f"chapter {code}")
+            chapter_resolution_index.invalidate(f"chapter {code}")
+            
             # Récupérer le document
             chapter = await self.collection.find_one({"code": code}, {"_id": 0})
             
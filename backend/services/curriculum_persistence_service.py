@@ -2,16 +2,34 @@
 Service de persistance du curriculum en MongoDB.
 
 Gère les opérations CRUD sur les chapitres du curriculum.
-Maintient la synchronisation entre MongoDB et le fichier JSON local.
+
+Architecture:
+- MongoDB: Source de vérité (curriculum_chapters)
+- curriculum_versions: version du curriculum, incrémentée à chaque écriture admin
+- Chaque worker sert un snapshot (CurriculumIndex) de cette version ; il compare
+  sa version à celle de MongoDB à intervalle court et reconstruit l'index hors
+  de la boucle d'événements, puis l'installe en une affectation
+- curriculum_6e.json: jeu initial et repli hors MongoDB, réécrit uniquement par
+  la commande d'export (scripts/export_curriculum.py)
 """
 
 import json
 import os
+import asyncio
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
+
+from curriculum.loader import (
+    CurriculumIndex,
+    build_curriculum_index,
+    get_curriculum_version,
+    install_curriculum_index
+)
+from services.chapter_mapping_service import chapter_resolution_index
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +40,12 @@ CURRICULUM_6E_PATH = os.path.join(CURRICULUM_DIR, "curriculum_6e.json")
 # Collection MongoDB pour le curriculum
 CURRICULUM_COLLECTION = "curriculum_chapters"
 
+# Version du curriculum par niveau ({_id: "6e", version: int})
+CURRICULUM_VERSIONS_COLLECTION = "curriculum_versions"
+
+# Intervalle de vérification de la version par chaque worker (secondes)
+CURRICULUM_VERSION_CHECK_SECONDS = float(os.environ.get("CURRICULUM_VERSION_CHECK_SECONDS", 5))
+
 
 import re
 from pydantic import field_validator
@@ -82,15 +106,103 @@ class ChapterUpdateRequest(BaseModel):
     contexts: Optional[List[str]] = None
 
 
+class CurriculumSnapshotService:
+    """
+    Snapshot versionné du curriculum 6e servi par curriculum.loader.
+
+    Responsabilités :
+        - Incrémenter la version MongoDB à chaque écriture admin
+        - Comparer la version servie à celle de MongoDB (une lecture par _id)
+        - Reconstruire l'index dans un thread puis l'installer atomiquement
+    """
+
+    NIVEAU = "6e"
+
+    def __init__(self):
+        self._check_task: Optional[asyncio.Task] = None
+        self._reload_lock = asyncio.Lock()
+
+    @property
+    def version(self) -> Optional[int]:
+        """Version servie par ce worker (None = fichier JSON)"""
+        return get_curriculum_version()
+
+    async def read_version(self, db: AsyncIOMotorDatabase) -> int:
+        doc = await db[CURRICULUM_VERSIONS_COLLECTION].find_one({"_id": self.NIVEAU})
+        return doc["version"] if doc else 0
+
+    async def bump_version(self, db: AsyncIOMotorDatabase) -> int:
+        doc = await db[CURRICULUM_VERSIONS_COLLECTION].find_one_and_update(
+            {"_id": self.NIVEAU},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+    async def load(self, db: AsyncIOMotorDatabase) -> CurriculumIndex:
+        """Relit le curriculum depuis MongoDB et installe le nouvel index"""
+        async with self._reload_lock:
+            # Version lue AVANT les chapitres : une écriture intercalée sera rejouée à la vérification suivante
+            version = await self.read_version(db)
+            chapters = await db[CURRICULUM_COLLECTION].find(
+                {"niveau": self.NIVEAU},
+                {"_id": 0, "created_at": 0, "updated_at": 0}
+            ).sort("code_officiel", 1).to_list(1000)
+
+            index = await asyncio.get_running_loop().run_in_executor(
+                None, build_curriculum_index, chapters, version
+            )
+            if install_curriculum_index(index):
+                # La table chapitre_id → chapter_code sera rechargée au prochain appel
+                chapter_resolution_index.invalidate(f"curriculum v{version}")
+            return index
+
+    async def check(self, db: AsyncIOMotorDatabase) -> bool:
+        """Recharge si MongoDB a une version plus récente que celle servie"""
+        version = await self.read_version(db)
+        served = self.version
+        if served is not None and version <= served:
+            return False
+        await self.load(db)
+        return True
+
+    async def _check_forever(self, db: AsyncIOMotorDatabase, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self.check(db):
+                    logger.info(f"🔄 Curriculum rechargé (v{self.version})")
+            except Exception as e:
+                logger.warning(f"⚠️ Vérification de la version du curriculum en échec : {e}")
+
+    def start_version_checks(self, db: AsyncIOMotorDatabase, interval: float = CURRICULUM_VERSION_CHECK_SECONDS) -> None:
+        if self._check_task is None or self._check_task.done():
+            self._check_task = asyncio.get_running_loop().create_task(self._check_forever(db, interval))
+
+    async def stop_version_checks(self) -> None:
+        if self._check_task is not None:
+            self._check_task.cancel()
+            try:
+                await self._check_task
+            except asyncio.CancelledError:
+                pass
+            self._check_task = None
+
+
+curriculum_snapshot = CurriculumSnapshotService()
+
+
 class CurriculumPersistenceService:
     """
     Service de persistance pour le curriculum.
-    Gère la synchronisation MongoDB <-> fichier JSON.
+    Écrit dans MongoDB puis publie une nouvelle version (CurriculumSnapshotService).
     """
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncIOMotorDatabase, snapshot: Optional[CurriculumSnapshotService] = None):
         self.db = db
         self.collection = db[CURRICULUM_COLLECTION]
+        self.snapshot = snapshot or curriculum_snapshot
         self._initialized = False
     
     async def initialize(self) -> None:
@@ -138,10 +250,14 @@ class CurriculumPersistenceService:
             await self.collection.insert_many(chapters)
             logger.info(f"Chargé {len(chapters)} chapitres depuis le fichier JSON")
     
-    async def _sync_to_json(self) -> None:
+    async def export_to_json(self, filepath: str = CURRICULUM_6E_PATH) -> int:
         """
-        Synchronise les données MongoDB vers le fichier JSON.
-        Maintient la compatibilité avec le système existant.
+        Exporte les chapitres MongoDB vers le fichier JSON.
+        Commande explicite (scripts/export_curriculum.py), hors chemin des requêtes.
+        Les autres clés du fichier (macro_groups, version, description) sont conservées.
+        
+        Returns:
+            Nombre de chapitres exportés
         """
         chapters = await self.collection.find(
             {"niveau": "6e"},
@@ -154,14 +270,18 @@ class CurriculumPersistenceService:
         data = {
             "version": 1,
             "niveau": "6e",
-            "description": "Référentiel pédagogique officiel 6e basé sur le programme de mathématiques",
-            "chapitres": chapters
+            "description": "Référentiel pédagogique officiel 6e basé sur le programme de mathématiques"
         }
+        if os.path.exists(filepath):
+            with open(filepath, "r", encoding="utf-8") as f:
+                data.update(json.load(f))
+        data["chapitres"] = chapters
         
-        with open(CURRICULUM_6E_PATH, "w", encoding="utf-8") as f:
+        with open(filepath, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         
-        logger.info(f"Fichier JSON synchronisé avec {len(chapters)} chapitres")
+        logger.info(f"Fichier JSON exporté avec {len(chapters)} chapitres")
+        return len(chapters)
     
     async def get_all_chapters(self, niveau: str = "6e") -> List[Dict[str, Any]]:
         """Récupère tous les chapitres d'un niveau"""
@@ -215,11 +335,7 @@ class CurriculumPersistenceService:
         
         await self.collection.insert_one(chapter)
         
-        # Synchroniser avec le fichier JSON
-        await self._sync_to_json()
-        
-        # Recharger le curriculum en mémoire
-        await self._reload_curriculum_index()
+        await self._publish_change()
         
         logger.info(f"Chapitre créé: {request.code_officiel}")
         
@@ -263,11 +379,7 @@ class CurriculumPersistenceService:
             {"$set": update_data}
         )
         
-        # Synchroniser avec le fichier JSON
-        await self._sync_to_json()
-        
-        # Recharger le curriculum en mémoire
-        await self._reload_curriculum_index()
+        await self._publish_change()
         
         logger.info(f"Chapitre mis à jour: {code_officiel}")
         
@@ -302,35 +414,24 @@ class CurriculumPersistenceService:
         result = await self.collection.delete_one({"code_officiel": code_officiel})
         
         if result.deleted_count > 0:
-            # Synchroniser avec le fichier JSON
-            await self._sync_to_json()
-            
-            # Recharger le curriculum en mémoire
-            await self._reload_curriculum_index()
+            await self._publish_change()
             
             logger.info(f"Chapitre supprimé: {code_officiel}")
             return True
         
         return False
     
-    async def _reload_curriculum_index(self) -> None:
+    async def _publish_change(self) -> None:
         """
-        Recharge l'index du curriculum en mémoire.
-        Nécessaire après chaque modification pour que les changements soient pris en compte.
+        Publie une nouvelle version du curriculum.
+        Ce worker recharge immédiatement ; les autres à leur prochaine vérification de version.
         """
         try:
-            from curriculum.loader import load_curriculum_6e, _curriculum_index
-            import curriculum.loader as loader_module
-            
-            # Réinitialiser le singleton
-            loader_module._curriculum_index = None
-            
-            # Recharger
-            load_curriculum_6e()
-            
-            logger.info("Index curriculum rechargé en mémoire")
+            version = await self.snapshot.bump_version(self.db)
+            await self.snapshot.load(self.db)
+            logger.info(f"Curriculum v{version} publié")
         except Exception as e:
-            logger.error(f"Erreur lors du rechargement de l'index: {e}")
+            logger.error(f"Erreur lors de la publication du curriculum: {e}")
     
     async def get_available_generators(self) -> List[str]:
         """
@@ -0,0 +1,191 @@
+"""
+Service de rendu HTML des documents (énoncés, résultats, étapes)
+
+Le rendu LaTeX → SVG (matplotlib) et le traitement des schémas géométriques
+sont coûteux : ils sont calculés une seule fois, à la génération du document,
+et stockés dans le champ `exercises_html` avec un tampon `renderer_version`.
+
+La liste des documents (GET /api/documents) devient une simple lecture Mongo
+indexée ; un document n'est re-rendu que si son tampon ne correspond plus à
+RENDERER_VERSION (renderers modifiés, documents antérieurs à ce service).
+
+⚠️ Incrémenter RENDERER_VERSION à chaque changement de sortie de
+latex_to_svg.py ou geometry_renderer.py.
+"""
+
+import copy
+import logging
+from typing import Any, Dict, List
+
+from subsystems import get_geometry_renderer, get_latex_renderer
+
+logger = logging.getLogger(__name__)
+
+RENDERER_VERSION = "2"
+
+# Projection de lecture pour la liste des documents (sans les exercices bruts)
+DOCUMENT_LIST_PROJECTION = {"_id": 0, "exercises": 0}
+
+
+def process_exercise_content(content: str) -> str:
+    """
+    Processes the exercise content to render both LaTeX and geometric schemas.
+    This centralizes all content processing logic for consistency.
+    """
+    if not content or not isinstance(content, str):
+        return content if isinstance(content, str) else ""
+
+    # 1. Process legacy geometric schemas (for backward compatibility)
+    try:
+        content = get_geometry_renderer().process_geometric_schemas_for_web(content)
+    except Exception as e:
+        logger.error(f"Error processing legacy geometric schemas: {e}")
+
+    # 2. Process LaTeX formulas
+    try:
+        content = get_latex_renderer().convert_latex_to_svg(content)
+    except Exception as e:
+        logger.error(f"Error processing LaTeX: {e}")
+
+    return content
+
+
+def prerender_latex(exercises: List[Dict[str, Any]]):
+    """
+    Rend en un seul lot les expressions LaTeX distinctes de toute une fiche.
+
+    Les conversions champ par champ qui suivent (process_exercise_content)
+    ne font alors plus que des lectures du cache mémoire.
+    """
+    expressions = []
+    for exercise in exercises or []:
+        solution = exercise.get('solution') or {}
+        texts = [exercise.get('enonce'), solution.get('resultat')]
+        texts += solution.get('etapes') or []
+        texts += (exercise.get('donnees') or {}).get('options') or []
+        for text in texts:
+            if isinstance(text, str):
+                expressions.extend(get_latex_renderer().extract_expressions(text))
+
+    if expressions:
+        try:
+            get_latex_renderer().render_latex_batch(expressions)
+        except Exception as e:
+            logger.error(f"Error pre-rendering LaTeX batch: {e}")
+
+
+def render_exercise_html(exercise: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Retourne une copie de l'exercice avec énoncé, résultat et étapes rendus en HTML.
+
+    Args:
+        exercise: Exercice tel que stocké dans `documents.exercises`
+
+    Returns:
+        Nouvel exercice (l'original n'est pas modifié)
+    """
+    rendered = copy.deepcopy(exercise)
+
+    if rendered.get('enonce'):
+        rendered['enonce'] = process_exercise_content(rendered['enonce'])
+
+    solution = rendered.get('solution')
+    if solution:
+        if solution.get('resultat'):
+            solution['resultat'] = process_exercise_content(solution['resultat'])
+        if solution.get('etapes') and isinstance(solution['etapes'], list):
+            solution['etapes'] = [process_exercise_content(step) for step in solution['etapes']]
+
+    return rendered
+
+
+def render_document_fields(exercises: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Champs de rendu à persister avec un document.
+
+    Returns:
+        {"exercises_html": [...], "renderer_version": RENDERER_VERSION}
+    """
+    prerender_latex(exercises)
+    return {
+        "exercises_html": [render_exercise_html(exercise) for exercise in exercises or []],
+        "renderer_version": RENDERER_VERSION
+    }
+
+
+def is_render_current(document: Dict[str, Any]) -> bool:
+    """Le rendu stocké du document est-il à jour ?"""
+    return document.get("renderer_version") == RENDERER_VERSION and "exercises_html" in document
+
+
+async def ensure_rendered(collection, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Re-rend paresseusement les documents dont le rendu est absent ou périmé.
+
+    Les documents doivent avoir été lus avec DOCUMENT_LIST_PROJECTION : les
+    exercices bruts des seuls documents périmés sont relus en une requête `$in`.
+
+    Args:
+        collection: Collection Mongo `documents`
+        documents: Documents lus sans les exercices bruts
+
+    Returns:
+        Les mêmes documents, avec `exercises_html` et `renderer_version` à jour
+    """
+    stale_ids = [doc["id"] for doc in documents if not is_render_current(doc) and doc.get("id")]
+    if not stale_ids:
+        return documents
+
+    raw_cursor = collection.find({"id": {"$in": stale_ids}}, {"_id": 0, "id": 1, "exercises": 1})
+    raw_by_id = {raw["id"]: raw.get("exercises", []) async for raw in raw_cursor}
+
+    for doc in documents:
+        if doc.get("id") in raw_by_id:
+            fields = render_document_fields(raw_by_id[doc["id"]])
+            await collection.update_one({"id": doc["id"]}, {"$set": fields})
+            doc.update(fields)
+
+    logger.info(f"Re-rendered {len(raw_by_id)} documents (renderer version {RENDERER_VERSION})")
+    return documents
+
+
+async def backfill_rendered_documents(collection, batch_size: int = 100) -> int:
+    """
+    Calcule le rendu stocké de tous les documents périmés (migration de masse).
+
+    Idempotent : peut être relancé sans danger, ne traite que les documents
+    dont `renderer_version` diffère de RENDERER_VERSION.
+
+    Returns:
+        Nombre de documents rendus
+    """
+    query = {"renderer_version": {"$ne": RENDERER_VERSION}}
+    total = 0
+
+    while True:
+        batch = await collection.find(query, {"exercises": 1}).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        for doc in batch:
+            await collection.update_one(
+                {"_id": doc["_id"]},
+                {"$set": render_document_fields(doc.get("exercises", []))}
+            )
+        total += len(batch)
+        logger.info(f"Backfill rendered documents: {total} done")
+
+    return total
+
+
+__all__ = [
+    "RENDERER_VERSION",
+    "DOCUMENT_LIST_PROJECTION",
+    "process_exercise_content",
+    "prerender_latex",
+    "render_exercise_html",
+    "render_document_fields",
+    "is_render_current",
+    "ensure_rendered",
+    "backfill_rendered_documents"
+]
@@ -2,25 +2,38 @@
 Service de persistance des exercices figés en MongoDB.
 
 Gère les opérations CRUD sur les exercices pilotes (GM07, GM08, etc.).
-Maintient la synchronisation entre MongoDB et les fichiers Python de données.
 
 Architecture:
-- MongoDB: Source de vérité pour les exercices
-- Fichiers Python: Générés automatiquement pour compatibilité avec les handlers
+- MongoDB: Source de vérité pour les exercices (admin_exercises)
+- Mémoire: snapshot versionné par chapitre (PilotExerciseStore), servi aux handlers
+- admin_exercise_versions: compteur de version par chapitre, incrémenté à chaque
+  écriture ; les autres workers le consultent (poll) pour recharger le chapitre
+- Fichiers Python (data/): jeu initial et repli hors MongoDB, régénérés uniquement
+  par la commande d'export (scripts/export_pilot_exercises.py)
 """
 
 import os
+import asyncio
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field, validator
+from pymongo import ReturnDocument
+
+from services.exercise_pool_index import POOL_SOURCES, ExercisePool, ExercisePoolRegistry, exercise_pools
 
 logger = logging.getLogger(__name__)
 
 # Collection MongoDB pour les exercices
 EXERCISES_COLLECTION = "admin_exercises"
 
+# Compteur de version par chapitre ({_id: chapter_code, version: int})
+EXERCISE_VERSIONS_COLLECTION = "admin_exercise_versions"
+
+# Intervalle de vérification des versions par chaque worker (secondes)
+PILOT_EXERCISES_POLL_SECONDS = float(os.environ.get("PILOT_EXERCISES_POLL_SECONDS", 5))
+
 # Chemin vers le dossier data
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 
@@ -113,6 +126,125 @@ class ExerciseResponse(BaseModel):
     updated_at: Optional[datetime] = None
 
 
+# =============================================================================
+# STORE EN MÉMOIRE (snapshots versionnés des chapitres pilotes)
+# =============================================================================
+
+class PilotExerciseStore:
+    """
+    Snapshots en mémoire des chapitres pilotes, chargés depuis MongoDB.
+
+    Responsabilités :
+        - Publier dans `exercise_pools` un pool immuable par chapitre, avec sa version
+        - Incrémenter le compteur de version du chapitre à chaque écriture admin
+        - Appliquer une écriture locale par copie du snapshot (sans relire le chapitre)
+        - Détecter les écritures des autres workers (poll du compteur de version)
+    """
+
+    def __init__(self, pools: ExercisePoolRegistry = exercise_pools):
+        self.pools = pools
+        self._poll_task: Optional[asyncio.Task] = None
+
+    def version(self, chapter_code: str) -> Optional[int]:
+        """Version publiée (None = pas encore chargé depuis MongoDB)"""
+        pool = self.pools.current(chapter_code)
+        return pool.version if pool else None
+
+    async def load(self, db: AsyncIOMotorDatabase, chapter_code: str) -> ExercisePool:
+        """Relit le chapitre depuis MongoDB et publie le snapshot"""
+        chapter_upper = chapter_code.upper()
+        # Version lue AVANT les exercices : une écriture intercalée sera rejouée au prochain poll
+        version_doc = await db[EXERCISE_VERSIONS_COLLECTION].find_one({"_id": chapter_upper})
+        version = version_doc["version"] if version_doc else 0
+        exercises = await db[EXERCISES_COLLECTION].find(
+            {"chapter_code": chapter_upper},
+            {"_id": 0}
+        ).sort("id", 1).to_list(None)
+        return self.pools.rebuild(chapter_upper, exercises, version=version)
+
+    async def load_all(self, service: "ExercisePersistenceService") -> None:
+        """Charge tous les chapitres pilotes (collection initialisée depuis data/ si vide)"""
+        for chapter_code in POOL_SOURCES:
+            await service.initialize_chapter(chapter_code)
+            await self.load(service.db, chapter_code)
+
+    async def bump_version(self, db: AsyncIOMotorDatabase, chapter_code: str) -> int:
+        doc = await db[EXERCISE_VERSIONS_COLLECTION].find_one_and_update(
+            {"_id": chapter_code},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+    async def apply_write(
+        self,
+        db: AsyncIOMotorDatabase,
+        chapter_code: str,
+        upserted: Optional[Dict[str, Any]] = None,
+        deleted_id: Optional[int] = None
+    ) -> ExercisePool:
+        """
+        Publie le résultat d'une écriture admin déjà faite dans MongoDB.
+
+        Si la nouvelle version suit directement la version publiée, le
+        snapshot est copié et modifié ; sinon (écriture d'un autre worker
+        entre-temps, snapshot absent) le chapitre est relu.
+        """
+        version = await self.bump_version(db, chapter_code)
+        published = self.pools.current(chapter_code)
+
+        if published is None or published.version is None or version != published.version + 1:
+            return await self.load(db, chapter_code)
+
+        changed_id = upserted["id"] if upserted else deleted_id
+        exercises = [ex for ex in published.exercises if ex["id"] != changed_id]
+        if upserted:
+            exercises.append(upserted)
+            exercises.sort(key=lambda ex: ex["id"])
+        return self.pools.rebuild(chapter_code, exercises, version=version)
+
+    async def poll(self, db: AsyncIOMotorDatabase) -> List[str]:
+        """Recharge les chapitres dont la version MongoDB a avancé (une requête)"""
+        docs = await db[EXERCISE_VERSIONS_COLLECTION].find(
+            {"_id": {"$in": list(POOL_SOURCES)}}
+        ).to_list(None)
+
+        changed = []
+        for doc in docs:
+            published = self.version(doc["_id"])
+            if published is None or doc["version"] > published:
+                await self.load(db, doc["_id"])
+                changed.append(doc["_id"])
+        return changed
+
+    async def _poll_forever(self, db: AsyncIOMotorDatabase, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                changed = await self.poll(db)
+                if changed:
+                    logger.info(f"🔄 Exercices pilotes rechargés (écriture d'un autre worker) : {', '.join(changed)}")
+            except Exception as e:
+                logger.warning(f"⚠️ Poll des versions d'exercices pilotes en échec : {e}")
+
+    def start_polling(self, db: AsyncIOMotorDatabase, interval: float = PILOT_EXERCISES_POLL_SECONDS) -> None:
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.get_running_loop().create_task(self._poll_forever(db, interval))
+
+    async def stop_polling(self) -> None:
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+
+
+pilot_exercise_store = PilotExerciseStore()
+
+
 # =============================================================================
 # SERVICE DE PERSISTANCE
 # =============================================================================
@@ -120,15 +252,16 @@ class ExerciseResponse(BaseModel):
 class ExercisePersistenceService:
     """
     Service de persistance pour les exercices figés.
-    Gère la synchronisation MongoDB <-> fichiers Python.
+    Écrit dans MongoDB puis publie le snapshot en mémoire (PilotExerciseStore).
     """
     
     # Chapitres pilotes avec exercices figés
     PILOT_CHAPTERS = ["6e_GM07", "6e_GM08", "6e_TESTS_DYN"]
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncIOMotorDatabase, store: Optional[PilotExerciseStore] = None):
         self.db = db
         self.collection = db[EXERCISES_COLLECTION]
+        self.store = store or pilot_exercise_store
         self._initialized = {}
     
     async def initialize_chapter(self, chapter_code: str) -> None:
@@ -222,11 +355,15 @@ class ExercisePersistenceService:
         except Exception as e:
             logger.error(f"Erreur chargement exercices {chapter_code}: {e}")
     
-    async def _sync_to_python_file(self, chapter_code: str) -> None:
+    async def export_to_python_file(self, chapter_code: str) -> Optional[str]:
         """
-        Synchronise les exercices MongoDB vers le fichier Python.
-        Génère le code Python compatible avec les handlers existants.
+        Exporte les exercices MongoDB vers le fichier Python (data/).
+        Commande explicite (scripts/export_pilot_exercises.py), hors chemin des requêtes.
+        
+        Returns:
+            Chemin du fichier écrit, None si le chapitre n'a pas de fichier exportable
         """
+        chapter_code = chapter_code.upper().replace("-", "_")
         exercises = await self.get_exercises(chapter_code)
         
         # Déterminer le nom du fichier et de la variable
@@ -238,7 +375,7 @@ class ExercisePersistenceService:
         info = file_mapping.get(chapter_code)
         if not info:
             logger.warning(f"Pas de mapping fichier pour {chapter_code}")
-            return
+            return None
         
         filename, var_name, description = info
         filepath = os.path.join(DATA_DIR, filename)
@@ -250,7 +387,8 @@ class ExercisePersistenceService:
         with open(filepath, "w", encoding="utf-8") as f:
             f.write(content)
         
-        logger.info(f"Fichier Python synchronisé: {filepath} ({len(exercises)} exercices)")
+        logger.info(f"Fichier Python exporté: {filepath} ({len(exercises)} exercices)")
+        return filepath
     
     def _generate_python_file(self, chapter_code: str, var_name: str, description: str, exercises: List[Dict]) -> str:
         """Génère le contenu du fichier Python pour les exercices"""
@@ -272,13 +410,16 @@ IMPORTANT: Tout le contenu est en HTML PUR.
 - Pas de LaTeX ($...$)
 - Utiliser <strong>, <em>, ×, ÷, etc.
 
-⚠️ FICHIER GÉNÉRÉ AUTOMATIQUEMENT PAR L'ADMIN
-   Ne pas modifier manuellement - utiliser /admin/curriculum
+⚠️ FICHIER GÉNÉRÉ PAR scripts/export_pilot_exercises.py
+   Source de vérité: MongoDB (admin_exercises), modifiée via /admin/curriculum.
+   Ce fichier sert de jeu initial et de repli hors MongoDB.
 """
 
 from typing import List, Dict, Any, Optional
 import random
 
+from services.exercise_pool_index import exercise_pools
+
 
 # =============================================================================
 # {len(exercises)} EXERCICES {code} VALIDÉS - HTML PUR (sans Markdown ni LaTeX)
@@ -334,27 +475,9 @@ def get_{code.lower()}_exercises(
         difficulty: "facile", "moyen", "difficile" (None = tous)
     
     Returns:
-        Liste d'exercices filtrés
+        Liste d'exercices filtrés (lecture de l'index précalculé, voir services/exercise_pool_index.py)
     """
-    exercises = {var_name}
-    
-    # Filtrer par offer
-    if offer:
-        offer = offer.lower()
-        if offer == "free":
-            exercises = [ex for ex in exercises if ex["offer"] == "free"]
-        elif offer == "pro":
-            pass  # PRO voit tout
-    else:
-        # Par défaut, FREE ne voit que free
-        exercises = [ex for ex in exercises if ex["offer"] == "free"]
-    
-    # Filtrer par difficulté
-    if difficulty:
-        difficulty = difficulty.lower()
-        exercises = [ex for ex in exercises if ex["difficulty"] == difficulty]
-    
-    return exercises
+    return list(exercise_pools.get("{chapter_code}").select(offer=offer, difficulty=difficulty))
 
 
 def get_random_{code.lower()}_exercise(
@@ -378,10 +501,9 @@ def get_random_{code.lower()}_exercise(
     if not available:
         return None
     
-    if seed is not None:
-        random.seed(seed)
-    
-    return random.choice(available)
+    # Générateur propre à l'appel : l'état global de `random` n'est jamais réinitialisé
+    rng = random.Random(seed)
+    return rng.choice(available)
 
 
 def get_{code.lower()}_batch(
@@ -419,12 +541,10 @@ def get_{code.lower()}_batch(
         batch_meta["warning"] = f"Aucun exercice disponible pour les filtres sélectionnés."
         return [], batch_meta
     
-    # Mélanger avec seed pour reproductibilité
-    if seed is not None:
-        random.seed(seed)
-    
+    # Mélanger avec seed pour reproductibilité (générateur propre à l'appel)
+    rng = random.Random(seed)
     shuffled = available.copy()
-    random.shuffle(shuffled)
+    rng.shuffle(shuffled)
     
     # Prendre au maximum ce qui est disponible
     actual_count = min(count, pool_size)
@@ -451,18 +571,14 @@ def get_exercise_by_seed_index(
     if not available:
         return None
     
-    if seed is not None:
-        random.seed(seed)
-        index = random.randint(0, len(available) - 1)
-    else:
-        index = random.randint(0, len(available) - 1)
+    index = random.Random(seed).randint(0, len(available) - 1)
     
     return available[index]
 
 
 def get_{code.lower()}_stats() -> Dict[str, Any]:
-    """Statistiques sur les exercices"""
-    exercises = {var_name}
+    """Statistiques sur les exercices servis (snapshot courant)"""
+    exercises = exercise_pools.get("{chapter_code}").exercises
     
     stats = {{
         "total": len(exercises),
@@ -566,15 +682,12 @@ def get_{code.lower()}_stats() -> Dict[str, Any]:
         }
         
         await self.collection.insert_one(doc)
+        del doc["_id"]
         
-        # Synchroniser avec le fichier Python (seulement pour GM07/GM08)
-        if chapter_upper in ["6E_GM07", "6E_GM08"]:
-            await self._sync_to_python_file(chapter_upper)
-            await self._reload_handler(chapter_upper)
+        await self._publish_write(chapter_upper, upserted=doc)
         
         logger.info(f"Exercice créé: {chapter_upper} #{next_id} (dynamic={request.is_dynamic})")
         
-        del doc["_id"]
         return doc
     
     async def update_exercise(
@@ -625,20 +738,16 @@ def get_{code.lower()}_stats() -> Dict[str, Any]:
             {"$set": update_data}
         )
         
-        # Synchroniser avec le fichier Python
-        await self._sync_to_python_file(chapter_upper)
-        
-        # Recharger le handler
-        await self._reload_handler(chapter_upper)
-        
-        logger.info(f"Exercice mis à jour: {chapter_upper} #{exercise_id}")
-        
         # Récupérer l'exercice mis à jour
         updated = await self.collection.find_one(
             {"chapter_code": chapter_upper, "id": exercise_id},
             {"_id": 0}
         )
         
+        await self._publish_write(chapter_upper, upserted=updated)
+        
+        logger.info(f"Exercice mis à jour: {chapter_upper} #{exercise_id}")
+        
         return updated
     
     async def delete_exercise(self, chapter_code: str, exercise_id: int) -> bool:
@@ -661,11 +770,7 @@ def get_{code.lower()}_stats() -> Dict[str, Any]:
         })
         
         if result.deleted_count > 0:
-            # Synchroniser avec le fichier Python
-            await self._sync_to_python_file(chapter_upper)
-            
-            # Recharger le handler
-            await self._reload_handler(chapter_upper)
+            await self._publish_write(chapter_upper, deleted_id=exercise_id)
             
             logger.info(f"Exercice supprimé: {chapter_upper} #{exercise_id}")
             return True
@@ -749,21 +854,20 @@ def get_{code.lower()}_stats() -> Dict[str, Any]:
             if "$" in request.enonce_html or "$" in request.solution_html:
                 raise ValueError("Le contenu ne doit pas contenir de LaTeX ($). Utilisez du HTML pur.")
     
-    async def _reload_handler(self, chapter_code: str) -> None:
-        """Recharge le handler en mémoire après modification"""
+    async def _publish_write(
+        self,
+        chapter_code: str,
+        upserted: Optional[Dict[str, Any]] = None,
+        deleted_id: Optional[int] = None
+    ) -> None:
+        """Publie l'écriture dans le snapshot en mémoire (les autres workers suivent par le compteur de version)"""
+        if chapter_code not in POOL_SOURCES:
+            return
         try:
-            import importlib
-            
-            if chapter_code == "6E_GM07":
-                import data.gm07_exercises as module
-                importlib.reload(module)
-            elif chapter_code == "6E_GM08":
-                import data.gm08_exercises as module
-                importlib.reload(module)
-            
-            logger.info(f"Handler {chapter_code} rechargé")
+            pool = await self.store.apply_write(self.db, chapter_code, upserted=upserted, deleted_id=deleted_id)
+            logger.info(f"Snapshot {chapter_code} publié (v{pool.version}, {len(pool)} exercices)")
         except Exception as e:
-            logger.error(f"Erreur rechargement handler {chapter_code}: {e}")
+            logger.error(f"Erreur publication snapshot {chapter_code}: {e}")
 
 
 # =============================================================================
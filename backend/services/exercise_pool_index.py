@@ -0,0 +1,228 @@
+"""
+Index des exercices figés des chapitres pilotes (GM07, GM08, TESTS_DYN)
+=======================================================================
+
+Chaque chapitre pilote sert un petit pool d'exercices figés. Au lieu de
+re-filtrer la liste complète et de re-dessiner les mêmes SVG à chaque
+requête, un ExercisePool immuable est construit une fois par chapitre :
+
+- index (offer, difficulty, family) → tuple d'exercices, dans l'ordre
+  de la source (les sélections par seed restent identiques)
+- table (id, empreinte des variables de rendu) → SVG pré-rendus
+
+Le registre `exercise_pools` reconstruit un pool complet puis le publie
+en un seul remplacement de référence : une requête en cours garde le
+pool qu'elle a lu, la suivante voit le nouveau.
+
+Source d'un pool : le snapshot MongoDB (admin_exercises) publié avec sa
+version par PilotExerciseStore (services/exercise_persistence_service.py) ;
+à défaut, le fichier data/*_exercises.py (jeu initial, repli hors MongoDB).
+
+Usage:
+    from services.exercise_pool_index import exercise_pools
+
+    pool = exercise_pools.get("6E_GM07")
+    available = pool.select("free", "facile")
+    svg_result = pool.svgs_for(available[0])
+"""
+
+import importlib
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from services.svg_render_service import generate_exercise_svgs
+
+logger = logging.getLogger(__name__)
+
+# Source de chaque chapitre pilote : (module, variable) lue à chaque reconstruction
+POOL_SOURCES: Mapping[str, Tuple[str, str]] = MappingProxyType({
+    "6E_GM07": ("data.gm07_exercises", "GM07_EXERCISES"),
+    "6E_GM08": ("data.gm08_exercises", "GM08_EXERCISES"),
+    "6E_TESTS_DYN": ("data.tests_dyn_exercises", "TESTS_DYN_EXERCISES"),
+})
+
+OFFERS = ("free", "pro")
+
+# Champs lus par generate_exercise_svgs : l'empreinte SVG en dépend
+SVG_INPUT_FIELDS = (
+    "needs_svg", "exercise_type", "family", "svg_enonce_brief", "svg_solution_brief", "enonce_html"
+)
+
+
+def _freeze(value: Any) -> Any:
+    """Version hashable d'une valeur JSON (dict/list → tuples)"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def svg_variables_hash(exercise: Dict[str, Any]) -> int:
+    """Empreinte des entrées de rendu SVG (variables + champs lus par le rendu)"""
+    return hash((_freeze(exercise.get("variables")),) + tuple(exercise.get(field) for field in SVG_INPUT_FIELDS))
+
+
+def _visible_offers(offer: str) -> Tuple[str, ...]:
+    """FREE ne voit que free, PRO voit tout"""
+    return ("free",) if offer == "free" else OFFERS
+
+
+class ExercisePool:
+    """
+    Pool immuable des exercices figés d'un chapitre.
+
+    Responsabilités :
+        - Répondre à un filtre (offer, difficulty, family) par une lecture de dict
+        - Servir les SVG pré-rendus d'un exercice du pool
+        - Retomber sur le rendu à la volée pour un exercice absent de la table
+    """
+
+    def __init__(
+        self,
+        chapter_code: str,
+        exercises: Iterable[Dict[str, Any]],
+        render_svgs: bool = True,
+        version: Optional[int] = None
+    ):
+        self.chapter_code = chapter_code
+        # Version MongoDB du snapshot (None = pool construit depuis le fichier data/)
+        self.version = version
+        self.exercises: Tuple[Dict[str, Any], ...] = tuple(exercises)
+
+        difficulties = [None] + sorted({ex["difficulty"] for ex in self.exercises})
+        families = [None] + sorted({ex["family"] for ex in self.exercises})
+
+        by_filter: Dict[Tuple[str, Optional[str], Optional[str]], Tuple[Dict[str, Any], ...]] = {}
+        for offer in OFFERS:
+            visible = _visible_offers(offer)
+            for difficulty in difficulties:
+                for family in families:
+                    by_filter[(offer, difficulty, family)] = tuple(
+                        ex for ex in self.exercises
+                        if ex["offer"] in visible
+                        and (difficulty is None or ex["difficulty"] == difficulty)
+                        and (family is None or ex["family"] == family)
+                    )
+        self._by_filter = MappingProxyType(by_filter)
+
+        svgs: Dict[Tuple[Any, int], Dict[str, Any]] = {}
+        if render_svgs:
+            for ex in self.exercises:
+                svgs[(ex["id"], svg_variables_hash(ex))] = generate_exercise_svgs(ex)
+        self._svgs = MappingProxyType(svgs)
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+    @property
+    def svg_count(self) -> int:
+        return len(self._svgs)
+
+    def select(
+        self,
+        offer: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        family: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], ...]:
+        """
+        Exercices visibles pour les filtres, dans l'ordre de la source.
+
+        Mêmes règles que l'ancien filtrage : offer absent = free, toute
+        autre valeur que "free" voit tout ; difficulté ou famille inconnue = aucun exercice.
+        """
+        offer = "free" if not offer or offer.lower() == "free" else "pro"
+        key = (offer, difficulty.lower() if difficulty else None, family.upper() if family else None)
+        return self._by_filter.get(key, ())
+
+    def svgs_for(self, exercise: Dict[str, Any]) -> Dict[str, Any]:
+        """SVG de l'exercice (copie superficielle de l'entrée pré-rendue)"""
+        svg_result = self._svgs.get((exercise.get("id"), svg_variables_hash(exercise)))
+        if svg_result is None:
+            # Exercice hors pool (ou modifié depuis la construction) : rendu à la volée
+            return generate_exercise_svgs(exercise)
+        return dict(svg_result)
+
+
+class ExercisePoolRegistry:
+    """
+    Pools des chapitres pilotes, construits au premier accès.
+
+    rebuild() construit le nouveau pool complet puis remplace la table en une
+    affectation (copie sur écriture) : les lectures ne prennent jamais le verrou.
+    """
+
+    def __init__(self, sources: Mapping[str, Tuple[str, str]] = POOL_SOURCES):
+        self._sources = sources
+        self._pools: Mapping[str, ExercisePool] = MappingProxyType({})
+        self._lock = threading.Lock()
+
+    def current(self, chapter_code: str) -> Optional[ExercisePool]:
+        """Pool publié, sans construction"""
+        return self._pools.get(chapter_code.upper())
+
+    def get(self, chapter_code: str) -> ExercisePool:
+        chapter_upper = chapter_code.upper()
+        pool = self._pools.get(chapter_upper)
+        if pool is None:
+            pool = self.rebuild(chapter_upper)
+        return pool
+
+    def _load_source(self, chapter_code: str) -> List[Dict[str, Any]]:
+        if chapter_code not in self._sources:
+            raise KeyError(f"Chapitre pilote inconnu : {chapter_code}")
+        module_name, var_name = self._sources[chapter_code]
+        return getattr(importlib.import_module(module_name), var_name)
+
+    def rebuild(
+        self,
+        chapter_code: str,
+        exercises: Optional[Iterable[Dict[str, Any]]] = None,
+        version: Optional[int] = None
+    ) -> ExercisePool:
+        """
+        Reconstruit le pool d'un chapitre (depuis sa source si `exercises` est absent).
+
+        Un snapshot versionné n'est jamais remplacé par une version plus
+        ancienne, ni par un pool sans version (fichier data/).
+        """
+        chapter_upper = chapter_code.upper()
+        start = time.perf_counter()
+        with self._lock:
+            published = self._pools.get(chapter_upper)
+            if published is not None and published.version is not None and (version is None or version < published.version):
+                logger.info(f"⏭️ Pool {chapter_upper} v{version} ignoré : v{published.version} déjà publiée")
+                return published
+            source = self._load_source(chapter_upper) if exercises is None else exercises
+            # TESTS_DYN : les SVG dépendent du seed, rien à pré-rendre
+            pool = ExercisePool(chapter_upper, source, render_svgs=chapter_upper != "6E_TESTS_DYN", version=version)
+            self._pools = MappingProxyType({**self._pools, chapter_upper: pool})
+        logger.info(
+            f"✅ Pool {chapter_upper} construit{f' (v{version})' if version is not None else ''} : {len(pool)} exercices, "
+            f"{pool.svg_count} SVG pré-rendus ({(time.perf_counter() - start) * 1000:.1f}ms)"
+        )
+        return pool
+
+    def build_all(self):
+        """Construit les pools de tous les chapitres pilotes (démarrage)"""
+        for chapter_code in self._sources:
+            self.rebuild(chapter_code)
+
+    def clear(self):
+        with self._lock:
+            self._pools = MappingProxyType({})
+
+
+exercise_pools = ExercisePoolRegistry()
+
+
+__all__ = [
+    "ExercisePool",
+    "ExercisePoolRegistry",
+    "POOL_SOURCES",
+    "exercise_pools",
+    "svg_variables_hash",
+]
@@ -76,7 +76,43 @@ class ExerciseTemplateService:
         if not exercise_type_dict:
             raise ValueError(f"ExerciseType with id {exercise_type_id} not found")
         
-        exercise_type = ExerciseType(**exercise_type_dict)
+        return await self.generate_exercise_for_type(
+            exercise_type=ExerciseType(**exercise_type_dict),
+            nb_questions=nb_questions,
+            seed=seed,
+            difficulty=difficulty,
+            options=options,
+            use_ai_enonce=use_ai_enonce,
+            use_ai_correction=use_ai_correction
+        )
+    
+    async def generate_exercise_for_type(
+        self,
+        exercise_type: ExerciseType,
+        nb_questions: int,
+        seed: int,
+        difficulty: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        use_ai_enonce: bool = False,
+        use_ai_correction: bool = False,
+        chapter_titles: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Génère un exercice à partir d'un ExerciseType déjà chargé
+        
+        Utilisé par SheetPreviewBuilder qui charge en lot les ExerciseTypes
+        et les chapitres d'une fiche (aucune requête DB par item).
+        
+        Args:
+            exercise_type: ExerciseType déjà chargé
+            chapter_titles: Titres des chapitres préchargés {code: titre}
+                (None = lecture en base pour les générateurs par chapitre)
+            (autres arguments : voir generate_exercise)
+        
+        Raises:
+            ValueError: Si les paramètres sont incompatibles avec l'ExerciseType
+        """
+        exercise_type_id = exercise_type.id
         
         # 2. Valider le nombre de questions
         if nb_questions < exercise_type.min_questions:
@@ -117,14 +153,17 @@ class ExerciseTemplateService:
             # Utiliser math_generation_service pour les générateurs spécifiques par chapitre
             math_gen_service = MathGenerationService()
             
-            # Récupérer le chapitre depuis MongoDB
-            chapter = await self.db.chapters.find_one(
-                {"code": exercise_type.chapter_code},
-                {"_id": 0, "titre": 1}
-            )
+            # Récupérer le chapitre (préchargé, sinon depuis MongoDB)
+            if chapter_titles is not None:
+                chapter_title = chapter_titles.get(exercise_type.chapter_code)
+            else:
+                chapter = await self.db.chapters.find_one(
+                    {"code": exercise_type.chapter_code},
+                    {"_id": 0, "titre": 1}
+                )
+                chapter_title = chapter["titre"] if chapter else None
             
-            if chapter:
-                chapter_title = chapter["titre"]
+            if chapter_title:
                 
                 # Générer les specs via math_generation_service
                 specs = math_gen_service.generate_math_exercise_specs(
@@ -22,7 +22,7 @@ from data.gm07_exercises import (
     get_gm07_batch,
     get_exercise_by_seed_index
 )
-from services.svg_render_service import generate_exercise_svgs
+from services.exercise_pool_index import exercise_pools
 
 
 def is_gm07_request(code_officiel: Optional[str]) -> bool:
@@ -52,8 +52,8 @@ def _format_exercise_response(exercise: Dict[str, Any], timestamp: int) -> Dict[
     is_premium = exercise["offer"] == "pro"
     exercise_id = f"ex_6e_gm07_{exercise['id']}_{timestamp}"
     
-    # Générer les SVG selon le type d'exercice
-    svg_result = generate_exercise_svgs(exercise)
+    # SVG pré-rendus à la construction du pool (rendu à la volée si l'exercice n'y est pas)
+    svg_result = exercise_pools.get("6E_GM07").svgs_for(exercise)
     
     return {
         "id_exercice": exercise_id,
@@ -0,0 +1,164 @@
+"""
+Quota d'exports des invités (fenêtre glissante de 30 jours)
+
+Chaque export invité comptait les exports des 30 derniers jours
+(count_documents sur `exports`, collection qui croît sans fin), et deux
+exports concurrents pouvaient passer la vérification avant que l'un d'eux
+ne soit enregistré.
+
+Un document par invité dans `guest_quotas` conserve les réservations de la
+fenêtre (au plus MAX_GUEST_EXPORTS entrées) :
+
+    {"guest_id": "...", "exports": [{"id": "...", "at": <date>}], "expires_at": <date>}
+
+- reserve() vérifie ET réserve en une seule mise à jour atomique : le filtre
+  n'accepte le document que s'il reste de la place dans la fenêtre ; sinon
+  l'upsert heurte l'index unique sur guest_id (quota atteint)
+- release() rend une réservation si l'export échoue
+- expires_at (index TTL) supprime les invités inactifs depuis 30 jours
+
+⚠️ L'atomicité repose sur l'index unique guest_quotas.guest_id
+(ensure_indexes au démarrage, init_db_indexes.py).
+"""
+
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+MAX_GUEST_EXPORTS = 3
+QUOTA_WINDOW = timedelta(days=30)
+
+
+class GuestQuotaService:
+    """
+    Quota d'exports par invité, vérifié et réservé atomiquement.
+
+    Responsabilités :
+        - Lire l'état du quota (une lecture indexée)
+        - Réserver un export (check-and-reserve)
+        - Annuler une réservation
+        - Amorcer les compteurs depuis l'historique `exports`
+    """
+
+    def __init__(self, collection, max_exports: int = MAX_GUEST_EXPORTS, window: timedelta = QUOTA_WINDOW):
+        """
+        Args:
+            collection: Collection Motor `guest_quotas`
+            max_exports: Nombre d'exports autorisés dans la fenêtre
+            window: Durée de la fenêtre glissante
+        """
+        self.collection = collection
+        self.max_exports = max_exports
+        self.window = window
+
+    async def ensure_indexes(self):
+        """Index unique (atomicité de reserve) et TTL (nettoyage des invités inactifs)"""
+        await self.collection.create_index("guest_id", unique=True, name="unique_guest_quota")
+        await self.collection.create_index("expires_at", expireAfterSeconds=0, name="guest_quota_expiry_ttl")
+
+    def _recent_exports(self, cutoff: datetime) -> Dict[str, Any]:
+        """Expression d'agrégation : réservations postérieures à cutoff"""
+        return {
+            "$filter": {
+                "input": {"$ifNull": ["$exports", []]},
+                "cond": {"$gte": ["$$this.at", cutoff]}
+            }
+        }
+
+    def _status(self, exports_used: int) -> Dict[str, Any]:
+        remaining = max(0, self.max_exports - exports_used)
+        return {
+            "exports_used": exports_used,
+            "exports_remaining": remaining,
+            "max_exports": self.max_exports,
+            "quota_exceeded": remaining == 0
+        }
+
+    async def get_status(self, guest_id: str) -> Dict[str, Any]:
+        """État du quota sans réserver (GET /quota/check)"""
+        cutoff = datetime.now(timezone.utc) - self.window
+        doc = await self.collection.find_one({"guest_id": guest_id}, {"_id": 0, "exports": 1})
+        exports = doc.get("exports", []) if doc else []
+        exports_used = sum(1 for export in exports if _as_utc(export["at"]) >= cutoff)
+        return self._status(exports_used)
+
+    async def reserve(self, guest_id: str) -> Optional[str]:
+        """
+        Réserve un export dans la fenêtre.
+
+        Returns:
+            L'identifiant de la réservation, ou None si le quota est atteint
+        """
+        now = datetime.now(timezone.utc)
+        recent = self._recent_exports(now - self.window)
+        reservation = {"id": str(uuid.uuid4()), "at": now}
+
+        # Deux tentatives : un DuplicateKeyError peut venir d'un premier export
+        # concurrent (document créé entre-temps) ; au second, le quota est atteint
+        for _ in range(2):
+            try:
+                await self.collection.update_one(
+                    {"guest_id": guest_id, "$expr": {"$lt": [{"$size": recent}, self.max_exports]}},
+                    [{"$set": {
+                        "exports": {"$concatArrays": [recent, [{"$literal": reservation}]]},
+                        "expires_at": now + self.window
+                    }}],
+                    upsert=True
+                )
+                return reservation["id"]
+            except DuplicateKeyError:
+                continue
+
+        logger.info(f"🚫 Guest quota exceeded for {guest_id[:8]}...")
+        return None
+
+    async def release(self, guest_id: str, reservation_id: str):
+        """Annule une réservation (export échoué)"""
+        await self.collection.update_one(
+            {"guest_id": guest_id},
+            {"$pull": {"exports": {"id": reservation_id}}}
+        )
+
+    async def seed_from_exports(self, exports_collection) -> int:
+        """
+        Reconstruit les compteurs depuis l'historique `exports` (migration).
+
+        Idempotent : les réservations de chaque invité sont remplacées par ses
+        exports de la fenêtre courante.
+
+        Returns:
+            Nombre d'invités amorcés
+        """
+        cutoff = datetime.now(timezone.utc) - self.window
+        pipeline = [
+            {"$match": {"guest_id": {"$ne": None}, "is_pro": {"$ne": True}, "created_at": {"$gte": cutoff}}},
+            {"$sort": {"created_at": 1}},
+            {"$group": {
+                "_id": "$guest_id",
+                "exports": {"$push": {"id": "$id", "at": "$created_at"}},
+                "last_export": {"$last": "$created_at"}
+            }}
+        ]
+
+        seeded = 0
+        async for group in exports_collection.aggregate(pipeline):
+            await self.collection.update_one(
+                {"guest_id": group["_id"]},
+                {"$set": {
+                    "exports": group["exports"],
+                    "expires_at": _as_utc(group["last_export"]) + self.window
+                }},
+                upsert=True
+            )
+            seeded += 1
+        return seeded
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Mongo renvoie des datetimes naïves (UTC)"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
@@ -8,17 +8,36 @@ KPI suivis :
 - Causes principales de rejet
 - Temps de génération
 - Coût estimé API
+- Taux de hit du cache de réponses LLM (services/llm_response_cache.py)
+
+Fonctionnement :
+- Compteurs agrégés en mémoire (globaux, par type, par cause, par heure),
+  complétés avant chaque résumé par les seules lignes ajoutées au fichier
+  depuis la lecture précédente (tous workers) ; la mémoire reste constante
+- Écritures JSONL bufferisées, faites par un thread dédié, avec rotation
+- last_n : fenêtre récente en mémoire, sinon lecture de la fin du fichier
 """
 
+import atexit
+import fcntl
 import logging
 import json
-from typing import Dict, List, Optional
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Bornes (ms) de l'histogramme des temps de génération
+TEMPS_BUCKETS_MS = (100, 250, 500, 1000, 2000, 5000, 10000, 30000)
+
+# Granularité des buckets temporels et nombre conservé (14 jours)
+HOUR_BUCKETS_KEPT = 14 * 24
+
 
 @dataclass
 class IAGenerationStats:
@@ -34,15 +53,204 @@ class IAGenerationStats:
     temps_generation_ms: Optional[float]  # Temps en millisecondes
 
 
+class KpiAggregate:
+    """
+    Agrégats KPI incrémentaux : add() en O(1), summary() indépendant du
+    nombre de générations enregistrées.
+    """
+    
+    def __init__(self):
+        self.total = 0
+        self.ia_utilisee = 0
+        self.ia_acceptee = 0
+        self.ia_rejetee = 0
+        self.fallback_utilise = 0
+        self.causes_rejet: Dict[str, int] = {}
+        self.types_stats: Dict[str, Dict[str, int]] = {}
+        self.temps_total_ms = 0.0
+        self.temps_count = 0
+        self.temps_histogramme = [0] * (len(TEMPS_BUCKETS_MS) + 1)
+        self.par_heure: Dict[str, Dict[str, int]] = {}
+        self.debut: Optional[str] = None
+        self.fin: Optional[str] = None
+    
+    @classmethod
+    def from_stats(cls, stats: Iterable[Dict[str, Any]]) -> "KpiAggregate":
+        aggregate = cls()
+        aggregate.add_all(stats)
+        return aggregate
+    
+    @staticmethod
+    def parse_lines(lines: Iterable[str]) -> List[Dict[str, Any]]:
+        """Décode les lignes JSONL ; les lignes illisibles sont journalisées et ignorées"""
+        stats = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                stats.append(json.loads(line))
+            except ValueError as e:
+                logger.warning(f"⚠️ Ligne de log monitoring ignorée : {e}")
+        return stats
+    
+    def add_all(self, stats: Iterable[Dict[str, Any]]):
+        """add() sur chaque entrée ; les entrées invalides (ancien schéma…) sont ignorées"""
+        for s in stats:
+            try:
+                self.add(s)
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                logger.warning(f"⚠️ Entrée de log monitoring ignorée : {e!r}")
+    
+    def add(self, s: Dict[str, Any]):
+        """
+        Intègre une génération (dict au format IAGenerationStats).
+
+        Les champs sont lus avant toute mise à jour : une entrée invalide lève
+        KeyError/TypeError/ValueError sans modifier les agrégats.
+        """
+        timestamp = s["timestamp"]
+        heure_key = timestamp[:13]
+        ia_utilisee = bool(s["ia_utilisee"])
+        ia_acceptee = bool(s["ia_acceptee"])
+        fallback = bool(s["fallback_utilise"])
+        rejetee = ia_utilisee and not ia_acceptee
+        cause_rejet = s["cause_rejet"]
+        type_exercice = s["type_exercice"]
+        temps_ms = float(s["temps_generation_ms"] or 0)
+        bucket = sum(1 for bound in TEMPS_BUCKETS_MS if temps_ms > bound)
+        
+        self.total += 1
+        self.debut = self.debut or timestamp
+        self.fin = timestamp
+        
+        self.ia_utilisee += ia_utilisee
+        self.ia_acceptee += ia_acceptee
+        self.ia_rejetee += rejetee
+        self.fallback_utilise += fallback
+        
+        # Causes de rejet
+        if cause_rejet:
+            self.causes_rejet[cause_rejet] = self.causes_rejet.get(cause_rejet, 0) + 1
+        
+        # Répartition par type
+        type_stats = self.types_stats.setdefault(
+            type_exercice,
+            {"total": 0, "ia_acceptee": 0, "ia_rejetee": 0, "fallback": 0}
+        )
+        type_stats["total"] += 1
+        if ia_acceptee:
+            type_stats["ia_acceptee"] += 1
+        elif rejetee:
+            type_stats["ia_rejetee"] += 1
+        if fallback:
+            type_stats["fallback"] += 1
+        
+        # Temps de génération (moyenne + histogramme)
+        if temps_ms:
+            self.temps_total_ms += temps_ms
+            self.temps_count += 1
+            self.temps_histogramme[bucket] += 1
+        
+        # Bucket horaire (les plus anciens sont abandonnés)
+        heure = self.par_heure.setdefault(
+            heure_key,
+            {"total": 0, "ia_acceptee": 0, "ia_rejetee": 0, "fallback": 0}
+        )
+        heure["total"] += 1
+        heure["ia_acceptee"] += ia_acceptee
+        heure["ia_rejetee"] += rejetee
+        heure["fallback"] += fallback
+        if len(self.par_heure) > HOUR_BUCKETS_KEPT:
+            del self.par_heure[min(self.par_heure)]
+    
+    def summary(self) -> Dict:
+        """KPI au format historique de get_kpi_summary()"""
+        if not self.total:
+            return {
+                "total": 0,
+                "message": "Aucune donnée disponible"
+            }
+        
+        temps_moyen = self.temps_total_ms / self.temps_count if self.temps_count else None
+        bornes = [f"<= {bound}" for bound in TEMPS_BUCKETS_MS] + [f"> {TEMPS_BUCKETS_MS[-1]}"]
+        
+        return {
+            "periode": {
+                "debut": self.debut,
+                "fin": self.fin,
+                "nb_generations": self.total
+            },
+            "kpi_globaux": {
+                "total_generations": self.total,
+                "ia_utilisee": self.ia_utilisee,
+                "ia_acceptee": self.ia_acceptee,
+                "ia_rejetee": self.ia_rejetee,
+                "fallback_utilise": self.fallback_utilise,
+                "taux_acceptation_ia": round(self.ia_acceptee / self.ia_utilisee * 100, 1) if self.ia_utilisee > 0 else 0,
+                "taux_rejet_ia": round(self.ia_rejetee / self.ia_utilisee * 100, 1) if self.ia_utilisee > 0 else 0,
+                "taux_fallback": round(self.fallback_utilise / self.total * 100, 1)
+            },
+            "causes_rejet": dict(self.causes_rejet),
+            "par_type_exercice": {type_ex: dict(stats) for type_ex, stats in self.types_stats.items()},
+            "par_heure": {heure: dict(stats) for heure, stats in sorted(self.par_heure.items())},
+            "performance": {
+                "temps_moyen_ms": round(temps_moyen, 2) if temps_moyen else None,
+                "histogramme_temps_ms": dict(zip(bornes, self.temps_histogramme))
+            }
+        }
+
+
 class IAMonitoringService:
     """Service de monitoring du pipeline IA"""
     
-    def __init__(self, log_file: str = "/app/backend/logs/ia_monitoring.jsonl"):
+    def __init__(
+        self,
+        log_file: str = "/app/backend/logs/ia_monitoring.jsonl",
+        recent_window: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        backup_count: Optional[int] = None
+    ):
+        """
+        Args:
+            log_file: Fichier JSONL des générations
+            recent_window: Générations récentes gardées en mémoire pour last_n
+                (IA_MONITORING_RECENT_WINDOW, défaut 1000)
+            flush_interval: Délai max avant écriture disque en secondes
+                (IA_MONITORING_FLUSH_INTERVAL, défaut 1)
+            max_bytes: Taille déclenchant la rotation du fichier
+                (IA_MONITORING_MAX_BYTES, défaut 10 Mo)
+            backup_count: Fichiers tournés conservés (IA_MONITORING_BACKUPS, défaut 5)
+        """
         self.log_file = Path(log_file)
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Stats en mémoire (session)
-        self.session_stats: List[IAGenerationStats] = []
+        self.flush_interval = flush_interval or float(os.environ.get("IA_MONITORING_FLUSH_INTERVAL", "1"))
+        self.max_bytes = max_bytes or int(os.environ.get("IA_MONITORING_MAX_BYTES", str(10 * 1024 * 1024)))
+        self.backup_count = backup_count if backup_count is not None else int(
+            os.environ.get("IA_MONITORING_BACKUPS", "5")
+        )
+        
+        # Stats en mémoire (session) : fenêtre bornée des dernières générations
+        self.session_stats = deque(
+            maxlen=recent_window or int(os.environ.get("IA_MONITORING_RECENT_WINDOW", "1000"))
+        )
+        
+        # Agrégats du fichier courant, tous workers : position déjà lue et
+        # inode (une rotation remplace le fichier et repart de zéro)
+        self._lock = threading.Lock()
+        self._aggregate = KpiAggregate()
+        self._read_offset = 0
+        self._read_inode: Optional[int] = None
+        
+        # Écritures bufferisées
+        self._buffer: List[str] = []
+        self._writer: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        
+        # Hits / misses du cache de réponses LLM par appelant (session)
+        self.response_cache_stats: Dict[str, Dict[str, int]] = {}
     
     def log_generation(
         self,
@@ -57,7 +265,7 @@ class IAMonitoringService:
     ):
         """Enregistrer une génération"""
         
-        stats = IAGenerationStats(
+        stats = asdict(IAGenerationStats(
             timestamp=datetime.now().isoformat(),
             type_exercice=type_exercice,
             niveau=niveau,
@@ -67,21 +275,167 @@ class IAMonitoringService:
             fallback_utilise=fallback_utilise,
             cause_rejet=cause_rejet,
             temps_generation_ms=temps_generation_ms
-        )
+        ))
         
-        # Ajouter aux stats session
-        self.session_stats.append(stats)
+        # Fenêtre récente et buffer d'écriture (aucune E/S ici) ; les agrégats
+        # sont alimentés à la relecture du fichier
+        with self._lock:
+            self.session_stats.append(stats)
+            self._buffer.append(json.dumps(stats) + "\n")
+        
+        self._ensure_writer()
+    
+    def log_response_cache(self, namespace: str, hit: bool):
+        """Enregistrer une consultation du cache de réponses LLM"""
+        stats = self.response_cache_stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+    
+    def get_response_cache_metrics(self) -> Dict:
+        """Hits, misses et taux de hit du cache de réponses LLM (global et par appelant)"""
+        par_appelant = {}
+        for namespace, stats in self.response_cache_stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            par_appelant[namespace] = {
+                **stats,
+                "taux_hit": round(stats["hits"] / lookups * 100, 1) if lookups else 0
+            }
+        
+        hits = sum(stats["hits"] for stats in self.response_cache_stats.values())
+        lookups = hits + sum(stats["misses"] for stats in self.response_cache_stats.values())
+        return {
+            "hits": hits,
+            "misses": lookups - hits,
+            "taux_hit": round(hits / lookups * 100, 1) if lookups else 0,
+            "par_appelant": par_appelant
+        }
+    
+    def flush(self):
+        """Écrit le buffer dans le fichier JSONL (rotation si la taille maximale est atteinte)"""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        
+        with self._write_lock:
+            try:
+                # Verrou inter-workers : rotation et écriture exclusives
+                with open(f"{self.log_file}.lock", "w") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    if self.log_file.exists() and self.log_file.stat().st_size >= self.max_bytes:
+                        self._rotate()
+                    with open(self.log_file, "a") as f:
+                        f.writelines(lines)
+            except Exception as e:
+                logger.error(f"Erreur écriture log monitoring : {e}")
+    
+    def _rotate(self):
+        """ia_monitoring.jsonl → .1 → .2 ... (les plus anciens au-delà de backup_count sont supprimés)"""
+        if self.backup_count <= 0:
+            self.log_file.unlink()
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = Path(f"{self.log_file}.{index}")
+            if source.exists():
+                source.replace(f"{self.log_file}.{index + 1}")
+        self.log_file.replace(f"{self.log_file}.1")
+        logger.info(f"🔄 Rotation du log monitoring : {self.log_file}")
+    
+    def _ensure_writer(self):
+        """Démarre le thread d'écriture (une fois par processus)"""
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run_writer, name="ia-monitoring-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+    
+    def _run_writer(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+    
+    def _sync_aggregate(self) -> KpiAggregate:
+        """
+        Intègre les lignes ajoutées au fichier depuis la dernière lecture (tous workers).
+
+        Lecture et décodage se font hors de self._lock ; le verrou n'est pris
+        que pour fusionner. Les lignes invalides sont ignorées (une seule fois) :
+        l'offset avance sur toutes les lignes complètes lues.
+        """
+        with self._lock:
+            inode, offset = self._read_inode, self._read_offset
         
-        # Écrire dans le fichier de log
         try:
-            with open(self.log_file, "a") as f:
-                f.write(json.dumps(asdict(stats)) + "\n")
-        except Exception as e:
-            logger.error(f"Erreur écriture log monitoring : {e}")
+            # Verrou partagé : aucune écriture ni rotation pendant la lecture
+            with open(f"{self.log_file}.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_SH)
+                if not self.log_file.exists():
+                    with self._lock:
+                        if self._read_inode is not None:
+                            self._reset_aggregate(None)
+                        return self._aggregate
+                
+                with open(self.log_file, "rb") as f:
+                    stat = os.fstat(f.fileno())
+                    # Fichier tourné (ou tronqué) : agrégats du nouveau fichier
+                    reset = stat.st_ino != inode or stat.st_size < offset
+                    start = 0 if reset else offset
+                    f.seek(start)
+                    data = f.read()
+        except OSError as e:
+            logger.error(f"Erreur lecture logs : {e}")
+            return self._aggregate
+        
+        # Seules les lignes complètes sont consommées
+        data = data[:data.rfind(b"\n") + 1]
+        records = KpiAggregate.parse_lines(data.decode("utf-8", errors="ignore").splitlines())
+        
+        with self._lock:
+            if (self._read_inode, self._read_offset) != (inode, offset):
+                # Un autre thread a déjà intégré cette portion
+                return self._aggregate
+            if reset:
+                self._reset_aggregate(stat.st_ino)
+            self._aggregate.add_all(records)
+            self._read_offset = start + len(data)
+            return self._aggregate
+    
+    def _reset_aggregate(self, inode: Optional[int]):
+        self._aggregate = KpiAggregate()
+        self._read_offset = 0
+        self._read_inode = inode
+    
+    def _read_last_lines(self, n: int) -> List[str]:
+        """Lit les n dernières lignes en remontant depuis la fin (fichier courant puis .1)"""
+        lines: List[str] = []
+        for path in (self.log_file, Path(f"{self.log_file}.1")):
+            if len(lines) >= n or not path.exists():
+                break
+            lines = self._tail_file(path, n - len(lines)) + lines
+        return lines[-n:]
+    
+    @staticmethod
+    def _tail_file(path: Path, n: int, block_size: int = 64 * 1024) -> List[str]:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0 and data.count(b"\n") <= n:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                data = f.read(read_size) + data
+        return [line for line in data.decode("utf-8", errors="ignore").splitlines() if line.strip()][-n:]
     
     def get_kpi_summary(self, last_n: Optional[int] = None) -> Dict:
         """
-        Calculer les KPI depuis les logs
+        Calculer les KPI
+        
+        Sans last_n : agrégats incrémentaux, complétés par les lignes ajoutées
+        au fichier depuis le dernier appel (tous workers).
+        Avec last_n : lecture des last_n dernières lignes du fichier (tous workers).
         
         Args:
             last_n: Nombre de dernières entrées à considérer (None = toutes)
@@ -89,86 +443,24 @@ class IAMonitoringService:
         Returns:
             Dict avec les KPI
         """
+        self.flush()
+        if last_n:
+            try:
+                stats = KpiAggregate.parse_lines(self._read_last_lines(last_n))
+            except OSError as e:
+                logger.error(f"Erreur lecture logs : {e}")
+                stats = []
+            kpi = KpiAggregate.from_stats(stats).summary()
+        else:
+            aggregate = self._sync_aggregate()
+            with self._lock:
+                kpi = aggregate.summary()
         
-        # Lire les logs
-        try:
-            with open(self.log_file, "r") as f:
-                lines = f.readlines()
-            
-            if last_n:
-                lines = lines[-last_n:]
-            
-            stats = [json.loads(line) for line in lines]
-        except Exception as e:
-            logger.error(f"Erreur lecture logs : {e}")
-            stats = []
-        
-        if not stats:
-            return {
-                "total": 0,
-                "message": "Aucune donnée disponible"
-            }
-        
-        # Calculer KPI
-        total = len(stats)
-        ia_utilisee = sum(1 for s in stats if s["ia_utilisee"])
-        ia_acceptee = sum(1 for s in stats if s["ia_acceptee"])
-        ia_rejetee = sum(1 for s in stats if s["ia_utilisee"] and not s["ia_acceptee"])
-        fallback_utilise = sum(1 for s in stats if s["fallback_utilise"])
-        
-        # Causes de rejet
-        causes_rejet = {}
-        for s in stats:
-            if s["cause_rejet"]:
-                cause = s["cause_rejet"]
-                causes_rejet[cause] = causes_rejet.get(cause, 0) + 1
-        
-        # Répartition par type
-        types_stats = {}
-        for s in stats:
-            type_ex = s["type_exercice"]
-            if type_ex not in types_stats:
-                types_stats[type_ex] = {
-                    "total": 0,
-                    "ia_acceptee": 0,
-                    "ia_rejetee": 0,
-                    "fallback": 0
-                }
-            
-            types_stats[type_ex]["total"] += 1
-            if s["ia_acceptee"]:
-                types_stats[type_ex]["ia_acceptee"] += 1
-            elif s["ia_utilisee"] and not s["ia_acceptee"]:
-                types_stats[type_ex]["ia_rejetee"] += 1
-            if s["fallback_utilise"]:
-                types_stats[type_ex]["fallback"] += 1
-        
-        # Temps moyen
-        temps_list = [s["temps_generation_ms"] for s in stats if s["temps_generation_ms"]]
-        temps_moyen = sum(temps_list) / len(temps_list) if temps_list else None
+        if kpi.get("total") == 0:
+            return kpi
         
-        return {
-            "periode": {
-                "debut": stats[0]["timestamp"] if stats else None,
-                "fin": stats[-1]["timestamp"] if stats else None,
-                "nb_generations": total
-            },
-            "kpi_globaux": {
-                "total_generations": total,
-                "ia_utilisee": ia_utilisee,
-                "ia_acceptee": ia_acceptee,
-                "ia_rejetee": ia_rejetee,
-                "fallback_utilise": fallback_utilise,
-                "taux_acceptation_ia": round(ia_acceptee / ia_utilisee * 100, 1) if ia_utilisee > 0 else 0,
-                "taux_rejet_ia": round(ia_rejetee / ia_utilisee * 100, 1) if ia_utilisee > 0 else 0,
-                "taux_fallback": round(fallback_utilise / total * 100, 1)
-            },
-            "causes_rejet": causes_rejet,
-            "par_type_exercice": types_stats,
-            "performance": {
-                "temps_moyen_ms": round(temps_moyen, 2) if temps_moyen else None
-            }
-        }
+        kpi["cache_reponses_llm"] = self.get_response_cache_metrics()
+        return kpi
     
     def print_kpi_report(self, last_n: Optional[int] = None):
         """Afficher un rapport KPI lisible"""
@@ -215,6 +507,14 @@ class IAMonitoringService:
             print(f"\n⏱️ Performance :")
             print(f"  - Temps moyen génération : {kpi['performance']['temps_moyen_ms']:.0f} ms")
         
+        # Cache de réponses LLM
+        cache = kpi['cache_reponses_llm']
+        if cache['hits'] + cache['misses'] > 0:
+            print(f"\n🎯 Cache réponses LLM :")
+            print(f"  - Hits : {cache['hits']} / Misses : {cache['misses']} (taux : {cache['taux_hit']}%)")
+            for namespace, stats in cache['par_appelant'].items():
+                print(f"  - {namespace} : {stats['taux_hit']}% de hits")
+        
         print("\n" + "="*80 + "\n")
     
     def get_alert_thresholds(self) -> Dict:
@@ -0,0 +1,485 @@
+"""
+Cache de réponses LLM au niveau du prompt
+
+Complète le cache de gabarits (CacheManager) : quand un prompt identique a
+déjà été envoyé au LLM, on renvoie l'une des N réponses stockées pour cette
+clé (pool de variantes) au lieu de refaire un appel.
+
+Deux familles de clés, toutes deux préfixées par la clé sémantique
+(StyleManager.build_cache_key), ce qui permet l'invalidation par préfixe
+(ex. tout un chapitre) :
+
+- make_template_key (rédaction math_text) : chapitre, type, difficulté,
+  style, niveau + forme des paramètres. Les valeurs tirées au hasard ne font
+  pas partie de la clé : la réponse est stockée en gabarit (ResponseTemplate,
+  valeurs concrètes → ⟦nom⟧) puis réinterpolée avec les valeurs de la spec
+  servie, comme les gabarits de CacheManager.
+- make_key (enrichissement, schémas) : clé sémantique + empreinte du prompt
+  exact. La réponse dépend du texte fourni (énoncé) : une variante ne sert
+  qu'à un prompt strictement identique (même énoncé réexporté, pools fixes).
+
+Persistance Mongo (collection `llm_response_cache` de la base de
+l'application, branchée par server.py via use_collection) avec index TTL sur
+`expires_at` (init_db_indexes.py). Les variantes sont bornées par `$slice`.
+
+Modes (LLM_CACHE_MODE) :
+    - "normal" : lecture + écriture, appel LLM tant que le pool n'est pas plein
+    - "replay" : hors-ligne, aucune requête LLM ; un prompt absent du cache
+                 lève LLMReplayMissError (les appelants basculent en fallback)
+    - "off"    : cache désactivé
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from style_manager import style_manager, StyleFormulation
+from services.ia_monitoring_service import ia_monitoring
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("normal", "replay", "off")
+
+# Emplacement de valeur dans un gabarit : ⟦nom⟧, ou ⟦nom,⟧ (décimale à virgule)
+PLACEHOLDER_RE = re.compile(r"⟦([^⟧]+?)(,?)⟧")
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+class LLMReplayMissError(Exception):
+    """Prompt absent du cache en mode replay (aucun appel LLM autorisé)"""
+    pass
+
+
+def _render_scalar(value) -> Optional[str]:
+    """Forme textuelle d'une valeur telle qu'elle apparaît dans une réponse JSON"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    if isinstance(value, str):
+        # Une minuscule isolée (« a ») est un mot courant, pas une valeur
+        if not value or (len(value) == 1 and not value.isupper()):
+            return None
+        return json.dumps(value, ensure_ascii=False)[1:-1]
+    return None
+
+
+def template_values(**groups) -> Dict[str, str]:
+    """
+    Aplatit des valeurs de spec en {nom: forme textuelle} pour ResponseTemplate.
+
+    Les dicts sont numérotés par position (nom.i.k / nom.i.v) : leurs clés
+    (ex. noms de segments) varient d'un tirage à l'autre. Les nombres contenus
+    dans une chaîne sont aussi exposés par position (nom#j).
+
+    Examples:
+        >>> template_values(parametres={"longueurs": {"DE": 3}}, etapes=["DE = 3 cm"])
+        {"parametres.longueurs.0.k": "DE", "parametres.longueurs.0.v": "3",
+         "etapes.0": "DE = 3 cm", "etapes.0#0": "3"}
+    """
+    values: Dict[str, str] = {}
+
+    def visit(name: str, value):
+        if isinstance(value, dict):
+            for i, (key, item) in enumerate(value.items()):
+                visit(f"{name}.{i}.k", key)
+                visit(f"{name}.{i}.v", item)
+        elif isinstance(value, (list, tuple)):
+            for i, item in enumerate(value):
+                visit(f"{name}.{i}", item)
+        else:
+            rendered = _render_scalar(value)
+            if rendered is None:
+                return
+            values[name] = rendered
+            if isinstance(value, str):
+                for j, number in enumerate(NUMBER_RE.findall(rendered)):
+                    values[f"{name}#{j}"] = number
+
+    for name, value in groups.items():
+        visit(name, value)
+    return values
+
+
+class ResponseTemplate:
+    """
+    Réponse LLM dont les valeurs de la spec sont remplacées par ⟦nom⟧.
+
+    Une valeur présente sous plusieurs noms est liée au premier ; les autres
+    deviennent des alias. Le gabarit ne sert qu'aux specs où ces égalités
+    tiennent encore (un rectangle 8 × 8 ne sert pas pour un 5 × 7).
+
+    from_response() refuse (None) une réponse contenant un nombre non relié à
+    la spec, sauf un chiffre isolé qui n'est pas une valeur de la spec
+    (constante « 2 × », numéro d'étape) : une valeur dérivée inconnue serait
+    resservie telle quelle à une autre spec.
+    """
+
+    def __init__(self, text: str, aliases: Dict[str, str]):
+        self.text = text
+        self.aliases = aliases
+
+    @classmethod
+    def from_response(cls, response: str, values: Dict[str, str]) -> Optional["ResponseTemplate"]:
+        if "⟦" in response:
+            return None
+
+        # Forme textuelle → (nom retenu, virgule décimale)
+        tokens: Dict[str, tuple] = {}
+        aliases: Dict[str, str] = {}
+        for name, rendered in values.items():
+            forms = [(rendered, "")]
+            if NUMBER_RE.fullmatch(rendered) and "." in rendered:
+                forms.append((rendered.replace(".", ","), ","))
+            for form, comma in forms:
+                if form in tokens:
+                    primary = tokens[form][0]
+                    if primary != name:
+                        aliases[name] = primary
+                else:
+                    tokens[form] = (name, comma)
+
+        used = set()
+
+        def replace(match):
+            name, comma = tokens[match.group(0)]
+            used.add(name)
+            return f"⟦{name}{comma}⟧"
+
+        if tokens:
+            patterns = []
+            for form in sorted(tokens, key=len, reverse=True):
+                if NUMBER_RE.fullmatch(form):
+                    patterns.append(rf"(?<!\d)(?<!\d[.,]){re.escape(form)}(?!\d)(?![.,]\d)")
+                else:
+                    patterns.append(rf"(?<![A-Za-z0-9_]){re.escape(form)}(?![A-Za-z0-9_])")
+            text = re.sub("|".join(patterns), replace, response)
+        else:
+            text = response
+
+        numbers = {form for form in tokens if NUMBER_RE.fullmatch(form)}
+        for stray in NUMBER_RE.findall(PLACEHOLDER_RE.sub(" ", text)):
+            if stray in numbers or len(stray) > 1:
+                return None
+
+        return cls(text, {alias: primary for alias, primary in aliases.items() if primary in used})
+
+    def render(self, values: Dict[str, str]) -> Optional[str]:
+        """Réponse pour une autre spec, ou None si le gabarit ne s'y applique pas"""
+        for alias, primary in self.aliases.items():
+            if values.get(alias) != values.get(primary):
+                return None
+
+        missing = False
+
+        def fill(match):
+            nonlocal missing
+            value = values.get(match.group(1))
+            if value is None:
+                missing = True
+                return ""
+            return value.replace(".", ",") if match.group(2) else value
+
+        text = PLACEHOLDER_RE.sub(fill, self.text)
+        return None if missing else text
+
+    def dumps(self) -> str:
+        return json.dumps({"template": self.text, "aliases": self.aliases}, ensure_ascii=False, sort_keys=True)
+
+    @classmethod
+    def loads(cls, variant: str) -> Optional["ResponseTemplate"]:
+        try:
+            data = json.loads(variant)
+            return cls(data["template"], data["aliases"])
+        except (ValueError, TypeError, KeyError):
+            return None
+
+
+class MemoryResponseStore:
+    """
+    Store en mémoire (tests, mode replay hors-ligne).
+
+    Peut être chargé depuis / sauvegardé vers un fichier JSON de réponses
+    enregistrées : {clé: [variante, ...]}.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, List[str]]] = None):
+        self.entries: Dict[str, List[str]] = entries or {}
+
+    @classmethod
+    def from_file(cls, path: str) -> "MemoryResponseStore":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+
+    async def get_variants(self, key: str) -> List[str]:
+        return list(self.entries.get(key, []))
+
+    async def add_variant(self, key: str, namespace: str, response: str, pool_size: int, ttl_seconds: int):
+        variants = self.entries.setdefault(key, [])
+        if response not in variants:
+            variants.append(response)
+            del variants[:-pool_size]
+
+    async def invalidate(self, key_prefix: str) -> int:
+        keys = [key for key in self.entries if key.startswith(key_prefix)]
+        for key in keys:
+            del self.entries[key]
+        return len(keys)
+
+
+class MongoResponseStore:
+    """Store Mongo : un document par clé, variantes bornées, expiration TTL"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get_variants(self, key: str) -> List[str]:
+        entry = await self.collection.find_one(
+            {"key": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"_id": 0, "variants": 1}
+        )
+        return entry.get("variants", []) if entry else []
+
+    async def add_variant(self, key: str, namespace: str, response: str, pool_size: int, ttl_seconds: int):
+        # $addToSet n'accepte pas $slice : déduplication par une lecture préalable
+        if await self.collection.count_documents({"key": key, "variants": response}, limit=1):
+            return
+
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"key": key},
+            {
+                "$setOnInsert": {"namespace": namespace, "created_at": now},
+                "$set": {"expires_at": now + timedelta(seconds=ttl_seconds)},
+                "$push": {"variants": {"$each": [response], "$slice": -pool_size}}
+            },
+            upsert=True
+        )
+
+    async def invalidate(self, key_prefix: str) -> int:
+        result = await self.collection.delete_many({"key": {"$regex": f"^{re.escape(key_prefix)}"}})
+        return result.deleted_count
+
+
+class LLMResponseCache:
+    """
+    Cache de réponses LLM avec pools de variantes.
+
+    Responsabilités :
+        - Construire des clés sémantiques (StyleManager) + forme des
+          paramètres ou empreinte du prompt
+        - Servir une variante au hasard quand le pool de la clé est plein
+        - Stocker les réponses validées par l'appelant (en gabarit si besoin)
+        - Remonter hits / misses à IAMonitoringService
+    """
+
+    def __init__(self, store=None, mode: str = "normal", pool_size: int = 3, ttl_seconds: int = 30 * 24 * 3600):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"LLM_CACHE_MODE invalide : {mode} (attendu : {', '.join(CACHE_MODES)})")
+        self._store = store
+        self.mode = mode
+        self.pool_size = pool_size
+        self.ttl_seconds = ttl_seconds
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        mode = os.environ.get("LLM_CACHE_MODE", "normal")
+        replay_file = os.environ.get("LLM_CACHE_REPLAY_FILE")
+        store = MemoryResponseStore.from_file(replay_file) if replay_file else None
+        return cls(
+            store=store,
+            mode=mode,
+            pool_size=int(os.environ.get("LLM_CACHE_VARIANTS", "3")),
+            ttl_seconds=int(os.environ.get("LLM_CACHE_TTL_DAYS", "30")) * 24 * 3600
+        )
+
+    @property
+    def store(self):
+        """Store des réponses (None tant qu'aucune collection n'est branchée)"""
+        return self._store
+
+    def use_collection(self, collection):
+        """Persiste dans la collection Mongo de l'application (sauf store déjà fourni, ex. replay)"""
+        if self._store is None:
+            self._store = MongoResponseStore(collection)
+
+    @staticmethod
+    def make_key(
+        chapitre: str,
+        type_exercice: str,
+        niveau: str,
+        prompt: str,
+        style: StyleFormulation = StyleFormulation.SCOLAIRE
+    ) -> str:
+        """
+        Clé de cache : clé sémantique StyleManager + empreinte du prompt.
+
+        Le niveau scolaire occupe l'emplacement « difficulté » de la clé
+        sémantique : il reste lisible pour l'invalidation par préfixe.
+
+        Examples:
+            >>> make_key("Fractions", "calcul_fractions", "6e", prompt)
+            "fractions__calcul_fractions__6e__scolaire__3f2a9c0d1b7e4a56"
+        """
+        semantic_key = style_manager.build_cache_key(chapitre, type_exercice, niveau, style)
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        return f"{semantic_key}__{prompt_hash}"
+
+    @staticmethod
+    def make_template_key(
+        chapitre: str,
+        type_exercice: str,
+        niveau: str,
+        difficulte: str,
+        shape: Iterable[str],
+        style: StyleFormulation = StyleFormulation.SCOLAIRE
+    ) -> str:
+        """
+        Clé de cache d'une réponse en gabarit : clé sémantique StyleManager +
+        niveau + empreinte de la forme (noms des paramètres, pas leurs valeurs).
+
+        Examples:
+            >>> make_template_key("Fractions", "calcul_fractions", "6e", "moyen", ["a", "b"])
+            "fractions__calcul_fractions__moyen__scolaire__6e__9c1f0b2e"
+        """
+        semantic_key = style_manager.build_cache_key(chapitre, type_exercice, difficulte, style)
+        shape_hash = hashlib.sha256("|".join(sorted(shape)).encode("utf-8")).hexdigest()[:8]
+        return f"{semantic_key}__{niveau.lower()}__{shape_hash}"
+
+    async def _servable_variants(self, namespace: str, key: str) -> List[str]:
+        """Variantes de la clé si le pool peut être servi, [] sinon"""
+        try:
+            variants = await self.store.get_variants(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Lecture cache LLM impossible ({namespace}) : {e}")
+            return []
+
+        # En mode normal, le pool est complété par de nouveaux appels avant d'être servi
+        if variants and (self.mode == "replay" or len(variants) >= self.pool_size):
+            return variants
+        return []
+
+    def _serve(self, namespace: str, key: str, responses: List[str]) -> Optional[str]:
+        if responses:
+            ia_monitoring.log_response_cache(namespace, hit=True)
+            logger.info(f"🎯 Cache LLM HIT ({namespace}) : {key}")
+            return random.choice(responses)
+
+        ia_monitoring.log_response_cache(namespace, hit=False)
+        if self.mode == "replay":
+            raise LLMReplayMissError(key)
+        return None
+
+    async def lookup(self, namespace: str, key: str) -> Optional[str]:
+        """
+        Variante en cache pour cette clé, ou None s'il faut appeler le LLM.
+
+        Raises:
+            LLMReplayMissError: mode replay et aucune variante enregistrée
+        """
+        if self.mode == "off" or self.store is None:
+            if self.mode == "replay":
+                raise LLMReplayMissError(key)
+            return None
+        return self._serve(namespace, key, await self._servable_variants(namespace, key))
+
+    async def lookup_template(self, namespace: str, key: str, values: Dict[str, str]) -> Optional[str]:
+        """
+        Variante en gabarit interpolée avec `values` (template_values de la
+        spec servie), ou None s'il faut appeler le LLM. Seules les variantes
+        applicables à ces valeurs sont candidates.
+
+        Raises:
+            LLMReplayMissError: mode replay et aucune variante applicable
+        """
+        if self.mode == "off" or self.store is None:
+            if self.mode == "replay":
+                raise LLMReplayMissError(key)
+            return None
+
+        rendered = []
+        for variant in await self._servable_variants(namespace, key):
+            template = ResponseTemplate.loads(variant)
+            response = template.render(values) if template else None
+            if response is not None:
+                rendered.append(response)
+        return self._serve(namespace, key, rendered)
+
+    async def store_response(self, namespace: str, key: str, response: str):
+        """Ajoute une réponse validée au pool de variantes de la clé"""
+        if self.mode != "normal" or self.store is None:
+            return
+        try:
+            await self.store.add_variant(key, namespace, response, self.pool_size, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"⚠️ Écriture cache LLM impossible ({namespace}) : {e}")
+
+    async def store_template(self, namespace: str, key: str, response: str, values: Dict[str, str]) -> bool:
+        """Ajoute une réponse validée, mise en gabarit, au pool (False si non généralisable)"""
+        if self.mode != "normal" or self.store is None:
+            return False
+        template = ResponseTemplate.from_response(response, values)
+        if template is None:
+            logger.info(f"Réponse LLM non mise en gabarit ({namespace}) : valeurs non reliées à la spec")
+            return False
+        await self.store_response(namespace, key, template.dumps())
+        return True
+
+    async def get_or_generate(
+        self,
+        namespace: str,
+        key: str,
+        generate: Callable[[], Awaitable[str]],
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Réponse en cache, sinon appel de `generate()` puis stockage.
+
+        Args:
+            namespace: Appelant (pour les métriques)
+            key: Clé construite par make_key
+            generate: Coroutine d'appel LLM
+            accept: Validation optionnelle ; une réponse refusée n'est pas stockée
+        """
+        cached = await self.lookup(namespace, key)
+        if cached is not None:
+            return cached
+
+        response = await generate()
+        if accept is None or accept(response):
+            await self.store_response(namespace, key, response)
+        return response
+
+    async def invalidate(self, key_prefix: str) -> int:
+        """Supprime toutes les clés commençant par `key_prefix` (ex. un chapitre)"""
+        if self.store is None:
+            return 0
+        removed = await self.store.invalidate(key_prefix)
+        logger.info(f"Invalidated {removed} LLM cache entries matching '{key_prefix}'")
+        return removed
+
+
+# Instance globale
+llm_response_cache = LLMResponseCache.from_env()
+
+
+__all__ = [
+    "LLMResponseCache",
+    "LLMReplayMissError",
+    "MemoryResponseStore",
+    "MongoResponseStore",
+    "ResponseTemplate",
+    "llm_response_cache",
+    "template_values"
+]
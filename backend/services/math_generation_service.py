@@ -3,10 +3,13 @@ Service de génération d'exercices mathématiques structurés
 Génère specs mathématiques complètes avec solutions calculées (SANS IA)
 """
 
+import json
+import os
 import random
 import math
 from fractions import Fraction
-from typing import List, Dict, Any, Tuple
+from types import MappingProxyType
+from typing import Callable, List, Dict, Any, Mapping, Tuple
 import logging
 from models.math_models import (
     MathExerciseSpec, MathExerciseType, DifficultyLevel, 
@@ -15,6 +18,154 @@ from models.math_models import (
 
 logger = logging.getLogger(__name__)
 
+# Fichier du référentiel 6e, utilisé pour valider les registres à l'import
+CURRICULUM_6E_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "curriculum", "curriculum_6e.json")
+
+# Chapitres servis par leur propre handler (gm08_handler, tests_dyn_handler), hors de ce service
+DEDICATED_PIPELINE_CHAPTERS = frozenset({"6e_GM08", "6e_TESTS_DYN"})
+
+
+def _freeze(table: Dict) -> Mapping:
+    """Registre en lecture seule (listes converties en tuples)"""
+    return MappingProxyType({key: tuple(value) if isinstance(value, list) else value for key, value in table.items()})
+
+
+# ============================================================================
+# REGISTRES DE DISPATCH
+# ============================================================================
+# Construits une seule fois à l'import (et non à chaque spec générée) :
+#   - CHAPTER_EXERCISE_TYPES : chapitre → types d'exercices
+#   - CHAPTER_GENERATORS     : chapitre → générateur dédié (défini après la classe)
+#   - TYPE_GENERATORS        : type d'exercice → générateur (défini après la classe)
+# Les générateurs sont des fonctions non liées, appelées avec l'instance.
+
+# Note: Les chapitres sont uniques dans le mapping
+# Pour des chapitres présents dans plusieurs niveaux, 
+# le mapping s'applique à tous les niveaux
+CHAPTER_EXERCISE_TYPES: Mapping[str, Tuple[MathExerciseType, ...]] = _freeze({
+    # ========== VAGUE 1 - 6e - Priorité Très Haute ==========
+    # Note: Utilise les chapitres existants du catalogue
+    
+    # Fractions - inclut représentation graphique, addition/soustraction
+    "Fractions": [MathExerciseType.CALCUL_FRACTIONS, MathExerciseType.FRACTION_REPRESENTATION, MathExerciseType.FRACTION_COMPARAISON],
+    "Fractions comme partage et quotient": [MathExerciseType.CALCUL_FRACTIONS, MathExerciseType.FRACTION_REPRESENTATION],
+    "Fractions simples de l'unité": [MathExerciseType.CALCUL_FRACTIONS, MathExerciseType.FRACTION_REPRESENTATION],
+    "Nombres en écriture fractionnaire": [MathExerciseType.CALCUL_FRACTIONS, MathExerciseType.FRACTIONS_EGALES, MathExerciseType.FRACTION_COMPARAISON],
+    
+    # Proportionnalité - inclut tableaux et problèmes achats
+    "Proportionnalité": [MathExerciseType.PROPORTIONNALITE, MathExerciseType.PROP_TABLEAU, MathExerciseType.PROP_ACHAT],
+    
+    # Nombres entiers - inclut lecture/écriture et comparaison
+    "Nombres entiers et décimaux": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.NOMBRES_LECTURE, MathExerciseType.NOMBRES_COMPARAISON],
+    
+    # Aires et périmètres
+    "Périmètres et aires": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.RECTANGLE, MathExerciseType.AIRE_TRIANGLE, MathExerciseType.AIRE_FIGURES_COMPOSEES],
+    "Aires": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.AIRE_TRIANGLE, MathExerciseType.CERCLE],
+    "Aire du rectangle et du carré": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.AIRE_FIGURES_COMPOSEES],
+    
+    # Géométrie
+    "Géométrie dans le plan": [MathExerciseType.RECTANGLE, MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.PROBLEME_2_ETAPES, MathExerciseType.TRIANGLE_CONSTRUCTION, MathExerciseType.QUADRILATERES],
+    
+    # Symétrie (déjà implémenté)
+    "Symétrie axiale": [MathExerciseType.SYMETRIE_AXIALE, MathExerciseType.SYMETRIE_PROPRIETES],
+    "Symétrie axiale (points, segments, figures)": [MathExerciseType.SYMETRIE_AXIALE],
+    
+    # ========== VAGUE 2 & 3 - 6e ==========
+    # Droites graduées
+    "Droite numérique et repérage": [MathExerciseType.DROITE_GRADUEE_ENTIERS, MathExerciseType.DROITE_GRADUEE_DECIMAUX],
+    "Droite graduée": [MathExerciseType.DROITE_GRADUEE_ENTIERS, MathExerciseType.DROITE_GRADUEE_DECIMAUX],
+    
+    # Angles
+    "Angles": [MathExerciseType.ANGLE_MESURE, MathExerciseType.ANGLE_VOCABULAIRE, MathExerciseType.ANGLE_PROPRIETES],
+    
+    # Volumes - 6e: pavé droit et cube
+    "Volumes": [MathExerciseType.VOLUME_PAVE, MathExerciseType.VOLUME, MathExerciseType.CONVERSIONS_UNITES],
+    
+    # Géométrie dans l'espace - 6e: solides, patrons, volumes
+    "Géométrie dans l'espace": [MathExerciseType.VOLUME_PAVE, MathExerciseType.VOLUME],
+    
+    # Données et tableaux
+    "Lire et compléter des tableaux de données": [MathExerciseType.TABLEAU_LECTURE, MathExerciseType.TABLEAU_COMPLETER, MathExerciseType.STATISTIQUES],
+    "Diagrammes en barres et pictogrammes": [MathExerciseType.DIAGRAMME_BARRES, MathExerciseType.STATISTIQUES],
+    
+    # Calculs avancés
+    "Priorités opératoires": [MathExerciseType.PRIORITES_OPERATIONS],
+    "Multiples et diviseurs, critères de divisibilité": [MathExerciseType.CRITERES_DIVISIBILITE, MathExerciseType.MULTIPLES],
+    
+    # Conversions - MISE À JOUR P1: Générateur dédié en priorité
+    "Longueurs, masses, durées": [MathExerciseType.GRANDEURS_MESURES_DEDIE, MathExerciseType.CONVERSIONS_UNITES],
+    
+    # ========== CHAPITRE MODÈLE: DURÉES ET LECTURE DE L'HEURE ==========
+    "Durées et lecture de l'heure": [
+        MathExerciseType.LECTURE_HORLOGE,
+        MathExerciseType.CONVERSION_DUREES,
+        MathExerciseType.CALCUL_DUREE,
+        MathExerciseType.PROBLEME_DUREES
+    ],
+    
+    # ========== 6e - Calculs (Calcul mental, posés, instrumentés) ==========
+    # MISE À JOUR P1: Utilisation des générateurs dédiés en priorité
+    "Calcul mental": [MathExerciseType.CALCUL_MENTAL_DEDIE, MathExerciseType.PRIORITES_OPERATIONS],
+    "Calculs posés": [MathExerciseType.CALCUL_POSE_DEDIE, MathExerciseType.CALCUL_DECIMAUX],
+    "Calculs instrumentés": [MathExerciseType.CALCUL_INSTRUMENTE_DEDIE, MathExerciseType.ARRONDI],
+    
+    # ========== 6e - Existants restants ==========
+    "Nombres décimaux": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.ENCADREMENT, MathExerciseType.ARRONDI],
+    "Géométrie - Triangles et quadrilatères": [MathExerciseType.RECTANGLE, MathExerciseType.PERIMETRE_AIRE],
+    "Perpendiculaires et parallèles à la règle et à l'équerre": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.RECTANGLE],
+    "Symétrie centrale": [MathExerciseType.SYMETRIE_CENTRALE],
+    
+    # ========== 6e - Chapitres supplémentaires (non dans curriculum principal) ==========
+    # NOTE: Ces chapitres sont utilisés pour des sous-thèmes spécifiques
+    # Ils ont des générateurs dédiés dans CHAPTER_GENERATORS
+    "Points, segments, droites, demi-droites": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.RECTANGLE],
+    "Alignement, milieu d'un segment": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.RECTANGLE],
+    "Lire et écrire les nombres entiers": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.NOMBRES_LECTURE],
+    "Comparer et ranger des nombres entiers": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.NOMBRES_COMPARAISON],
+    "Addition et soustraction de nombres entiers": [MathExerciseType.CALCUL_RELATIFS, MathExerciseType.CALCUL_DECIMAUX],
+    "Triangles (construction et classification)": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.TRIANGLE_CONSTRUCTION],
+    "Quadrilatères usuels (carré, rectangle, losange, parallélogramme)": [MathExerciseType.RECTANGLE, MathExerciseType.QUADRILATERES],
+    "Multiplication de nombres entiers": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.PRIORITES_OPERATIONS],
+    "Division euclidienne": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.CRITERES_DIVISIBILITE],
+    "Mesurer et comparer des longueurs": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.CONVERSIONS_UNITES],
+    "Périmètre de figures usuelles": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.RECTANGLE],
+    
+    # ========== Chapitres multi-niveaux (5e, 4e, 3e) - SANS 6e car déjà définis ==========
+    # Note: "Fractions", "Proportionnalité", "Nombres entiers et décimaux" sont
+    # définis en haut avec les générateurs Vague 1 pour le niveau 6e
+    # Note: "Volumes" et "Géométrie dans l'espace" sont définis plus haut
+    "Nombres relatifs": [MathExerciseType.CALCUL_RELATIFS],
+    "Nombres rationnels": [MathExerciseType.CALCUL_FRACTIONS],
+    "Statistiques": [MathExerciseType.STATISTIQUES, MathExerciseType.DIAGRAMME_BARRES],
+    # "Géométrie dans l'espace" et "Volumes" -> voir définitions plus haut
+    "Puissances": [MathExerciseType.PUISSANCES],
+    "Calcul littéral": [MathExerciseType.EQUATION_1ER_DEGRE, MathExerciseType.CALCUL_DECIMAUX],
+    
+    # ========== 5e ==========
+    "Triangles": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.TRIANGLE_RECTANGLE],
+    "Aires et périmètres": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.CERCLE, MathExerciseType.RECTANGLE],
+    "Angles et triangles": [MathExerciseType.TRIANGLE_QUELCONQUE],
+    "Parallélogrammes": [MathExerciseType.RECTANGLE, MathExerciseType.PERIMETRE_AIRE],
+    # ❌ "Symétrie centrale" RETIRÉ : Pas de générateur disponible
+    # ❌ "Homothétie" RETIRÉ : Pas de générateur disponible
+    
+    # ========== 4e ==========
+    "Théorème de Pythagore": [MathExerciseType.TRIANGLE_RECTANGLE],
+    "Équations": [MathExerciseType.EQUATION_1ER_DEGRE],
+    "Cosinus": [MathExerciseType.TRIGONOMETRIE],
+    
+    # ========== 3e et géométrie avancée ==========
+    "Probabilités": [MathExerciseType.PROBABILITES],
+    "Statistiques et probabilités": [MathExerciseType.STATISTIQUES, MathExerciseType.PROBABILITES],
+    "Aires et volumes": [MathExerciseType.VOLUME, MathExerciseType.PERIMETRE_AIRE],
+    "Théorème de Thalès": [MathExerciseType.THALES],
+    "Trigonométrie": [MathExerciseType.TRIGONOMETRIE],
+    "Le cercle": [MathExerciseType.CERCLE],
+    "Cercle": [MathExerciseType.CERCLE],
+    "Organisation et gestion de données, fonctions": [MathExerciseType.STATISTIQUES, MathExerciseType.PROPORTIONNALITE]
+})
+
+
 class MathGenerationService:
     """Service de génération d'exercices mathématiques structurés"""
     
@@ -110,145 +261,20 @@ class MathGenerationService:
         return specs
     
     def _map_chapter_to_types(self, chapitre: str, niveau: str) -> List[MathExerciseType]:
-        """Mappe les chapitres aux types d'exercices appropriés"""
-        
-        # Note: Les chapitres sont uniques dans le mapping
-        # Pour des chapitres présents dans plusieurs niveaux, 
-        # le mapping s'applique à tous les niveaux
-        mapping = {
-            # ========== VAGUE 1 - 6e - Priorité Très Haute ==========
-            # Note: Utilise les chapitres existants du catalogue
-            
-            # Fractions - inclut représentation graphique, addition/soustraction
-            "Fractions": [MathExerciseType.CALCUL_FRACTIONS, MathExerciseType.FRACTION_REPRESENTATION, MathExerciseType.FRACTION_COMPARAISON],
-            "Fractions comme partage et quotient": [MathExerciseType.CALCUL_FRACTIONS, MathExerciseType.FRACTION_REPRESENTATION],
-            "Fractions simples de l'unité": [MathExerciseType.CALCUL_FRACTIONS, MathExerciseType.FRACTION_REPRESENTATION],
-            "Nombres en écriture fractionnaire": [MathExerciseType.CALCUL_FRACTIONS, MathExerciseType.FRACTIONS_EGALES, MathExerciseType.FRACTION_COMPARAISON],
-            
-            # Proportionnalité - inclut tableaux et problèmes achats
-            "Proportionnalité": [MathExerciseType.PROPORTIONNALITE, MathExerciseType.PROP_TABLEAU, MathExerciseType.PROP_ACHAT],
-            
-            # Nombres entiers - inclut lecture/écriture et comparaison
-            "Nombres entiers et décimaux": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.NOMBRES_LECTURE, MathExerciseType.NOMBRES_COMPARAISON],
-            
-            # Aires et périmètres
-            "Périmètres et aires": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.RECTANGLE, MathExerciseType.AIRE_TRIANGLE, MathExerciseType.AIRE_FIGURES_COMPOSEES],
-            "Aires": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.AIRE_TRIANGLE, MathExerciseType.CERCLE],
-            "Aire du rectangle et du carré": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.AIRE_FIGURES_COMPOSEES],
-            
-            # Géométrie
-            "Géométrie dans le plan": [MathExerciseType.RECTANGLE, MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.PROBLEME_2_ETAPES, MathExerciseType.TRIANGLE_CONSTRUCTION, MathExerciseType.QUADRILATERES],
-            
-            # Symétrie (déjà implémenté)
-            "Symétrie axiale": [MathExerciseType.SYMETRIE_AXIALE, MathExerciseType.SYMETRIE_PROPRIETES],
-            "Symétrie axiale (points, segments, figures)": [MathExerciseType.SYMETRIE_AXIALE],
-            
-            # ========== VAGUE 2 & 3 - 6e ==========
-            # Droites graduées
-            "Droite numérique et repérage": [MathExerciseType.DROITE_GRADUEE_ENTIERS, MathExerciseType.DROITE_GRADUEE_DECIMAUX],
-            "Droite graduée": [MathExerciseType.DROITE_GRADUEE_ENTIERS, MathExerciseType.DROITE_GRADUEE_DECIMAUX],
-            
-            # Angles
-            "Angles": [MathExerciseType.ANGLE_MESURE, MathExerciseType.ANGLE_VOCABULAIRE, MathExerciseType.ANGLE_PROPRIETES],
-            
-            # Volumes - 6e: pavé droit et cube
-            "Volumes": [MathExerciseType.VOLUME_PAVE, MathExerciseType.VOLUME, MathExerciseType.CONVERSIONS_UNITES],
-            
-            # Géométrie dans l'espace - 6e: solides, patrons, volumes
-            "Géométrie dans l'espace": [MathExerciseType.VOLUME_PAVE, MathExerciseType.VOLUME],
-            
-            # Données et tableaux
-            "Lire et compléter des tableaux de données": [MathExerciseType.TABLEAU_LECTURE, MathExerciseType.TABLEAU_COMPLETER, MathExerciseType.STATISTIQUES],
-            "Diagrammes en barres et pictogrammes": [MathExerciseType.DIAGRAMME_BARRES, MathExerciseType.STATISTIQUES],
-            
-            # Calculs avancés
-            "Priorités opératoires": [MathExerciseType.PRIORITES_OPERATIONS],
-            "Multiples et diviseurs, critères de divisibilité": [MathExerciseType.CRITERES_DIVISIBILITE, MathExerciseType.MULTIPLES],
-            
-            # Conversions - MISE À JOUR P1: Générateur dédié en priorité
-            "Longueurs, masses, durées": [MathExerciseType.GRANDEURS_MESURES_DEDIE, MathExerciseType.CONVERSIONS_UNITES],
-            
-            # ========== CHAPITRE MODÈLE: DURÉES ET LECTURE DE L'HEURE ==========
-            "Durées et lecture de l'heure": [
-                MathExerciseType.LECTURE_HORLOGE,
-                MathExerciseType.CONVERSION_DUREES,
-                MathExerciseType.CALCUL_DUREE,
-                MathExerciseType.PROBLEME_DUREES
-            ],
-            
-            # ========== 6e - Calculs (Calcul mental, posés, instrumentés) ==========
-            # MISE À JOUR P1: Utilisation des générateurs dédiés en priorité
-            "Calcul mental": [MathExerciseType.CALCUL_MENTAL_DEDIE, MathExerciseType.PRIORITES_OPERATIONS],
-            "Calculs posés": [MathExerciseType.CALCUL_POSE_DEDIE, MathExerciseType.CALCUL_DECIMAUX],
-            "Calculs instrumentés": [MathExerciseType.CALCUL_INSTRUMENTE_DEDIE, MathExerciseType.ARRONDI],
-            
-            # ========== 6e - Existants restants ==========
-            "Nombres décimaux": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.ENCADREMENT, MathExerciseType.ARRONDI],
-            "Géométrie - Triangles et quadrilatères": [MathExerciseType.RECTANGLE, MathExerciseType.PERIMETRE_AIRE],
-            "Perpendiculaires et parallèles à la règle et à l'équerre": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.RECTANGLE],
-            "Symétrie centrale": [MathExerciseType.SYMETRIE_CENTRALE],
-            
-            # ========== 6e - Chapitres supplémentaires (non dans curriculum principal) ==========
-            # NOTE: Ces chapitres sont utilisés pour des sous-thèmes spécifiques
-            # Ils ont des générateurs dédiés dans chapter_specific_generators
-            "Points, segments, droites, demi-droites": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.RECTANGLE],
-            "Alignement, milieu d'un segment": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.RECTANGLE],
-            "Lire et écrire les nombres entiers": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.NOMBRES_LECTURE],
-            "Comparer et ranger des nombres entiers": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.NOMBRES_COMPARAISON],
-            "Addition et soustraction de nombres entiers": [MathExerciseType.CALCUL_RELATIFS, MathExerciseType.CALCUL_DECIMAUX],
-            "Triangles (construction et classification)": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.TRIANGLE_CONSTRUCTION],
-            "Quadrilatères usuels (carré, rectangle, losange, parallélogramme)": [MathExerciseType.RECTANGLE, MathExerciseType.QUADRILATERES],
-            "Multiplication de nombres entiers": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.PRIORITES_OPERATIONS],
-            "Division euclidienne": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.CRITERES_DIVISIBILITE],
-            "Mesurer et comparer des longueurs": [MathExerciseType.CALCUL_DECIMAUX, MathExerciseType.CONVERSIONS_UNITES],
-            "Périmètre de figures usuelles": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.RECTANGLE],
-            
-            # ========== Chapitres multi-niveaux (5e, 4e, 3e) - SANS 6e car déjà définis ==========
-            # Note: "Fractions", "Proportionnalité", "Nombres entiers et décimaux" sont
-            # définis en haut avec les générateurs Vague 1 pour le niveau 6e
-            # Note: "Volumes" et "Géométrie dans l'espace" sont définis plus haut (ligne 107)
-            "Nombres relatifs": [MathExerciseType.CALCUL_RELATIFS],
-            "Nombres rationnels": [MathExerciseType.CALCUL_FRACTIONS],
-            "Statistiques": [MathExerciseType.STATISTIQUES, MathExerciseType.DIAGRAMME_BARRES],
-            # "Géométrie dans l'espace" et "Volumes" -> voir définitions plus haut
-            "Puissances": [MathExerciseType.PUISSANCES],
-            "Calcul littéral": [MathExerciseType.EQUATION_1ER_DEGRE, MathExerciseType.CALCUL_DECIMAUX],
-            
-            # ========== 5e ==========
-            "Triangles": [MathExerciseType.TRIANGLE_QUELCONQUE, MathExerciseType.TRIANGLE_RECTANGLE],
-            "Aires et périmètres": [MathExerciseType.PERIMETRE_AIRE, MathExerciseType.CERCLE, MathExerciseType.RECTANGLE],
-            "Angles et triangles": [MathExerciseType.TRIANGLE_QUELCONQUE],
-            "Parallélogrammes": [MathExerciseType.RECTANGLE, MathExerciseType.PERIMETRE_AIRE],
-            # ❌ "Symétrie centrale" RETIRÉ : Pas de générateur disponible
-            # ❌ "Homothétie" RETIRÉ : Pas de générateur disponible
-            
-            # ========== 4e ==========
-            "Théorème de Pythagore": [MathExerciseType.TRIANGLE_RECTANGLE],
-            "Équations": [MathExerciseType.EQUATION_1ER_DEGRE],
-            "Cosinus": [MathExerciseType.TRIGONOMETRIE],
-            
-            # ========== 3e et géométrie avancée ==========
-            "Probabilités": [MathExerciseType.PROBABILITES],
-            "Statistiques et probabilités": [MathExerciseType.STATISTIQUES, MathExerciseType.PROBABILITES],
-            "Aires et volumes": [MathExerciseType.VOLUME, MathExerciseType.PERIMETRE_AIRE],
-            "Théorème de Thalès": [MathExerciseType.THALES],
-            "Trigonométrie": [MathExerciseType.TRIGONOMETRIE],
-            "Le cercle": [MathExerciseType.CERCLE],
-            "Cercle": [MathExerciseType.CERCLE],
-            "Organisation et gestion de données, fonctions": [MathExerciseType.STATISTIQUES, MathExerciseType.PROPORTIONNALITE]
-        }
+        """Mappe les chapitres aux types d'exercices appropriés (CHAPTER_EXERCISE_TYPES)"""
+        exercise_types = CHAPTER_EXERCISE_TYPES.get(chapitre)
         
         # 🚨 SÉCURITÉ CRITIQUE : Lever une erreur si chapitre inconnu
-        if chapitre not in mapping:
+        if exercise_types is None:
             raise ValueError(
                 f"❌ CHAPITRE NON MAPPÉ : '{chapitre}'\n"
-                f"   Niveau : {niveau if 'niveau' in locals() else 'N/A'}\n"
+                f"   Niveau : {niveau or 'N/A'}\n"
                 f"   Le chapitre existe dans le curriculum mais aucun générateur n'est défini.\n"
-                f"   → Ajoutez ce chapitre au mapping dans _get_exercise_types_for_chapter()\n"
-                f"   Chapitres disponibles : {sorted(mapping.keys())}"
+                f"   → Ajoutez ce chapitre à CHAPTER_EXERCISE_TYPES\n"
+                f"   Chapitres disponibles : {sorted(CHAPTER_EXERCISE_TYPES)}"
             )
         
-        return mapping[chapitre]
+        return list(exercise_types)
     
     def _generate_spec_by_type(
         self, 
@@ -259,120 +285,14 @@ class MathGenerationService:
     ) -> MathExerciseSpec:
         """Génère une spec selon le type d'exercice"""
         
-        # SPRINT 1, 2 & 3 : Générateurs spécifiques par chapitre (priorité sur les types)
-        chapter_specific_generators = {
-            # SPRINT 1
-            "Perpendiculaires et parallèles à la règle et à l'équerre": self._gen_perpendiculaires_paralleles,
-            "Droite numérique et repérage": self._gen_droite_numerique,
-            "Lire et compléter des tableaux de données": self._gen_tableaux_donnees,
-            
-            # SPRINT 2
-            "Points, segments, droites, demi-droites": self._gen_points_segments_droites,
-            "Alignement, milieu d'un segment": self._gen_alignement_milieu,
-            "Lire et écrire les nombres entiers": self._gen_lire_ecrire_entiers,
-            "Comparer et ranger des nombres entiers": self._gen_comparer_ranger_entiers,
-            "Addition et soustraction de nombres entiers": self._gen_addition_soustraction_entiers,
-            
-            # SPRINT 3
-            "Triangles (construction et classification)": self._gen_triangles,
-            "Quadrilatères usuels (carré, rectangle, losange, parallélogramme)": self._gen_quadrilateres,
-            "Multiplication de nombres entiers": self._gen_multiplication_entiers,
-            "Division euclidienne": self._gen_division_euclidienne,
-            "Multiples et diviseurs, critères de divisibilité": self._gen_multiples_diviseurs,
-            
-            # SPRINT 4
-            "Fractions comme partage et quotient": self._gen_fractions_partage,
-            "Fractions simples de l'unité": self._gen_fractions_simples,
-            "Mesurer et comparer des longueurs": self._gen_mesurer_longueurs,
-            "Périmètre de figures usuelles": self._gen_perimetre_figures,
-            "Aire du rectangle et du carré": self._gen_aire_rectangle_carre,
-            "Diagrammes en barres et pictogrammes": self._gen_diagrammes_barres,
-        }
-        
-        # Vérifier si un générateur spécifique existe pour ce chapitre
-        if chapitre in chapter_specific_generators:
-            return chapter_specific_generators[chapitre](niveau, chapitre, difficulte)
-        
-        # Sinon, utiliser les générateurs par type d'exercice (système existant)
-        generators = {
-            MathExerciseType.CALCUL_RELATIFS: self._gen_calcul_relatifs,
-            MathExerciseType.CALCUL_FRACTIONS: self._gen_calcul_fractions,
-            MathExerciseType.CALCUL_DECIMAUX: self._gen_calcul_decimaux,
-            MathExerciseType.EQUATION_1ER_DEGRE: self._gen_equation_1er_degre,
-            MathExerciseType.TRIANGLE_RECTANGLE: self._gen_triangle_rectangle,
-            MathExerciseType.TRIANGLE_QUELCONQUE: self._gen_triangle_quelconque,
-            MathExerciseType.PROPORTIONNALITE: self._gen_proportionnalite,
-            MathExerciseType.PERIMETRE_AIRE: self._gen_perimetre_aire,
-            MathExerciseType.RECTANGLE: self._gen_rectangle,
-            MathExerciseType.VOLUME: self._gen_volume,
-            MathExerciseType.STATISTIQUES: self._gen_statistiques,
-            MathExerciseType.PROBABILITES: self._gen_probabilites,
-            MathExerciseType.PUISSANCES: self._gen_puissances,
-            MathExerciseType.CERCLE: self._gen_cercle,
-            MathExerciseType.THALES: self._gen_thales,
-            MathExerciseType.TRIGONOMETRIE: self._gen_trigonometrie,
-            MathExerciseType.SYMETRIE_AXIALE: self._gen_symetrie_axiale,
-            MathExerciseType.SYMETRIE_CENTRALE: self._gen_symetrie_centrale,
-            # ========== VAGUE 1 - Générateurs 6e ==========
-            MathExerciseType.FRACTION_REPRESENTATION: self._gen_fraction_representation,
-            MathExerciseType.PROP_TABLEAU: self._gen_prop_tableau,
-            MathExerciseType.PROP_ACHAT: self._gen_prop_achat,
-            MathExerciseType.PROBLEME_2_ETAPES: self._gen_probleme_2_etapes,
-            MathExerciseType.NOMBRES_LECTURE: self._gen_nombres_lecture,
-            MathExerciseType.NOMBRES_COMPARAISON: self._gen_nombres_comparaison,
-            # ========== VAGUE 2 - Générateurs 6e ==========
-            MathExerciseType.DROITE_GRADUEE_ENTIERS: self._gen_droite_graduee_entiers,
-            MathExerciseType.DROITE_GRADUEE_DECIMAUX: self._gen_droite_graduee_decimaux,
-            MathExerciseType.FRACTION_DROITE: self._gen_fraction_droite,
-            MathExerciseType.FRACTION_COMPARAISON: self._gen_fraction_comparaison,
-            MathExerciseType.PROP_COEFFICIENT: self._gen_prop_coefficient,
-            MathExerciseType.VITESSE_DUREE_DISTANCE: self._gen_vitesse_duree_distance,
-            MathExerciseType.AIRE_TRIANGLE: self._gen_aire_triangle,
-            MathExerciseType.AIRE_FIGURES_COMPOSEES: self._gen_aire_figures_composees,
-            MathExerciseType.VOLUME_PAVE: self._gen_volume_pave,
-            MathExerciseType.TABLEAU_LECTURE: self._gen_tableau_lecture,
-            MathExerciseType.DIAGRAMME_BARRES: self._gen_diagramme_barres,
-            MathExerciseType.PROBLEME_1_ETAPE: self._gen_probleme_1_etape,
-            MathExerciseType.TRIANGLE_CONSTRUCTION: self._gen_triangle_construction,
-            MathExerciseType.QUADRILATERES: self._gen_quadrilateres,
-            MathExerciseType.ANGLE_MESURE: self._gen_angle_mesure,
-            MathExerciseType.FORMULES: self._gen_formules,
-            # ========== VAGUE 3 - Générateurs 6e ==========
-            MathExerciseType.FRACTIONS_EGALES: self._gen_fractions_egales,
-            MathExerciseType.DECOMPOSITION: self._gen_decomposition,
-            MathExerciseType.ENCADREMENT: self._gen_encadrement,
-            MathExerciseType.ARRONDI: self._gen_arrondi,
-            MathExerciseType.PRIORITES_OPERATIONS: self._gen_priorites_operations,
-            MathExerciseType.CRITERES_DIVISIBILITE: self._gen_criteres_divisibilite,
-            MathExerciseType.MULTIPLES: self._gen_multiples,
-            MathExerciseType.CONVERSIONS_UNITES: self._gen_conversions_unites,
-            MathExerciseType.ANGLE_VOCABULAIRE: self._gen_angle_vocabulaire,
-            MathExerciseType.ANGLE_PROPRIETES: self._gen_angle_proprietes,
-            MathExerciseType.SYMETRIE_PROPRIETES: self._gen_symetrie_proprietes,
-            MathExerciseType.TABLEAU_COMPLETER: self._gen_tableau_completer,
-            MathExerciseType.DIAGRAMME_CIRCULAIRE: self._gen_diagramme_circulaire,
-            MathExerciseType.SUBSTITUTION: self._gen_substitution,
-            # ========== GÉNÉRATEURS DÉDIÉS 6e (P1) ==========
-            MathExerciseType.CALCUL_MENTAL_DEDIE: self._gen_calcul_mental_dedie,
-            MathExerciseType.CALCUL_POSE_DEDIE: self._gen_calcul_pose_dedie,
-            MathExerciseType.CALCUL_INSTRUMENTE_DEDIE: self._gen_calcul_instrumente_dedie,
-            MathExerciseType.GRANDEURS_MESURES_DEDIE: self._gen_grandeurs_mesures_dedie,
-            # ========== CHAPITRE MODÈLE: DURÉES ET LECTURE DE L'HEURE ==========
-            MathExerciseType.LECTURE_HORLOGE: self._gen_lecture_horloge,
-            MathExerciseType.CONVERSION_DUREES: self._gen_conversion_durees,
-            MathExerciseType.CALCUL_DUREE: self._gen_calcul_duree,
-            MathExerciseType.PROBLEME_DUREES: self._gen_probleme_durees,
-            # ========== GÉNÉRATEUR PREMIUM: DURÉES (6e_GM07) ==========
-            MathExerciseType.DUREES_PREMIUM: self._gen_durees_premium
-        }
-        
-        generator = generators.get(exercise_type)
+        # Générateur spécifique au chapitre (priorité sur les types), sinon par type
+        generator = CHAPTER_GENERATORS.get(chapitre) or TYPE_GENERATORS.get(exercise_type)
         if generator:
-            return generator(niveau, chapitre, difficulte)
+            return generator(self, niveau, chapitre, difficulte)
         else:
             # Fallback
             return self._gen_calcul_decimaux(niveau, chapitre, difficulte)
-    
+
     def _get_next_geometry_points(self) -> List[str]:
         """Retourne le prochain set de points géométriques non utilisé"""
         for point_set in self.geometry_points_sets:
@@ -9601,3 +9521,154 @@ class MathGenerationService:
             resultat_final="Voir correction détaillée"
         )
 
+
+# SPRINT 1, 2, 3 & 4 : Générateurs spécifiques par chapitre (priorité sur les types)
+CHAPTER_GENERATORS: Mapping[str, Callable[..., MathExerciseSpec]] = _freeze({
+    # SPRINT 1
+    "Perpendiculaires et parallèles à la règle et à l'équerre": MathGenerationService._gen_perpendiculaires_paralleles,
+    "Droite numérique et repérage": MathGenerationService._gen_droite_numerique,
+    "Lire et compléter des tableaux de données": MathGenerationService._gen_tableaux_donnees,
+    
+    # SPRINT 2
+    "Points, segments, droites, demi-droites": MathGenerationService._gen_points_segments_droites,
+    "Alignement, milieu d'un segment": MathGenerationService._gen_alignement_milieu,
+    "Lire et écrire les nombres entiers": MathGenerationService._gen_lire_ecrire_entiers,
+    "Comparer et ranger des nombres entiers": MathGenerationService._gen_comparer_ranger_entiers,
+    "Addition et soustraction de nombres entiers": MathGenerationService._gen_addition_soustraction_entiers,
+    
+    # SPRINT 3
+    "Triangles (construction et classification)": MathGenerationService._gen_triangles,
+    "Quadrilatères usuels (carré, rectangle, losange, parallélogramme)": MathGenerationService._gen_quadrilateres,
+    "Multiplication de nombres entiers": MathGenerationService._gen_multiplication_entiers,
+    "Division euclidienne": MathGenerationService._gen_division_euclidienne,
+    "Multiples et diviseurs, critères de divisibilité": MathGenerationService._gen_multiples_diviseurs,
+    
+    # SPRINT 4
+    "Fractions comme partage et quotient": MathGenerationService._gen_fractions_partage,
+    "Fractions simples de l'unité": MathGenerationService._gen_fractions_simples,
+    "Mesurer et comparer des longueurs": MathGenerationService._gen_mesurer_longueurs,
+    "Périmètre de figures usuelles": MathGenerationService._gen_perimetre_figures,
+    "Aire du rectangle et du carré": MathGenerationService._gen_aire_rectangle_carre,
+    "Diagrammes en barres et pictogrammes": MathGenerationService._gen_diagrammes_barres,
+})
+
+# Générateurs par type d'exercice (système existant)
+TYPE_GENERATORS: Mapping[MathExerciseType, Callable[..., MathExerciseSpec]] = _freeze({
+    MathExerciseType.CALCUL_RELATIFS: MathGenerationService._gen_calcul_relatifs,
+    MathExerciseType.CALCUL_FRACTIONS: MathGenerationService._gen_calcul_fractions,
+    MathExerciseType.CALCUL_DECIMAUX: MathGenerationService._gen_calcul_decimaux,
+    MathExerciseType.EQUATION_1ER_DEGRE: MathGenerationService._gen_equation_1er_degre,
+    MathExerciseType.TRIANGLE_RECTANGLE: MathGenerationService._gen_triangle_rectangle,
+    MathExerciseType.TRIANGLE_QUELCONQUE: MathGenerationService._gen_triangle_quelconque,
+    MathExerciseType.PROPORTIONNALITE: MathGenerationService._gen_proportionnalite,
+    MathExerciseType.PERIMETRE_AIRE: MathGenerationService._gen_perimetre_aire,
+    MathExerciseType.RECTANGLE: MathGenerationService._gen_rectangle,
+    MathExerciseType.VOLUME: MathGenerationService._gen_volume,
+    MathExerciseType.STATISTIQUES: MathGenerationService._gen_statistiques,
+    MathExerciseType.PROBABILITES: MathGenerationService._gen_probabilites,
+    MathExerciseType.PUISSANCES: MathGenerationService._gen_puissances,
+    MathExerciseType.CERCLE: MathGenerationService._gen_cercle,
+    MathExerciseType.THALES: MathGenerationService._gen_thales,
+    MathExerciseType.TRIGONOMETRIE: MathGenerationService._gen_trigonometrie,
+    MathExerciseType.SYMETRIE_AXIALE: MathGenerationService._gen_symetrie_axiale,
+    MathExerciseType.SYMETRIE_CENTRALE: MathGenerationService._gen_symetrie_centrale,
+    # ========== VAGUE 1 - Générateurs 6e ==========
+    MathExerciseType.FRACTION_REPRESENTATION: MathGenerationService._gen_fraction_representation,
+    MathExerciseType.PROP_TABLEAU: MathGenerationService._gen_prop_tableau,
+    MathExerciseType.PROP_ACHAT: MathGenerationService._gen_prop_achat,
+    MathExerciseType.PROBLEME_2_ETAPES: MathGenerationService._gen_probleme_2_etapes,
+    MathExerciseType.NOMBRES_LECTURE: MathGenerationService._gen_nombres_lecture,
+    MathExerciseType.NOMBRES_COMPARAISON: MathGenerationService._gen_nombres_comparaison,
+    # ========== VAGUE 2 - Générateurs 6e ==========
+    MathExerciseType.DROITE_GRADUEE_ENTIERS: MathGenerationService._gen_droite_graduee_entiers,
+    MathExerciseType.DROITE_GRADUEE_DECIMAUX: MathGenerationService._gen_droite_graduee_decimaux,
+    MathExerciseType.FRACTION_DROITE: MathGenerationService._gen_fraction_droite,
+    MathExerciseType.FRACTION_COMPARAISON: MathGenerationService._gen_fraction_comparaison,
+    MathExerciseType.PROP_COEFFICIENT: MathGenerationService._gen_prop_coefficient,
+    MathExerciseType.VITESSE_DUREE_DISTANCE: MathGenerationService._gen_vitesse_duree_distance,
+    MathExerciseType.AIRE_TRIANGLE: MathGenerationService._gen_aire_triangle,
+    MathExerciseType.AIRE_FIGURES_COMPOSEES: MathGenerationService._gen_aire_figures_composees,
+    MathExerciseType.VOLUME_PAVE: MathGenerationService._gen_volume_pave,
+    MathExerciseType.TABLEAU_LECTURE: MathGenerationService._gen_tableau_lecture,
+    MathExerciseType.DIAGRAMME_BARRES: MathGenerationService._gen_diagramme_barres,
+    MathExerciseType.PROBLEME_1_ETAPE: MathGenerationService._gen_probleme_1_etape,
+    MathExerciseType.TRIANGLE_CONSTRUCTION: MathGenerationService._gen_triangle_construction,
+    MathExerciseType.QUADRILATERES: MathGenerationService._gen_quadrilateres,
+    MathExerciseType.ANGLE_MESURE: MathGenerationService._gen_angle_mesure,
+    MathExerciseType.FORMULES: MathGenerationService._gen_formules,
+    # ========== VAGUE 3 - Générateurs 6e ==========
+    MathExerciseType.FRACTIONS_EGALES: MathGenerationService._gen_fractions_egales,
+    MathExerciseType.DECOMPOSITION: MathGenerationService._gen_decomposition,
+    MathExerciseType.ENCADREMENT: MathGenerationService._gen_encadrement,
+    MathExerciseType.ARRONDI: MathGenerationService._gen_arrondi,
+    MathExerciseType.PRIORITES_OPERATIONS: MathGenerationService._gen_priorites_operations,
+    MathExerciseType.CRITERES_DIVISIBILITE: MathGenerationService._gen_criteres_divisibilite,
+    MathExerciseType.MULTIPLES: MathGenerationService._gen_multiples,
+    MathExerciseType.CONVERSIONS_UNITES: MathGenerationService._gen_conversions_unites,
+    MathExerciseType.ANGLE_VOCABULAIRE: MathGenerationService._gen_angle_vocabulaire,
+    MathExerciseType.ANGLE_PROPRIETES: MathGenerationService._gen_angle_proprietes,
+    MathExerciseType.SYMETRIE_PROPRIETES: MathGenerationService._gen_symetrie_proprietes,
+    MathExerciseType.TABLEAU_COMPLETER: MathGenerationService._gen_tableau_completer,
+    MathExerciseType.DIAGRAMME_CIRCULAIRE: MathGenerationService._gen_diagramme_circulaire,
+    MathExerciseType.SUBSTITUTION: MathGenerationService._gen_substitution,
+    # ========== GÉNÉRATEURS DÉDIÉS 6e (P1) ==========
+    MathExerciseType.CALCUL_MENTAL_DEDIE: MathGenerationService._gen_calcul_mental_dedie,
+    MathExerciseType.CALCUL_POSE_DEDIE: MathGenerationService._gen_calcul_pose_dedie,
+    MathExerciseType.CALCUL_INSTRUMENTE_DEDIE: MathGenerationService._gen_calcul_instrumente_dedie,
+    MathExerciseType.GRANDEURS_MESURES_DEDIE: MathGenerationService._gen_grandeurs_mesures_dedie,
+    # ========== CHAPITRE MODÈLE: DURÉES ET LECTURE DE L'HEURE ==========
+    MathExerciseType.LECTURE_HORLOGE: MathGenerationService._gen_lecture_horloge,
+    MathExerciseType.CONVERSION_DUREES: MathGenerationService._gen_conversion_durees,
+    MathExerciseType.CALCUL_DUREE: MathGenerationService._gen_calcul_duree,
+    MathExerciseType.PROBLEME_DUREES: MathGenerationService._gen_probleme_durees,
+    # ========== GÉNÉRATEUR PREMIUM: DURÉES (6e_GM07) ==========
+    MathExerciseType.DUREES_PREMIUM: MathGenerationService._gen_durees_premium
+})
+
+
+def validate_generation_registries(curriculum_path: str = CURRICULUM_6E_PATH) -> List[str]:
+    """
+    Vérifie la cohérence des registres entre eux et avec le référentiel.
+    
+    Returns:
+        Liste des incohérences (vide si tout est cohérent) :
+        - type d'exercice sans générateur (fallback silencieux sur calcul_decimaux)
+        - chapitre_backend du référentiel absent de CHAPTER_EXERCISE_TYPES
+        - exercise_types du référentiel inconnus ou sans générateur
+    """
+    problems = []
+    
+    for chapitre, exercise_types in CHAPTER_EXERCISE_TYPES.items():
+        for exercise_type in exercise_types:
+            if exercise_type not in TYPE_GENERATORS and chapitre not in CHAPTER_GENERATORS:
+                problems.append(f"{chapitre}: aucun générateur pour {exercise_type.name}")
+    
+    for chapitre in CHAPTER_GENERATORS:
+        if chapitre not in CHAPTER_EXERCISE_TYPES:
+            problems.append(f"{chapitre}: générateur dédié sans entrée dans CHAPTER_EXERCISE_TYPES")
+    
+    try:
+        with open(curriculum_path, "r", encoding="utf-8") as f:
+            chapitres = json.load(f).get("chapitres", [])
+    except (OSError, ValueError) as e:
+        return problems + [f"référentiel illisible ({curriculum_path}): {e}"]
+    
+    for chapter in chapitres:
+        code = chapter.get("code_officiel", "?")
+        if code in DEDICATED_PIPELINE_CHAPTERS:
+            continue
+        backend = chapter.get("chapitre_backend")
+        if backend and backend not in CHAPTER_EXERCISE_TYPES:
+            problems.append(f"{code}: chapitre_backend '{backend}' non mappé")
+        for name in chapter.get("exercise_types", []):
+            exercise_type = MathExerciseType.__members__.get(name)
+            if exercise_type is None:
+                problems.append(f"{code}: type d'exercice inconnu '{name}'")
+            elif exercise_type not in TYPE_GENERATORS:
+                problems.append(f"{code}: aucun générateur pour {name}")
+    
+    return problems
+
+
+for _problem in validate_generation_registries():
+    logger.warning(f"⚠️ Registre de génération incohérent — {_problem}")
@@ -5,68 +5,120 @@ L'IA ne fait QUE la rédaction, jamais les calculs ou paramètres
 SYSTÈME D'OPTIMISATION IA (Le Maître Mot) :
     1. Vérifier si un gabarit existe dans le cache
     2. Si oui : interpolation directe (0 appel IA, coût = 0)
-    3. Si non : appel IA classique + stockage en cache pour le futur
+    3. Si non : cache de réponses LLM (prompt identique déjà validé)
+    4. Sinon : appel IA classique + stockage en cache pour le futur
 """
 
 import json
 import asyncio
 import logging
+import os
 import time
 from typing import List, Optional
 from models.math_models import MathExerciseSpec, MathTextGeneration, GeneratedMathExercise
 from utils import get_emergent_key
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from subsystems import get_llm_chat_module
 from services.text_normalizer import normalizer
 from services.ia_monitoring_service import ia_monitoring
+from services.llm_response_cache import LLMResponseCache, llm_response_cache, template_values
 from style_manager import style_manager, StyleFormulation
 from cache_manager import cache_manager
 from gabarit_loader import gabarit_loader
 
 logger = logging.getLogger(__name__)
 
+
+class TokenBucket:
+    """
+    Limiteur de débit global (token bucket) pour les appels LLM.
+    
+    Partagé par toutes les requêtes du processus : `rate` appels par seconde
+    en régime établi, rafales jusqu'à `capacity` appels. Les appelants en
+    attente sont servis dans l'ordre d'arrivée. Un débit nul ou négatif
+    désactive le limiteur.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"capacity doit être >= 1 (reçu {capacity})")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    @classmethod
+    def from_env(cls) -> "TokenBucket":
+        return cls(
+            rate=float(os.environ.get("LLM_RATE_PER_SECOND", "2")),
+            capacity=int(os.environ.get("LLM_RATE_BURST", "5"))
+        )
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    async def acquire(self):
+        """Attend qu'un jeton soit disponible puis le consomme"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+# Limiteur partagé par toutes les instances de MathTextService
+llm_rate_limiter = TokenBucket.from_env()
+
+
 class MathTextService:
     """Service de rédaction IA pour exercices mathématiques"""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[TokenBucket] = None, max_concurrency: Optional[int] = None):
         self.emergent_key = get_emergent_key()
+        self.rate_limiter = rate_limiter or llm_rate_limiter
+        # Nombre maximal de specs rédigées simultanément pour une même fiche
+        self.max_concurrency = max_concurrency or int(os.environ.get("MATH_TEXT_CONCURRENCY", "5"))
     
     async def generate_text_for_specs(
         self, 
         specs: List[MathExerciseSpec]
     ) -> List[GeneratedMathExercise]:
-        """Génère le texte IA pour une liste de specs mathématiques"""
+        """
+        Génère le texte IA pour une liste de specs mathématiques.
         
-        exercises = []
+        Les specs sont rédigées en parallèle (au plus `max_concurrency` à la
+        fois) : la latence d'une fiche est celle de l'appel le plus lent, pas
+        la somme des appels. L'ordre des specs est conservé et chaque spec
+        retombe indépendamment sur son fallback en cas d'échec.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
         
-        for i, spec in enumerate(specs):
-            try:
-                # Générer le texte IA pour cette spec
-                text_generation = await self._generate_text_for_single_spec(spec)
+        async def generate_one(i: int, spec: MathExerciseSpec) -> GeneratedMathExercise:
+            async with semaphore:
+                try:
+                    # Générer le texte IA pour cette spec
+                    text_generation = await self._generate_text_for_single_spec(spec)
+                    logger.info(f"✅ Exercice {i+1}/{len(specs)} - Texte généré avec succès")
+                    
+                except Exception as e:
+                    logger.error(f"❌ Erreur génération texte exercice {i+1}: {e}")
+                    
+                    # Fallback sans IA
+                    text_generation = self._generate_fallback_text(spec)
+                    logger.info(f"🔄 Exercice {i+1}/{len(specs)} - Utilisé fallback textuel")
                 
                 # Créer l'exercice complet
-                exercise = GeneratedMathExercise(
+                return GeneratedMathExercise(
                     spec=spec,
                     texte=text_generation
                 )
-                
-                exercises.append(exercise)
-                
-                logger.info(f"✅ Exercice {i+1}/{len(specs)} - Texte généré avec succès")
-                
-            except Exception as e:
-                logger.error(f"❌ Erreur génération texte exercice {i+1}: {e}")
-                
-                # Fallback sans IA
-                fallback_text = self._generate_fallback_text(spec)
-                exercise = GeneratedMathExercise(
-                    spec=spec,
-                    texte=fallback_text
-                )
-                exercises.append(exercise)
-                
-                logger.info(f"🔄 Exercice {i+1}/{len(specs)} - Utilisé fallback textuel")
         
-        return exercises
+        return list(await asyncio.gather(*(generate_one(i, spec) for i, spec in enumerate(specs))))
     
     async def _generate_text_for_single_spec(
         self, 
@@ -136,17 +188,41 @@ class MathTextService:
         
         # Appel IA
         try:
-            chat = LlmChat(
-                api_key=self.emergent_key,
-                session_id=f"math_text_{hash(str(spec.parametres))}",
-                system_message=system_message
-            ).with_model('openai', 'gpt-4o')
-            
-            user_message = UserMessage(text=user_prompt)
-            response = await asyncio.wait_for(
-                chat.send_message(user_message),
-                timeout=30.0
+            # Cache de réponses en gabarit : spec de même forme (valeurs tirées différentes)
+            # → variante déjà validée, réinterpolée avec les valeurs de cette spec (0 appel IA)
+            # En mode replay, une spec sans variante applicable lève LLMReplayMissError → fallback
+            cache_values = template_values(
+                parametres=spec.parametres,
+                solution=spec.solution_calculee,
+                resultat=spec.resultat_final,
+                etapes=spec.etapes_calculees
             )
+            cache_key = LLMResponseCache.make_template_key(
+                spec.chapitre, spec.type_exercice.value, spec.niveau, spec.difficulte.value,
+                shape=[*spec.parametres, f"etapes:{len(spec.etapes_calculees)}"]
+            )
+            response = await llm_response_cache.lookup_template("math_text", cache_key, cache_values)
+            from_cache = response is not None
+            if from_cache and not self._is_valid_cached_response(response, spec):
+                logger.warning(f"⚠️ Variante en cache incohérente pour cette spec ({cache_key}) → appel IA")
+                from_cache = False
+            
+            if not from_cache:
+                # Limite de débit globale (avant le timeout : l'attente ne le consomme pas)
+                await self.rate_limiter.acquire()
+                
+                llm_chat = get_llm_chat_module()
+                chat = llm_chat.LlmChat(
+                    api_key=self.emergent_key,
+                    session_id=f"math_text_{hash(str(spec.parametres))}",
+                    system_message=system_message
+                ).with_model('openai', 'gpt-4o')
+                
+                user_message = llm_chat.UserMessage(text=user_prompt)
+                response = await asyncio.wait_for(
+                    chat.send_message(user_message),
+                    timeout=30.0
+                )
             
             # Parser la réponse JSON
             text_generation = self._parse_ai_response(response, spec)
@@ -188,6 +264,10 @@ class MathTextService:
                     
                     return self._generate_fallback_text(spec)
             
+            # Seules les réponses ayant passé toutes les validations sont mises en cache
+            if not from_cache:
+                await llm_response_cache.store_template("math_text", cache_key, response, cache_values)
+            
             # Normaliser les symboles mathématiques
             text_generation.enonce = normalizer.normalize_math_symbols(text_generation.enonce)
             text_generation.solution_redigee = normalizer.normalize_math_symbols(text_generation.solution_redigee)
@@ -318,6 +398,16 @@ Tu réponds UNIQUEMENT en JSON avec les champs : "enonce", "explication_prof", "
         
         return prompt
     
+    def _is_valid_cached_response(self, response: str, spec: MathExerciseSpec) -> bool:
+        """Une variante réinterpolée passe les mêmes validations qu'une réponse IA"""
+        try:
+            text_generation = self._parse_ai_response(response, spec)
+        except ValueError:
+            return False
+        if not self._validate_ai_response(text_generation, spec):
+            return False
+        return spec.type_exercice.value != "cercle" or self._validate_cercle_specifique(text_generation, spec)
+    
     def _parse_ai_response(
         self, 
         response: str, 
@@ -0,0 +1,179 @@
+"""
+Construction du preview JSON d'une feuille d'exercices (MathALÉA)
+
+Partagé par /preview, /generate-pdf, /export-standard et /generate-pdf-pro.
+
+Coût DB constant quelle que soit la taille de la fiche :
+    1. Items de la fiche (triés par order)
+    2. ExerciseTypes référencés ($in)
+    3. Chapitres des générateurs par chapitre ($in)
+La génération des items se fait ensuite sans aucune requête, en concurrence
+bornée (l'ordre des items est conservé).
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from models.mathalea_models import ExerciseType, SheetItem
+
+logger = logging.getLogger(__name__)
+
+
+class ExerciseTypeNotFoundError(LookupError):
+    """ExerciseType référencé par un item de fiche introuvable"""
+
+    def __init__(self, item_id: str, exercise_type_id: str):
+        self.item_id = item_id
+        self.exercise_type_id = exercise_type_id
+        super().__init__(f"ExerciseType {exercise_type_id} not found for item {item_id}")
+
+
+class SheetPreviewBuilder:
+    """
+    Construit le preview d'une fiche en chargeant ses données en lot.
+
+    Args:
+        sheet_items_collection: Collection Motor des SheetItems
+        exercise_types_collection: Collection Motor des ExerciseTypes
+        chapters_collection: Collection Motor des chapitres
+        template_service: ExerciseTemplateService (generate_exercise_for_type)
+        max_concurrency: Items générés simultanément (SHEET_PREVIEW_CONCURRENCY)
+    """
+
+    def __init__(
+        self,
+        sheet_items_collection,
+        exercise_types_collection,
+        chapters_collection,
+        template_service,
+        max_concurrency: Optional[int] = None
+    ):
+        self.sheet_items_collection = sheet_items_collection
+        self.exercise_types_collection = exercise_types_collection
+        self.chapters_collection = chapters_collection
+        self.template_service = template_service
+        self.max_concurrency = max_concurrency or int(os.environ.get("SHEET_PREVIEW_CONCURRENCY", "8"))
+
+    async def load_items(self, sheet_id: str) -> List[Dict[str, Any]]:
+        """Items de la fiche, triés par order (1 requête)"""
+        cursor = self.sheet_items_collection.find({"sheet_id": sheet_id}, {"_id": 0}).sort("order", 1)
+        return await cursor.to_list(length=1000)
+
+    async def load_exercise_types(self, items: List[SheetItem]) -> Dict[str, ExerciseType]:
+        """ExerciseTypes référencés par les items, indexés par id (1 requête)"""
+        ids = list({item.exercise_type_id for item in items})
+        if not ids:
+            return {}
+        cursor = self.exercise_types_collection.find({"id": {"$in": ids}}, {"_id": 0})
+        return {doc["id"]: ExerciseType(**doc) for doc in await cursor.to_list(length=len(ids))}
+
+    async def load_chapter_titles(self, exercise_types: Dict[str, ExerciseType]) -> Dict[str, str]:
+        """Titres des chapitres des générateurs par chapitre {code: titre} (1 requête)"""
+        codes = list({
+            exercise_type.chapter_code
+            for exercise_type in exercise_types.values()
+            if getattr(exercise_type, "chapter_code", None)
+        })
+        if not codes:
+            return {}
+        cursor = self.chapters_collection.find({"code": {"$in": codes}}, {"_id": 0, "code": 1, "titre": 1})
+        return {doc["code"]: doc["titre"] for doc in await cursor.to_list(length=len(codes))}
+
+    async def build_preview(self, sheet: Dict[str, Any], skip_errors: bool = False) -> Dict[str, Any]:
+        """
+        Génère le preview complet d'une fiche (sans IA).
+
+        Args:
+            sheet: Document ExerciseSheet déjà chargé
+            skip_errors: Ignorer (avec un log) les items invalides, dont
+                l'ExerciseType est introuvable ou dont la génération échoue,
+                au lieu de lever
+
+        Returns:
+            Dict {sheet_id, titre, niveau, description, items}
+
+        Raises:
+            ExerciseTypeNotFoundError: ExerciseType manquant (skip_errors=False)
+            ValueError: Configuration d'item invalide (skip_errors=False)
+        """
+        items = self._parse_items(await self.load_items(sheet["id"]), skip_errors)
+        exercise_types = await self.load_exercise_types(items)
+        chapter_titles = await self.load_chapter_titles(exercise_types)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def build_one(item: SheetItem) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self._build_item(item, exercise_types, chapter_titles)
+                except Exception as e:
+                    if not skip_errors:
+                        raise
+                    logger.warning(f"⚠️ Item {item.id} ignoré dans le preview : {e}")
+                    return None
+
+        preview_items = await asyncio.gather(*(build_one(item) for item in items))
+
+        return {
+            "sheet_id": sheet["id"],
+            "titre": sheet["titre"],
+            "niveau": sheet["niveau"],
+            "description": sheet.get("description"),
+            "items": [preview_item for preview_item in preview_items if preview_item is not None]
+        }
+
+    @staticmethod
+    def _parse_items(item_dicts: List[Dict[str, Any]], skip_errors: bool) -> List[SheetItem]:
+        """Valide chaque item (les items invalides sont ignorés si skip_errors)"""
+        items = []
+        for item_dict in item_dicts:
+            try:
+                items.append(SheetItem(**item_dict))
+            except ValueError as e:
+                if not skip_errors:
+                    raise
+                logger.warning(f"⚠️ Item {item_dict.get('id')} invalide ignoré dans le preview : {e}")
+        return items
+
+    async def _build_item(
+        self,
+        item: SheetItem,
+        exercise_types: Dict[str, ExerciseType],
+        chapter_titles: Dict[str, str]
+    ) -> Dict[str, Any]:
+        exercise_type = exercise_types.get(item.exercise_type_id)
+        if exercise_type is None:
+            raise ExerciseTypeNotFoundError(item.id, item.exercise_type_id)
+
+        generated = await self.template_service.generate_exercise_for_type(
+            exercise_type=exercise_type,
+            nb_questions=item.config.nb_questions,
+            seed=item.config.seed,
+            difficulty=item.config.difficulty,
+            options=item.config.options,
+            use_ai_enonce=False,  # L'enrichissement IA est appliqué après coup
+            use_ai_correction=False,
+            chapter_titles=chapter_titles
+        )
+
+        return {
+            "item_id": item.id,
+            "exercise_type_id": item.exercise_type_id,
+            "exercise_type_summary": {
+                "code_ref": exercise_type.code_ref,
+                "titre": exercise_type.titre,
+                "niveau": exercise_type.niveau,
+                "domaine": exercise_type.domaine,
+                "generator_kind": exercise_type.generator_kind.value
+            },
+            "config": item.config.dict(),
+            "generated": generated
+        }
+
+
+__all__ = [
+    "ExerciseTypeNotFoundError",
+    "SheetPreviewBuilder"
+]
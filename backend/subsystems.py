@@ -0,0 +1,72 @@
+"""
+Lazy accessors for heavy subsystems
+
+Importing server.py used to pull in matplotlib/pyplot (latex_to_svg,
+geometry_renderer, render_schema) and emergentintegrations (litellm, Google
+SDKs) on every worker boot, although they are only needed by a few
+endpoints. Each accessor imports its module on first call and returns the
+same object afterwards.
+
+preload_renderers() imports the matplotlib-based renderers; it is meant to
+run in a thread after startup so the first export does not pay for it.
+"""
+
+import logging
+import time
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "get_latex_renderer",
+    "get_geometry_renderer",
+    "get_schema_renderer",
+    "get_llm_chat_module",
+    "get_stripe_checkout_module",
+    "preload_renderers",
+]
+
+
+@lru_cache(maxsize=None)
+def get_latex_renderer():
+    from latex_to_svg import latex_renderer
+    return latex_renderer
+
+
+@lru_cache(maxsize=None)
+def get_geometry_renderer():
+    from geometry_renderer import geometry_renderer
+    return geometry_renderer
+
+
+@lru_cache(maxsize=None)
+def get_schema_renderer():
+    from render_schema import schema_renderer
+    return schema_renderer
+
+
+@lru_cache(maxsize=None)
+def get_llm_chat_module():
+    """emergentintegrations.llm.chat (LlmChat, UserMessage)"""
+    import emergentintegrations.llm.chat as llm_chat
+    return llm_chat
+
+
+@lru_cache(maxsize=None)
+def get_stripe_checkout_module():
+    """emergentintegrations.payments.stripe.checkout (StripeCheckout, CheckoutSessionRequest, ...)"""
+    import emergentintegrations.payments.stripe.checkout as stripe_checkout
+    return stripe_checkout
+
+
+def preload_renderers():
+    """Import the matplotlib-based renderers ahead of the first request"""
+    start = time.perf_counter()
+    try:
+        get_latex_renderer()
+        get_geometry_renderer()
+        get_schema_renderer()
+    except Exception as e:
+        logger.warning(f"⚠️ Renderer preload failed (will retry on first use): {e}")
+        return
+    logger.info(f"✅ Renderers preloaded in {(time.perf_counter() - start) * 1000:.0f}ms")
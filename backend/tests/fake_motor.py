@@ -0,0 +1,171 @@
+"""
+Collections Motor factices en mémoire, partagées par les tests des services
+
+Sous-ensemble de l'API utilisé par les services :
+- Filtres : égalité, $in, $ne, $gte, $lte, $regex (+ $options "i")
+- Projections d'inclusion ou d'exclusion
+- Curseurs : sort, limit, to_list, async for
+- Écritures : insert, update_one / find_one_and_update ($set, $inc, upsert), delete_one
+- Compteurs de requêtes (queries, finds, find_ones) pour vérifier le coût DB
+
+Les documents passés au constructeur ne sont pas copiés : les écritures sont
+visibles dans la liste d'origine.
+"""
+
+import asyncio
+import copy
+import re
+from types import SimpleNamespace
+
+
+def _regex_matches(value, condition):
+    flags = re.IGNORECASE if "i" in condition.get("$options", "") else 0
+    return isinstance(value, str) and re.search(condition["$regex"], value, flags) is not None
+
+
+OPERATORS = {
+    "$in": lambda value, operand: value in operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+}
+
+
+def matches(doc, query):
+    for field, condition in (query or {}).items():
+        value = doc.get(field)
+        if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+            if "$regex" in condition and not _regex_matches(value, condition):
+                return False
+            for operator, operand in condition.items():
+                if operator in OPERATORS and not OPERATORS[operator](value, operand):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def project(doc, projection):
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    included = [field for field, keep in projection.items() if keep and field != "_id"]
+    if included:
+        doc = {field: doc[field] for field in ["_id", *included] if field in doc}
+    for field, keep in projection.items():
+        if not keep:
+            doc.pop(field, None)
+    return doc
+
+
+def apply_update(doc, update):
+    doc.update(update.get("$set", {}))
+    for field, increment in update.get("$inc", {}).items():
+        doc[field] = doc.get(field, 0) + increment
+
+
+class FakeCursor:
+
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self._limit = None
+
+    def sort(self, field, direction=1):
+        self.docs.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(0)
+        docs = self.docs[:self._limit] if self._limit else self.docs
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs[:self._limit] if self._limit else self.docs:
+            yield doc
+
+
+class FakeCollection:
+
+    def __init__(self, docs=None):
+        self.docs = docs if docs is not None else []
+        self.queries = []  # Filtres des find(), dans l'ordre
+        self.find_ones = 0
+
+    @property
+    def finds(self) -> int:
+        return len(self.queries)
+
+    def find(self, query=None, projection=None):
+        self.queries.append(query)
+        return FakeCursor([project(doc, projection) for doc in self.docs if matches(doc, query)])
+
+    async def find_one(self, query=None, projection=None, sort=None):
+        self.find_ones += 1
+        docs = [doc for doc in self.docs if matches(doc, query)]
+        for field, direction in reversed(sort or []):
+            docs.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return project(docs[0], projection) if docs else None
+
+    def _find_or_upsert(self, query, upsert):
+        doc = next((doc for doc in self.docs if matches(doc, query)), None)
+        if doc is None and upsert:
+            doc = {field: value for field, value in query.items() if not isinstance(value, dict)}
+            self.docs.append(doc)
+        return doc
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        """Renvoie le document après mise à jour (ReturnDocument.AFTER)"""
+        doc = self._find_or_upsert(query, upsert)
+        if doc is None:
+            return None
+        apply_update(doc, update)
+        return copy.deepcopy(doc)
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", f"oid-{len(self.docs)}")
+        self.docs.append(copy.deepcopy(doc))
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs):
+        for doc in docs:
+            await self.insert_one(doc)
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self._find_or_upsert(query, upsert)
+        if doc is not None:
+            apply_update(doc, update)
+        return SimpleNamespace(matched_count=int(doc is not None))
+
+    async def delete_one(self, query):
+        doc = next((doc for doc in self.docs if matches(doc, query)), None)
+        if doc is not None:
+            self.docs.remove(doc)
+        return SimpleNamespace(deleted_count=int(doc is not None))
+
+    async def count_documents(self, query):
+        return sum(1 for doc in self.docs if matches(doc, query))
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+
+class FakeDb:
+    """Base de données : collections créées au premier accès (db[name] ou db.name)"""
+
+    def __init__(self, **collections):
+        self.collections = dict(collections)
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name == "collections":
+            raise AttributeError(name)
+        return self[name]
@@ -0,0 +1,112 @@
+"""
+Tests des agrégats journaliers des analytics (services/analytics_rollup_service.py)
+
+Couvre:
+- Incréments documents / exports par (propriétaire, jour, matière, template)
+- Overview et usage calculés depuis les seules lignes du propriétaire
+- Backfill idempotent (compteurs remplacés)
+- Une erreur d'analytics ne fait pas échouer la requête
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from fake_motor import FakeCollection, FakeCursor
+from services.analytics_rollup_service import AnalyticsRollupService, day_of
+
+
+class FakeHistoryCollection:
+    """documents / exports : résultat d'agrégation fourni tel quel"""
+
+    def __init__(self, name, groups):
+        self.name = name
+        self.groups = groups
+
+    def aggregate(self, pipeline, **kwargs):
+        return FakeCursor(self.groups)
+
+
+class FailingCollection:
+
+    async def update_one(self, *args, **kwargs):
+        raise ConnectionError("mongo down")
+
+
+NOW = datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def rollup():
+    return AnalyticsRollupService(FakeCollection())
+
+
+class TestAnalyticsRollup:
+
+    @pytest.mark.asyncio
+    async def test_overview_from_rollup_rows(self, rollup):
+        await rollup.record_document("prof@example.com", "Mathématiques", datetime(2026, 10, 10, tzinfo=timezone.utc))
+        await rollup.record_document("prof@example.com", "Mathématiques", "2026-10-10T08:00:00")
+        await rollup.record_document("prof@example.com", "Français", datetime(2026, 1, 5, tzinfo=timezone.utc))
+        await rollup.record_export("prof@example.com", "Mathématiques", "classique", datetime(2026, 10, 11, tzinfo=timezone.utc))
+        await rollup.record_export("prof@example.com", "Mathématiques", None, datetime(2026, 10, 11, tzinfo=timezone.utc))
+        await rollup.record_document("guest_abc", "Mathématiques")
+
+        overview = await rollup.get_overview("prof@example.com", now=NOW)
+
+        assert overview["total_documents"] == 3
+        assert overview["total_exports"] == 2
+        assert overview["recent_activity"] == {"documents_last_30_days": 2, "exports_last_30_days": 2}
+        assert sorted((s["subject"], s["count"]) for s in overview["subject_distribution"]) == [
+            ("Français", 1), ("Mathématiques", 2)
+        ]
+        assert sorted((t["template"], t["count"]) for t in overview["template_usage"]) == [
+            ("classique", 1), ("standard", 1)
+        ]
+        assert rollup.collection.queries == [{"owner": "prof@example.com"}]
+
+    @pytest.mark.asyncio
+    async def test_usage_reads_only_the_period(self, rollup):
+        for day in (1, 14, 15, 15):
+            await rollup.record_document("prof@example.com", "Mathématiques", datetime(2026, 10, day, tzinfo=timezone.utc))
+        await rollup.record_document("prof@example.com", "SVT", datetime(2026, 10, 15, tzinfo=timezone.utc))
+        await rollup.record_export("prof@example.com", "SVT", "moderne", datetime(2026, 10, 15, tzinfo=timezone.utc))
+
+        usage = await rollup.get_usage(
+            "prof@example.com", datetime(2026, 10, 10, tzinfo=timezone.utc), NOW
+        )
+
+        assert rollup.collection.queries[-1]["day"] == {"$gte": "2026-10-10", "$lte": "2026-10-16"}
+        assert usage["daily_activity"]["documents"] == [
+            {"date": "2026-10-14", "count": 1}, {"date": "2026-10-15", "count": 3}
+        ]
+        assert usage["daily_activity"]["exports"] == [{"date": "2026-10-15", "count": 1}]
+        assert {"date": "2026-10-15", "subject": "Mathématiques", "count": 2} in usage["subject_timeline"]
+
+    @pytest.mark.asyncio
+    async def test_backfill_is_idempotent(self, rollup):
+        documents = FakeHistoryCollection("documents", [
+            {"_id": {"owner": "prof@example.com", "day": "2026-10-01", "matiere": "Mathématiques"}, "count": 4}
+        ])
+        exports = FakeHistoryCollection("exports", [
+            {"_id": {"owner": "prof@example.com", "day": "2026-10-01", "template": "classique", "matiere": "Mathématiques"}, "count": 2}
+        ])
+
+        assert await rollup.backfill(documents, exports) == (1, 1)
+        await rollup.backfill(documents, exports)
+
+        overview = await rollup.get_overview("prof@example.com", now=NOW)
+        assert overview["total_documents"] == 4
+        assert overview["total_exports"] == 2
+
+    @pytest.mark.asyncio
+    async def test_rollup_errors_do_not_propagate(self):
+        rollup = AnalyticsRollupService(FailingCollection())
+
+        await rollup.record_document("prof@example.com", "Mathématiques")
+        await rollup.record_export(None, "Mathématiques", "classique")  # Sans propriétaire : ignoré
+
+    def test_day_of(self):
+        assert day_of("2026-10-16T23:30:00") == "2026-10-16"
+        assert day_of(datetime(2026, 10, 16, 23, 30, tzinfo=timezone.utc)) == "2026-10-16"
+        assert day_of(datetime(2026, 10, 17, 0, 30)) == "2026-10-17"
@@ -0,0 +1,107 @@
+"""
+Tests du cache de sessions / statut Pro (services/auth_cache.py)
+
+Couvre:
+- Hit sans aller-retour DB, TTL borné par l'expiration de la session / de l'abonnement
+- Regroupement des écritures de last_used
+- Invalidation par session et par utilisateur
+- Template (y compris l'absence de template) et borne LRU
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.auth_cache import AuthCache
+
+
+@pytest.fixture
+def cache():
+    return AuthCache(session_ttl=30, pro_ttl=60, last_used_interval=60, max_entries=100)
+
+
+def in_seconds(seconds):
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+class TestAuthCache:
+
+    def test_session_hit_and_miss(self, cache):
+        assert cache.get_session("token-1") is None
+
+        cache.put_session("token-1", "prof@example.com", in_seconds(3600))
+
+        assert cache.get_session("token-1") == "prof@example.com"
+        assert cache.get_metrics()["hits"] == 1
+        assert cache.get_metrics()["misses"] == 1
+
+    def test_session_never_outlives_expiration(self, cache):
+        cache.put_session("soon", "a@example.com", in_seconds(0.05))
+        cache.put_session("expired", "b@example.com", in_seconds(-1))
+        # Datetime naïve stockée par Mongo : interprétée en UTC
+        cache.put_session("naive", "c@example.com", datetime.utcnow() + timedelta(hours=1))
+
+        assert cache.get_session("soon") == "a@example.com"
+        assert cache.get_session("expired") is None
+        assert cache.get_session("naive") == "c@example.com"
+        time.sleep(0.1)
+        assert cache.get_session("soon") is None
+
+    def test_last_used_writes_are_coalesced(self):
+        cache = AuthCache(last_used_interval=0.05)
+
+        assert cache.should_touch("token-1")
+        assert not cache.should_touch("token-1")
+        assert cache.should_touch("token-2")
+        time.sleep(0.06)
+        assert cache.should_touch("token-1")
+        assert cache.get_metrics()["last_used_writes_skipped"] == 1
+
+    def test_pro_status_bounded_by_subscription(self, cache):
+        user = {"email": "prof@example.com"}
+        cache.put_pro_status("prof@example.com", True, user, in_seconds(0.05))
+        cache.put_pro_status("free@example.com", False, None)
+
+        assert cache.get_pro_status("prof@example.com") == (True, user)
+        assert cache.get_pro_status("free@example.com") == (False, None)
+        time.sleep(0.1)
+        assert cache.get_pro_status("prof@example.com") is None
+
+    def test_template_absence_is_cached(self, cache):
+        assert cache.get_template("prof@example.com") == (False, None)
+
+        cache.put_template("prof@example.com", None)
+
+        assert cache.get_template("prof@example.com") == (True, None)
+
+    def test_invalidate_session(self, cache):
+        cache.put_session("token-1", "prof@example.com", in_seconds(3600))
+        cache.should_touch("token-1")
+
+        cache.invalidate_session("token-1")
+
+        assert cache.get_session("token-1") is None
+        assert cache.should_touch("token-1")
+
+    def test_invalidate_user(self, cache):
+        cache.put_session("token-1", "prof@example.com", in_seconds(3600))
+        cache.put_session("token-2", "autre@example.com", in_seconds(3600))
+        cache.put_pro_status("prof@example.com", True, {}, in_seconds(3600))
+        cache.put_template("prof@example.com", {"template_style": "classique"})
+
+        cache.invalidate_user("prof@example.com")
+
+        assert cache.get_session("token-1") is None
+        assert cache.get_session("token-2") == "autre@example.com"
+        assert cache.get_pro_status("prof@example.com") is None
+        assert cache.get_template("prof@example.com") == (False, None)
+
+    def test_tables_are_bounded(self):
+        cache = AuthCache(max_entries=3)
+        for i in range(5):
+            cache.put_session(f"token-{i}", f"user{i}@example.com", in_seconds(3600))
+
+        assert cache.get_metrics()["sessions"] == 3
+        assert cache.get_session("token-0") is None
+        assert cache.get_session("token-4") == "user4@example.com"
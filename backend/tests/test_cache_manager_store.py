@@ -0,0 +1,147 @@
+"""
+Tests du stockage des gabarits (cache_manager.py)
+
+Couvre:
+- Écriture différée (write-behind) par lots, hors chemin de requête
+- Partage entre instances / processus (SQLite WAL)
+- TTL par entrée, éviction LRU, compaction
+- Invalidation par pattern
+- Métriques (latence p50/p99)
+- Amorçage depuis l'ancien fichier JSON
+"""
+
+import json
+import multiprocessing
+import time
+
+import pytest
+
+from cache_manager import CacheManager
+
+
+@pytest.fixture
+def cache(tmp_path):
+    manager = CacheManager(cache_dir=str(tmp_path), flush_interval=60, flush_batch_size=1000)
+    yield manager
+    manager.close()
+
+
+def write_keys(cache_dir, worker, count):
+    manager = CacheManager(cache_dir=cache_dir, flush_interval=0.05)
+    for i in range(count):
+        manager.set(f"worker{worker}__key{i}", f"gabarit {worker}/{i}")
+    manager.close()
+
+
+class TestCacheManagerStore:
+
+    def test_set_is_write_behind(self, cache, tmp_path):
+        cache.set("fractions__calcul__moyen__concis", "Calcule {a} + {b}.")
+
+        assert cache.get("fractions__calcul__moyen__concis") == "Calcule {a} + {b}."
+        assert cache._store.count() == 0
+        assert cache.get_metrics()["pending_writes"] == 1
+
+        cache.flush()
+
+        other_worker = CacheManager(cache_dir=str(tmp_path))
+        assert other_worker.get("fractions__calcul__moyen__concis") == "Calcule {a} + {b}."
+        other_worker.close()
+
+    def test_background_flush_after_interval(self, tmp_path):
+        manager = CacheManager(cache_dir=str(tmp_path), flush_interval=0.05)
+        manager.set("k", "v")
+
+        deadline = time.monotonic() + 2
+        while manager._store.count() == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        manager.close()
+
+        assert manager._store.count() == 1
+
+    def test_concurrent_workers_share_store(self, tmp_path):
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=write_keys, args=(str(tmp_path), w, 50)) for w in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=30)
+
+        manager = CacheManager(cache_dir=str(tmp_path))
+        assert all(worker.exitcode == 0 for worker in workers)
+        assert manager._store.count() == 200
+        assert manager.get("worker3__key49") == "gabarit 3/49"
+        manager.close()
+
+    def test_ttl_per_entry(self, cache):
+        cache.set("court", "a", ttl_seconds=0.05)
+        cache.set("permanent", "b")
+        time.sleep(0.1)
+
+        assert cache.get("court") is None
+        assert cache.get("permanent") == "b"
+
+    def test_lru_bound_and_compaction(self, tmp_path):
+        manager = CacheManager(cache_dir=str(tmp_path), max_entries=3, flush_interval=60)
+        for i in range(5):
+            manager.set(f"k{i}", f"v{i}")
+        manager.get("k2")  # k2 devient le plus récemment lu
+        manager.set("k5", "v5")
+
+        assert list(manager._cache) == ["k4", "k2", "k5"]
+
+        manager.compact()
+
+        assert manager._store.count() == 3
+        manager.close()
+
+    def test_invalidate_pattern_removes_memory_and_disk(self, cache):
+        cache.set("symetrie_axiale__a", "1")
+        cache.set("symetrie_axiale__b", "2")
+        cache.set("fractions__a", "3")
+
+        cache.invalidate_pattern("symetrie_axiale.*")
+
+        assert cache.get("symetrie_axiale__a") is None
+        assert sorted(cache._store.keys()) == ["fractions__a"]
+
+    def test_metrics_include_lookup_latency(self, cache):
+        cache.set("k", "v")
+        for _ in range(10):
+            cache.get("k")
+        cache.get("absent")
+
+        metrics = cache.get_metrics()
+
+        assert metrics["hits"] == 10 and metrics["misses"] == 1
+        assert metrics["cache_size"] == 1
+        assert 0 <= metrics["p50_lookup_ms"] <= metrics["p99_lookup_ms"]
+
+    def test_cache_size_counts_pending_writes_once(self, cache):
+        cache.set("a", "1")
+        cache.flush()
+        cache.set("a", "2")
+        cache.set("b", "3")
+
+        assert cache.get_metrics()["pending_writes"] == 2
+        assert cache.get_metrics()["cache_size"] == 2
+
+    def test_counters_persist_across_restarts(self, cache, tmp_path):
+        cache.set("k", "v")
+        cache.get("k")
+        cache.close()
+
+        restarted = CacheManager(cache_dir=str(tmp_path))
+        assert restarted.get_metrics()["hits"] == 1
+        restarted.close()
+
+    def test_seeded_from_legacy_json(self, tmp_path):
+        legacy = {"cache": {"ancien__gabarit": "Soit {x}."}, "hits": 7, "misses": 2, "total_cost_saved": 12.0}
+        (tmp_path / "gabarits_cache.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+        manager = CacheManager(cache_dir=str(tmp_path))
+
+        assert manager.get("ancien__gabarit") == "Soit {x}."
+        assert manager.get_metrics()["hits"] == 8
+        assert (tmp_path / "gabarits_cache.json").exists()
+        manager.close()
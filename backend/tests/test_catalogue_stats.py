@@ -0,0 +1,199 @@
+"""
+Tests des statistiques du catalogue (services/catalogue_stats_service.py, routes/catalogue_routes.py)
+
+Couvre:
+- Une seule agrégation pour les effectifs de tous les chapitres d'un niveau
+- Règles de correspondance (chapitre_id / legacy_code / chapter_code, fallback)
+- Cache des réponses, invalidation, ETag et 304, taille bornée (TTL + LRU)
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes.catalogue_routes as catalogue_routes
+from fake_motor import FakeCollection, FakeCursor
+from services.catalogue_stats_service import CatalogueCache, ChapterCounts, catalogue_cache, etag_matches
+
+
+class FakeExerciseTypes(FakeCollection):
+    """exercise_types : $match niveau + $group (domaine, chapitre_id, chapter_code)"""
+
+    def __init__(self, docs):
+        super().__init__(docs)
+        self.aggregations = 0
+
+    def aggregate(self, pipeline):
+        self.aggregations += 1
+        docs = self.docs
+        if "$match" in pipeline[0]:
+            docs = [doc for doc in docs if doc.get("niveau") == pipeline[0]["$match"]["niveau"]]
+        groups = {}
+        for doc in docs:
+            key = (doc.get("domaine"), doc.get("chapitre_id"), doc.get("chapter_code"))
+            groups[key] = groups.get(key, 0) + 1
+        return FakeCursor([
+            {"_id": {"domaine": d, "chapitre_id": c, "chapter_code": k}, "count": n}
+            for (d, c, k), n in groups.items()
+        ])
+
+    async def count_documents(self, query):
+        raise AssertionError("count_documents par chapitre ne doit plus être appelé")
+
+
+class FakeChapterService:
+
+    def __init__(self, chapters):
+        self.chapters = chapters
+        self.calls = 0
+
+    async def get_chapters_by_niveau(self, niveau):
+        self.calls += 1
+        return [chapter for chapter in self.chapters if chapter["niveau"] == niveau]
+
+
+CHAPTERS = [
+    {"code": "6e_N04", "titre": "Fractions", "niveau": "6e", "domaine": "Nombres et calculs", "legacy_code": "6N20", "ordre": 2},
+    {"code": "6e_G07", "titre": "Symétrie axiale", "niveau": "6e", "domaine": "Espace et géométrie", "ordre": 1},
+]
+
+EXERCISE_TYPES = [
+    {"niveau": "6e", "domaine": "Nombres et calculs", "chapter_code": "6e_N04"},
+    {"niveau": "6e", "domaine": "Nombres et calculs", "chapitre_id": "6N20"},
+    {"niveau": "6e", "domaine": "Nombres et calculs", "chapitre_id": "6e_N04", "chapter_code": "6e_N04"},
+    {"niveau": "6e", "domaine": "Espace et géométrie", "chapitre_id": "6e_G07"},
+    {"niveau": "6e", "domaine": "Espace et géométrie", "chapter_code": "6e_N99"},
+    {"niveau": "5e", "domaine": "Nombres et calculs", "chapter_code": "6e_N04"},
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    exercise_types = FakeExerciseTypes(EXERCISE_TYPES)
+    chapter_service = FakeChapterService(CHAPTERS)
+    monkeypatch.setattr(catalogue_routes, "exercise_types_collection", exercise_types)
+    monkeypatch.setattr(catalogue_routes, "chapter_service", chapter_service)
+    catalogue_cache.invalidate("test")
+
+    app = FastAPI()
+    app.include_router(catalogue_routes.router)
+    yield TestClient(app), exercise_types, chapter_service
+    catalogue_cache.invalidate("test")
+
+
+class TestChapterCounts:
+
+    def test_matching_rules(self):
+        counts = ChapterCounts({
+            ("Nombres et calculs", "6N20", None): 2,
+            ("Nombres et calculs", None, "6e_N04"): 3,
+            ("Nombres et calculs", "Fractions", None): 1,
+            ("Espace et géométrie", None, None): 4,
+        })
+
+        assert counts.for_chapter(CHAPTERS[0]) == 5
+        # Pas de legacy_code : les types sans chapitre_id ne sont pas comptés
+        assert counts.for_chapter(CHAPTERS[1]) == 0
+        assert counts.for_legacy_chapter("Nombres et calculs", {"id": "6_fractions", "titre": "Fractions"}) == 1
+        assert counts.for_legacy_chapter("Espace et géométrie", {"id": "6_fractions", "titre": "Fractions"}) == 0
+
+
+class TestCatalogueRoutes:
+
+    def test_level_chapters_single_aggregation(self, client):
+        http, exercise_types, _ = client
+
+        response = http.get("/api/catalogue/levels/6e/chapters")
+
+        assert response.status_code == 200
+        assert exercise_types.aggregations == 1
+        counts = {chapter["id"]: chapter["nb_exercises"] for chapter in response.json()}
+        assert counts == {"6e_N04": 3, "6e_G07": 1}
+
+    def test_legacy_fallback(self, client, monkeypatch):
+        http, exercise_types, _ = client
+        monkeypatch.setattr(catalogue_routes, "chapter_service", FakeChapterService([]))
+        exercise_types.docs = [{"niveau": "5e", "domaine": "Nombres et calculs", "chapitre_id": "Fractions"}]
+
+        chapters = http.get("/api/catalogue/levels/5e/chapters").json()
+
+        fractions = next(chapter for chapter in chapters if chapter["id"] == "5_fractions")
+        assert fractions["nb_exercises"] == 1
+        assert http.get("/api/catalogue/levels/CM2/chapters").status_code == 404
+
+    def test_cached_until_invalidated(self, client):
+        http, exercise_types, chapter_service = client
+
+        http.get("/api/catalogue/levels/6e/chapters")
+        http.get("/api/catalogue/levels/6e/chapters")
+        assert (exercise_types.aggregations, chapter_service.calls) == (1, 1)
+
+        catalogue_cache.invalidate("exercise type created")
+        http.get("/api/catalogue/levels/6e/chapters")
+        assert exercise_types.aggregations == 2
+
+    def test_etag_and_not_modified(self, client):
+        http, _, _ = client
+
+        first = http.get("/api/catalogue/levels/6e/chapters")
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "no-cache"
+
+        revalidated = http.get("/api/catalogue/levels/6e/chapters", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+
+        catalogue_cache.invalidate("test")
+        unchanged = http.get("/api/catalogue/levels/6e/chapters", headers={"If-None-Match": etag})
+        assert unchanged.status_code == 304  # ETag de contenu : stable si les données n'ont pas changé
+
+
+class TestCatalogueCache:
+
+    def test_stale_build_not_stored_after_invalidation(self):
+        cache = CatalogueCache(ttl_seconds=60)
+        generation = cache.generation
+        cache.invalidate("concurrent write")
+
+        cache.put(("k",), [1], generation)
+
+        assert cache.get(("k",)) is None
+
+    def test_ttl(self):
+        cache = CatalogueCache(ttl_seconds=0)
+        cache.put(("k",), [1])
+
+        assert cache.get(("k",)) is None
+        assert cache.get_metrics()["entries"] == 0
+
+    def test_size_is_bounded(self):
+        cache = CatalogueCache(ttl_seconds=60, max_entries=3)
+        for niveau in ("6e", "5e", "4e"):
+            cache.put(("chapters", niveau), [niveau])
+        cache.get(("chapters", "6e"))
+        cache.put(("chapters", "3e"), ["3e"])
+
+        assert cache.get(("chapters", "6e")) is not None
+        assert cache.get(("chapters", "5e")) is None
+
+        # Requêtes avec des paramètres arbitraires : les moins récentes sont évincées
+        for i in range(50):
+            cache.put(("chapters", f"niveau-{i}"), [])
+
+        assert cache.get_metrics()["entries"] == 3
+        assert cache.get(("chapters", "niveau-49")) is not None
+        assert cache.get(("chapters", "6e")) is None
+
+    def test_expired_entries_purged_on_put(self):
+        cache = CatalogueCache(ttl_seconds=0)
+        for i in range(10):
+            cache.put(("chapters", f"niveau-{i}"), [])
+
+        assert cache.get_metrics()["entries"] == 1
+
+    def test_etag_matches(self):
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('W/"abc", "def"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches('"def"', '"abc"')
+        assert not etag_matches(None, '"abc"')
@@ -0,0 +1,98 @@
+"""
+Tests de l'index de résolution chapitre_id → chapter_code (services/chapter_mapping_service.py)
+
+Couvre:
+- Ordre des stratégies : legacy_code, code, titre + niveau
+- Une seule lecture de `chapters` pour un lot (resolve_many)
+- Rechargement après invalidation ou expiration du TTL (écritures des
+  autres workers), repli sur les requêtes si MongoDB échoue
+"""
+
+import pytest
+
+from fake_motor import FakeCollection, FakeDb
+from services.chapter_mapping_service import ChapterMappingService, ChapterResolutionIndex
+
+
+class BrokenChapters(FakeCollection):
+
+    def find(self, query=None, projection=None):
+        raise ConnectionError("mongo down")
+
+
+CHAPTERS = [
+    {"code": "6e_N04", "titre": "Fractions", "niveau": "6e", "legacy_code": "6N20"},
+    {"code": "6e_G07", "titre": "Symétrie axiale", "niveau": "6e"},
+    {"code": "5e_G01", "titre": "Symétrie centrale", "niveau": "5e", "legacy_code": "6e_N04"},
+]
+
+
+@pytest.fixture
+def chapters():
+    return FakeCollection(CHAPTERS)
+
+
+@pytest.fixture
+def service(chapters):
+    return ChapterMappingService(FakeDb(chapters=chapters), index=ChapterResolutionIndex())
+
+
+class TestChapterResolutionIndex:
+
+    @pytest.mark.asyncio
+    async def test_strategies_in_order(self, service, chapters):
+        results = await service.resolve_many([
+            {"chapter_code": "6e_SP03", "chapitre_id": "6N20"},
+            {"chapitre_id": "6N20", "niveau": "6e"},
+            {"chapitre_id": "6e_G07"},
+            {"chapitre_id": "6e_N04"},  # legacy_code prioritaire sur code
+            {"chapitre_id": "SYMÉTRIE", "niveau": "6e"},
+            {"chapitre_id": "symétrie", "niveau": "4e"},
+            {"chapitre_id": "Fractions"},  # Sans niveau : pas de recherche par titre
+            {"niveau": "6e"},
+        ])
+
+        assert results == ["6e_SP03", "6e_N04", "6e_G07", "5e_G01", "6e_G07", None, None, None]
+        assert (chapters.finds, chapters.find_ones) == (1, 0)
+
+    @pytest.mark.asyncio
+    async def test_single_resolution_reuses_loaded_index(self, service, chapters):
+        for _ in range(3):
+            assert await service.get_chapter_code_for_exercise_type({"chapitre_id": "Fractions", "niveau": "6e"}) == "6e_N04"
+
+        assert chapters.finds == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_reloads_on_next_call(self, service, chapters):
+        await service.resolve_many([{"chapitre_id": "6N20"}])
+        chapters.docs = [{"code": "6e_N05", "titre": "Fractions", "niveau": "6e", "legacy_code": "6N20"}]
+
+        service.index.invalidate("chapter 6e_N05")
+
+        assert await service.resolve_many([{"chapitre_id": "6N20"}]) == ["6e_N05"]
+        assert chapters.finds == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_index_reloads(self, chapters, monkeypatch):
+        service = ChapterMappingService(FakeDb(chapters=chapters), index=ChapterResolutionIndex(ttl_seconds=300))
+        clock = [1000.0]
+        monkeypatch.setattr("services.chapter_mapping_service.time.monotonic", lambda: clock[0])
+
+        await service.resolve_many([{"chapitre_id": "6N20"}])
+        # Écriture faite par un autre worker : aucune invalidation locale
+        chapters.docs = [{"code": "6e_N05", "titre": "Fractions", "niveau": "6e", "legacy_code": "6N20"}]
+
+        clock[0] += 299
+        assert await service.resolve_many([{"chapitre_id": "6N20"}]) == ["6e_N04"]
+
+        clock[0] += 1
+        assert await service.resolve_many([{"chapitre_id": "6N20"}]) == ["6e_N05"]
+        assert chapters.finds == 2
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_queries_when_index_unavailable(self):
+        chapters = BrokenChapters(CHAPTERS)
+        service = ChapterMappingService(FakeDb(chapters=chapters), index=ChapterResolutionIndex())
+
+        assert await service.resolve_many([{"chapitre_id": "6N20"}, {"chapitre_id": "axiale", "niveau": "6e"}]) == ["6e_N04", "6e_G07"]
+        assert chapters.find_ones > 0
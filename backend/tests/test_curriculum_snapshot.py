@@ -0,0 +1,148 @@
+"""
+Tests du snapshot versionné du curriculum (services/curriculum_persistence_service.py)
+
+Couvre:
+- Index chargé depuis MongoDB avec sa version, installé en une affectation
+- Écriture admin : version incrémentée, index du worker rechargé, JSON non réécrit
+- Autre worker : rechargement sur vérification de version uniquement
+- Une version ancienne (ou le fichier JSON) ne remplace jamais un snapshot plus récent
+- Endpoint /api/admin/curriculum/version, export JSON explicite
+"""
+
+import json
+
+import pytest
+import pytest_asyncio
+
+import curriculum.loader as loader
+from curriculum.loader import (
+    CURRICULUM_6E_PATH,
+    build_curriculum_index,
+    get_chapter_by_official_code,
+    get_curriculum_index,
+    install_curriculum_index
+)
+from fake_motor import FakeDb
+from routes.admin_curriculum_routes import get_curriculum_version_endpoint
+from services.curriculum_persistence_service import (
+    CURRICULUM_COLLECTION,
+    CURRICULUM_VERSIONS_COLLECTION,
+    ChapterCreateRequest,
+    ChapterUpdateRequest,
+    CurriculumPersistenceService,
+    CurriculumSnapshotService
+)
+
+with open(CURRICULUM_6E_PATH, "r", encoding="utf-8") as f:
+    CURRICULUM_FILE = json.load(f)
+
+CODE = CURRICULUM_FILE["chapitres"][0]["code_officiel"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    """Index du processus remis à zéro (restauré après le test)"""
+    monkeypatch.setattr(loader, "_curriculum_index", None)
+
+
+@pytest.fixture
+def db():
+    return FakeDb()
+
+
+@pytest.fixture
+def snapshot():
+    return CurriculumSnapshotService()
+
+
+@pytest_asyncio.fixture
+async def service(db, snapshot, monkeypatch):
+    service = CurriculumPersistenceService(db, snapshot=snapshot)
+    monkeypatch.setattr(service, "export_to_json", pytest.fail)
+    await service.initialize()
+    await snapshot.load(db)
+    return service
+
+
+class TestCurriculumSnapshot:
+
+    @pytest.mark.asyncio
+    async def test_load_installs_versioned_index(self, db, snapshot, service):
+        index = get_curriculum_index()
+
+        assert index.version == 0 and snapshot.version == 0
+        assert len(index.by_official_code) == len(CURRICULUM_FILE["chapitres"])
+
+    @pytest.mark.asyncio
+    async def test_admin_write_bumps_version_and_reloads(self, db, snapshot, service):
+        before = get_curriculum_index()
+
+        await service.update_chapter(CODE, ChapterUpdateRequest(libelle="Nouveau libellé"))
+        await service.create_chapter(ChapterCreateRequest(
+            code_officiel="6e_Z99", libelle="Chapitre test", chapitre_backend="Chapitre test"
+        ))
+
+        assert snapshot.version == 2
+        assert get_chapter_by_official_code(CODE).libelle == "Nouveau libellé"
+        assert get_chapter_by_official_code("6e_Z99") is not None
+        # Un lecteur qui tient l'ancien index le voit inchangé
+        assert before.by_official_code[CODE].libelle != "Nouveau libellé"
+
+        await service.delete_chapter("6e_Z99")
+
+        assert snapshot.version == 3
+        assert get_chapter_by_official_code("6e_Z99") is None
+
+    @pytest.mark.asyncio
+    async def test_other_worker_reloads_on_version_check(self, db, snapshot, service):
+        chapters = db[CURRICULUM_COLLECTION]
+        versions = db[CURRICULUM_VERSIONS_COLLECTION]
+        finds = chapters.finds
+
+        assert await snapshot.check(db) is False
+        assert chapters.finds == finds
+
+        # Écriture faite par un autre worker : chapitre modifié puis version incrémentée
+        await chapters.update_one({"code_officiel": CODE}, {"$set": {"statut": "hidden"}})
+        await versions.find_one_and_update({"_id": "6e"}, {"$inc": {"version": 1}}, upsert=True)
+
+        assert await snapshot.check(db) is True
+        assert snapshot.version == 1
+        assert get_chapter_by_official_code(CODE).statut == "hidden"
+
+    @pytest.mark.asyncio
+    async def test_older_or_file_index_never_replaces_snapshot(self, db, snapshot, service):
+        await service.update_chapter(CODE, ChapterUpdateRequest(statut="beta"))
+        current = get_curriculum_index()
+
+        assert install_curriculum_index(build_curriculum_index(CURRICULUM_FILE["chapitres"], version=0)) is False
+        assert install_curriculum_index(build_curriculum_index(CURRICULUM_FILE["chapitres"])) is False
+        assert loader.load_curriculum_6e() is current
+
+    @pytest.mark.asyncio
+    async def test_version_endpoint(self, db, snapshot, service, monkeypatch):
+        monkeypatch.setattr("routes.admin_curriculum_routes.curriculum_snapshot", snapshot)
+        await db[CURRICULUM_VERSIONS_COLLECTION].find_one_and_update({"_id": "6e"}, {"$inc": {"version": 1}}, upsert=True)
+
+        response = await get_curriculum_version_endpoint(admin_check=True, db=db)
+
+        assert response.served_version == 0
+        assert response.latest_version == 1
+        assert response.stale is True
+        assert response.source == "mongodb"
+
+    @pytest.mark.asyncio
+    async def test_export_to_json_keeps_other_keys(self, db, tmp_path):
+        exported = tmp_path / "curriculum_6e.json"
+        exported.write_text(json.dumps(CURRICULUM_FILE), encoding="utf-8")
+        service = CurriculumPersistenceService(db, snapshot=CurriculumSnapshotService())
+        await service.initialize()
+        await service.collection.update_one({"code_officiel": CODE}, {"$set": {"libelle": "Exporté"}})
+
+        count = await service.export_to_json(str(exported))
+
+        data = json.loads(exported.read_text(encoding="utf-8"))
+        assert count == len(CURRICULUM_FILE["chapitres"])
+        assert data["macro_groups"] == CURRICULUM_FILE["macro_groups"]
+        assert data["version"] == CURRICULUM_FILE["version"]
+        assert next(ch for ch in data["chapitres"] if ch["code_officiel"] == CODE)["libelle"] == "Exporté"
@@ -0,0 +1,69 @@
+"""
+Tests du rendu HTML persistant des documents (services/document_render_service.py)
+
+Couvre:
+- Rendu d'un exercice sans modifier l'original
+- Re-rendu paresseux des seuls documents périmés (une requête $in)
+- Backfill idempotent
+"""
+
+import pytest
+
+from fake_motor import FakeCollection
+from services import document_render_service as render_service
+
+
+@pytest.fixture(autouse=True)
+def fake_renderers(monkeypatch):
+    monkeypatch.setattr(render_service, "process_exercise_content", lambda content: f"<html>{content}</html>")
+    monkeypatch.setattr(render_service, "prerender_latex", lambda exercises: None)
+
+
+EXERCISE = {"type": "ouvert", "enonce": "$x^2$", "solution": {"resultat": "4", "etapes": ["a", "b"]}}
+
+
+class TestDocumentRenderService:
+
+    def test_render_exercise_html_does_not_mutate(self):
+        rendered = render_service.render_exercise_html(EXERCISE)
+
+        assert rendered["enonce"] == "<html>$x^2$</html>"
+        assert rendered["solution"]["resultat"] == "<html>4</html>"
+        assert rendered["solution"]["etapes"] == ["<html>a</html>", "<html>b</html>"]
+        assert EXERCISE["enonce"] == "$x^2$"
+
+    @pytest.mark.asyncio
+    async def test_ensure_rendered_only_touches_stale_documents(self):
+        fresh = {"id": "fresh", "exercises": [EXERCISE], **render_service.render_document_fields([EXERCISE])}
+        stale = {"id": "stale", "exercises": [EXERCISE], "renderer_version": "0", "exercises_html": []}
+        legacy = {"id": "legacy", "exercises": [EXERCISE]}
+        collection = FakeCollection([fresh, stale, legacy])
+
+        listed = [
+            {k: v for k, v in doc.items() if k != "exercises"}
+            for doc in collection.docs
+        ]
+        result = await render_service.ensure_rendered(collection, listed)
+
+        assert collection.finds == 1
+        assert all(render_service.is_render_current(doc) for doc in result)
+        assert all(render_service.is_render_current(doc) for doc in collection.docs)
+        assert result[2]["exercises_html"][0]["enonce"] == "<html>$x^2$</html>"
+
+    @pytest.mark.asyncio
+    async def test_ensure_rendered_no_query_when_all_current(self):
+        fields = render_service.render_document_fields([EXERCISE])
+        collection = FakeCollection([])
+
+        await render_service.ensure_rendered(collection, [{"id": "a", **fields}])
+
+        assert collection.finds == 0
+
+    @pytest.mark.asyncio
+    async def test_backfill_is_idempotent(self):
+        docs = [{"_id": i, "id": str(i), "exercises": [EXERCISE]} for i in range(5)]
+        collection = FakeCollection(docs)
+
+        assert await render_service.backfill_rendered_documents(collection, batch_size=2) == 5
+        assert await render_service.backfill_rendered_documents(collection, batch_size=2) == 0
+        assert all(doc["renderer_version"] == render_service.RENDERER_VERSION for doc in docs)
@@ -0,0 +1,171 @@
+"""
+Tests des appels Wikimedia de DocumentSearcher (document_search.py)
+
+Un serveur HTTP local simule l'API Commons. Couvre:
+- Recherche + métadonnées concurrentes (plafond de concurrence)
+- Cache TTL persistant et cache négatif
+- Disjoncteur : repli immédiat sur le document de fallback
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from document_search import DocumentSearcher
+
+
+class StubWikimediaServer:
+    """API Commons minimale : list=search et prop=imageinfo"""
+
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        self.delay = 0.0
+        self.missing_titles = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                with stub._lock:
+                    stub.requests.append(params)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    time.sleep(stub.delay)
+                    body = json.dumps(stub.respond(params)).encode()
+                    self.send_response(stub.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/w/api.php"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def respond(self, params):
+        if params.get("list") == "search":
+            return {"query": {"search": [{"title": f"File:Map_{i}.svg"} for i in range(5)]}}
+        title = params["titles"]
+        if title in self.missing_titles:
+            return {"query": {"pages": {"-1": {"missing": ""}}}}
+        return {"query": {"pages": {"1": {"imageinfo": [{
+            "url": f"https://upload.example/{title}",
+            "width": 1500,
+            "height": 800,
+            "mime": "image/svg+xml",
+            "commonsmeta": {"LicenseShortName": "CC-BY-SA-4.0"}
+        }]}}}}
+
+    def count(self, kind):
+        key = "list" if kind == "search" else "titles"
+        return sum(1 for params in self.requests if key in params)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubWikimediaServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def searcher(stub, tmp_path):
+    return DocumentSearcher(cache_dir=str(tmp_path), api_base=stub.url)
+
+
+class TestWikimediaSearch:
+
+    @pytest.mark.asyncio
+    async def test_search_fetches_metadata_concurrently_with_cap(self, stub, searcher):
+        stub.delay = 0.1
+        searcher.metadata_concurrency = 2
+
+        results = await searcher._search_wikimedia_commons("carte_thematique", [], "français")
+        await searcher.aclose()
+
+        assert len(results) == 5
+        assert results[0]["licence"]["type"] == "CC BY-SA"
+        assert stub.count("metadata") == 5
+        assert stub.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_results_are_cached_across_instances(self, stub, searcher, tmp_path):
+        await searcher._search_wikimedia_commons("carte_thematique", [], "français")
+        await searcher.aclose()
+
+        other_worker = DocumentSearcher(cache_dir=str(tmp_path), api_base=stub.url)
+        results = await other_worker._search_wikimedia_commons("carte_thematique", [], "français")
+        await other_worker.aclose()
+
+        assert len(results) == 5
+        assert stub.count("search") == 1
+        assert stub.count("metadata") == 5
+
+    @pytest.mark.asyncio
+    async def test_missing_metadata_is_negatively_cached(self, stub, searcher):
+        stub.missing_titles = {"File:Map_0.svg"}
+
+        assert await searcher._get_file_metadata("File:Map_0.svg") is None
+        assert await searcher._get_file_metadata("File:Map_0.svg") is None
+        await searcher.aclose()
+
+        assert stub.count("metadata") == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_falls_back_without_calling_upstream(self, stub, searcher):
+        stub.status = 500
+        searcher.circuit_breaker.failure_threshold = 2
+        request = {"type": "carte_thematique", "langue": "anglais"}
+
+        for _ in range(2):
+            await searcher._search_wikimedia_commons("carte_thematique", [f"essai {_}"], "anglais")
+        assert searcher.circuit_breaker.state == "open"
+
+        calls_before = len(stub.requests)
+        document = await searcher.search_geographic_document(request)
+        await searcher.aclose()
+
+        assert len(stub.requests) == calls_before
+        assert document["titre"] == "Planisphère monde (fallback)"
+
+    @pytest.mark.asyncio
+    async def test_slow_upstream_opens_circuit(self, stub, searcher):
+        stub.delay = 0.2
+        searcher.circuit_breaker.slow_call_seconds = 0.05
+        searcher.circuit_breaker.failure_threshold = 1
+
+        await searcher._get_file_metadata("File:Slow.svg")
+        await searcher.aclose()
+
+        assert searcher.circuit_breaker.state == "open"
+
+    def test_circuit_half_opens_after_reset_timeout(self, searcher):
+        breaker = searcher.circuit_breaker
+        breaker.failure_threshold = 1
+        breaker.reset_timeout = 0.01
+
+        breaker.record_failure()
+        assert not breaker.allow_request()
+        time.sleep(0.02)
+        assert breaker.state == "half_open"
+        breaker.record_success(0.0)
+        assert breaker.state == "closed"
@@ -0,0 +1,107 @@
+"""
+Tests de l'index des chapitres pilotes (services/exercise_pool_index.py)
+
+Couvre:
+- Index (offer, difficulty, family) identique à l'ancien filtrage, ordre de la source conservé
+- SVG pré-rendus identiques au rendu à la volée, sans re-rendu au service
+- Rendu à la volée pour un exercice modifié / hors pool
+- Reconstruction atomique : nouveau pool publié, ancien pool intact
+"""
+
+import pytest
+
+from data.gm07_exercises import GM07_EXERCISES
+from data.gm08_exercises import GM08_EXERCISES
+from data.tests_dyn_exercises import TESTS_DYN_EXERCISES
+from services import exercise_pool_index
+from services.exercise_pool_index import ExercisePool, ExercisePoolRegistry, exercise_pools
+from services.svg_render_service import generate_exercise_svgs
+
+SOURCES = {
+    "6E_GM07": GM07_EXERCISES,
+    "6E_GM08": GM08_EXERCISES,
+    "6E_TESTS_DYN": TESTS_DYN_EXERCISES,
+}
+
+
+def legacy_filter(exercises, offer=None, difficulty=None):
+    """Ancien filtrage des fichiers data/*_exercises.py"""
+    if not offer or offer.lower() == "free":
+        exercises = [ex for ex in exercises if ex["offer"] == "free"]
+    if difficulty:
+        exercises = [ex for ex in exercises if ex["difficulty"] == difficulty.lower()]
+    return exercises
+
+
+class TestExercisePoolIndex:
+
+    @pytest.mark.parametrize("chapter_code", sorted(SOURCES))
+    def test_select_matches_legacy_filter(self, chapter_code):
+        pool = exercise_pools.get(chapter_code)
+
+        for offer in (None, "free", "FREE", "pro", "Pro"):
+            for difficulty in (None, "facile", "Moyen", "difficile", "inconnue"):
+                expected = legacy_filter(SOURCES[chapter_code], offer, difficulty)
+                assert list(pool.select(offer, difficulty)) == expected
+
+    def test_select_by_family(self):
+        pool = exercise_pools.get("6E_GM07")
+
+        selected = pool.select("pro", None, "lecture_horloge")
+
+        assert selected and all(ex["family"] == "LECTURE_HORLOGE" for ex in selected)
+        assert pool.select("pro", "facile", "FAMILLE_INCONNUE") == ()
+
+    @pytest.mark.parametrize("chapter_code", ["6E_GM07", "6E_GM08"])
+    def test_prerendered_svgs_match_live_render(self, chapter_code, monkeypatch):
+        pool = exercise_pools.get(chapter_code)
+        expected = {ex["id"]: generate_exercise_svgs(ex) for ex in SOURCES[chapter_code]}
+
+        def no_render(exercise):
+            raise AssertionError("SVG re-rendu alors qu'il est pré-rendu")
+
+        monkeypatch.setattr(exercise_pool_index, "generate_exercise_svgs", no_render)
+
+        for ex in SOURCES[chapter_code]:
+            assert pool.svgs_for(ex) == expected[ex["id"]]
+
+    def test_served_svgs_are_copies(self):
+        pool = exercise_pools.get("6E_GM07")
+        exercise = GM07_EXERCISES[0]
+
+        served = pool.svgs_for(exercise)
+        served["figure_svg"] = None
+
+        assert pool.svgs_for(exercise)["figure_svg"] is not None
+
+    def test_modified_exercise_is_rendered_live(self):
+        pool = exercise_pools.get("6E_GM07")
+        exercise = dict(next(ex for ex in GM07_EXERCISES if ex["needs_svg"]), variables={"hour": 4, "minute": 35})
+
+        assert pool.svgs_for(exercise) == generate_exercise_svgs(exercise)
+        assert pool.svgs_for(exercise)["variables_used"]["source"] == "variables"
+
+    def test_rebuild_swaps_pool(self):
+        registry = ExercisePoolRegistry()
+        before = registry.get("6E_GM07")
+        extra = dict(GM07_EXERCISES[0], id=999, difficulty="facile", offer="free")
+
+        after = registry.rebuild("6E_GM07", list(GM07_EXERCISES) + [extra])
+
+        assert registry.get("6E_GM07") is after
+        assert extra in after.select("free", "facile")
+        assert extra not in before.select("free", "facile")
+        assert len(before) == len(GM07_EXERCISES)
+
+    def test_dynamic_chapter_has_no_prerendered_svgs(self):
+        assert exercise_pools.get("6E_TESTS_DYN").svg_count == 0
+
+    def test_unknown_chapter(self):
+        with pytest.raises(KeyError):
+            ExercisePoolRegistry().get("6E_XX99")
+
+    def test_pool_is_read_only(self):
+        pool = ExercisePool("6E_GM07", GM07_EXERCISES)
+
+        with pytest.raises(TypeError):
+            pool._by_filter[("free", None, None)] = ()
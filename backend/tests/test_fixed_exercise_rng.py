@@ -0,0 +1,90 @@
+"""
+Tests du déterminisme des handlers à exercices figés (GM07 / GM08 / TESTS_DYN)
+
+Couvre:
+- Un même seed donne le même résultat, que les requêtes soient servies en série
+  ou en parallèle (pool de threads, milliers de requêtes entremêlées)
+- L'état global du module `random` n'est ni lu ni réinitialisé par les handlers
+"""
+
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.gm07_handler import generate_gm07_batch, generate_gm07_exercise
+from services.gm08_handler import generate_gm08_batch, generate_gm08_exercise
+from services.tests_dyn_handler import generate_tests_dyn_batch, generate_tests_dyn_exercise
+
+HANDLERS = {
+    "gm07_batch": lambda seed: generate_gm07_batch(offer="pro", count=5, seed=seed)[0],
+    "gm08_batch": lambda seed: generate_gm08_batch(offer="pro", count=5, seed=seed)[0],
+    "tests_dyn_batch": lambda seed: generate_tests_dyn_batch(offer="pro", count=3, seed=seed)[0],
+    "gm07_single": lambda seed: [generate_gm07_exercise(offer="pro", seed=seed)],
+    "gm08_single": lambda seed: [generate_gm08_exercise(offer="pro", seed=seed)],
+    "tests_dyn_single": lambda seed: [generate_tests_dyn_exercise(offer="pro", seed=seed)],
+}
+SEEDS = range(1, 501)
+
+
+def fingerprint(exercises):
+    """Contenu des exercices, sans les identifiants horodatés"""
+    return [
+        (
+            exercise["metadata"]["exercise_id"],
+            exercise["enonce_html"],
+            exercise["solution_html"],
+            exercise["figure_svg_enonce"],
+            exercise["figure_svg_solution"]
+        )
+        for exercise in exercises
+    ]
+
+
+def run(name, seed):
+    return name, seed, fingerprint(HANDLERS[name](seed))
+
+
+def disturb_global_random(stop_after):
+    """Un autre utilisateur du module `random` global, pendant les requêtes"""
+    for i in range(stop_after):
+        random.seed(i)
+        random.random()
+
+
+class TestFixedExerciseRng:
+
+    def test_concurrent_requests_match_serial_runs(self):
+        requests = [(name, seed) for seed in SEEDS for name in HANDLERS]
+        serial = {(name, seed): result for name, seed, result in (run(name, seed) for name, seed in requests)}
+
+        random.Random(0).shuffle(requests)
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Bascule de thread quasi à chaque instruction
+        try:
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                noise = [pool.submit(disturb_global_random, 20_000) for _ in range(2)]
+                concurrent = list(pool.map(lambda request: run(*request), requests))
+                for future in noise:
+                    future.result()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert len(concurrent) == len(HANDLERS) * len(SEEDS)
+        mismatches = [(name, seed) for name, seed, result in concurrent if result != serial[(name, seed)]]
+        assert mismatches == []
+
+    @pytest.mark.parametrize("name", sorted(HANDLERS))
+    def test_global_random_state_untouched(self, name):
+        random.seed(1234)
+        state = random.getstate()
+
+        HANDLERS[name](42)
+
+        assert random.getstate() == state
+
+    def test_different_seeds_still_vary(self):
+        batches = {tuple(fingerprint(HANDLERS["gm07_batch"](seed))) for seed in range(1, 21)}
+
+        assert len(batches) > 1
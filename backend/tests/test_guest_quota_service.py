@@ -0,0 +1,177 @@
+"""
+Tests du quota d'exports invités (services/guest_quota_service.py)
+
+Couvre:
+- Fenêtre glissante de 30 jours (les exports anciens ne comptent plus)
+- Check-and-reserve : des exports concurrents ne dépassent jamais le quota
+- Annulation d'une réservation
+- Amorçage depuis l'historique `exports`
+
+La collection factice évalue le sous-ensemble d'expressions d'agrégation
+utilisé par le service et reproduit l'index unique sur guest_id.
+"""
+
+import asyncio
+import copy
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from fake_motor import FakeCursor
+from services.guest_quota_service import GuestQuotaService
+
+
+def evaluate(expression, doc, variables=None):
+    """Évaluateur minimal d'expressions d'agrégation"""
+    variables = variables or {}
+    if isinstance(expression, str) and expression.startswith("$$"):
+        name, _, path = expression[2:].partition(".")
+        value = variables[name]
+        return value[path] if path else value
+    if isinstance(expression, str) and expression.startswith("$"):
+        return doc.get(expression[1:])
+    if isinstance(expression, list):
+        return [evaluate(item, doc, variables) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+
+    (operator, args), = expression.items()
+    if operator == "$literal":
+        return args
+    if operator == "$filter":
+        items = evaluate(args["input"], doc, variables)
+        return [item for item in items if evaluate(args["cond"], doc, {**variables, "this": item})]
+    values = evaluate(args, doc, variables)
+    if operator == "$ifNull":
+        return values[1] if values[0] is None else values[0]
+    if operator == "$size":
+        return len(values)
+    if operator == "$concatArrays":
+        return [item for array in values for item in array]
+    if operator == "$gte":
+        return values[0] >= values[1]
+    if operator == "$lt":
+        return values[0] < values[1]
+    raise NotImplementedError(operator)
+
+
+class FakeQuotaCollection:
+    """guest_quotas avec index unique sur guest_id"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query, projection=None):
+        await asyncio.sleep(0)
+        doc = self.docs.get(query["guest_id"])
+        return copy.deepcopy(doc)
+
+    async def update_one(self, query, update, upsert=False):
+        await asyncio.sleep(0)  # Laisse les autres tâches s'intercaler entre les appels
+        guest_id = query["guest_id"]
+        doc = self.docs.get(guest_id)
+        matches = doc is not None and ("$expr" not in query or evaluate(query["$expr"], doc))
+
+        if not matches:
+            if not upsert:
+                return
+            if doc is not None:
+                raise DuplicateKeyError("E11000 duplicate key error (guest_id)")
+            doc = {"guest_id": guest_id}
+            self.docs[guest_id] = doc
+
+        if isinstance(update, list):
+            for stage in update:
+                doc.update({field: evaluate(value, doc) for field, value in stage["$set"].items()})
+        elif "$set" in update:
+            doc.update(update["$set"])
+        elif "$pull" in update:
+            (field, condition), = update["$pull"].items()
+            doc[field] = [item for item in doc[field] if item["id"] != condition["id"]]
+
+
+class FakeExportsCollection:
+    """exports : agrégation déjà calculée (le pipeline est vérifié séparément)"""
+
+    def __init__(self, groups):
+        self.groups = groups
+        self.pipeline = None
+
+    def aggregate(self, pipeline):
+        self.pipeline = pipeline
+        return FakeCursor(self.groups)
+
+
+@pytest.fixture
+def service():
+    return GuestQuotaService(FakeQuotaCollection())
+
+
+class TestGuestQuotaService:
+
+    @pytest.mark.asyncio
+    async def test_reserve_until_quota_exhausted(self, service):
+        reservations = [await service.reserve("guest-1") for _ in range(4)]
+
+        assert all(reservations[:3])
+        assert reservations[3] is None
+        status = await service.get_status("guest-1")
+        assert status == {"exports_used": 3, "exports_remaining": 0, "max_exports": 3, "quota_exceeded": True}
+        assert (await service.get_status("guest-2"))["exports_remaining"] == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrent_exports_cannot_exceed_quota(self, service):
+        results = await asyncio.gather(*(service.reserve("guest-1") for _ in range(10)))
+
+        assert sum(1 for reservation in results if reservation) == 3
+        assert len(service.collection.docs["guest-1"]["exports"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_window_is_rolling(self, service):
+        old = datetime.now(timezone.utc) - timedelta(days=31)
+        recent = datetime.now(timezone.utc) - timedelta(days=2)
+        service.collection.docs["guest-1"] = {
+            "guest_id": "guest-1",
+            "exports": [{"id": "a", "at": old}, {"id": "b", "at": old}, {"id": "c", "at": recent}]
+        }
+
+        assert (await service.get_status("guest-1"))["exports_used"] == 1
+        assert await service.reserve("guest-1")
+        assert await service.reserve("guest-1")
+        assert await service.reserve("guest-1") is None
+        # Les réservations hors fenêtre sont purgées à l'écriture
+        assert [export["id"] for export in service.collection.docs["guest-1"]["exports"]][0] == "c"
+
+    @pytest.mark.asyncio
+    async def test_release_gives_back_the_export(self, service):
+        reservations = [await service.reserve("guest-1") for _ in range(3)]
+
+        await service.release("guest-1", reservations[1])
+
+        assert (await service.get_status("guest-1"))["exports_remaining"] == 1
+        assert await service.reserve("guest-1")
+
+    @pytest.mark.asyncio
+    async def test_expiry_follows_last_export(self, service):
+        await service.reserve("guest-1")
+
+        expires_at = service.collection.docs["guest-1"]["expires_at"]
+
+        assert timedelta(days=29) < expires_at - datetime.now(timezone.utc) <= timedelta(days=30)
+
+    @pytest.mark.asyncio
+    async def test_seed_from_exports(self, service):
+        last_export = datetime(2026, 1, 10, 12, 0)  # Naïve, comme renvoyée par Mongo
+        exports = FakeExportsCollection([
+            {"_id": "guest-1", "exports": [{"id": "e1", "at": last_export}], "last_export": last_export}
+        ])
+
+        assert await service.seed_from_exports(exports) == 1
+        assert await service.seed_from_exports(exports) == 1  # Idempotent
+
+        doc = service.collection.docs["guest-1"]
+        assert doc["exports"] == [{"id": "e1", "at": last_export}]
+        assert doc["expires_at"] == last_export.replace(tzinfo=timezone.utc) + timedelta(days=30)
+        match = exports.pipeline[0]["$match"]
+        assert match["guest_id"] == {"$ne": None} and "$gte" in match["created_at"]
@@ -0,0 +1,161 @@
+"""
+Tests des KPI incrémentaux du monitoring IA (services/ia_monitoring_service.py)
+
+Couvre:
+- Agrégats identiques au calcul historique, sans relire tout le fichier
+- Lignes écrites par un autre worker intégrées au résumé suivant
+- Écritures bufferisées et rotation du JSONL
+- last_n par lecture de la fin du fichier (y compris après rotation)
+- Mémoire bornée (fenêtre récente, buckets horaires)
+"""
+
+import json
+
+import pytest
+
+from services.ia_monitoring_service import HOUR_BUCKETS_KEPT, IAMonitoringService, KpiAggregate
+
+
+def log(service, type_exercice="fractions", ia_utilisee=True, ia_acceptee=True, cause=None, temps=120.0):
+    service.log_generation(
+        type_exercice=type_exercice,
+        niveau="6e",
+        chapitre="Fractions",
+        ia_utilisee=ia_utilisee,
+        ia_acceptee=ia_acceptee,
+        fallback_utilise=not ia_acceptee,
+        cause_rejet=cause,
+        temps_generation_ms=temps
+    )
+
+
+@pytest.fixture
+def service(tmp_path):
+    monitoring = IAMonitoringService(log_file=str(tmp_path / "ia_monitoring.jsonl"), flush_interval=60)
+    yield monitoring
+    monitoring.flush()
+
+
+class TestIAMonitoringKpi:
+
+    def test_summary_is_incremental(self, service):
+        for _ in range(3):
+            log(service)
+        log(service, type_exercice="cercle", ia_acceptee=False, cause="validation_cercle_specifique_echouee", temps=800)
+        log(service, ia_utilisee=False, ia_acceptee=False, cause="bypass_securite", temps=None)
+
+        kpi = service.get_kpi_summary()
+
+        assert kpi["kpi_globaux"]["total_generations"] == 5
+        assert kpi["kpi_globaux"]["ia_rejetee"] == 1
+        assert kpi["kpi_globaux"]["taux_acceptation_ia"] == 75.0
+        assert kpi["kpi_globaux"]["taux_fallback"] == 40.0
+        assert kpi["causes_rejet"] == {"validation_cercle_specifique_echouee": 1, "bypass_securite": 1}
+        assert kpi["par_type_exercice"]["cercle"] == {"total": 1, "ia_acceptee": 0, "ia_rejetee": 1, "fallback": 1}
+        assert kpi["performance"]["temps_moyen_ms"] == 290.0
+        assert kpi["performance"]["histogramme_temps_ms"]["<= 250"] == 3
+        assert sum(stats["total"] for stats in kpi["par_heure"].values()) == 5
+
+        # Résumé suivant : seules les lignes ajoutées sont lues
+        aggregate, offset = service._aggregate, service._read_offset
+        log(service)
+        assert service.get_kpi_summary()["kpi_globaux"]["total_generations"] == 6
+        assert service._aggregate is aggregate
+        assert offset < service._read_offset == service.log_file.stat().st_size
+
+    def test_other_worker_writes_are_counted(self, service):
+        other = IAMonitoringService(log_file=str(service.log_file), flush_interval=60)
+        log(service)
+        assert service.get_kpi_summary()["kpi_globaux"]["total_generations"] == 1
+
+        # Un deuxième worker écrit dans le même fichier
+        log(other, type_exercice="cercle")
+        log(other, type_exercice="cercle")
+        other.flush()
+
+        kpi = service.get_kpi_summary()
+        assert kpi["kpi_globaux"]["total_generations"] == 3
+        assert kpi["par_type_exercice"]["cercle"]["total"] == 2
+        assert other.get_kpi_summary()["kpi_globaux"] == kpi["kpi_globaux"]
+
+    def test_invalid_lines_are_skipped_once(self, service):
+        log(service)
+        service.flush()
+        with open(service.log_file, "a") as f:
+            f.write("{pas du json\n")
+            f.write(json.dumps({"timestamp": "2025-01-01T10:00:00", "ancien_schema": True}) + "\n")
+        log(service)
+
+        for _ in range(3):
+            assert service.get_kpi_summary()["kpi_globaux"]["total_generations"] == 2
+        assert service._read_offset == service.log_file.stat().st_size
+
+    def test_rotation_by_other_worker_restarts_aggregate(self, tmp_path):
+        log_file = str(tmp_path / "ia_monitoring.jsonl")
+        service = IAMonitoringService(log_file=log_file, flush_interval=60)
+        other = IAMonitoringService(log_file=log_file, flush_interval=60, max_bytes=1)
+        log(service)
+        log(service)
+        assert service.get_kpi_summary()["kpi_globaux"]["total_generations"] == 2
+
+        log(other)
+        other.flush()  # Rotation puis écriture dans un nouveau fichier
+
+        assert (tmp_path / "ia_monitoring.jsonl.1").exists()
+        assert service.get_kpi_summary()["kpi_globaux"]["total_generations"] == 1
+
+    def test_writes_are_buffered(self, service):
+        log(service)
+
+        assert not service.log_file.exists()
+
+        service.flush()
+        lines = service.log_file.read_text().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["type_exercice"] == "fractions"
+
+    def test_existing_file_loaded_once(self, service, tmp_path):
+        for _ in range(4):
+            log(service)
+        service.flush()
+
+        restarted = IAMonitoringService(log_file=str(service.log_file), flush_interval=60)
+
+        assert restarted.get_kpi_summary()["kpi_globaux"]["total_generations"] == 4
+
+    def test_rotation_and_tail_seek_for_last_n(self, tmp_path):
+        service = IAMonitoringService(
+            log_file=str(tmp_path / "ia_monitoring.jsonl"), flush_interval=60, max_bytes=2000, backup_count=2
+        )
+        for i in range(40):
+            log(service, type_exercice=f"type_{i}")
+            service.flush()
+
+        assert (tmp_path / "ia_monitoring.jsonl.1").exists()
+        assert not (tmp_path / "ia_monitoring.jsonl.3").exists()
+
+        kpi = service.get_kpi_summary(last_n=12)
+        assert kpi["kpi_globaux"]["total_generations"] == 12
+        assert list(kpi["par_type_exercice"]) == [f"type_{i}" for i in range(28, 40)]
+
+    def test_memory_is_bounded(self, tmp_path):
+        service = IAMonitoringService(log_file=str(tmp_path / "ia_monitoring.jsonl"), recent_window=10)
+        for _ in range(50):
+            log(service)
+
+        assert len(service.session_stats) == 10
+
+        aggregate = KpiAggregate()
+        for hour in range(HOUR_BUCKETS_KEPT + 24):
+            day, hour_of_day = divmod(hour, 24)
+            aggregate.add({
+                "timestamp": f"2026-01-{day + 1:02d}T{hour_of_day:02d}:00:00",
+                "type_exercice": "fractions",
+                "ia_utilisee": True,
+                "ia_acceptee": True,
+                "fallback_utilise": False,
+                "cause_rejet": None,
+                "temps_generation_ms": 100.0
+            })
+        assert len(aggregate.par_heure) == HOUR_BUCKETS_KEPT
+        assert min(aggregate.par_heure) == "2026-01-02T00"
@@ -0,0 +1,92 @@
+"""
+Tests du rendu LaTeX groupé (latex_to_svg.py)
+
+Couvre:
+- Tokenizer unique et réinsertion identique aux trois passes historiques
+- Coût proportionnel aux expressions distinctes d'une fiche
+- Rendu des manquants via un pool
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from latex_to_svg import LaTeXToSVGRenderer
+
+
+@pytest.fixture
+def renderer(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_render(self, latex_code):
+        calls.append(latex_code)
+        return f"<svg>{latex_code}</svg>"
+
+    monkeypatch.setattr(LaTeXToSVGRenderer, "_render_svg", fake_render)
+    instance = LaTeXToSVGRenderer(cache_dir=str(tmp_path))
+    instance.calls = calls
+    return instance
+
+
+INLINE = '<span class="math-inline" style="display: inline-block; vertical-align: middle;"><svg>{}</svg></span>'
+DISPLAY = '<div class="math-display" style="text-align: center; margin: 12px 0;"><svg>{}</svg></div>'
+
+
+class TestLatexBatchRender:
+
+    def test_single_scan_splices_all_forms(self, renderer):
+        text = "Soit $x$, puis $$y+1$$ et \\( \\frac{1}{2} \\)."
+
+        result = renderer.convert_text_with_latex(text)
+
+        assert result == (
+            "Soit " + INLINE.format("x") + ", puis " + DISPLAY.format("y+1")
+            + " et " + INLINE.format("\\frac{1}{2}") + "."
+        )
+
+    def test_sheet_cost_scales_with_unique_expressions(self, renderer):
+        texts = [f"Calculer $\\frac{{3}}{{4}}$ et $x^{{2}}$ (question {i})" for i in range(40)]
+
+        converted = renderer.convert_texts_with_latex(texts)
+
+        assert len(converted) == 40
+        assert sorted(renderer.calls) == ["\\frac{3}{4}", "x^{2}"]
+        assert renderer.get_cache_stats()["misses"] == 2
+
+    def test_disk_hits_are_fetched_in_one_batch(self, renderer, tmp_path):
+        renderer.render_latex_batch(["a", "b", "c"])
+
+        other_worker = LaTeXToSVGRenderer(cache_dir=str(tmp_path))
+        result = other_worker.render_latex_batch(["$a$", "b", "c", "d"])
+
+        assert result == {"a": "<svg>a</svg>", "b": "<svg>b</svg>", "c": "<svg>c</svg>", "d": "<svg>d</svg>"}
+        assert other_worker.get_cache_stats()["disk_hits"] == 3
+        assert renderer.calls == ["a", "b", "c", "d"]
+
+    def test_missing_expressions_rendered_through_executor(self, renderer):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            result = renderer.render_latex_batch(["p", "q", "p"], executor=executor)
+
+        assert result == {"p": "<svg>p</svg>", "q": "<svg>q</svg>"}
+        assert sorted(renderer.calls) == ["p", "q"]
+
+    def test_process_document_exercises_batches_the_sheet(self, renderer):
+        exercises = [
+            SimpleNamespace(
+                enonce="Calculer $\\frac{1}{2}$",
+                type="qcm",
+                donnees=SimpleNamespace(options=["$\\frac{1}{2}$", "$2$"]),
+                solution=SimpleNamespace(etapes=["$\\frac{1}{2}$ = $0,5$"], resultat="$0,5$")
+            )
+            for _ in range(3)
+        ]
+        document = SimpleNamespace(exercises=exercises)
+
+        renderer.process_document_exercises(document)
+
+        assert sorted(renderer.calls) == ["0,5", "2", "\\frac{1}{2}"]
+        first = document.exercises[0]
+        assert first.donnees.options[1] == INLINE.format("2")
+        assert first.solution.resultat == INLINE.format("0,5")
+        assert first.enonce == "Calculer " + INLINE.format("\\frac{1}{2}")
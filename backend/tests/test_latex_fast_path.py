@@ -0,0 +1,78 @@
+"""
+Tests du chemin rapide de rendu LaTeX → SVG (latex_to_svg.py)
+
+Couvre:
+- Détection du sous-ensemble supporté
+- SVG valide sans figure matplotlib
+- Repli sur le rendu figure (syntaxe hors sous-ensemble, échec, désactivation)
+"""
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from latex_to_svg import LaTeXToSVGRenderer
+
+
+@pytest.fixture
+def renderer(tmp_path, monkeypatch):
+    figure_calls = []
+
+    def fake_figure(self, latex_code):
+        figure_calls.append(latex_code)
+        return "<svg>figure</svg>"
+
+    monkeypatch.setattr(LaTeXToSVGRenderer, "_render_svg_figure", fake_figure)
+    instance = LaTeXToSVGRenderer(cache_dir=str(tmp_path))
+    instance.figure_calls = figure_calls
+    return instance
+
+
+class TestLatexFastPath:
+
+    @pytest.mark.parametrize("latex_code", [
+        "\\frac{3}{4} + \\frac{1}{4}",
+        "7^{2} \\times 7^{4}",
+        "\\sqrt{2} \\div \\pi",
+        "x \\leq 3, \\; \\text{cm}^2",
+    ])
+    def test_supported_subset(self, latex_code):
+        assert LaTeXToSVGRenderer._is_fast_path_supported(latex_code)
+
+    @pytest.mark.parametrize("latex_code", [
+        "\\begin{matrix} a \\end{matrix}",
+        "\\overline{AB}",
+        "a & b",
+    ])
+    def test_unsupported_syntax(self, latex_code):
+        assert not LaTeXToSVGRenderer._is_fast_path_supported(latex_code)
+
+    def test_fast_path_emits_svg_without_figure(self, renderer):
+        svg_content = renderer._render_svg("\\frac{3}{4} \\times 7^{2}")
+
+        root = ET.fromstring(svg_content)
+        assert root.tag == "{http://www.w3.org/2000/svg}svg"
+        assert root.get("width").endswith("pt")
+        path = root.find("{http://www.w3.org/2000/svg}path")
+        assert path.get("d").startswith("M")
+        assert renderer.figure_calls == []
+        assert renderer.get_cache_stats()["fast_renders"] == 1
+
+    def test_unsupported_falls_back_to_figure(self, renderer):
+        assert renderer._render_svg("\\overline{AB}") == "<svg>figure</svg>"
+        assert renderer.figure_calls == ["\\overline{AB}"]
+
+    def test_fast_path_error_falls_back_to_figure(self, renderer, monkeypatch):
+        def broken(self, latex_code):
+            raise ValueError("parse error")
+
+        monkeypatch.setattr(LaTeXToSVGRenderer, "_render_svg_fast", broken)
+
+        assert renderer._render_svg("\\frac{1}{2}") == "<svg>figure</svg>"
+        assert renderer.get_cache_stats()["figure_renders"] == 1
+
+    def test_fast_path_can_be_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(LaTeXToSVGRenderer, "_render_svg_figure", lambda self, code: "<svg>figure</svg>")
+        renderer = LaTeXToSVGRenderer(cache_dir=str(tmp_path), fast_path=False)
+
+        assert renderer._render_svg("\\frac{1}{2}") == "<svg>figure</svg>"
@@ -0,0 +1,139 @@
+"""
+Tests du cache SVG à deux niveaux de LaTeXToSVGRenderer (latex_to_svg.py)
+
+Couvre:
+- LRU mémoire borné en octets
+- Store disque partagé entre instances (workers)
+- Dates d'accès disque écrites par lot, repli mémoire si le répertoire est inutilisable
+- Pas de mise en cache des rendus en échec
+- Extraction d'expressions et pré-chauffage
+"""
+
+import pytest
+
+from latex_to_svg import LaTeXToSVGRenderer, SVGDiskStore
+
+
+@pytest.fixture
+def counting_renderer(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_render(self, latex_code):
+        calls.append(latex_code)
+        return f"<svg>{latex_code}</svg>"
+
+    monkeypatch.setattr(LaTeXToSVGRenderer, "_render_svg", fake_render)
+
+    def make(**kwargs):
+        kwargs.setdefault("max_memory_bytes", 10_000)
+        return LaTeXToSVGRenderer(cache_dir=str(tmp_path), **kwargs)
+
+    return make, calls
+
+
+class TestLatexSvgCache:
+
+    def test_memory_hit(self, counting_renderer):
+        make, calls = counting_renderer
+        renderer = make()
+
+        assert renderer.render_latex_expression("\\frac{3}{4}") == "<svg>\\frac{3}{4}</svg>"
+        assert renderer.render_latex_expression("$\\frac{3}{4}$") == "<svg>\\frac{3}{4}</svg>"
+
+        assert calls == ["\\frac{3}{4}"]
+        stats = renderer.get_cache_stats()
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio_percent"] == 50.0
+
+    def test_disk_store_shared_between_workers(self, counting_renderer):
+        make, calls = counting_renderer
+        make().render_latex_expression("x^2")
+
+        other_worker = make()
+        assert other_worker.render_latex_expression("x^2") == "<svg>x^2</svg>"
+
+        assert calls == ["x^2"]
+        assert other_worker.get_cache_stats()["disk_hits"] == 1
+
+    def test_memory_lru_respects_byte_budget(self, counting_renderer):
+        make, _ = counting_renderer
+        renderer = make(max_memory_bytes=30)
+
+        for expression in ["a1", "b2", "c3"]:
+            renderer.render_latex_expression(expression)
+
+        # 3 x 13 octets > 30 : la plus ancienne entrée est évincée
+        assert renderer.get_cache_stats()["memory_bytes"] <= 30
+        assert len(renderer.svg_cache) == 2
+        renderer.render_latex_expression("a1")
+        assert renderer.get_cache_stats()["disk_hits"] == 1
+
+    def test_disk_store_is_bounded(self, counting_renderer):
+        make, _ = counting_renderer
+        renderer = make(max_disk_entries=2)
+
+        for expression in ["a", "b", "c"]:
+            renderer.render_latex_expression(expression)
+
+        assert renderer.get_cache_stats()["disk_entries"] == 2
+
+    def test_disk_hits_do_not_write_until_flush(self, tmp_path):
+        store = SVGDiskStore(str(tmp_path / "svg.sqlite3"), access_flush_seconds=3600)
+        store.put("a", "<svg>a</svg>")
+        conn = store._connection()
+        written_at = conn.execute("SELECT accessed_at FROM svg WHERE key = 'a'").fetchone()[0]
+        changes = conn.total_changes
+
+        assert store.get("a") == "<svg>a</svg>"
+        assert conn.total_changes == changes
+
+        store.put("b", "<svg>b</svg>")
+        assert conn.execute("SELECT accessed_at FROM svg WHERE key = 'a'").fetchone()[0] > written_at
+
+    def test_disk_row_count_tracked_without_recount(self, tmp_path):
+        store = SVGDiskStore(str(tmp_path / "svg.sqlite3"), max_entries=2)
+        store.put_many({"a": "<svg>a</svg>", "b": "<svg>b</svg>"})
+        store.put("a", "<svg>a</svg>")
+        assert store._row_count == 2
+
+        store.put("c", "<svg>c</svg>")
+        assert store._row_count == store.count() == 2
+
+    def test_unwritable_cache_dir_falls_back_to_memory(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(LaTeXToSVGRenderer, "_render_svg", lambda self, latex_code: f"<svg>{latex_code}</svg>")
+        not_a_dir = tmp_path / "file"
+        not_a_dir.write_text("")
+
+        renderer = LaTeXToSVGRenderer(cache_dir=str(not_a_dir / "cache"))
+        assert renderer.render_latex_expression("x^2") == "<svg>x^2</svg>"
+        assert renderer.render_latex_expression("x^2") == "<svg>x^2</svg>"
+
+        stats = renderer.get_cache_stats()
+        assert stats["disk_available"] is False
+        assert stats["disk_errors"] == 0
+        assert stats["memory_hits"] == 1
+
+    def test_failed_render_is_not_cached(self, tmp_path, monkeypatch):
+        def failing_render(self, latex_code):
+            raise ValueError("bad latex")
+
+        monkeypatch.setattr(LaTeXToSVGRenderer, "_render_svg", failing_render)
+        renderer = LaTeXToSVGRenderer(cache_dir=str(tmp_path))
+
+        assert renderer.render_latex_expression("\\oops") == '<span style="font-style: italic;">[\\oops]</span>'
+        assert renderer.get_cache_stats()["disk_entries"] == 0
+        assert len(renderer.svg_cache) == 0
+
+    def test_extract_expressions_and_warm_up(self, counting_renderer):
+        make, calls = counting_renderer
+        renderer = make()
+        text = "Calculer $$a+b$$ puis \\( c \\) et $d$."
+
+        expressions = renderer.extract_expressions(text)
+        assert expressions == ["a+b", "c", "d"]
+
+        assert renderer.warm_up(expressions) == 3
+        assert renderer.warm_up(expressions) == 0
+        renderer.convert_text_with_latex(text)
+        assert calls == ["a+b", "c", "d"]
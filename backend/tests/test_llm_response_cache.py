@@ -0,0 +1,281 @@
+"""
+Tests du cache de réponses LLM (services/llm_response_cache.py)
+
+Couvre:
+- Pool de variantes : appels LLM jusqu'à N variantes, puis service depuis le cache
+- Réponses refusées non stockées
+- Mode replay hors-ligne (aucun appel, miss explicite)
+- Invalidation par préfixe sémantique
+- Métriques hit/miss dans IAMonitoringService
+- Réponses en gabarit (valeurs de la spec → ⟦nom⟧) : clé indépendante des
+  valeurs tirées, égalités fortuites et valeurs dérivées inconnues refusées
+- Taux de hit sur des specs réelles (MathGenerationService)
+- Intégration dans l'enrichissement IA et la rédaction math_text (aucune
+  écriture sur un hit)
+- Collection Mongo fournie par l'application
+"""
+
+import json
+import random
+
+import pytest
+
+import ia_engine.exercise_ai_enrichment as enrichment
+from services.ia_monitoring_service import ia_monitoring
+from services.llm_response_cache import (
+    LLMReplayMissError,
+    LLMResponseCache,
+    MemoryResponseStore,
+    MongoResponseStore,
+    ResponseTemplate,
+    template_values
+)
+
+
+def make_generator(responses):
+    calls = []
+
+    async def generate():
+        calls.append(len(calls))
+        return responses[(len(calls) - 1) % len(responses)]
+
+    generate.calls = calls
+    return generate
+
+
+@pytest.fixture(autouse=True)
+def reset_monitoring(monkeypatch):
+    monkeypatch.setattr(ia_monitoring, "response_cache_stats", {})
+
+
+class TestLLMResponseCache:
+
+    def test_key_combines_semantic_prefix_and_prompt_hash(self):
+        key = LLMResponseCache.make_key("Fractions", "calcul_fractions", "6e", "prompt A")
+
+        assert key.startswith("fractions__calcul_fractions__6e__scolaire__")
+        assert key != LLMResponseCache.make_key("Fractions", "calcul_fractions", "6e", "prompt B")
+
+    @pytest.mark.asyncio
+    async def test_pool_is_filled_then_served_from_cache(self):
+        cache = LLMResponseCache(store=MemoryResponseStore(), pool_size=2)
+        generate = make_generator(["variante 1", "variante 2"])
+        key = LLMResponseCache.make_key("Fractions", "calcul_fractions", "6e", "prompt")
+
+        results = [await cache.get_or_generate("math_text", key, generate) for _ in range(6)]
+
+        assert len(generate.calls) == 2
+        assert set(results) == {"variante 1", "variante 2"}
+        metrics = ia_monitoring.get_response_cache_metrics()
+        assert metrics["hits"] == 4 and metrics["misses"] == 2
+        assert metrics["par_appelant"]["math_text"]["taux_hit"] == 66.7
+
+    @pytest.mark.asyncio
+    async def test_rejected_response_is_not_stored(self):
+        store = MemoryResponseStore()
+        cache = LLMResponseCache(store=store, pool_size=1)
+        generate = make_generator(["KO"])
+
+        await cache.get_or_generate("enrich_statement", "k", generate, accept=lambda r: len(r) >= 10)
+        await cache.get_or_generate("enrich_statement", "k", generate, accept=lambda r: len(r) >= 10)
+
+        assert store.entries == {}
+        assert len(generate.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_replay_mode_never_calls_generate(self, tmp_path):
+        recorded = tmp_path / "llm_replay.json"
+        MemoryResponseStore({"connu": ["réponse enregistrée"]}).dump(str(recorded))
+        cache = LLMResponseCache(store=MemoryResponseStore.from_file(str(recorded)), mode="replay")
+        generate = make_generator(["appel réseau"])
+
+        assert await cache.get_or_generate("math_text", "connu", generate) == "réponse enregistrée"
+        with pytest.raises(LLMReplayMissError):
+            await cache.get_or_generate("math_text", "inconnu", generate)
+        assert generate.calls == []
+
+    @pytest.mark.asyncio
+    async def test_invalidate_by_chapter_prefix(self):
+        store = MemoryResponseStore()
+        cache = LLMResponseCache(store=store, pool_size=1)
+        fractions = LLMResponseCache.make_key("Fractions", "calcul_fractions", "6e", "p1")
+        thales = LLMResponseCache.make_key("Thalès", "thales", "3e", "p2")
+        await cache.store_response("math_text", fractions, "a")
+        await cache.store_response("math_text", thales, "b")
+
+        assert await cache.invalidate("fractions__") == 1
+        assert list(store.entries) == [thales]
+
+    @pytest.mark.asyncio
+    async def test_off_mode_bypasses_store(self):
+        store = MemoryResponseStore({"k": ["a"]})
+        cache = LLMResponseCache(store=store, mode="off", pool_size=1)
+
+        assert await cache.lookup("math_text", "k") is None
+        await cache.store_response("math_text", "k", "b")
+        assert store.entries == {"k": ["a"]}
+
+    def test_use_collection_keeps_configured_store(self):
+        collection = object()
+        cache = LLMResponseCache()
+        cache.use_collection(collection)
+
+        assert isinstance(cache.store, MongoResponseStore) and cache.store.collection is collection
+
+        replay_store = MemoryResponseStore()
+        replay = LLMResponseCache(store=replay_store, mode="replay")
+        replay.use_collection(collection)
+
+        assert replay.store is replay_store
+
+
+class TestEnrichmentCache:
+
+    @pytest.mark.asyncio
+    async def test_identical_enrichment_prompt_reuses_cached_variant(self, monkeypatch):
+        calls = []
+
+        class FakeChat:
+            def __init__(self, **kwargs):
+                pass
+
+            def with_model(self, *args):
+                return self
+
+            async def run(self, message):
+                calls.append(message)
+                return "Énoncé reformulé de manière pédagogique."
+
+        monkeypatch.setenv("EMERGENT_LLM_KEY", "test-key")
+        monkeypatch.setattr(enrichment, "LlmChat", FakeChat)
+        monkeypatch.setattr(enrichment, "UserMessage", lambda content: content)
+        monkeypatch.setattr(
+            enrichment, "llm_response_cache", LLMResponseCache(store=MemoryResponseStore(), pool_size=1)
+        )
+
+        first = await enrichment.enrich_statement("Calculer 3/4 + 1/4.", {"a": 3}, "6e")
+        second = await enrichment.enrich_statement("Calculer 3/4 + 1/4.", {"a": 3}, "6e")
+
+        assert first == second == "Énoncé reformulé de manière pédagogique."
+        assert len(calls) == 1
+
+
+def spec_values(spec):
+    return template_values(
+        parametres=spec.parametres,
+        solution=spec.solution_calculee,
+        resultat=spec.resultat_final,
+        etapes=spec.etapes_calculees
+    )
+
+
+def fake_llm_response(spec, intro):
+    """Réponse rédigée à partir des valeurs de la spec (comme le LLM)"""
+    return json.dumps({
+        "enonce": f"{intro} : {spec.etapes_calculees[0]}",
+        "solution_redigee": " ".join(spec.etapes_calculees)
+    }, ensure_ascii=False)
+
+
+class TestResponseTemplate:
+
+    def test_values_are_replaced_and_reinterpolated(self):
+        first = template_values(parametres={"triangle": "DEF", "longueurs": {"DE": 3, "EF": 4.5}}, resultat="7,5 cm")
+        second = template_values(parametres={"triangle": "MNP", "longueurs": {"MN": 6, "NP": 2.5}}, resultat="8,5 cm")
+
+        template = ResponseTemplate.from_response(
+            '{"enonce": "Dans le triangle DEF, DE = 3 cm et EF = 4,5 cm.", "solution_redigee": "DE + EF = 7,5 cm"}',
+            first
+        )
+
+        assert "3" not in template.text and "DEF" not in template.text
+        assert template.render(second) == (
+            '{"enonce": "Dans le triangle MNP, MN = 6 cm et NP = 2,5 cm.", "solution_redigee": "MN + NP = 8,5 cm"}'
+        )
+
+    def test_coincidental_equality_limits_reuse(self):
+        square = template_values(parametres={"longueur": 8, "largeur": 8})
+        template = ResponseTemplate.from_response('{"enonce": "Rectangle de 8 cm sur 8 cm"}', square)
+
+        assert template.render(template_values(parametres={"longueur": 5, "largeur": 5})) is not None
+        assert template.render(template_values(parametres={"longueur": 5, "largeur": 7})) is None
+
+    def test_unknown_derived_number_is_not_templated(self):
+        values = template_values(parametres={"a": 12, "b": 30})
+
+        assert ResponseTemplate.from_response('{"enonce": "12 + 30 = 42"}', values) is None
+        # Constante d'un chiffre sans lien avec la spec : conservée telle quelle
+        assert ResponseTemplate.from_response('{"enonce": "2 × 12 + 30"}', values) is not None
+        # Chiffre égal à une valeur mais non reconnu comme tel (coordonnées ambiguës)
+        assert ResponseTemplate.from_response('{"enonce": "A(3,5)"}', template_values(parametres={"x": 3, "y": 5})) is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("niveau, chapitre", [
+        ("4e", "Théorème de Pythagore"),
+        ("6e", "Fractions"),
+    ])
+    async def test_hit_rate_on_generated_specs(self, niveau, chapitre):
+        from services.math_generation_service import MathGenerationService
+
+        random.seed(2026)
+        cache = LLMResponseCache(store=MemoryResponseStore(), pool_size=3)
+        intros = ["Exercice", "On considère", "Énoncé"]
+        specs = MathGenerationService().generate_math_exercise_specs(niveau, chapitre, "moyen", 60)
+        llm_calls = 0
+
+        for spec in specs:
+            values = spec_values(spec)
+            key = LLMResponseCache.make_template_key(
+                spec.chapitre, spec.type_exercice.value, spec.niveau, spec.difficulte.value,
+                shape=[*spec.parametres, f"etapes:{len(spec.etapes_calculees)}"]
+            )
+            response = await cache.lookup_template("math_text", key, values)
+            if response is None:
+                await cache.store_template("math_text", key, fake_llm_response(spec, intros[llm_calls % 3]), values)
+                llm_calls += 1
+            else:
+                # La variante servie porte les valeurs de cette spec
+                intro = json.loads(response)["enonce"].split(" : ")[0]
+                assert response == fake_llm_response(spec, intro)
+
+        # Un pool de 3 variantes par forme de spec (+ égalités fortuites)
+        assert llm_calls <= len(specs) // 2
+
+
+class RecordingStore(MemoryResponseStore):
+
+    def __init__(self, entries=None):
+        super().__init__(entries)
+        self.writes = 0
+
+    async def get_variants(self, key):
+        return [ResponseTemplate("réponse validée", {}).dumps()]
+
+    async def add_variant(self, *args, **kwargs):
+        self.writes += 1
+
+
+class TestMathTextCache:
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_is_not_stored_again(self, monkeypatch):
+        import services.math_text_service as math_text
+        from models.math_models import MathTextGeneration
+        from services.math_generation_service import MathGenerationService
+
+        monkeypatch.setenv("EMERGENT_LLM_KEY", "test-key")
+        store = RecordingStore()
+        monkeypatch.setattr(math_text, "llm_response_cache", LLMResponseCache(store=store, pool_size=1))
+        monkeypatch.setattr(math_text.ia_monitoring, "log_generation", lambda **kwargs: None)
+        service = math_text.MathTextService()
+        monkeypatch.setattr(service, "_try_generate_from_gabarit", lambda spec: None)
+        monkeypatch.setattr(service, "_parse_ai_response", lambda response, spec: MathTextGeneration(
+            enonce=response, solution_redigee="Solution."
+        ))
+        monkeypatch.setattr(service, "_validate_ai_response", lambda generation, spec: True)
+        spec = MathGenerationService().generate_math_exercise_specs("6e", "Fractions", "moyen", 1)[0]
+
+        generation = await service._generate_text_for_single_spec(spec)
+
+        assert generation.enonce == "réponse validée"
+        assert store.writes == 0
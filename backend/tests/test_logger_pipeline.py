@@ -0,0 +1,123 @@
+"""
+Tests du pipeline de logs AppLogger (logger.py)
+
+Couvre:
+- Redaction en une passe (email, token, clés, session, Stripe)
+- Écriture déportée dans le thread QueueListener
+- Échantillonnage DEBUG/INFO par module en prod
+- Mode synchrone APP_LOG_ASYNC=0
+"""
+
+import json
+import logging
+
+import pytest
+
+import logger as logger_module
+from logger import AppLogger, DeferredQueueHandler, LogSampler, SensitiveDataFilter
+
+
+@pytest.fixture
+def make_logger(tmp_path, monkeypatch):
+    monkeypatch.setenv("APP_ENV", "prod")
+    monkeypatch.setenv("APP_LOG_FORMAT", "json")
+    created = []
+
+    def factory(**env):
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        app_logger = AppLogger(log_dir=str(tmp_path))
+        created.append(app_logger)
+        return app_logger
+
+    yield factory
+
+    for app_logger in created:
+        app_logger.shutdown()
+    # Rétablit les handlers du logger global partagé ('lemaitremot')
+    logger_module.app_logger.logger = logger_module.app_logger._setup_logger()
+
+
+def read_entries(tmp_path):
+    return [json.loads(line) for line in (tmp_path / "app.log").read_text(encoding="utf-8").splitlines()]
+
+
+class TestRedaction:
+
+    @pytest.mark.parametrize("text, expected", [
+        ("contact teacher@example.com", "contact tea***@example.com"),
+        ("token=abcdefghijkl123", "token=***REDACTED***"),
+        ('"API_KEY": "s3cr3tvalue"', '"API_KEY": "***REDACTED***"'),
+        ("session=" + "a" * 24, "session=***REDACTED***"),
+        ("cle sk_live_" + "x" * 24 + " fin", "cle ***REDACTED*** fin"),
+        ("token=court", "token=court"),
+    ])
+    def test_single_pass_redaction(self, text, expected):
+        assert SensitiveDataFilter.redact_sensitive_data(text) == expected
+
+
+class TestQueuePipeline:
+
+    def test_records_written_by_listener(self, make_logger, tmp_path):
+        app_logger = make_logger()
+
+        assert isinstance(app_logger.logger.handlers[0], DeferredQueueHandler)
+
+        app_logger.info("Export pour prof@example.com", module_name="export", doc_id="doc-1")
+        app_logger.flush()
+
+        entry, = read_entries(tmp_path)
+        assert entry["module"] == "export"
+        assert entry["doc_id"] == "doc-1"
+        assert entry["message"] == "Export pour pro***@example.com"
+
+    def test_exception_formatted_in_listener(self, make_logger, tmp_path):
+        app_logger = make_logger()
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            app_logger.error("Échec", module_name="export", exc_info=True)
+        app_logger.flush()
+
+        entry, = read_entries(tmp_path)
+        assert "ValueError: boom" in entry["exception"]
+
+    def test_sync_mode_uses_direct_handlers(self, make_logger, tmp_path):
+        app_logger = make_logger(APP_LOG_ASYNC="0")
+
+        assert not any(isinstance(handler, DeferredQueueHandler) for handler in app_logger.logger.handlers)
+
+        app_logger.warning("Direct", module_name="quota")
+
+        assert read_entries(tmp_path)[0]["message"] == "Direct"
+
+
+class TestSampling:
+
+    def test_sampler_from_env(self, monkeypatch):
+        monkeypatch.setenv("APP_LOG_SAMPLE_RATE", "0.5")
+        monkeypatch.setenv("APP_LOG_SAMPLING", "schema=0, quota=1")
+
+        sampler = LogSampler.from_env()
+
+        assert sampler.default_rate == 0.5
+        assert sampler.rates == {"schema": 0.0, "quota": 1.0}
+        assert not sampler.keep(logging.INFO, "schema")
+        assert sampler.keep(logging.ERROR, "schema")
+        assert sampler.keep(logging.INFO, "quota")
+
+    def test_info_sampled_out_warning_kept(self, make_logger, tmp_path):
+        app_logger = make_logger(APP_LOG_SAMPLING="schema=0")
+
+        app_logger.info("Schéma rendu", module_name="schema")
+        app_logger.warning("Schéma invalide", module_name="schema")
+        app_logger.info("Export", module_name="export")
+        app_logger.flush()
+
+        assert [entry["message"] for entry in read_entries(tmp_path)] == ["Schéma invalide", "Export"]
+
+    def test_dev_is_never_sampled(self, make_logger):
+        app_logger = make_logger(APP_ENV="dev", APP_LOG_SAMPLE_RATE="0")
+
+        assert app_logger.sampler.keep(logging.DEBUG, "schema")
@@ -0,0 +1,60 @@
+"""
+Tests des registres de dispatch de MathGenerationService (services/math_generation_service.py)
+
+Couvre:
+- Registres cohérents entre eux et avec curriculum_6e.json
+- Registres en lecture seule, copie renvoyée par _map_chapter_to_types
+- Priorité du générateur dédié au chapitre sur le générateur par type
+"""
+
+from types import MappingProxyType
+
+import pytest
+
+from models.math_models import MathExerciseType
+from services import math_generation_service
+from services.math_generation_service import (
+    CHAPTER_EXERCISE_TYPES,
+    TYPE_GENERATORS,
+    MathGenerationService,
+    validate_generation_registries
+)
+
+
+class TestDispatchRegistries:
+
+    def test_registries_match_curriculum(self):
+        assert validate_generation_registries() == []
+
+    def test_registries_are_read_only(self):
+        with pytest.raises(TypeError):
+            CHAPTER_EXERCISE_TYPES["Nouveau"] = (MathExerciseType.CALCUL_DECIMAUX,)
+        with pytest.raises(TypeError):
+            TYPE_GENERATORS[MathExerciseType.CALCUL_DECIMAUX] = None
+
+        types = MathGenerationService()._map_chapter_to_types("Fractions", "6e")
+        types.append(MathExerciseType.PUISSANCES)
+        assert MathExerciseType.PUISSANCES not in CHAPTER_EXERCISE_TYPES["Fractions"]
+
+    def test_unknown_chapter_raises(self):
+        with pytest.raises(ValueError, match="CHAPITRE NON MAPPÉ"):
+            MathGenerationService()._map_chapter_to_types("Chapitre inexistant", "6e")
+
+    def test_chapter_generator_takes_priority(self, monkeypatch):
+        calls = []
+
+        def fake_generator(name):
+            return lambda self, niveau, chapitre, difficulte: calls.append((name, chapitre))
+
+        monkeypatch.setattr(math_generation_service, "CHAPTER_GENERATORS", MappingProxyType({
+            "Division euclidienne": fake_generator("chapitre")
+        }))
+        monkeypatch.setattr(math_generation_service, "TYPE_GENERATORS", MappingProxyType({
+            MathExerciseType.CALCUL_DECIMAUX: fake_generator("type")
+        }))
+        service = MathGenerationService()
+
+        service._generate_spec_by_type("6e", "Division euclidienne", MathExerciseType.CALCUL_DECIMAUX, "facile")
+        service._generate_spec_by_type("6e", "Nombres décimaux", MathExerciseType.CALCUL_DECIMAUX, "facile")
+
+        assert calls == [("chapitre", "Division euclidienne"), ("type", "Nombres décimaux")]
@@ -0,0 +1,119 @@
+"""
+Tests de la rédaction parallèle des specs (services/math_text_service.py)
+
+Couvre:
+- Latence ~ max() et non somme des appels, ordre conservé
+- Plafond de concurrence
+- Fallback indépendant par spec
+- Limiteur de débit global (token bucket), désactivé par un débit nul
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from models.math_models import MathTextGeneration
+from services.math_generation_service import MathGenerationService
+from services.math_text_service import MathTextService, TokenBucket
+
+
+@pytest.fixture
+def specs():
+    return MathGenerationService().generate_math_exercise_specs("6e", "Fractions", "moyen", 6)
+
+
+def make_service(monkeypatch, delay=0.1, fail_indexes=(), max_concurrency=10):
+    monkeypatch.setenv("EMERGENT_LLM_KEY", "test-key")
+    service = MathTextService(rate_limiter=TokenBucket(rate=1000, capacity=1000), max_concurrency=max_concurrency)
+    service.in_flight = 0
+    service.max_in_flight = 0
+
+    async def fake_single(spec):
+        index = service.spec_index[id(spec)]
+        service.in_flight += 1
+        service.max_in_flight = max(service.max_in_flight, service.in_flight)
+        try:
+            await asyncio.sleep(delay)
+            if index in fail_indexes:
+                raise RuntimeError("LLM timeout")
+            return MathTextGeneration(enonce=f"IA {index}")
+        finally:
+            service.in_flight -= 1
+
+    monkeypatch.setattr(service, "_generate_text_for_single_spec", fake_single)
+    monkeypatch.setattr(service, "_generate_fallback_text", lambda spec: MathTextGeneration(enonce="fallback"))
+    return service
+
+
+class TestMathTextParallel:
+
+    @pytest.mark.asyncio
+    async def test_latency_is_max_not_sum_and_order_preserved(self, monkeypatch, specs):
+        service = make_service(monkeypatch, delay=0.1)
+        service.spec_index = {id(spec): i for i, spec in enumerate(specs)}
+
+        start = time.perf_counter()
+        exercises = await service.generate_text_for_specs(specs)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.4
+        assert [exercise.texte.enonce for exercise in exercises] == [f"IA {i}" for i in range(len(specs))]
+        assert [exercise.spec for exercise in exercises] == specs
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self, monkeypatch, specs):
+        service = make_service(monkeypatch, delay=0.05, max_concurrency=2)
+        service.spec_index = {id(spec): i for i, spec in enumerate(specs)}
+
+        await service.generate_text_for_specs(specs)
+
+        assert service.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_fall_back_per_spec(self, monkeypatch, specs):
+        service = make_service(monkeypatch, delay=0.01, fail_indexes={1, 4})
+        service.spec_index = {id(spec): i for i, spec in enumerate(specs)}
+
+        exercises = await service.generate_text_for_specs(specs)
+
+        enonces = [exercise.texte.enonce for exercise in exercises]
+        assert enonces == ["IA 0", "fallback", "IA 2", "IA 3", "fallback", "IA 5"]
+
+
+class TestTokenBucket:
+
+    @pytest.mark.asyncio
+    async def test_burst_then_steady_rate(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+        elapsed = time.perf_counter() - start
+
+        # 2 jetons immédiats, puis 4 jetons à 20/s
+        assert 0.18 <= elapsed < 0.5
+
+    @pytest.mark.asyncio
+    async def test_burst_within_capacity_is_immediate(self):
+        bucket = TokenBucket(rate=1, capacity=5)
+
+        start = time.perf_counter()
+        for _ in range(5):
+            await bucket.acquire()
+
+        assert time.perf_counter() - start < 0.05
+
+    @pytest.mark.asyncio
+    async def test_zero_rate_disables_limiter(self):
+        bucket = TokenBucket(rate=0, capacity=1)
+
+        start = time.perf_counter()
+        for _ in range(10):
+            await bucket.acquire()
+
+        assert time.perf_counter() - start < 0.05
+
+    def test_capacity_below_one_is_rejected(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=2, capacity=0)
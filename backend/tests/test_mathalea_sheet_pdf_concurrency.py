@@ -0,0 +1,110 @@
+"""
+Tests de la génération parallèle des 3 PDFs d'une fiche
+
+Couvre:
+- build_sheet_pdfs: 3 rendus en parallèle (latence ≈ le plus lent), rendus
+  restants annulés au premier échec
+- start_sheet_pdfs_zip: archive ZIP valide contenant les 3 PDFs, erreurs du
+  pool levées avant le début du flux
+- Content-Disposition de l'archive sûr en latin-1 (RFC 5987)
+"""
+
+import asyncio
+import io
+import time
+import zipfile
+
+import pytest
+
+from engine.pdf_engine import mathalea_sheet_pdf_builder as builder
+from engine.pdf_engine.render_pool import RenderPoolBusyError
+
+
+PREVIEW = {
+    "sheet_id": "sheet-test",
+    "titre": "Fiche test",
+    "niveau": "6e",
+    "items": []
+}
+
+
+@pytest.fixture
+def fake_render(monkeypatch):
+    """Remplace le pool de rendu par un rendu lent simulé (0.2s par PDF)"""
+    async def _render(html, base_url=None):
+        await asyncio.sleep(0.2)
+        return b"%PDF-" + str(len(html)).encode()
+
+    monkeypatch.setattr(builder, "render_pdf", _render)
+
+
+class TestSheetPdfConcurrency:
+
+    @pytest.mark.asyncio
+    async def test_build_sheet_pdfs_runs_in_parallel(self, fake_render):
+        start = time.perf_counter()
+        pdfs = await builder.build_sheet_pdfs(PREVIEW)
+        elapsed = time.perf_counter() - start
+
+        assert set(pdfs) == {"subject_pdf", "student_pdf", "correction_pdf"}
+        assert all(pdf.startswith(b"%PDF-") for pdf in pdfs.values())
+        # Séquentiel: ~0.6s, parallèle: ~0.2s
+        assert elapsed < 0.45
+
+    @pytest.mark.asyncio
+    async def test_build_sheet_pdfs_cancels_siblings_on_failure(self, monkeypatch):
+        cancelled = []
+
+        async def _render(html, base_url=None):
+            if "Corrigé" in html:
+                raise RenderPoolBusyError(retry_after=3)
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(html)
+                raise
+            return b"%PDF-"
+
+        monkeypatch.setattr(builder, "render_pdf", _render)
+
+        with pytest.raises(RenderPoolBusyError):
+            await builder.build_sheet_pdfs(PREVIEW)
+        await asyncio.sleep(0)
+        assert len(cancelled) == 2
+
+    def test_all_exports_exist(self):
+        assert all(hasattr(builder, name) for name in builder.__all__)
+
+    @pytest.mark.asyncio
+    async def test_stream_zip_contains_three_pdfs(self, fake_render):
+        stream = await builder.start_sheet_pdfs_zip(PREVIEW, "LeMaitreMot_Fiche")
+        chunks = [chunk async for chunk in stream]
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == [
+            "LeMaitreMot_Fiche_corrige.pdf",
+            "LeMaitreMot_Fiche_eleve.pdf",
+            "LeMaitreMot_Fiche_sujet.pdf",
+        ]
+        for name in archive.namelist():
+            assert archive.read(name).startswith(b"%PDF-")
+
+    @pytest.mark.asyncio
+    async def test_stream_zip_raises_before_streaming_when_pool_busy(self, monkeypatch):
+        async def _busy(html, base_url=None):
+            raise RenderPoolBusyError(retry_after=3)
+
+        monkeypatch.setattr(builder, "render_pdf", _busy)
+
+        with pytest.raises(RenderPoolBusyError):
+            await builder.start_sheet_pdfs_zip(PREVIEW, "LeMaitreMot_Fiche")
+
+    def test_zip_content_disposition_is_latin1_safe(self):
+        from routes.mathalea_routes import _attachment_disposition
+
+        header = _attachment_disposition("LeMaitreMot_Fractions_Œuvre_→_1.zip")
+
+        header.encode("latin-1")
+        assert 'filename="LeMaitreMot_Fractions_uvre__1.zip"' in header
+        assert "filename*=UTF-8''LeMaitreMot_Fractions_%C5%92uvre_%E2%86%92_1.zip" in header
@@ -0,0 +1,118 @@
+"""
+Tests du cache d'artefacts PDF (engine/pdf_engine/artifact_cache.py)
+
+Couvre:
+- Clé de contenu stable et sensible au contenu
+- Hit / miss et métriques (contenu lu au hit, fichier disparu = miss)
+- Invalidation par document (vary_exercise) et par utilisateur (template)
+- Éviction LRU bornée en taille
+"""
+
+import os
+import time
+
+from engine.pdf_engine.artifact_cache import PdfArtifactCache
+
+
+EXERCISES = [{"enonce": "Calculer $\\frac{3}{4} + \\frac{1}{4}$", "solution": {"resultat": "1"}}]
+
+
+def _key(**overrides):
+    parts = {
+        "document": {"id": "doc-1", "exercises": EXERCISES},
+        "export_type": "sujet",
+        "template": "<html>{{ document }}</html>",
+        "template_config": None,
+        "date_creation": "16/10/2026",
+    }
+    parts.update(overrides)
+    return PdfArtifactCache.make_key(**parts)
+
+
+class TestPdfArtifactCache:
+
+    def test_key_is_stable_and_content_sensitive(self):
+        assert _key() == _key()
+        assert _key() != _key(export_type="corrige")
+        assert _key() != _key(template_config={"school_name": "Collège"})
+        assert _key() != _key(document={"id": "doc-1", "exercises": EXERCISES + EXERCISES})
+        # L'ordre des clés ne change pas le hash
+        assert PdfArtifactCache.make_key(a=1, b=2) == PdfArtifactCache.make_key(b=2, a=1)
+
+    def test_miss_then_hit(self, tmp_path):
+        cache = PdfArtifactCache(str(tmp_path), max_bytes=10_000)
+        key = _key()
+
+        assert cache.get("doc-1", key) is None
+        path = cache.put("doc-1", key, b"%PDF-guest")
+        assert path.read_bytes() == b"%PDF-guest"
+        assert cache.get("doc-1", key) == b"%PDF-guest"
+
+        metrics = cache.get_metrics()
+        assert metrics["hits"] == 1
+        assert metrics["misses"] == 1
+        assert metrics["stores"] == 1
+        assert metrics["hit_rate_percent"] == 50.0
+
+    def test_hit_is_read_before_eviction(self, tmp_path):
+        cache = PdfArtifactCache(str(tmp_path), max_bytes=10_000)
+        key = _key()
+        path = cache.put("doc-1", key, b"%PDF-guest")
+
+        pdf_bytes = cache.get("doc-1", key)
+        # Éviction / invalidation par un autre worker après le hit
+        path.unlink()
+
+        assert pdf_bytes == b"%PDF-guest"
+        assert cache.get("doc-1", key) is None
+
+    def test_owner_isolation(self, tmp_path):
+        cache = PdfArtifactCache(str(tmp_path), max_bytes=10_000)
+        key = _key()
+        cache.put("doc-1", key, b"%PDF-pro", user_email="prof@example.com")
+
+        assert cache.get("doc-1", key) is None
+        assert cache.get("doc-1", key, user_email="autre@example.com") is None
+        assert cache.get("doc-1", key, user_email="Prof@Example.com") is not None
+
+    def test_invalidate_document(self, tmp_path):
+        cache = PdfArtifactCache(str(tmp_path), max_bytes=10_000)
+        cache.put("doc-1", _key(), b"%PDF-1")
+        cache.put("doc-1", _key(export_type="corrige"), b"%PDF-2", user_email="prof@example.com")
+        cache.put("doc-2", _key(), b"%PDF-3")
+
+        cache.invalidate_document("doc-1")
+
+        assert cache.get("doc-1", _key()) is None
+        assert cache.get("doc-1", _key(export_type="corrige"), user_email="prof@example.com") is None
+        assert cache.get("doc-2", _key()) is not None
+
+    def test_invalidate_user(self, tmp_path):
+        cache = PdfArtifactCache(str(tmp_path), max_bytes=10_000)
+        cache.put("doc-1", _key(), b"%PDF-pro", user_email="prof@example.com")
+        cache.put("doc-2", _key(), b"%PDF-pro", user_email="prof@example.com")
+        cache.put("doc-1", _key(), b"%PDF-guest")
+
+        cache.invalidate_user("prof@example.com")
+
+        assert cache.get("doc-1", _key(), user_email="prof@example.com") is None
+        assert cache.get("doc-2", _key(), user_email="prof@example.com") is None
+        assert cache.get("doc-1", _key()) is not None
+
+    def test_lru_eviction_keeps_recently_used(self, tmp_path):
+        cache = PdfArtifactCache(str(tmp_path), max_bytes=250)
+        keys = [_key(export_type=f"type-{i}") for i in range(3)]
+        now = time.time()
+        for i, key in enumerate(keys[:2]):
+            path = cache.put("doc-1", key, b"x" * 100)
+            os.utime(path, (now - 100 + i, now - 100 + i))
+
+        # Le premier artefact est relu : il devient le plus récent
+        assert cache.get("doc-1", keys[0]) is not None
+        cache.put("doc-1", keys[2], b"x" * 100)
+
+        assert cache.get("doc-1", keys[0]) is not None
+        assert cache.get("doc-1", keys[1]) is None
+        assert cache.get("doc-1", keys[2]) is not None
+        assert cache.get_metrics()["evictions"] == 1
+        assert cache.get_metrics()["size_bytes"] <= 250
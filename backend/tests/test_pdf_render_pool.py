@@ -0,0 +1,135 @@
+"""
+Tests du pool de rendu PDF (engine/pdf_engine/render_pool.py)
+
+Couvre:
+- Rendu via l'API asynchrone render_pdf
+- Backpressure: file pleine → RenderPoolBusyError (503 + Retry-After)
+- Timeout par job et libération du slot à la fin réelle du job
+- La boucle d'événements reste disponible pendant un rendu
+- Workers process (spawn) réels
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from engine.pdf_engine.render_pool import (
+    PdfRenderPool,
+    RenderPoolBusyError,
+    RenderTimeoutError,
+)
+
+
+def _fake_render(html, base_url=None):
+    """Rendu factice picklable (WeasyPrint n'est pas requis pour ces tests)"""
+    return f"%PDF {html} {base_url}".encode()
+
+
+def _slow_render(html, base_url=None):
+    time.sleep(float(html))
+    return b"%PDF slow"
+
+
+def _thread_pool_factory(max_workers):
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def _make_pool(render_func=_fake_render, max_workers=1, max_queue=0, timeout=5.0):
+    return PdfRenderPool(
+        max_workers=max_workers,
+        max_queue=max_queue,
+        timeout=timeout,
+        render_func=render_func,
+        executor_factory=_thread_pool_factory,
+    )
+
+
+class TestPdfRenderPool:
+
+    @pytest.mark.asyncio
+    async def test_render_returns_bytes(self):
+        pool = _make_pool()
+        try:
+            pdf = await pool.render_pdf("<p>x</p>", base_url="file:///tmp/")
+            assert pdf == b"%PDF <p>x</p> file:///tmp/"
+            assert pool.pending == 0
+            assert pool.get_metrics()["completed"] == 1
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queue_full_raises_busy_with_retry_after(self):
+        pool = _make_pool(render_func=_slow_render, max_workers=1, max_queue=1)
+        try:
+            running = [asyncio.ensure_future(pool.render_pdf("0.3")) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with pytest.raises(RenderPoolBusyError) as exc_info:
+                await pool.render_pdf("0")
+            assert exc_info.value.retry_after >= 1
+            assert await asyncio.gather(*running) == [b"%PDF slow", b"%PDF slow"]
+            assert pool.get_metrics()["rejected"] == 1
+            assert pool.pending == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timeout_keeps_slot_until_job_finishes(self):
+        pool = _make_pool(render_func=_slow_render, timeout=0.1)
+        try:
+            with pytest.raises(RenderTimeoutError):
+                await pool.render_pdf("0.4")
+            # Le worker rend toujours : le slot n'est pas encore libéré
+            assert pool.pending == 1
+            with pytest.raises(RenderPoolBusyError):
+                await pool.render_pdf("0")
+            await asyncio.sleep(0.5)
+            assert pool.pending == 0
+            assert await pool.render_pdf("0") == b"%PDF slow"
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_not_blocked_during_render(self):
+        pool = _make_pool(render_func=_slow_render)
+        try:
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.ensure_future(ticker())
+            await pool.render_pdf("0.3")
+            task.cancel()
+            assert ticks >= 10
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_render_errors_propagate(self):
+        def failing_render(html, base_url=None):
+            raise ValueError("bad html")
+
+        pool = _make_pool(render_func=failing_render)
+        try:
+            with pytest.raises(ValueError):
+                await pool.render_pdf("<p>")
+            assert pool.get_metrics()["failures"] == 1
+            assert pool.pending == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_process_workers(self):
+        """Pool réel de processus (spawn), rendu hors du process principal"""
+        pool = PdfRenderPool(max_workers=2, max_queue=2, timeout=60, render_func=_fake_render)
+        try:
+            await pool.warm_up()
+            results = await asyncio.gather(*(pool.render_pdf(str(i)) for i in range(4)))
+            assert results == [f"%PDF {i} None".encode() for i in range(4)]
+        finally:
+            pool.shutdown()
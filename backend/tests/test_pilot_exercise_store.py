@@ -0,0 +1,173 @@
+"""
+Tests du store en mémoire des chapitres pilotes (services/exercise_persistence_service.py)
+
+Couvre:
+- Snapshot chargé depuis MongoDB, publié avec la version du chapitre
+- Écritures admin : version incrémentée, snapshot copié et modifié sans relire
+  le chapitre, aucun fichier data/ réécrit
+- Deuxième worker : rechargement par poll du compteur de version uniquement
+- Une version ancienne ne remplace jamais une version publiée
+- Export explicite vers un fichier Python
+- Statistiques calculées sur le snapshot servi
+"""
+
+import asyncio
+import importlib.util
+
+import pytest
+
+from data.gm07_exercises import GM07_EXERCISES
+from data.tests_dyn_exercises import TESTS_DYN_EXERCISES, get_tests_dyn_stats
+from fake_motor import FakeDb
+from services import exercise_persistence_service
+from services.exercise_persistence_service import (
+    EXERCISE_VERSIONS_COLLECTION,
+    EXERCISES_COLLECTION,
+    ExerciseCreateRequest,
+    ExercisePersistenceService,
+    ExerciseUpdateRequest,
+    PilotExerciseStore
+)
+from services.exercise_pool_index import ExercisePoolRegistry
+
+
+@pytest.fixture
+def db():
+    return FakeDb()
+
+
+def make_worker(db):
+    """Un worker : son propre registre de pools, la base partagée"""
+    store = PilotExerciseStore(pools=ExercisePoolRegistry())
+    return store, ExercisePersistenceService(db, store=store)
+
+
+def new_exercise(**fields):
+    return ExerciseCreateRequest(**{
+        "family": "CONVERSION",
+        "difficulty": "facile",
+        "offer": "free",
+        "enonce_html": "<p>Convertir 2 h en minutes.</p>",
+        "solution_html": "<p>120 min</p>",
+        **fields
+    })
+
+
+class TestPilotExerciseStore:
+
+    @pytest.mark.asyncio
+    async def test_load_all_publishes_mongo_snapshots(self, db):
+        store, service = make_worker(db)
+
+        await store.load_all(service)
+
+        pool = store.pools.current("6E_GM07")
+        assert pool.version == 0
+        assert [ex["id"] for ex in pool.exercises] == [ex["id"] for ex in GM07_EXERCISES]
+        assert store.version("6E_TESTS_DYN") == 0
+
+    @pytest.mark.asyncio
+    async def test_writes_update_snapshot_without_rereading_chapter(self, db, monkeypatch):
+        store, service = make_worker(db)
+        await store.load_all(service)
+        exercises = db[EXERCISES_COLLECTION]
+        finds_after_load = exercises.finds
+        monkeypatch.setattr(service, "export_to_python_file", pytest.fail)
+
+        created = await service.create_exercise("6e_GM07", new_exercise())
+        await service.update_exercise("6e_GM07", 1, ExerciseUpdateRequest(enonce_html="<p>Nouvel énoncé</p>"))
+        await service.delete_exercise("6e_GM07", 2)
+
+        pool = store.pools.current("6E_GM07")
+        ids = [ex["id"] for ex in pool.exercises]
+        assert pool.version == 3
+        assert created["id"] in ids and 2 not in ids
+        assert pool.exercises[0]["enonce_html"] == "<p>Nouvel énoncé</p>"
+        assert created in pool.select("free", "facile", "CONVERSION")
+        assert exercises.finds == finds_after_load
+
+    @pytest.mark.asyncio
+    async def test_other_worker_reloads_on_version_change(self, db):
+        store_a, service_a = make_worker(db)
+        store_b, service_b = make_worker(db)
+        await store_a.load_all(service_a)
+        await store_b.load_all(service_b)
+
+        assert await store_b.poll(db) == []
+
+        await service_a.update_exercise("6e_GM07", 3, ExerciseUpdateRequest(offer="pro"))
+
+        assert await store_b.poll(db) == ["6E_GM07"]
+        pool = store_b.pools.current("6E_GM07")
+        assert pool.version == 1
+        assert all(ex["id"] != 3 for ex in pool.select("free"))
+        assert await store_b.poll(db) == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_write_forces_full_reload(self, db):
+        store_a, service_a = make_worker(db)
+        store_b, service_b = make_worker(db)
+        await store_a.load_all(service_a)
+        await store_b.load_all(service_b)
+
+        await service_a.delete_exercise("6e_GM08", 1)
+        await service_b.delete_exercise("6e_GM08", 2)
+
+        pool = store_b.pools.current("6E_GM08")
+        assert pool.version == 2
+        assert {1, 2}.isdisjoint(ex["id"] for ex in pool.exercises)
+
+    @pytest.mark.asyncio
+    async def test_older_version_never_replaces_newer(self, db):
+        store, service = make_worker(db)
+        await store.load_all(service)
+        await service.delete_exercise("6e_GM07", 1)
+        published = store.pools.current("6E_GM07")
+
+        assert store.pools.rebuild("6E_GM07", GM07_EXERCISES, version=0) is published
+        assert store.pools.rebuild("6E_GM07") is published
+
+    @pytest.mark.asyncio
+    async def test_export_to_python_file(self, db, tmp_path, monkeypatch):
+        store, service = make_worker(db)
+        await store.load_all(service)
+        await service.create_exercise("6e_GM07", new_exercise())
+        monkeypatch.setattr(exercise_persistence_service, "DATA_DIR", str(tmp_path))
+
+        filepath = await service.export_to_python_file("6e_GM07")
+
+        spec = importlib.util.spec_from_file_location("exported_gm07", filepath)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        assert len(module.GM07_EXERCISES) == len(GM07_EXERCISES) + 1
+        assert await service.export_to_python_file("6e_TESTS_DYN") is None
+        assert db[EXERCISE_VERSIONS_COLLECTION].docs == [{"_id": "6E_GM07", "version": 1}]
+
+    @pytest.mark.asyncio
+    async def test_polling_task_picks_up_writes(self, db):
+        store_a, service_a = make_worker(db)
+        store_b, service_b = make_worker(db)
+        await store_a.load_all(service_a)
+        await store_b.load_all(service_b)
+
+        store_b.start_polling(db, interval=0.01)
+        try:
+            await service_a.delete_exercise("6e_GM07", 5)
+            for _ in range(100):
+                if store_b.version("6E_GM07") == 1:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await store_b.stop_polling()
+
+        assert store_b.version("6E_GM07") == 1
+
+    @pytest.mark.asyncio
+    async def test_tests_dyn_stats_count_served_snapshot(self, db, monkeypatch):
+        store, service = make_worker(db)
+        monkeypatch.setattr("data.tests_dyn_exercises.exercise_pools", store.pools)
+        await store.load_all(service)
+
+        await service.delete_exercise("6e_TESTS_DYN", TESTS_DYN_EXERCISES[0]["id"])
+
+        assert get_tests_dyn_stats()["total"] == len(TESTS_DYN_EXERCISES) - 1
@@ -0,0 +1,140 @@
+"""
+Tests du preview de fiche chargé en lot (services/sheet_preview_builder.py)
+
+Couvre:
+- Nombre de requêtes DB constant (items, ExerciseTypes, chapitres)
+- Ordre des items et structure du preview conservés
+- ExerciseType manquant ou item invalide : erreur ou item ignoré (skip_errors)
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+from fake_motor import FakeCollection
+from services.sheet_preview_builder import ExerciseTypeNotFoundError, SheetPreviewBuilder
+
+
+def exercise_type(index, chapter_code=None):
+    return {
+        "id": f"type-{index}",
+        "code_ref": f"TEST_{index}",
+        "titre": f"Exercice {index}",
+        "chapter_code": chapter_code,
+        "niveau": "6e",
+        "domaine": "Nombres et calculs",
+        "generator_kind": "template"
+    }
+
+
+class FakeTemplateService:
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate_exercise_for_type(self, exercise_type, nb_questions, seed, chapter_titles=None, **kwargs):
+        self.calls.append((exercise_type.id, chapter_titles.get(exercise_type.chapter_code)))
+        await asyncio.sleep(0.01)
+        return {"exercise_type_id": exercise_type.id, "seed": seed, "questions": []}
+
+
+def make_builder(nb_items, exercise_types):
+    items = [
+        {
+            "id": f"item-{i}",
+            "sheet_id": "sheet-1",
+            "exercise_type_id": f"type-{i % 3}",
+            "config": {"nb_questions": 2, "seed": i, "difficulty": "facile"},
+            "order": nb_items - i
+        }
+        for i in range(nb_items)
+    ]
+    collections = (
+        FakeCollection(items),
+        FakeCollection(exercise_types),
+        FakeCollection([{"code": "6e_N04", "titre": "Fractions"}])
+    )
+    return SheetPreviewBuilder(*collections, FakeTemplateService()), collections
+
+
+SHEET = {"id": "sheet-1", "titre": "Fiche", "niveau": "6e", "description": None}
+
+
+class TestSheetPreviewBuilder:
+
+    @pytest.mark.asyncio
+    async def test_thirty_items_cost_three_queries(self):
+        types = [exercise_type(0, "6e_N04"), exercise_type(1), exercise_type(2, "6e_N04")]
+        builder, collections = make_builder(30, types)
+
+        preview = await builder.build_preview(SHEET)
+
+        assert [collection.finds for collection in collections] == [1, 1, 1]
+        assert len(preview["items"]) == 30
+        # Trié par order (décroissant par rapport à l'index ici)
+        assert preview["items"][0]["item_id"] == "item-29"
+        first = preview["items"][0]
+        assert set(first) == {"item_id", "exercise_type_id", "exercise_type_summary", "config", "generated"}
+        assert first["exercise_type_summary"]["code_ref"] == "TEST_2"
+        assert ("type-0", "Fractions") in builder.template_service.calls
+
+    @pytest.mark.asyncio
+    async def test_items_are_generated_concurrently(self):
+        builder, _ = make_builder(20, [exercise_type(i) for i in range(3)])
+
+        start = asyncio.get_running_loop().time()
+        await builder.build_preview(SHEET)
+
+        # Séquentiel : 20 × 10 ms ; concurrence 8 : 3 vagues
+        assert asyncio.get_running_loop().time() - start < 0.15
+
+    @pytest.mark.asyncio
+    async def test_missing_exercise_type_raises(self):
+        builder, _ = make_builder(3, [exercise_type(0), exercise_type(1)])
+
+        with pytest.raises(ExerciseTypeNotFoundError) as error:
+            await builder.build_preview(SHEET)
+        assert error.value.exercise_type_id == "type-2"
+
+    @pytest.mark.asyncio
+    async def test_missing_exercise_type_skipped(self):
+        builder, _ = make_builder(3, [exercise_type(0), exercise_type(1)])
+
+        preview = await builder.build_preview(SHEET, skip_errors=True)
+
+        assert [item["item_id"] for item in preview["items"]] == ["item-1", "item-0"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_item_skipped(self):
+        builder, (items, _, _) = make_builder(3, [exercise_type(i) for i in range(3)])
+        del items.docs[1]["config"]
+
+        with pytest.raises(ValueError):
+            await builder.build_preview(SHEET)
+
+        preview = await builder.build_preview(SHEET, skip_errors=True)
+
+        assert [item["item_id"] for item in preview["items"]] == ["item-2", "item-0"]
+
+
+class TestGenerateExerciseForType:
+
+    @pytest.mark.asyncio
+    async def test_preloaded_chapter_title_skips_db(self, monkeypatch):
+        monkeypatch.setenv("MONGO_URL", "mongodb://localhost:27017")
+        service_module = importlib.import_module("services.exercise_template_service")
+        from models.mathalea_models import ExerciseType
+
+        service = service_module.ExerciseTemplateService()
+        monkeypatch.setattr(service, "db", None)  # Toute requête échouerait
+
+        result = await service.generate_exercise_for_type(
+            exercise_type=ExerciseType(**exercise_type(0, "6e_N04")),
+            nb_questions=2,
+            seed=1,
+            chapter_titles={"6e_N04": "Fractions"}
+        )
+
+        assert result["nb_questions"] == 2
+        assert len(result["questions"]) == 2
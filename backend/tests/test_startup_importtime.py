@@ -0,0 +1,82 @@
+"""
+Tests du temps de démarrage d'un worker (import de server.py)
+
+Couvre:
+- matplotlib, emergentintegrations / litellm et les SDK Google ne sont plus
+  importés au démarrage (chargés à la demande via subsystems.py)
+- Aucune vérification des dépendances système (subprocess) à l'import
+- Budget de `python -X importtime -c "import server"` (STARTUP_IMPORT_BUDGET_MS, défaut 2500 ms)
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", 2500))
+LAZY_MODULES = (
+    "matplotlib", "emergentintegrations", "litellm", "google.genai", "google.generativeai", "google.ai",
+    "latex_to_svg", "geometry_renderer", "render_schema"
+)
+
+PROBE = """
+import subprocess, sys
+subprocess.run = subprocess.Popen = None  # Aucun sous-processus à l'import
+import server
+print(",".join(sorted(sys.modules)))
+"""
+
+
+def parse_importtime(stderr: str) -> dict:
+    """{module: temps cumulé en µs} depuis la sortie de -X importtime"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+@pytest.fixture(scope="module")
+def server_import():
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "startup_importtime")
+
+    # Deux imports : le premier compile les .pyc, le second mesure un démarrage de worker
+    for _ in range(2):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+        )
+    if result.returncode != 0:
+        if "ModuleNotFoundError" in result.stderr:
+            pytest.skip(f"Dépendance absente de l'environnement : {result.stderr.strip().splitlines()[-1]}")
+        pytest.fail(f"Import de server.py en échec :\n{result.stderr[-2000:]}")
+
+    modules = set(result.stdout.strip().splitlines()[-1].split(","))
+    return modules, parse_importtime(result.stderr)
+
+
+class TestStartupImportTime:
+
+    def test_heavy_subsystems_are_lazy(self, server_import):
+        modules, _ = server_import
+
+        eager = sorted(name for name in modules if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES))
+        assert eager == []
+
+    def test_import_budget(self, server_import):
+        _, cumulative = server_import
+
+        server_ms = cumulative["server"] / 1000
+        slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[1:6]
+        assert server_ms < IMPORT_BUDGET_MS, (
+            f"import server : {server_ms:.0f} ms > budget {IMPORT_BUDGET_MS:.0f} ms "
+            f"(plus lents : {', '.join(f'{name} {us / 1000:.0f} ms' for name, us in slowest)})"
+        )